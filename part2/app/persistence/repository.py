@@ -27,11 +27,43 @@ class Repository(ABC):
 
 
 class InMemoryRepository(Repository):
-    def __init__(self):
+    def __init__(self, indexed_fields=()):
         self._storage = {}
+        # Hash indexes (value -> {id: obj}) for fields looked up by get_by_attribute
+        self._indexes = {field: {} for field in indexed_fields}
+        self._index_keys = {}
+
+    def _index(self, obj):
+        if not self._indexes:
+            return
+        keys = {}
+        for field, index in self._indexes.items():
+            value = getattr(obj, field, None)
+            index.setdefault(value, {})[obj.id] = obj
+            keys[field] = value
+        self._index_keys[obj.id] = keys
+
+    def _unindex(self, obj_id):
+        keys = self._index_keys.pop(obj_id, None)
+        if not keys:
+            return
+        for field, value in keys.items():
+            index = self._indexes[field]
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.pop(obj_id, None)
+                if not bucket:
+                    del index[value]
+
+    def reindex(self, obj):
+        self._unindex(obj.id)
+        if obj.id in self._storage:
+            self._index(obj)
 
     def add(self, obj):
+        self._unindex(obj.id)
         self._storage[obj.id] = obj
+        self._index(obj)
 
     def get(self, obj_id):
         return self._storage.get(obj_id)
@@ -42,11 +74,19 @@ class InMemoryRepository(Repository):
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
-            obj.update(data)
+            try:
+                obj.update(data)
+            finally:
+                self.reindex(obj)
 
     def delete(self, obj_id):
         if obj_id in self._storage:
+            self._unindex(obj_id)
             del self._storage[obj_id]
 
     def get_by_attribute(self, attr_name, attr_value):
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            bucket = index.get(attr_value)
+            return next(iter(bucket.values())) if bucket else None
         return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
@@ -3,10 +3,10 @@ from app.models.user import User
 
 class HBnBFacade:
     def __init__(self):
-        self.user_repo = InMemoryRepository()
+        self.user_repo = InMemoryRepository(indexed_fields=('email',))
         self.place_repo = InMemoryRepository()
         self.review_repo = InMemoryRepository()
-        self.amenity_repo = InMemoryRepository()
+        self.amenity_repo = InMemoryRepository(indexed_fields=('name',))
 
     # User methods
     def create_user(self, user_data):
@@ -40,8 +40,8 @@ class HBnBFacade:
             if existing and existing.id != user_id:
                 raise ValueError("Email already registered")
         
-        # Update the user
-        user.update(user_data)
+        # Update the user (through the repository so the email index stays current)
+        self.user_repo.update(user_id, user_data)
         return user
 
     # Amenity methods
@@ -67,8 +67,8 @@ class HBnBFacade:
         if not amenity:
             return None
         
-        # Update the amenity
-        amenity.update(amenity_data)
+        # Update the amenity (through the repository so the name index stays current)
+        self.amenity_repo.update(amenity_id, amenity_data)
         return amenity
 
     # Place methods
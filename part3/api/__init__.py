@@ -41,3 +41,9 @@ try:
     api.add_namespace(reviews_ns, path='/reviews')
 except ImportError:
     pass
+
+try:
+    from .v1.suggest import api as suggest_ns
+    api.add_namespace(suggest_ns, path='/suggest')
+except ImportError:
+    pass
@@ -2,6 +2,7 @@
 from flask import request
 from flask_restx import Namespace, Resource, fields
 
+from utils.pagination import page_headers, page_request
 from .rbac import admin_required
 
 api = Namespace("amenities", description="Amenity operations")
@@ -20,12 +21,20 @@ amenity_input_model = api.model("AmenityInput", {
 
 @api.route("/")
 class AmenityList(Resource):
+    @api.doc(params={"cursor": "Opaque cursor from X-Next-Cursor", "limit": "Page size"})
     @api.response(200, "List of amenities")
+    @api.response(400, "Invalid cursor or limit")
     def get(self):
-        """List all amenities. Public."""
+        """List amenities. Public. Pass ?limit= (and ?cursor=) to page through them."""
         from services import facade
-        amenities = facade.get_all_amenities()
-        return [a.to_dict() for a in amenities], 200
+        try:
+            page = page_request(request.args)
+            if page is None:
+                return [a.to_dict() for a in facade.get_all_amenities()], 200
+            amenities, next_cursor = facade.get_page("amenities", *page)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return [a.to_dict() for a in amenities], 200, page_headers(request.base_url, next_cursor, page[1])
 
     @admin_required
     @api.expect(amenity_input_model, validate=True)
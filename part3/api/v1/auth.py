@@ -22,6 +22,7 @@ class Login(Resource):
     @api.response(200, "Login successful", token_model)
     @api.response(400, "Invalid input")
     @api.response(401, "Invalid email or password")
+    @api.response(503, "Too many concurrent logins")
     def post(self):
         """Login with email and password. Returns JWT (identity=user id, claims: email, is_admin)."""
         data = request.get_json() or {}
@@ -35,11 +36,16 @@ class Login(Resource):
         if not user:
             return {"error": "Invalid email or password"}, 401
 
-        bcrypt = current_app.extensions.get("bcrypt")
-        if not bcrypt or not getattr(user, "password_hash", None):
+        hasher = current_app.extensions.get("password_hasher")
+        if not hasher or not getattr(user, "password_hash", None):
             return {"error": "Invalid email or password"}, 401
-        if not bcrypt.check_password_hash(user.password_hash, password):
+        # On the hashing pool; a full queue answers 503 (HashingOverloaded)
+        valid, new_hash = hasher.check_and_rehash(user.password_hash, password)
+        if not valid:
             return {"error": "Invalid email or password"}, 401
+        if new_hash:
+            # Stored with an outdated work factor: upgrade it now that we know the password
+            facade.update_user(user.id, {"password_hash": new_hash})
 
         token = create_access_token(
             identity=user.id,
@@ -3,6 +3,10 @@ from flask import request
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 from services import facade
+from utils.facets import FILTER_FIELDS, place_filters
+from utils.geo import MAX_NEARBY, MAX_NEAREST, MAX_RADIUS_KM, nearest_request, radius_request
+from utils.pagination import page_headers, page_request
+from utils.text_search import MAX_SEARCH_LIMIT, search_request
 
 api = Namespace('places', description='Place operations')
 
@@ -87,11 +91,22 @@ class PlaceList(Resource):
         except Exception as e:
             return {'error': str(e)}, 500
 
+    @api.doc(params={'cursor': 'Opaque cursor from X-Next-Cursor', 'limit': 'Page size'})
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(400, 'Invalid cursor or limit')
     @api.marshal_list_with(place_summary_model)
     def get(self):
-        """Retrieve a list of all places"""
-        places = facade.get_all_places()
+        """Retrieve a list of places. Pass ?limit= (and ?cursor=) to page through them."""
+        headers = {}
+        try:
+            page = page_request(request.args)
+            if page is None:
+                places = facade.get_all_places()
+            else:
+                places, next_cursor = facade.get_page('places', *page)
+                headers = page_headers(request.base_url, next_cursor, page[1])
+        except ValueError as e:
+            api.abort(400, str(e))
         
         # Return summary for list view
         return [
@@ -102,7 +117,93 @@ class PlaceList(Resource):
                 'longitude': place.longitude
             }
             for place in places
-        ]
+        ], 200, headers
+
+def _with_distances(hits):
+    """Serialize (place, distance_km) hits, nearest first"""
+    return [dict(place.to_dict(), distance_km=round(distance, 3)) for place, distance in hits]
+
+
+@api.route('/stats')
+class PlaceStats(Resource):
+    @api.doc(params={name: f'Filter: {name}' for name in FILTER_FIELDS})
+    @api.response(200, 'Price buckets, places per city and amenity, average price')
+    @api.response(400, 'Invalid filter value')
+    def get(self):
+        """Facet counts of the places matching the filters (all places without filters)"""
+        try:
+            filters = place_filters(request.args)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return facade.get_place_stats(filters), 200
+
+
+@api.route('/summary')
+class PlaceSummary(Resource):
+    @api.doc(params={'city': 'Summarize this city only'})
+    @api.response(200, 'Place count, average / min / max price, review count and average rating')
+    @api.response(404, 'No places in this city')
+    def get(self):
+        """Summary of all places, or of one city"""
+        result = facade.get_place_summary(request.args.get('city') or None)
+        if result is None:
+            return {'error': 'No places in this city'}, 404
+        return result, 200
+
+
+@api.route('/summary/cities')
+class CitySummaries(Resource):
+    @api.response(200, 'Summary of each city, the most places first')
+    def get(self):
+        """Summary of every city"""
+        return facade.get_city_summaries(), 200
+
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    @api.doc(params={'q': 'Words to look for in title and description',
+                     'limit': f'Maximum number of places (1-{MAX_SEARCH_LIMIT})'})
+    @api.response(200, 'Matching places, best match first')
+    @api.response(400, 'Missing search term or invalid limit')
+    def get(self):
+        """Full-text search on place title and description, ranked by relevance"""
+        try:
+            query, limit = search_request(request.args)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return [place.to_dict() for place in facade.search_places(query, limit)], 200
+
+
+@api.route('/nearby')
+class PlaceNearby(Resource):
+    @api.doc(params={'lat': 'Latitude', 'lng': 'Longitude',
+                     'radius': f'Radius in km (at most {MAX_RADIUS_KM:g})',
+                     'limit': f'Maximum number of places (1-{MAX_NEARBY})'})
+    @api.response(200, 'Places within the radius, nearest first')
+    @api.response(400, 'Invalid coordinates, radius or limit')
+    def get(self):
+        """Places within ?radius= km of (?lat=, ?lng=), sorted by distance"""
+        try:
+            latitude, longitude, radius, limit = radius_request(request.args)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return _with_distances(facade.get_places_within(latitude, longitude, radius, limit)), 200
+
+
+@api.route('/nearest')
+class PlaceNearest(Resource):
+    @api.doc(params={'lat': 'Latitude', 'lng': 'Longitude',
+                     'k': f'Number of places (1-{MAX_NEAREST})'})
+    @api.response(200, 'The k nearest places, nearest first')
+    @api.response(400, 'Invalid coordinates or k')
+    def get(self):
+        """The ?k= places nearest to (?lat=, ?lng=)"""
+        try:
+            latitude, longitude, k = nearest_request(request.args)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return _with_distances(facade.get_nearest_places(latitude, longitude, k)), 200
+
 
 @api.route('/<place_id>')
 class PlaceResource(Resource):
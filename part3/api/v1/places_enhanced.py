@@ -9,43 +9,40 @@ from models.place import Place
 from models.city import City
 from models.user import User
 from models.state import State
-from functools import wraps
-import json
+from models.review import Review
+from models.amenity import Amenity
 from datetime import datetime
+from sqlalchemy import and_, or_
+from utils.facets import facet_select, facets_from_rows
+from utils.geo import bounding_boxes, haversine_km, radius_request
+from utils.pagination import (DEFAULT_LIMIT, cursor_key, decode_cursor,
+                              encode_cursor, page_request)
+from utils.response_cache import cache_response
 
+# Relationships each endpoint's serializer touches; eager-loaded so a page of
+# N places costs a constant number of queries (see utils.loading). The list
+# touches none: its rating fields come from rating_sum / rating_count
+PLACE_LIST_PROFILE = ()
+PLACE_DETAIL_PROFILE = ('city', 'user', 'reviews', 'reviews.user', 'amenities')
 
-def cache_response(timeout=300):
-    """Decorator to cache API responses"""
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            cache_key = f"{request.path}?{request.query_string.decode()}"
-            
-            # Try to get from cache
-            redis_cache = storage.__redis_cache if hasattr(storage, '__redis_cache') else None
-            if redis_cache:
-                cached = redis_cache.get(cache_key)
-                if cached:
-                    return jsonify(json.loads(cached))
-            
-            # Execute function
-            response = f(*args, **kwargs)
-            
-            # Cache the response
-            if redis_cache and response.status_code == 200:
-                redis_cache.setex(
-                    cache_key,
-                    timeout,
-                    response.get_data(as_text=True)
-                )
-            
-            return response
-        return decorated_function
-    return decorator
+
+def _storage_cache():
+    """Response cache client exposed by the storage engine, if it has one"""
+    return getattr(storage, 'cache_client', None)
+
+
+def _data_version(*classes):
+    """Version token callable: changes whenever one of classes is committed"""
+    def version():
+        if not hasattr(storage, 'cache_version'):
+            return ''
+        return storage.cache_version(*classes)
+    return version
 
 
 @app_views.route('/cities/<city_id>/places', methods=['GET'])
-@cache_response(timeout=60)
+@cache_response(timeout=60, client=_storage_cache,
+                version=_data_version(Place, City, Review))
 def get_places(city_id):
     """
     Get all places in a city with enhanced features
@@ -54,9 +51,11 @@ def get_places(city_id):
     if not city:
         abort(404)
     
-    # Get pagination parameters
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    # Get keyset pagination parameters (?cursor=&limit=)
+    try:
+        cursor, limit = page_request(request.args) or (None, DEFAULT_LIMIT)
+    except ValueError as e:
+        abort(400, description=str(e))
     
     # Get filter parameters
     min_price = request.args.get('min_price', type=float)
@@ -64,7 +63,7 @@ def get_places(city_id):
     amenities = request.args.getlist('amenities')
     
     # Build query
-    query = storage.__session.query(Place).filter_by(city_id=city_id)
+    query = storage.query(Place, PLACE_LIST_PROFILE).filter_by(city_id=city_id)
     
     # Apply filters
     if min_price is not None:
@@ -77,11 +76,17 @@ def get_places(city_id):
         for amenity_id in amenities:
             query = query.filter(Place.amenities.any(id=amenity_id))
     
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination
-    places = query.offset((page - 1) * per_page).limit(per_page).all()
+    # Seek past the cursor instead of OFFSET, so deep pages cost the same as the first
+    query = query.order_by(Place.created_at, Place.id)
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Place.created_at > created_at,
+            and_(Place.created_at == created_at, Place.id > last_id)
+        ))
+    rows = query.limit(limit + 1).all()
+    places = rows[:limit]
+    next_cursor = encode_cursor(cursor_key(places[-1])) if len(rows) > limit else None
     
     # Prepare response
     places_list = []
@@ -90,7 +95,7 @@ def get_places(city_id):
         
         # Add calculated fields
         place_dict['average_rating'] = place.average_rating()
-        place_dict['total_reviews'] = len(place.reviews)
+        place_dict['total_reviews'] = place.rating_count or 0
         
         # Include only essential information
         essential_fields = ['id', 'name', 'description', 'price_by_night',
@@ -103,10 +108,8 @@ def get_places(city_id):
     response = {
         'data': places_list,
         'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total': total,
-            'pages': (total + per_page - 1) // per_page
+            'limit': limit,
+            'next_cursor': next_cursor
         },
         'filters_applied': {
             'min_price': min_price,
@@ -120,12 +123,15 @@ def get_places(city_id):
 
 
 @app_views.route('/places/<place_id>', methods=['GET'])
-@cache_response(timeout=300)
+@cache_response(timeout=300, client=_storage_cache,
+                version=_data_version(Place, City, User, Review, Amenity))
 def get_place(place_id):
     """
     Get specific place with detailed information
     """
-    place = storage.get(Place, place_id)
+    # Not storage.get(): cached instances are detached and could not lazy-load
+    # the relationships below, which are eager-loaded here instead
+    place = storage.query(Place, PLACE_DETAIL_PROFILE).filter_by(id=place_id).first()
     if not place:
         abort(404)
     
@@ -168,7 +174,7 @@ def search_places():
     data = request.get_json()
     
     # Build query
-    query = storage.__session.query(Place)
+    query = storage.query(Place)
     
     # Text search
     if 'text' in data:
@@ -178,19 +184,20 @@ def search_places():
             Place.description.ilike(search_text)
         )
     
-    # Location search
+    # Location search: bounding box prefilter in SQL, then exact haversine
+    # distance; results come back nearest first with their distance_km
+    origin = None
     if 'latitude' in data and 'longitude' in data and 'radius' in data:
-        # Simplified distance calculation (for demo purposes)
-        # In production, use PostGIS or similar
-        lat = data['latitude']
-        lng = data['longitude']
-        radius = data['radius']
-        
-        # This is a simplified version - implement proper haversine formula
-        query = query.filter(
-            Place.latitude.between(lat - radius/111, lat + radius/111),
-            Place.longitude.between(lng - radius/111, lng + radius/111)
-        )
+        try:
+            origin = radius_request({'lat': data['latitude'], 'lng': data['longitude'],
+                                     'radius': data['radius']})[:3]
+        except ValueError as e:
+            abort(400, description=str(e))
+        boxes = [
+            and_(Place.latitude.between(south, north), Place.longitude.between(west, east))
+            for south, west, north, east in bounding_boxes(*origin)
+        ]
+        query = query.filter(or_(*boxes))
     
     # Date availability
     if 'check_in' in data and 'check_out' in data:
@@ -198,29 +205,42 @@ def search_places():
         # In production, check against bookings
         pass
     
-    # Execute query
-    places = query.limit(50).all()
-    
-    return jsonify([place.to_dict() for place in places])
+    if origin is None:
+        places = query.limit(50).all()
+        return jsonify([place.to_dict() for place in places])
+    
+    lat, lng, radius = origin
+    hits = []
+    for place in query.all():
+        distance = haversine_km(lat, lng, place.latitude, place.longitude)
+        if distance <= radius:
+            hits.append((distance, place))
+    hits.sort(key=lambda hit: hit[0])
+    return jsonify([dict(place.to_dict(), distance_km=round(distance, 3))
+                    for distance, place in hits[:50]])
 
 
 @app_views.route('/places/stats', methods=['GET'])
 def get_places_stats():
     """
-    Get statistics about places
+    Facet counts of the places matching ?city_id=&min_price=&max_price=
+    (all places without filters): price buckets, places per city and per
+    amenity, and the average price, from a single grouped statement
     """
-    stats = {
-        'total_places': storage.count(Place),
-        'by_city': {},
-        'price_distribution': {
-            'under_50': storage.__session.query(Place).filter(Place.price_by_night < 50).count(),
-            '50_100': storage.__session.query(Place).filter(Place.price_by_night.between(50, 100)).count(),
-            '100_200': storage.__session.query(Place).filter(Place.price_by_night.between(100, 200)).count(),
-            'over_200': storage.__session.query(Place).filter(Place.price_by_night > 200).count()
-        },
-        'average_price': storage.__session.query(
-            func.avg(Place.price_by_night)
-        ).scalar() or 0
-    }
+    query = storage.query(Place).with_entities(
+        Place.id, Place.price_by_night.label('price'), Place.city_id.label('city'))
+    city_id = request.args.get('city_id')
+    min_price = request.args.get('min_price', type=float)
+    max_price = request.args.get('max_price', type=float)
+    if city_id:
+        query = query.filter(Place.city_id == city_id)
+    if min_price is not None:
+        query = query.filter(Place.price_by_night >= min_price)
+    if max_price is not None:
+        query = query.filter(Place.price_by_night <= max_price)
     
-    return jsonify(stats)
+    filtered = query.cte('filtered_places')
+    link = Place.amenities.property.secondary
+    statement = facet_select(filtered, link.c.place_id, link.c.amenity_id,
+                             Amenity.id, Amenity.name)
+    return jsonify(facets_from_rows(query.session.execute(statement)))
@@ -3,6 +3,7 @@ from flask import request
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 from services import facade
+from utils.pagination import page_headers, page_request
 
 api = Namespace('reviews', description='Review operations')
 
@@ -52,11 +53,22 @@ class ReviewList(Resource):
         except Exception as e:
             return {'error': str(e)}, 500
 
+    @api.doc(params={'cursor': 'Opaque cursor from X-Next-Cursor', 'limit': 'Page size'})
     @api.response(200, 'List of reviews retrieved successfully')
+    @api.response(400, 'Invalid cursor or limit')
     @api.marshal_list_with(review_summary_model)
     def get(self):
-        """Retrieve a list of all reviews"""
-        reviews = facade.get_all_reviews()
+        """Retrieve a list of reviews. Pass ?limit= (and ?cursor=) to page through them."""
+        headers = {}
+        try:
+            page = page_request(request.args)
+            if page is None:
+                reviews = facade.get_all_reviews()
+            else:
+                reviews, next_cursor = facade.get_page('reviews', *page)
+                headers = page_headers(request.base_url, next_cursor, page[1])
+        except ValueError as e:
+            api.abort(400, str(e))
         
         # Return summary for list view
         return [
@@ -66,7 +78,7 @@ class ReviewList(Resource):
                 'rating': review.rating
             }
             for review in reviews
-        ]
+        ], 200, headers
 
 @api.route('/<review_id>')
 class ReviewResource(Resource):
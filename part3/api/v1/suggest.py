@@ -0,0 +1,30 @@
+from flask_restx import Namespace, Resource, fields
+from flask import request
+
+from services import facade
+from utils.suggest import MAX_SUGGESTIONS, suggest_request
+
+api = Namespace('suggest', description='Search box autocomplete')
+
+suggestion_model = api.model('Suggestion', {
+    'type': fields.String(description='city, amenity or place'),
+    'text': fields.String(description='City name, amenity name or place title'),
+    'score': fields.Integer(description='Popularity: places in the city, places with the '
+                                        'amenity or reviews of the place'),
+    'id': fields.String(description='Amenity or place ID'),
+})
+
+
+@api.route('')
+class Suggest(Resource):
+    @api.doc(params={'q': 'What the user typed so far',
+                     'limit': f'Maximum number of suggestions (1-{MAX_SUGGESTIONS})'})
+    @api.response(200, 'Completions, most popular first', [suggestion_model])
+    @api.response(400, 'Missing q or invalid limit')
+    def get(self):
+        """Complete city names, amenity names and place titles from a prefix of any word"""
+        try:
+            query, limit = suggest_request(request.args)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return facade.suggest(query, limit), 200
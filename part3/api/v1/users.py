@@ -3,6 +3,7 @@ from flask import request, current_app
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
+from utils.pagination import page_headers, page_request
 from .rbac import admin_required
 
 api = Namespace("users", description="User operations")
@@ -37,12 +38,20 @@ user_update_model = api.model("UserUpdate", {
 @api.route("/")
 class UserList(Resource):
     @jwt_required()
+    @api.doc(params={"cursor": "Opaque cursor from X-Next-Cursor", "limit": "Page size"})
     @api.response(200, "List of users")
+    @api.response(400, "Invalid cursor or limit")
     def get(self):
-        """List all users. Requires JWT."""
+        """List users. Requires JWT. Pass ?limit= (and ?cursor=) to page through them."""
         from services import facade
-        users = facade.get_all_users()
-        return [u.to_dict() for u in users], 200
+        try:
+            page = page_request(request.args)
+            if page is None:
+                return [u.to_dict() for u in facade.get_all_users()], 200
+            users, next_cursor = facade.get_page("users", *page)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return [u.to_dict() for u in users], 200, page_headers(request.base_url, next_cursor, page[1])
 
     @admin_required
     @api.expect(user_input_model, validate=True)
@@ -55,10 +64,10 @@ class UserList(Resource):
         for k in required:
             if k not in data:
                 return {"error": f"Missing required field: {k}"}, 400
-        bcrypt = current_app.extensions.get("bcrypt")
-        if not bcrypt:
+        hasher = current_app.extensions.get("password_hasher")
+        if not hasher:
             return {"error": "Password hashing not configured"}, 500
-        pw_hash = bcrypt.generate_password_hash(data["password"]).decode("utf-8")
+        pw_hash = hasher.hash(data["password"])
         payload = {
             "first_name": data["first_name"],
             "last_name": data["last_name"],
@@ -95,12 +104,12 @@ class UserResource(Resource):
     def put(self, user_id):
         """Update any user (including email and password). Admin only. Passwords hashed with Bcrypt."""
         data = request.get_json() or {}
-        bcrypt = current_app.extensions.get("bcrypt")
-        if not bcrypt:
+        hasher = current_app.extensions.get("password_hasher")
+        if not hasher:
             return {"error": "Password hashing not configured"}, 500
         upd = {k: v for k, v in data.items() if k in {"first_name", "last_name", "email", "password", "is_admin"}}
         if "password" in upd:
-            upd["password_hash"] = bcrypt.generate_password_hash(upd.pop("password")).decode("utf-8")
+            upd["password_hash"] = hasher.hash(upd.pop("password"))
         if not upd:
             from services import facade
             user = facade.get_user(user_id)
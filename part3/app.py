@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-"""Main application file. Flask + Flask-RESTx + JWT + Bcrypt."""
+"""Main application file. Flask + Flask-RESTx + JWT + Bcrypt (on a bounded hashing pool)."""
 import os
 from flask import Flask
 from flask_jwt_extended import JWTManager
@@ -7,25 +7,35 @@ from flask_bcrypt import Bcrypt
 
 from api import api_bp
 from config import config
+from utils.password_hashing import PasswordHasher
+from utils.topics import redis_publisher
 
 jwt = JWTManager()
 bcrypt = Bcrypt()
+password_hasher = PasswordHasher()
 
 
 def create_app(config_name=None):
-    """Create and configure the Flask application."""
-    config_name = config_name or os.environ.get("FLASK_ENV", "development")
-    cfg = config.get(config_name, config["default"])
+    """Create and configure the Flask application (config_name: a key of
+    config.config, or a config class)."""
+    if isinstance(config_name, type):
+        cfg = config_name
+    else:
+        config_name = config_name or os.environ.get("FLASK_ENV", "development")
+        cfg = config.get(config_name, config["default"])
     app = Flask(__name__)
     app.config.from_object(cfg)
 
     jwt.init_app(app)
     bcrypt.init_app(app)
+    password_hasher.init_app(app)
     app.register_blueprint(api_bp)
 
     with app.app_context():
         from services import facade
-        facade.ensure_admin(bcrypt)
+        facade.ensure_admin(password_hasher)
+        # place:<id> change events for the WebSocket servers (CHANGE_EVENTS_REDIS_URL)
+        facade.change_publisher = redis_publisher(app.config.get("CHANGE_EVENTS_REDIS_URL"))
 
     return app
 
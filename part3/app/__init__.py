@@ -1,23 +1,89 @@
 "App initialization for HBnB."
-from flask import Flask
+from flask import Flask, jsonify
 from flask_restx import Api
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 
-db = SQLAlchemy()
+from app.persistence.routing import RoutingSession
+from utils.password_hashing import PasswordHasher
+
+# Reads go to SQLALCHEMY_REPLICA_BINDS when configured (see app.persistence.routing)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 bcrypt = Bcrypt()
+password_hasher = PasswordHasher()
 jwt = JWTManager()
 
+def init_pool_metrics(app):
+    """Serve GET /api/v1/_internal/pool (pool_stats of every engine, admin token
+    required) when POOL_METRICS_ENABLED is set."""
+    if not app.config.get('POOL_METRICS_ENABLED', False):
+        return
+    from flask_jwt_extended import get_jwt, jwt_required
+    from app.persistence.engine import pool_stats
+
+    @app.route('/api/v1/_internal/pool')
+    @jwt_required()
+    def internal_pool_stats():
+        if get_jwt().get('is_admin') is not True:
+            return jsonify({'error': 'Admin access required'}), 403
+        return jsonify({
+            bind or 'default': pool_stats(engine) for bind, engine in db.engines.items()
+        })
+
 def create_app(config_class):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Pool sizing / pre-ping (MySQL) or WAL pragmas (SQLite) from the config's
+    # SQLALCHEMY_POOL_* settings; must be set before db.init_app
+    from app.persistence.engine import configure_engine_options, install_sqlite_pragmas
+    configure_engine_options(app)
+
     # Initialize extensions
+    from app.persistence.routing import init_replicas
+    init_replicas(app)
     db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            install_sqlite_pragmas(engine)
     bcrypt.init_app(app)
+    # bcrypt off the request threads, bounded (BCRYPT_LOG_ROUNDS / _HASH_WORKERS / _HASH_QUEUE)
+    password_hasher.init_app(app)
     jwt.init_app(app)
 
+    # Per-request query count / DB time in Server-Timing, slow statements logged
+    # (QUERY_LOGGING, SLOW_QUERY_MS, ... in the config)
+    from utils.query_profiler import QueryProfiler
+    QueryProfiler(app)
+
+    # Committed place / review changes to the WebSocket topics (CHANGE_EVENTS_REDIS_URL)
+    from app.persistence.change_events import configure_publisher
+    configure_publisher(app.config.get('CHANGE_EVENTS_REDIS_URL'))
+
+    # Connection pool metrics, for sizing workers against the database (opt-in, admins only)
+    init_pool_metrics(app)
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats_command():
+        """Recompute the place_stats / city_stats tables from places and reviews."""
+        from app.models.place import Place  # (app.models attaches the stats tables)
+        from app.persistence.summary import rebuild_summary
+        from app.persistence.unit_of_work import unit_of_work
+        with unit_of_work() as session:
+            cities = rebuild_summary(session, Place)
+        print(f"Rebuilt place_stats and city_stats ({cities} cities)")
+
+    @app.cli.command('recompute-ratings')
+    def recompute_ratings_command():
+        """Recompute places.rating_sum / rating_count from the reviews table."""
+        from app.models.place import Place  # (app.models attaches the rating aggregates)
+        from app.persistence.ratings import recompute_rating_aggregates
+        from app.persistence.unit_of_work import unit_of_work
+        with unit_of_work() as session:
+            places = recompute_rating_aggregates(session, Place)
+        print(f"Recomputed the rating aggregates of {places} places")
+
     # Register ORM models so db.create_all() creates tables (only User is mapped at this stage).
     from app.models import baseclass  # noqa: F401
     from app.models import user  # noqa: F401
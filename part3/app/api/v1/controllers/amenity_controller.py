@@ -15,6 +15,13 @@ class AmenityController:
         amenities, status_code = self.amenity_service.get_all_amenities()
         return jsonify(amenities), status_code
     
+    def bulk_create_amenities(self):
+        """Create many amenities from a JSON array (?partial=true keeps the valid ones)."""
+        items = request.get_json(silent=True)
+        partial = request.args.get('partial', 'false').lower() in ('1', 'true')
+        result, status_code = self.amenity_service.bulk_create_amenities(items, partial)
+        return jsonify(result), status_code
+    
     def get_amenity(self, amenity_id):
         """Get a specific amenity."""
         result, status_code = self.amenity_service.get_amenity(amenity_id)
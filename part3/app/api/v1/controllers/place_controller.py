@@ -1,6 +1,11 @@
 """Place controller for handling place-related API requests."""
 from flask import request, jsonify
 from app.services.place_service import PlaceService
+from utils.facets import place_filters
+from utils.geo import nearest_request, radius_request
+from utils.pagination import page_request
+from utils.suggest import suggest_request
+from utils.text_search import search_request
 
 
 class PlaceController:
@@ -11,9 +16,23 @@ class PlaceController:
         self.place_service = PlaceService()
     
     def get_places(self):
-        """Get all places."""
-        places, status_code = self.place_service.get_all_places()
-        return jsonify(places), status_code
+        """Get all places (keyset-paged with ?cursor=&limit=)."""
+        try:
+            page = page_request(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if page is None:
+            places, status_code = self.place_service.get_all_places()
+            return jsonify(places), status_code
+        places, status_code, headers = self.place_service.get_all_places(*page, request.base_url)
+        return jsonify(places), status_code, headers
+    
+    def bulk_create_places(self):
+        """Create many places from a JSON array (?partial=true keeps the valid ones)."""
+        items = request.get_json(silent=True)
+        partial = request.args.get('partial', 'false').lower() in ('1', 'true')
+        result, status_code = self.place_service.bulk_create_places(items, partial)
+        return jsonify(result), status_code
     
     def get_place(self, place_id):
         """Get a specific place."""
@@ -46,12 +65,41 @@ class PlaceController:
         return jsonify(result), status_code
     
     def search_places(self):
-        """Search places by title or description."""
-        search_term = request.args.get('q', '')
-        if not search_term:
-            return jsonify({'error': 'Search term is required'}), 400
+        """Search places by title or description (?q=&limit=), best match first."""
+        try:
+            search_term, limit = search_request(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        places, status_code = self.place_service.search_places(search_term, limit)
+        return jsonify(places), status_code
+    
+    def suggest(self):
+        """Autocomplete for the search box (?q=&limit=): cities, amenities and place titles."""
+        try:
+            query, limit = suggest_request(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        places, status_code = self.place_service.search_places(search_term)
+        suggestions, status_code = self.place_service.suggest(query, limit)
+        return jsonify(suggestions), status_code
+    
+    def get_places_nearby(self):
+        """Get places within ?radius= km of (?lat=, ?lng=), nearest first."""
+        try:
+            latitude, longitude, radius, limit = radius_request(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        places, status_code = self.place_service.get_places_within(latitude, longitude, radius, limit)
+        return jsonify(places), status_code
+    
+    def get_nearest_places(self):
+        """Get the ?k= places nearest to (?lat=, ?lng=)."""
+        try:
+            latitude, longitude, k = nearest_request(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        places, status_code = self.place_service.get_nearest_places(latitude, longitude, k)
         return jsonify(places), status_code
     
     def get_places_by_city(self):
@@ -76,43 +124,30 @@ class PlaceController:
     
     def get_places_with_filters(self):
         """Get places with filters."""
-        filters = {}
-        
-        # Extract filter parameters
-        city = request.args.get('city')
-        min_price = request.args.get('min_price')
-        max_price = request.args.get('max_price')
-        min_bedrooms = request.args.get('min_bedrooms')
-        min_bathrooms = request.args.get('min_bathrooms')
-        min_guests = request.args.get('min_guests')
-        
-        if city:
-            filters['city'] = city
-        if min_price:
-            try:
-                filters['min_price'] = float(min_price)
-            except ValueError:
-                return jsonify({'error': 'min_price must be a number'}), 400
-        if max_price:
-            try:
-                filters['max_price'] = float(max_price)
-            except ValueError:
-                return jsonify({'error': 'max_price must be a number'}), 400
-        if min_bedrooms:
-            try:
-                filters['min_bedrooms'] = int(min_bedrooms)
-            except ValueError:
-                return jsonify({'error': 'min_bedrooms must be an integer'}), 400
-        if min_bathrooms:
-            try:
-                filters['min_bathrooms'] = int(min_bathrooms)
-            except ValueError:
-                return jsonify({'error': 'min_bathrooms must be an integer'}), 400
-        if min_guests:
-            try:
-                filters['min_guests'] = int(min_guests)
-            except ValueError:
-                return jsonify({'error': 'min_guests must be an integer'}), 400
+        try:
+            filters = place_filters(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         places, status_code = self.place_service.get_places_with_filters(filters)
         return jsonify(places), status_code
+    
+    def get_places_stats(self):
+        """Facet counts for the places matching the same filters as get_places_with_filters."""
+        try:
+            filters = place_filters(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        stats, status_code = self.place_service.get_place_stats(filters)
+        return jsonify(stats), status_code
+    
+    def get_places_summary(self):
+        """Place count, price and rating summary of all places, or of ?city=."""
+        result, status_code = self.place_service.get_place_summary(request.args.get('city') or None)
+        return jsonify(result), status_code
+    
+    def get_cities_summary(self):
+        """Summary of every city, the most places first."""
+        result, status_code = self.place_service.get_city_summaries()
+        return jsonify(result), status_code
@@ -15,6 +15,13 @@ class ReviewController:
         reviews, status_code = self.review_service.get_all_reviews()
         return jsonify(reviews), status_code
     
+    def bulk_create_reviews(self):
+        """Create many reviews from a JSON array (?partial=true keeps the valid ones)."""
+        items = request.get_json(silent=True)
+        partial = request.args.get('partial', 'false').lower() in ('1', 'true')
+        result, status_code = self.review_service.bulk_create_reviews(items, partial)
+        return jsonify(result), status_code
+    
     def get_review(self, review_id):
         """Get a specific review."""
         result, status_code = self.review_service.get_review(review_id)
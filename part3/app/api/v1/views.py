@@ -23,17 +23,27 @@ api_bp.route('/users/<string:user_id>', methods=['DELETE'])(user_controller.dele
 # Place routes
 api_bp.route('/places', methods=['GET'])(place_controller.get_places)
 api_bp.route('/places', methods=['POST'])(place_controller.create_place)
+api_bp.route('/places/bulk', methods=['POST'])(place_controller.bulk_create_places)
 api_bp.route('/places/<string:place_id>', methods=['GET'])(place_controller.get_place)
 api_bp.route('/places/<string:place_id>', methods=['PUT'])(place_controller.update_place)
 api_bp.route('/places/<string:place_id>', methods=['DELETE'])(place_controller.delete_place)
 api_bp.route('/places/search', methods=['GET'])(place_controller.search_places)
+api_bp.route('/places/nearby', methods=['GET'])(place_controller.get_places_nearby)
+api_bp.route('/places/nearest', methods=['GET'])(place_controller.get_nearest_places)
 api_bp.route('/places/city', methods=['GET'])(place_controller.get_places_by_city)
 api_bp.route('/places/price-range', methods=['GET'])(place_controller.get_places_by_price_range)
 api_bp.route('/places/filter', methods=['GET'])(place_controller.get_places_with_filters)
+api_bp.route('/places/stats', methods=['GET'])(place_controller.get_places_stats)
+api_bp.route('/places/summary', methods=['GET'])(place_controller.get_places_summary)
+api_bp.route('/places/summary/cities', methods=['GET'])(place_controller.get_cities_summary)
+
+# Search box autocomplete (cities, amenities, place titles)
+api_bp.route('/suggest', methods=['GET'])(place_controller.suggest)
 
 # Review routes
 api_bp.route('/reviews', methods=['GET'])(review_controller.get_reviews)
 api_bp.route('/reviews', methods=['POST'])(review_controller.create_review)
+api_bp.route('/reviews/bulk', methods=['POST'])(review_controller.bulk_create_reviews)
 api_bp.route('/reviews/<string:review_id>', methods=['GET'])(review_controller.get_review)
 api_bp.route('/reviews/<string:review_id>', methods=['PUT'])(review_controller.update_review)
 api_bp.route('/reviews/<string:review_id>', methods=['DELETE'])(review_controller.delete_review)
@@ -43,6 +53,7 @@ api_bp.route('/reviews/recent', methods=['GET'])(review_controller.get_recent_re
 # Amenity routes
 api_bp.route('/amenities', methods=['GET'])(amenity_controller.get_amenities)
 api_bp.route('/amenities', methods=['POST'])(amenity_controller.create_amenity)
+api_bp.route('/amenities/bulk', methods=['POST'])(amenity_controller.bulk_create_amenities)
 api_bp.route('/amenities/<string:amenity_id>', methods=['GET'])(amenity_controller.get_amenity)
 api_bp.route('/amenities/<string:amenity_id>', methods=['PUT'])(amenity_controller.update_amenity)
 api_bp.route('/amenities/<string:amenity_id>', methods=['DELETE'])(amenity_controller.delete_amenity)
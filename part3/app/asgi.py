@@ -0,0 +1,465 @@
+"""ASGI entry point for the /api/v1 API.
+
+Usage (from part3/): uvicorn app.asgi:application
+
+startup() picks one of two modes, so one data store answers every path:
+
+- SQL stack available (app.services.async_facade imports, models mapped):
+  the routes below run natively on AsyncHBnBFacade, one event loop per
+  worker serving thousands of concurrent requests, each yielding to the loop
+  while it waits on the database (--workers N is fine: the state is in the
+  database). Every other path falls through to the Flask app of
+  app.create_app(), on the same database, run on a thread pool by asgiref's
+  WsgiToAsgi.
+- Otherwise: the whole Flask-RESTx API of part3/app.py (the in-memory
+  facade) is served through WsgiToAsgi, and the native routes are off. Its
+  state lives in the process, so run a single worker.
+
+Each request runs in one async_unit_of_work(): the facade's writes commit
+when the handler returns. Handlers return (body, status) or (body, status,
+headers), like the Flask services; ValueError answers 400, a missing field
+400 and an unknown id 404.
+
+Write routes require what the RESTx resources require, checked before the
+facade runs: an access token signed with JWT_SECRET_KEY (creating users and
+amenities: with the is_admin claim), and for places and reviews the caller
+must own the object or be an admin.
+"""
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import re
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import jwt
+
+from app.persistence.async_repository import dump
+from app.persistence.async_session import async_unit_of_work, dispose_async_engine, init_async_engine
+from app.persistence.change_events import configure_publisher
+from app.persistence.engine import DEFAULT_POOL_SETTINGS
+from utils.facets import place_filters
+from utils.pagination import page_headers, page_request
+from utils.password_hashing import HashingOverloaded
+from utils.suggest import suggest_request
+from utils.text_search import search_request
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/api/v1'
+
+# Route access, as on the RESTx resources: a valid access token (JWT) or one
+# with the is_admin claim (ADMIN); ownership is checked by the handlers
+JWT = 'jwt'
+ADMIN = 'admin'
+
+
+class AuthError(Exception):
+    """A request without the token its route requires; answers status."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+def authenticate(request, secret: str, algorithm: str = 'HS256') -> Dict[str, Any]:
+    """Claims of the request's Bearer access token, as flask_jwt_extended issues
+    and checks them (401 missing or expired, 422 invalid)."""
+    scheme, _, token = request.headers.get('authorization', '').partition(' ')
+    if scheme != 'Bearer' or not token:
+        raise AuthError('Missing Authorization Header', 401)
+    try:
+        claims = jwt.decode(token, secret, algorithms=[algorithm])
+    except jwt.ExpiredSignatureError:
+        raise AuthError('Token has expired', 401)
+    except jwt.InvalidTokenError:
+        raise AuthError('Invalid token', 422)
+    if claims.get('type') != 'access' or 'sub' not in claims:
+        raise AuthError('Only access tokens are allowed', 422)
+    return claims
+
+
+class Request:
+    """The parts of an HTTP scope the handlers read."""
+
+    def __init__(self, scope: Dict[str, Any], body: bytes = b''):
+        self.method = scope['method']
+        self.path = scope['path']
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        self.args = {name: values[0] for name, values in query.items()}
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1')
+                        for name, value in scope.get('headers', ())}
+        self.body = body
+        self.claims: Dict[str, Any] = {}
+        self.base_url = (f"{scope.get('scheme', 'http')}://"
+                         f"{self.headers.get('host', 'localhost')}{self.path}")
+
+    def get_json(self):
+        """The JSON body, or None when it is empty or not JSON."""
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+    @property
+    def identity(self) -> Optional[str]:
+        return self.claims.get('sub')
+
+    @property
+    def is_admin(self) -> bool:
+        return self.claims.get('is_admin') is True
+
+    def may_change(self, owner_id: Optional[str]) -> bool:
+        """Whether the caller owns the object (owner_id) or is an admin."""
+        return self.is_admin or (owner_id is not None and owner_id == self.identity)
+
+
+class Router:
+    """(method, path pattern) -> async handler; '<name>' matches one path segment
+    and a trailing slash is optional (the RESTx namespaces use one)."""
+
+    def __init__(self, prefix: str = ''):
+        self.prefix = prefix
+        self._routes: List[Tuple[str, re.Pattern, Callable]] = []
+        self.access: Dict[Callable, Optional[str]] = {}
+
+    def route(self, method: str, pattern: str, access: Optional[str] = None):
+        """Register a handler; access is None (public), JWT or ADMIN."""
+        regex = re.compile('^' + re.sub(r'<(\w+)>', r'(?P<\1>[^/]+)', self.prefix + pattern) + '/?$')
+
+        def decorator(handler):
+            self._routes.append((method, regex, handler))
+            self.access[handler] = access
+            return handler
+        return decorator
+
+    def match(self, method: str, path: str) -> Tuple[Optional[Callable], Dict[str, str]]:
+        """The first handler registered for method and path, with its path parameters."""
+        for route_method, regex, handler in self._routes:
+            if route_method != method:
+                continue
+            found = regex.match(path)
+            if found:
+                return handler, found.groupdict()
+        return None, {}
+
+
+router = Router(API_PREFIX)
+
+
+async def _listing(request, get_all, get_page):
+    """The whole collection, or one keyset page with X-Next-Cursor / Link headers."""
+    page = page_request(request.args)
+    if page is None:
+        return await dump(await get_all()), 200
+    items, next_cursor = await get_page(*page)
+    return await dump(items), 200, page_headers(request.base_url, next_cursor, page[1])
+
+
+async def _created(obj):
+    return await dump(obj), 201
+
+
+async def _found(obj, name):
+    if obj is None:
+        return {'error': f'{name} not found'}, 404
+    return await dump(obj), 200
+
+
+def _forbidden(message):
+    return {'error': message}, 403
+
+
+def _input(request):
+    data = request.get_json()
+    if not data or not isinstance(data, dict):
+        raise ValueError('No input data provided')
+    return data
+
+
+# Users
+
+@router.route('POST', '/users', ADMIN)
+async def create_user(request, facade):
+    return await _created(await facade.create_user(_input(request)))
+
+
+@router.route('GET', '/users/<user_id>')
+async def get_user(request, facade, user_id):
+    return await _found(await facade.get_user(user_id), 'User')
+
+
+# Places (fixed paths before /places/<place_id>)
+
+@router.route('GET', '/places')
+async def get_places(request, facade):
+    return await _listing(request, facade.get_all_places, facade.get_places_page)
+
+
+@router.route('POST', '/places', JWT)
+async def create_place(request, facade):
+    place_data = _input(request)
+    for field in ('title', 'description', 'price'):
+        if not place_data.get(field):
+            raise ValueError(f'{field} is required')
+    if not request.is_admin and place_data.get('owner_id') != request.identity:
+        return _forbidden('Non-admin can only create places with owner_id equal to your user id')
+    return await _created(await facade.create_place(place_data))
+
+
+@router.route('GET', '/places/search')
+async def search_places(request, facade):
+    return await dump(await facade.search_places(*search_request(request.args))), 200
+
+
+@router.route('GET', '/places/stats')
+async def get_places_stats(request, facade):
+    return await facade.get_place_stats(place_filters(request.args)), 200
+
+
+@router.route('GET', '/places/summary')
+async def get_places_summary(request, facade):
+    result = await facade.get_place_summary(request.args.get('city') or None)
+    if result is None:
+        return {'error': 'No places in this city'}, 404
+    return result, 200
+
+
+@router.route('GET', '/places/summary/cities')
+async def get_cities_summary(request, facade):
+    return await facade.get_city_summaries(), 200
+
+
+@router.route('GET', '/suggest')
+async def suggest(request, facade):
+    return await facade.suggest(*suggest_request(request.args)), 200
+
+
+@router.route('GET', '/places/<place_id>')
+async def get_place(request, facade, place_id):
+    return await _found(await facade.get_place(place_id), 'Place')
+
+
+@router.route('PUT', '/places/<place_id>', JWT)
+async def update_place(request, facade, place_id):
+    place = await facade.get_place(place_id)
+    if place is None:
+        return {'error': 'Place not found'}, 404
+    if not request.may_change(place.owner_id):
+        return _forbidden('Only the place owner or an admin can update this place')
+    return await _found(await facade.update_place(place_id, _input(request)), 'Place')
+
+
+@router.route('DELETE', '/places/<place_id>', JWT)
+async def delete_place(request, facade, place_id):
+    place = await facade.get_place(place_id)
+    if place is None:
+        return {'error': 'Place not found'}, 404
+    if not request.may_change(place.owner_id):
+        return _forbidden('Only the place owner or an admin can delete this place')
+    if not await facade.delete_place(place_id):
+        return {'error': 'Place not found'}, 404
+    return {'message': 'Place deleted successfully'}, 200
+
+
+# Reviews
+
+@router.route('POST', '/reviews', JWT)
+async def create_review(request, facade):
+    review_data = _input(request)
+    if not request.is_admin and review_data.get('user_id') != request.identity:
+        return _forbidden('Non-admin can only create reviews with user_id equal to your user id')
+    if not isinstance(review_data.get('rating'), int) or not 1 <= review_data['rating'] <= 5:
+        raise ValueError('Rating must be between 1 and 5')
+    return await _created(await facade.create_review(review_data))
+
+
+@router.route('GET', '/reviews/<review_id>')
+async def get_review(request, facade, review_id):
+    return await _found(await facade.get_review(review_id), 'Review')
+
+
+@router.route('DELETE', '/reviews/<review_id>', JWT)
+async def delete_review(request, facade, review_id):
+    review = await facade.get_review(review_id)
+    if review is None:
+        return {'error': 'Review not found'}, 404
+    if not request.may_change(review.user_id):
+        return _forbidden('Only the review author or an admin can delete this review')
+    if not await facade.delete_review(review_id):
+        return {'error': 'Review not found'}, 404
+    return {'message': 'Review deleted successfully'}, 200
+
+
+# Amenities
+
+@router.route('POST', '/amenities', ADMIN)
+async def create_amenity(request, facade):
+    return await _created(await facade.create_amenity(_input(request)))
+
+
+@router.route('GET', '/amenities/<amenity_id>')
+async def get_amenity(request, facade, amenity_id):
+    return await _found(await facade.get_amenity(amenity_id), 'Amenity')
+
+
+def _config_class():
+    from config import config
+    return config.get(os.environ.get('FLASK_ENV', 'development'), config['default'])
+
+
+def _restx_app(config_class):
+    """create_app() of part3/app.py, the Flask-RESTx API on the in-memory facade.
+    Loaded by path: the app package shadows the app module."""
+    module = sys.modules.get('hbnb_restx_app')
+    if module is None:
+        path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+        spec = importlib.util.spec_from_file_location('hbnb_restx_app', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules['hbnb_restx_app'] = module
+    return module.create_app(config_class)
+
+
+def _async_facade_class():
+    """AsyncHBnBFacade, or None when the SQL stack does not import or map."""
+    # Checked up front: a failed app.services import leaves app.models half-registered
+    if importlib.util.find_spec('app.repositories.base_repository') is None:
+        logger.warning("Native async routes unavailable (app.repositories.base_repository is missing); "
+                       "serving app.py through WSGI")
+        return None
+    try:
+        from app.services.async_facade import AsyncHBnBFacade
+        from app.models.place import Place
+    except ImportError as e:
+        logger.warning(f"Native async routes unavailable ({e}); serving app.py through WSGI")
+        return None
+    if not hasattr(Place, '__table__'):
+        logger.warning("Native async routes unavailable (models not mapped); serving app.py through WSGI")
+        return None
+    return AsyncHBnBFacade
+
+
+class HBnBASGI:
+    """ASGI application: router handlers on the async facade and the other paths on
+    app.create_app(), or the whole app.py API when the SQL stack is unavailable."""
+
+    def __init__(self, config_class=None, fallback: bool = True):
+        self.config_class = config_class
+        self.fallback = fallback
+        self.facade = None
+        self._wsgi = None
+        self._starting = None
+
+    async def startup(self) -> None:
+        from asgiref.wsgi import WsgiToAsgi
+        config_class = self.config_class or _config_class()
+        facade_class = _async_facade_class()
+        if facade_class is None:
+            self._wsgi = WsgiToAsgi(_restx_app(config_class))
+            return
+        settings = {key: getattr(config_class, key, default)
+                    for key, default in DEFAULT_POOL_SETTINGS.items()}
+        init_async_engine(config_class.SQLALCHEMY_DATABASE_URI, settings)
+        configure_publisher(getattr(config_class, 'CHANGE_EVENTS_REDIS_URL', None))
+        self.facade = facade_class()
+        if self.fallback:
+            from app import create_app
+            self._wsgi = WsgiToAsgi(create_app(config_class))
+
+    async def shutdown(self) -> None:
+        if self.facade is not None:
+            await dispose_async_engine()
+        self.facade = self._wsgi = self._starting = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            # Nothing else is served here; refuse websocket handshakes
+            return await send({'type': 'websocket.close', 'code': 1000})
+        if self.facade is None and self._wsgi is None:
+            # Servers without lifespan support: start once, on the first request
+            self._starting = self._starting or asyncio.ensure_future(self.startup())
+            await self._starting
+        handler, params = (None, None) if self.facade is None else router.match(
+            scope['method'], scope['path'])
+        if handler is None:
+            if self._wsgi is not None:
+                return await self._wsgi(scope, receive, send)
+            return await _send_json(send, {'error': 'Not found'}, 404)
+        request = Request(scope, await _read_body(receive))
+        await _send_json(send, *await self.dispatch(handler, request, params))
+
+    def authorize(self, handler, request) -> None:
+        """Check the token its route requires and set request.claims; raises AuthError."""
+        access = router.access.get(handler)
+        if access is None:
+            return
+        config_class = self.config_class or _config_class()
+        request.claims = authenticate(request, config_class.JWT_SECRET_KEY,
+                                      getattr(config_class, 'JWT_ALGORITHM', 'HS256'))
+        if access == ADMIN and not request.is_admin:
+            raise AuthError('Admin access required', 403)
+
+    async def dispatch(self, handler, request, params) -> Tuple[Any, int, Dict[str, str]]:
+        """Check access, then run handler in a unit of work; returns (body, status, headers)."""
+        try:
+            self.authorize(handler, request)
+        except AuthError as e:
+            key = 'msg' if e.status != 403 else 'error'
+            return {key: str(e)}, e.status, {}
+        try:
+            async with async_unit_of_work():
+                result = await handler(request, self.facade, **params)
+        except HashingOverloaded as e:
+            return {'error': e.description}, e.code, {'Retry-After': str(e.retry_after)}
+        except KeyError as e:
+            return {'error': f'{e.args[0]} is required'}, 400, {}
+        except ValueError as e:
+            return {'error': str(e)}, 400, {}
+        except Exception:
+            logger.exception("%s %s failed", request.method, request.path)
+            return {'error': 'Internal server error'}, 500, {}
+        body, status, *headers = result
+        return body, status, headers[0] if headers else {}
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def _send_json(send, body, status, headers=None):
+    payload = json.dumps(body).encode()
+    raw_headers = [(b'content-type', b'application/json'),
+                   (b'content-length', str(len(payload)).encode())]
+    raw_headers += [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in (headers or {}).items()]
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+application = HBnBASGI()
@@ -15,3 +15,15 @@ from app.models.user import User
 from app.models.place import Place
 from app.models.review import Review
 from app.models.amenity import Amenity
+
+# places.rating_sum / rating_count, kept in step with reviews
+from app.persistence.ratings import attach_rating_aggregates
+attach_rating_aggregates(Place, Review)
+
+# place_stats / city_stats tables, kept in step with places and reviews
+from app.persistence.summary import attach_summary
+attach_summary(Place, Review)
+
+# place:<id> change events for the WebSocket topics
+from app.persistence.change_events import attach_change_events
+attach_change_events(Place, Review)
@@ -8,6 +8,10 @@ from app.models import place_amenities  # Import association table
 class Amenity(BaseModel):
     """Amenity model representing a property amenity."""
     __tablename__ = 'amenities'
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, id)
+        db.Index('idx_amenities_created_at_id', 'created_at', 'id'),
+    )
     
     # Core attribute
     name = db.Column(db.String(50), unique=True, nullable=False)
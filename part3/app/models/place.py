@@ -1,26 +1,47 @@
 """Place model with relationships."""
 from app import db
 from app.models.base_model import BaseModel
-from sqlalchemy.orm import validates
+from sqlalchemy import event
+from sqlalchemy.orm import column_property, validates
 from app.models import place_amenities  # Import association table
+from app.persistence.fulltext import attach_fulltext
+from utils.geo import GEOHASH_PRECISION, geohash_encode
 
 
 class Place(BaseModel):
     """Place model representing a rental property."""
     __tablename__ = 'places'
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, id)
+        db.Index('idx_places_created_at_id', 'created_at', 'id'),
+        # Radius / nearest searches seek on geohash cell ranges (utils.geo)
+        db.Index('idx_places_geohash', 'geohash'),
+        # City filters, and city_stats min / max recomputes (app.persistence.summary)
+        db.Index('idx_places_city', 'city'),
+    )
     
     # Core attributes
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
-    price = db.Column(db.Float, nullable=False)
+    # active_history: the old price and city are loaded before a change so the
+    # place_stats / city_stats rows can be adjusted (app.persistence.summary)
+    price = column_property(db.Column(db.Float, nullable=False), active_history=True)
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
+    # Geohash of (latitude, longitude), set on flush; NULL without coordinates
+    geohash = db.Column(db.String(GEOHASH_PRECISION), nullable=True)
     address = db.Column(db.String(200), nullable=False)
-    city = db.Column(db.String(100), nullable=False)
+    city = column_property(db.Column(db.String(100), nullable=False), active_history=True)
     max_guests = db.Column(db.Integer, default=1)
     bedrooms = db.Column(db.Integer, default=1)
     bathrooms = db.Column(db.Integer, default=1)
     
+    # Denormalized review aggregates. Kept in step with reviews (same transaction)
+    # by the Review mapper events of app.persistence.ratings; rebuilt in bulk by
+    # PlaceRepository.recompute_rating_aggregates().
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Foreign Keys
     # One-to-Many: User -> Places (a place belongs to one user)
     owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
@@ -114,6 +135,8 @@ class Place(BaseModel):
             'bedrooms': self.bedrooms,
             'bathrooms': self.bathrooms,
             'owner_id': self.owner_id,
+            'average_rating': self.average_rating(),
+            'reviews_count': self.rating_count or 0,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -126,23 +149,21 @@ class Place(BaseModel):
         if self.owner:
             result['owner'] = self.owner.to_dict_without_email()
         
-        # Include reviews
+        # Include reviews (average_rating and reviews_count come from to_dict)
         result['reviews'] = [review.to_dict() for review in self.reviews]
-        result['reviews_count'] = len(self.reviews)
         
         # Include amenities
         result['amenities'] = [amenity.to_dict() for amenity in self.amenities]
         result['amenities_count'] = len(self.amenities)
         
-        # Calculate average rating
-        if self.reviews:
-            total_rating = sum(review.rating for review in self.reviews)
-            result['average_rating'] = round(total_rating / len(self.reviews), 1)
-        else:
-            result['average_rating'] = 0.0
-        
         return result
     
+    def average_rating(self):
+        """Average review rating from the denormalized aggregates (0.0 if unrated)."""
+        if not self.rating_count:
+            return 0.0
+        return round(self.rating_sum / self.rating_count, 1)
+    
     def add_amenity(self, amenity):
         """Add an amenity to this place."""
         if amenity not in self.amenities:
@@ -159,3 +180,16 @@ class Place(BaseModel):
     
     def __repr__(self):
         return f'<Place {self.title}>'
+
+
+# Text index on title/description for PlaceRepository.search_places
+attach_fulltext(Place)
+
+
+@event.listens_for(Place, 'before_insert')
+@event.listens_for(Place, 'before_update')
+def _set_geohash(mapper, connection, target):
+    if target.latitude is None or target.longitude is None:
+        target.geohash = None
+    else:
+        target.geohash = geohash_encode(target.latitude, target.longitude)
@@ -1,23 +1,30 @@
 """Review model with relationships."""
 from app import db
 from app.models.base_model import BaseModel
-from sqlalchemy.orm import validates
+from sqlalchemy.orm import column_property, validates
 
 
 class Review(BaseModel):
     """Review model representing a user review."""
     __tablename__ = 'reviews'
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, id)
+        db.Index('idx_reviews_created_at_id', 'created_at', 'id'),
+    )
     
     # Core attributes
     text = db.Column(db.Text, nullable=False)
-    rating = db.Column(db.Integer, nullable=False)
+    # active_history: the old value is loaded before a change so the place rating
+    # aggregates can be adjusted by the exact delta (app.persistence.ratings)
+    rating = column_property(db.Column(db.Integer, nullable=False), active_history=True)
     
     # Foreign Keys
     # One-to-Many: User -> Reviews (a review is written by one user)
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     
     # One-to-Many: Place -> Reviews (a review is for one place)
-    place_id = db.Column(db.String(36), db.ForeignKey('places.id'), nullable=False)
+    place_id = column_property(db.Column(db.String(36), db.ForeignKey('places.id'), nullable=False),
+                               active_history=True)
     
     # Relationships
     # Many-to-One: Review -> User (a review belongs to one user)
@@ -81,3 +88,4 @@ class Review(BaseModel):
     
     def __repr__(self):
         return f'<Review {self.rating} stars>'
+
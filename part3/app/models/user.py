@@ -1,5 +1,5 @@
 """User model with relationships."""
-from app import db, bcrypt
+from app import db, password_hasher
 from app.models.base_model import BaseModel
 from sqlalchemy.orm import validates
 import re
@@ -8,6 +8,10 @@ import re
 class User(BaseModel):
     """User model representing a registered user."""
     __tablename__ = 'users'
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, id)
+        db.Index('idx_users_created_at_id', 'created_at', 'id'),
+    )
     
     # User-specific attributes
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
@@ -50,14 +54,26 @@ class User(BaseModel):
     
     @password.setter
     def password(self, password):
-        """Set password - hash it using bcrypt."""
+        """Set password - hash it using bcrypt on the hashing pool."""
+        self.validate_password(password)
+        self.password_hash = password_hasher.hash(password)
+    
+    @staticmethod
+    def validate_password(password):
+        """Check the password rules before hashing."""
         if not password or len(password) < 6:
             raise ValueError("Password must be at least 6 characters")
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
     
     def verify_password(self, password):
         """Verify a password against the stored hash."""
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.check(self.password_hash, password)
+    
+    def verify_and_rehash(self, password):
+        """Verify a password; rehash it when the stored cost is outdated (flushed with the session)."""
+        valid, new_hash = password_hasher.check_and_rehash(self.password_hash, password)
+        if new_hash:
+            self.password_hash = new_hash
+        return valid
     
     def hash_password(self, password):
         """Hash the password before storing it."""
@@ -0,0 +1,150 @@
+"""Async counterpart of app.persistence.repository.
+
+AsyncRepository is the Repository interface with coroutine methods;
+AsyncSQLAlchemyRepository implements it on the AsyncSession of the current
+async_unit_of_work() (app.persistence.async_session). As with
+SQLAlchemyRepository, writes are only flushed; the outermost unit of work
+commits.
+
+Nothing may lazy-load outside the greenlet the session runs its IO in: name
+the relationships a serializer touches in a loading profile (utils.loading),
+or do the work through run_sync(), which runs plain Session code (the search
+indexes, summaries, to_dict() of expired objects) with async IO underneath.
+"""
+from abc import ABC, abstractmethod
+
+from sqlalchemy import and_, or_, select
+
+from app.persistence.async_session import current_session
+from utils.loading import loader_options
+from utils.pagination import DEFAULT_LIMIT, cursor_key, decode_cursor, encode_cursor
+
+
+async def dump(obj, method='to_dict'):
+    """obj.<method>() (or [...] for a list of objects), run on the session's greenlet,
+    so expired attributes and relationships outside the loading profile can load."""
+    def serialize(session):
+        if isinstance(obj, list):
+            return [getattr(item, method)() for item in obj]
+        return getattr(obj, method)()
+    return await current_session().run_sync(serialize)
+
+
+class AsyncRepository(ABC):
+    """Abstract async repository interface, mirroring Repository."""
+
+    @abstractmethod
+    async def add(self, obj):
+        pass
+
+    @abstractmethod
+    async def get(self, obj_id):
+        pass
+
+    @abstractmethod
+    async def get_all(self):
+        pass
+
+    @abstractmethod
+    async def update(self, obj_id, data, fields=None):
+        pass
+
+    @abstractmethod
+    async def delete(self, obj_id):
+        pass
+
+    @abstractmethod
+    async def get_by_attribute(self, attr_name, attr_value):
+        pass
+
+    @abstractmethod
+    async def get_page(self, cursor=None, limit=DEFAULT_LIMIT):
+        """Return (objects, next_cursor): up to limit objects after cursor, ordered by
+        (created_at, id). next_cursor is None on the last page."""
+        pass
+
+
+class AsyncSQLAlchemyRepository(AsyncRepository):
+    """AsyncSession-backed repository implementing AsyncRepository for any mapped model."""
+
+    def __init__(self, model_class):
+        self._model = model_class
+
+    @property
+    def model(self):
+        return self._model
+
+    @property
+    def session(self):
+        return current_session()
+
+    def _select(self, profile=None):
+        """SELECT of the model with the loader options of a loading profile."""
+        return select(self._model).options(*loader_options(self._model, profile))
+
+    async def add(self, obj):
+        self.session.add(obj)
+        await self.session.flush()
+
+    async def get(self, obj_id, profile=None):
+        return await self.session.get(self._model, obj_id, options=loader_options(self._model, profile))
+
+    async def get_many(self, obj_ids, profile=None):
+        """Objects of obj_ids in that order (unknown ids skipped), in one query."""
+        if not obj_ids:
+            return []
+        found = {obj.id: obj for obj in await self.session.scalars(
+            self._select(profile).where(self._model.id.in_(obj_ids)))}
+        return [found[obj_id] for obj_id in obj_ids if obj_id in found]
+
+    async def get_all(self, profile=None):
+        return list(await self.session.scalars(self._select(profile)))
+
+    async def update(self, obj_id, data, fields=None):
+        """Apply data (only its keys in fields, when given) and flush; returns the
+        object, or None if it does not exist."""
+        obj = await self.get(obj_id)
+        if not obj:
+            return
+        if fields is not None:
+            data = {key: data[key] for key in fields if key in data}
+        if hasattr(obj, "update") and callable(getattr(obj, "update")):
+            # BaseModel.update(**kwargs)
+            obj.update(**data)
+        else:
+            for k, v in data.items():
+                if hasattr(obj, k):
+                    setattr(obj, k, v)
+        await self.session.flush()
+        return obj
+
+    async def delete(self, obj_id):
+        obj = await self.get(obj_id)
+        if obj:
+            # Loads the cascaded collections (reviews of a place, ...) with async IO
+            await self.session.delete(obj)
+            await self.session.flush()
+        return obj is not None
+
+    async def get_by_attribute(self, attr_name, attr_value):
+        return (await self.session.scalars(
+            select(self._model).filter_by(**{attr_name: attr_value}).limit(1))).first()
+
+    async def get_page(self, cursor=None, limit=DEFAULT_LIMIT, profile=None):
+        """Keyset page, as SQLAlchemyRepository.get_page."""
+        model = self._model
+        statement = self._select(profile).order_by(model.created_at, model.id)
+        if cursor:
+            created_at, obj_id = decode_cursor(cursor)
+            statement = statement.where(or_(
+                model.created_at > created_at,
+                and_(model.created_at == created_at, model.id > obj_id),
+            ))
+        rows = list(await self.session.scalars(statement.limit(limit + 1)))
+        items = rows[:limit]
+        next_cursor = encode_cursor(cursor_key(items[-1])) if len(rows) > limit else None
+        return items, next_cursor
+
+    async def run_sync(self, fn, *args, **kwargs):
+        """fn(session, *args, **kwargs) on the synchronous Session behind the AsyncSession."""
+        return await self.session.run_sync(fn, *args, **kwargs)
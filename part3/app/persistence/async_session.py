@@ -0,0 +1,116 @@
+"""Async engine, per-task sessions and unit of work (SQLAlchemy asyncio).
+
+The ASGI entry point (app/asgi.py) serves requests from one event loop: the
+async drivers (aiosqlite, aiomysql, asyncpg) yield to the loop on every round
+trip, so a request waiting on the database does not hold a worker thread.
+
+init_async_engine() builds the engine from the same SQLALCHEMY_DATABASE_URI
+and SQLALCHEMY_POOL_* settings as the Flask app; async_database_url() swaps
+in the async driver. async_unit_of_work() opens an AsyncSession for the
+current task (a context variable, so concurrent requests never share one),
+commits it once when the outermost scope exits and rolls back on error, like
+app.persistence.unit_of_work. Flush events (rating aggregates, place_stats /
+city_stats, the search indexes) are Session events and run unchanged inside
+AsyncSession flushes.
+"""
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.persistence.engine import DEFAULT_POOL_SETTINGS, build_engine_options, install_sqlite_pragmas
+
+ASYNC_DRIVERS = {
+    'sqlite': 'aiosqlite',
+    'mysql': 'aiomysql',
+    'postgresql': 'asyncpg',
+}
+DEPTH_KEY = 'uow_depth'
+
+_engine = None
+_sessionmaker = None
+_current: ContextVar[Optional[AsyncSession]] = ContextVar('async_session', default=None)
+
+
+def async_database_url(uri: str) -> str:
+    """uri with its driver replaced by the backend's asyncio driver (async URLs are kept)."""
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver configured for {backend}")
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}').render_as_string(hide_password=False)
+
+
+def async_engine_options(uri: str, settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """build_engine_options() for an async engine (asyncio-adapted queue pool)."""
+    options = build_engine_options(uri, dict(DEFAULT_POOL_SETTINGS, **(settings or {})))
+    if options.pop('poolclass', None) is not None:
+        options['poolclass'] = AsyncAdaptedQueuePool
+    return options
+
+
+def init_async_engine(uri: str, settings: Optional[Dict[str, Any]] = None, **options):
+    """Create the async engine and session factory for uri (a sync or async URL)."""
+    global _engine, _sessionmaker
+    engine_options = async_engine_options(uri, settings)
+    engine_options.update(options)
+    _engine = create_async_engine(async_database_url(uri), **engine_options)
+    install_sqlite_pragmas(_engine.sync_engine)
+    # Objects stay readable after commit: expired attributes cannot lazy-load outside a greenlet
+    _sessionmaker = async_sessionmaker(_engine, expire_on_commit=False)
+    return _engine
+
+
+async def dispose_async_engine() -> None:
+    global _engine, _sessionmaker
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = _sessionmaker = None
+
+
+def current_session() -> AsyncSession:
+    """The AsyncSession of the current task's unit of work."""
+    session = _current.get()
+    if session is None:
+        raise RuntimeError("No async unit of work in progress")
+    return session
+
+
+@asynccontextmanager
+async def async_unit_of_work():
+    """Commit the task's session once when the outermost scope exits, roll it back on error."""
+    session = _current.get()
+    token = None
+    if session is None:
+        if _sessionmaker is None:
+            raise RuntimeError("init_async_engine() has not been called")
+        session = _sessionmaker()
+        token = _current.set(session)
+    depth = session.info.get(DEPTH_KEY, 0)
+    session.info[DEPTH_KEY] = depth + 1
+    try:
+        yield session
+        if depth == 0:
+            await session.commit()
+    except BaseException:
+        if depth == 0:
+            await session.rollback()
+        raise
+    finally:
+        session.info[DEPTH_KEY] = depth
+        if token is not None:
+            _current.reset(token)
+            await session.close()
+
+
+def async_transactional(func):
+    """Run the coroutine function func in an async_unit_of_work()."""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        async with async_unit_of_work():
+            return await func(*args, **kwargs)
+    return wrapper
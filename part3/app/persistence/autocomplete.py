@@ -0,0 +1,120 @@
+"""Autocomplete for the search box, served from an in-process utils.suggest.Suggester.
+
+The Suggester of an engine is loaded from the places, amenities and
+place_amenities tables on first use, then kept current from this process's
+committed writes: after_flush records the Place, Amenity and Review changes
+of a session and after_commit applies them (a rollback discards them), those
+committed while it loads included (see app.persistence.engine_indexes).
+Review counts are popularity weights applied as deltas: a review committing
+just as the load reads may be counted twice until the next rebuild.
+Writes made by other processes show up after rebuild_suggestions(engine) or a
+restart.
+"""
+from collections import Counter
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.persistence.engine_indexes import EngineIndexes
+from utils.suggest import Suggester
+
+CHANGES_KEY = 'suggest_changes'
+
+
+def _load(engine) -> Suggester:
+    from app.models import place_amenities
+    from app.models.amenity import Amenity
+    from app.models.place import Place
+    with engine.connect() as conn:
+        links = {}
+        for place_id, amenity_id in conn.execute(
+                select(place_amenities.c.place_id, place_amenities.c.amenity_id)):
+            links.setdefault(place_id, []).append(amenity_id)
+        places = [(place_id, title, city, links.get(place_id, ()), reviews)
+                  for place_id, title, city, reviews in conn.execute(
+                      select(Place.id, Place.title, Place.city, Place.rating_count))]
+        amenities = list(conn.execute(select(Amenity.id, Amenity.name)))
+    suggester = Suggester()
+    suggester.load(places, amenities)
+    return suggester
+
+
+def _apply(suggester, changes):
+    for amenity_id, name in changes['amenities'].items():
+        if name is None:
+            suggester.remove_amenity(amenity_id)
+        else:
+            suggester.set_amenity(amenity_id, name)
+    for place_id, place in changes['places'].items():
+        if place is None:
+            suggester.remove_place(place_id)
+        else:
+            suggester.set_place(place_id, *place)
+    for place_id, delta in changes['reviews'].items():
+        if delta:
+            suggester.add_reviews(place_id, delta)
+
+
+_suggesters = EngineIndexes(_apply)
+
+
+def suggest(session, query: str, limit: int):
+    """Completions of query, most popular first (see Suggester.suggest)."""
+    from app.models.place import Place
+    suggester = _suggesters.get(session.get_bind(mapper=inspect(Place)), _load)
+    with _suggesters.lock:
+        return suggester.suggest(query, limit)
+
+
+def rebuild_suggestions(engine) -> None:
+    """Reload the suggestions of engine from the database on next use."""
+    _suggesters.discard(engine)
+
+
+def _changes(session):
+    return session.info.setdefault(CHANGES_KEY, {'places': {}, 'amenities': {}, 'reviews': Counter()})
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_changes(session, flush_context):
+    # Recorded even before a suggester exists: one may start loading before the commit
+    from app.models.amenity import Amenity
+    from app.models.place import Place
+    from app.models.review import Review
+    changes = _changes(session)
+    for obj in session.new.union(session.dirty):
+        if isinstance(obj, Place):
+            # Amenity ids only when the collection is loaded; None keeps the known ones
+            amenities = obj.__dict__.get('amenities')
+            changes['places'][obj.id] = (obj.title, obj.city,
+                                         None if amenities is None else [a.id for a in amenities])
+        elif isinstance(obj, Amenity):
+            changes['amenities'][obj.id] = obj.name
+        elif isinstance(obj, Review):
+            history = inspect(obj).attrs.place_id.history
+            for place_id in history.deleted or ():
+                changes['reviews'][place_id] -= 1
+            if obj in session.new:
+                changes['reviews'][obj.place_id] += 1
+            elif history.deleted:
+                changes['reviews'][obj.place_id] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Place):
+            changes['places'][obj.id] = None
+        elif isinstance(obj, Amenity):
+            changes['amenities'][obj.id] = None
+        elif isinstance(obj, Review):
+            changes['reviews'][obj.place_id] -= 1
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_changes(session):
+    changes = session.info.pop(CHANGES_KEY, None)
+    if not changes:
+        return
+    _suggesters.commit(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop(CHANGES_KEY, None)
@@ -0,0 +1,103 @@
+"""Place and review change events for the WebSocket topics (see utils.topics).
+
+after_flush records an event on place:<place id> for each Place updated or
+deleted and each Review created, updated or deleted by a session;
+after_commit publishes the events of the transaction and a rollback discards
+them, so subscribers only hear of changes that were committed. New places
+have no subscribers yet and publish nothing.
+
+attach_change_events(Place, Review) names the models whose changes are
+events (app.models). Events are published when a publisher is configured: configure_publisher()
+with CHANGE_EVENTS_REDIS_URL (create_app, the ASGI startup) publishes them
+on CHANGES_CHANNEL, one pipelined round trip per commit; under an event loop
+(the async sessions of app.asgi) the round trip runs on the loop's default
+executor. A failed publish is logged, not raised: the transaction is already
+committed.
+"""
+import asyncio
+import logging
+from typing import Callable, List, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from utils.topics import change_event, place_topic, redis_publisher
+
+logger = logging.getLogger(__name__)
+
+EVENTS_KEY = 'change_events'
+
+_publisher: Optional[Callable[[List[str]], None]] = None
+_place_model = None
+_review_model = None
+
+
+def attach_change_events(place_model, review_model) -> None:
+    """Record the changes of place_model and review_model instances as events."""
+    global _place_model, _review_model
+    _place_model, _review_model = place_model, review_model
+
+
+def set_publisher(publisher: Optional[Callable[[List[str]], None]]) -> None:
+    """Publish committed change events with publisher(events); None turns events off."""
+    global _publisher
+    _publisher = publisher
+
+
+def configure_publisher(redis_url: Optional[str]) -> None:
+    """Publish change events on Redis at redis_url (CHANGE_EVENTS_REDIS_URL), if set."""
+    if redis_url:
+        set_publisher(redis_publisher(redis_url))
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_events(session, flush_context):
+    if _publisher is None or _place_model is None:
+        return
+    events = session.info.setdefault(EVENTS_KEY, [])
+    for obj in session.new:
+        if isinstance(obj, _review_model):
+            events.append(change_event('review_created', place_topic(obj.place_id), obj.to_dict()))
+    for obj in session.dirty:
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, _place_model):
+            events.append(change_event('place_updated', place_topic(obj.id), obj.to_dict()))
+        elif isinstance(obj, _review_model):
+            moved_from = inspect(obj).attrs.place_id.history.deleted
+            for place_id in moved_from or ():
+                events.append(change_event('review_deleted', place_topic(place_id),
+                                           {'id': obj.id, 'place_id': place_id}))
+            kind = 'review_created' if moved_from else 'review_updated'
+            events.append(change_event(kind, place_topic(obj.place_id), obj.to_dict()))
+    for obj in session.deleted:
+        if isinstance(obj, _place_model):
+            events.append(change_event('place_deleted', place_topic(obj.id), {'id': obj.id}))
+        elif isinstance(obj, _review_model):
+            events.append(change_event('review_deleted', place_topic(obj.place_id),
+                                       {'id': obj.id, 'place_id': obj.place_id}))
+
+
+def _publish(publisher, events: List[str]) -> None:
+    try:
+        publisher(events)
+    except Exception as e:
+        logger.error(f"Publishing {len(events)} change events failed: {e}")
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_events(session):
+    events = session.info.pop(EVENTS_KEY, None)
+    if not events or _publisher is None:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _publish(_publisher, events)
+    else:
+        loop.run_in_executor(None, _publish, _publisher, events)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_events(session):
+    session.info.pop(EVENTS_KEY, None)
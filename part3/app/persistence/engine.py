@@ -0,0 +1,162 @@
+"""Engine options per database backend, and connection pool metrics.
+
+configure_engine_options() turns the pool settings of the config class
+(SQLALCHEMY_POOL_SIZE, SQLALCHEMY_MAX_OVERFLOW, SQLALCHEMY_POOL_RECYCLE,
+SQLALCHEMY_POOL_TIMEOUT) into SQLALCHEMY_ENGINE_OPTIONS, which is the only
+pool configuration Flask-SQLAlchemy 3 reads:
+
+- MySQL: sized QueuePool with pre-ping and recycling, so connections dropped
+  by wait_timeout are replaced instead of failing a request;
+- SQLite files: WAL journal and pragmas set on every new connection, so
+  readers no longer block the writer in dev/test;
+- SQLite in memory: left to Flask-SQLAlchemy (StaticPool, one connection).
+
+Queue pools are TimedQueuePool instances, which also measure how long each
+checkout waited for a free connection; pool_stats() reports it.
+"""
+import time
+from threading import Lock
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA foreign_keys=ON',
+    'PRAGMA busy_timeout=5000',
+)
+
+DEFAULT_POOL_SETTINGS = {
+    'SQLALCHEMY_POOL_SIZE': 10,
+    'SQLALCHEMY_MAX_OVERFLOW': 20,
+    'SQLALCHEMY_POOL_RECYCLE': 3600,
+    'SQLALCHEMY_POOL_TIMEOUT': 30,
+}
+
+
+class PoolWaitStats:
+    """Checkout count, wait time and timeouts of one pool."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return conn
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def build_engine_options(uri: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Engine options for uri given the SQLALCHEMY_POOL_* settings."""
+    url = make_url(uri)
+    if _is_memory_sqlite(url):
+        return {}
+    options = {'poolclass': TimedQueuePool}
+    if url.get_backend_name() == 'mysql':
+        options.update(
+            pool_size=settings['SQLALCHEMY_POOL_SIZE'],
+            max_overflow=settings['SQLALCHEMY_MAX_OVERFLOW'],
+            pool_recycle=settings['SQLALCHEMY_POOL_RECYCLE'],
+            pool_timeout=settings['SQLALCHEMY_POOL_TIMEOUT'],
+            pool_pre_ping=True,
+        )
+    elif url.get_backend_name() == 'sqlite':
+        # SQLite serializes writers anyway; a few pooled connections suffice
+        options.update(pool_size=5, max_overflow=10,
+                       pool_timeout=settings['SQLALCHEMY_POOL_TIMEOUT'],
+                       connect_args={'check_same_thread': False})
+    return options
+
+
+def configure_engine_options(app) -> None:
+    """Fill SQLALCHEMY_ENGINE_OPTIONS from the pool settings (explicit options win).
+
+    Must run before db.init_app(app).
+    """
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI')
+    if not uri:
+        return
+    settings = {key: app.config.get(key, default) for key, default in DEFAULT_POOL_SETTINGS.items()}
+    options = build_engine_options(uri, settings)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def install_sqlite_pragmas(engine) -> None:
+    """Run SQLITE_PRAGMAS on every new connection of a file-backed SQLite engine."""
+    if engine.url.get_backend_name() == 'sqlite' and not _is_memory_sqlite(engine.url):
+        if not event.contains(engine, 'connect', _set_sqlite_pragmas):
+            event.listen(engine, 'connect', _set_sqlite_pragmas)
+
+
+def pool_stats(engine) -> Dict[str, Any]:
+    """Size, checked-out connections, overflow and checkout wait times of engine's pool."""
+    pool = engine.pool
+    stats = {
+        'backend': engine.url.get_backend_name(),
+        'pool_class': type(pool).__name__,
+        'status': pool.status(),
+    }
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    if isinstance(pool, TimedQueuePool):
+        stats['wait'] = pool.wait_stats.to_dict()
+    return stats
@@ -0,0 +1,65 @@
+"""In-process indexes of an engine, loaded from the database on first use and
+kept current from this process's commits (fulltext, autocomplete).
+
+A load runs outside the lock: under run_sync its queries yield to the event
+loop, and another request blocking on the lock would stall that loop. Commits
+can therefore land while it reads. Each load registers a journal before its
+queries; a commit is applied to the installed indexes and appended to the
+open journals, and the loader replays its journal into the index it installs,
+under the lock acquisition that closes the journal.
+"""
+import weakref
+from threading import Lock
+
+
+class EngineIndexes:
+    """One index per engine; apply(index, changes) applies a commit's changes."""
+
+    def __init__(self, apply):
+        self._apply = apply
+        self._indexes = weakref.WeakKeyDictionary()
+        self._journals = weakref.WeakKeyDictionary()
+        self.lock = Lock()
+
+    def get(self, engine, load):
+        """The index of engine, built by load(engine) on first use."""
+        index = self._indexes.get(engine)
+        if index is not None:
+            return index
+        journal = []
+        with self.lock:
+            self._journals.setdefault(engine, []).append(journal)
+        try:
+            index = load(engine)
+        except BaseException:
+            with self.lock:
+                self._close(engine, journal)
+            raise
+        with self.lock:
+            self._close(engine, journal)
+            installed = self._indexes.get(engine)
+            if installed is not None:
+                return installed
+            for changes in journal:
+                self._apply(index, changes)
+            self._indexes[engine] = index
+            return index
+
+    def _close(self, engine, journal) -> None:
+        # By identity: the journals of concurrent loads may be equal lists
+        journals = self._journals[engine]
+        del journals[next(i for i, open_journal in enumerate(journals) if open_journal is journal)]
+
+    def discard(self, engine) -> None:
+        """Drop the index of engine; the next get() loads it again."""
+        with self.lock:
+            self._indexes.pop(engine, None)
+
+    def commit(self, changes) -> None:
+        """Apply committed changes to the indexes, and journal them for the loads in flight."""
+        with self.lock:
+            for index in list(self._indexes.values()):
+                self._apply(index, changes)
+            for journals in list(self._journals.values()):
+                for journal in journals:
+                    journal.append(changes)
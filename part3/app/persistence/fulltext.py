@@ -0,0 +1,198 @@
+"""Full-text search on place title and description.
+
+The text index depends on the database behind the session:
+
+- SQLite with FTS5: a places_fts external-content table (porter tokenizer),
+  kept in step with places by triggers, ranked with bm25();
+- MySQL: a FULLTEXT index on (title, description), ranked by MATCH ... AGAINST;
+- anything else, or a database created before the index existed: an
+  in-process utils.text_search.InvertedIndex, loaded from the places table
+  on first search and updated from committed Place changes of this process
+  (those committed while it loads included, see app.persistence.engine_indexes).
+
+attach_fulltext(Place) creates the SQLite and MySQL indexes together with
+the places table (db.create_all). For existing databases run
+ensure_fulltext(engine) once. An SQLite VACUUM may renumber the places rowids
+the FTS table points at; run rebuild_fulltext(engine) after one.
+"""
+import weakref
+
+from sqlalchemy import DDL, event, inspect, select, text
+from sqlalchemy.orm import Session
+
+from app.persistence.engine_indexes import EngineIndexes
+from utils.text_search import PLACE_FIELDS, InvertedIndex, tokenize
+
+FTS_TABLE = 'places_fts'
+FTS5_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, description, content='places', "
+    "tokenize='porter unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON places BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description) "
+    "VALUES (new.rowid, new.title, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON places BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON places BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description) "
+    "VALUES (new.rowid, new.title, new.description); END",
+)
+FTS5_DROP = f"DROP TABLE IF EXISTS {FTS_TABLE}"
+FTS5_REBUILD = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+MYSQL_FULLTEXT_DDL = "ALTER TABLE places ADD FULLTEXT INDEX ft_places_text (title, description)"
+
+FTS5_SEARCH = text(
+    f"SELECT places.id, -bm25({FTS_TABLE}, "
+    f"{PLACE_FIELDS['title']}, {PLACE_FIELDS['description']}) AS score "
+    f"FROM {FTS_TABLE} JOIN places ON places.rowid = {FTS_TABLE}.rowid "
+    f"WHERE {FTS_TABLE} MATCH :match ORDER BY score DESC, places.id LIMIT :limit"
+)
+MYSQL_SEARCH = text(
+    "SELECT id, MATCH(title, description) AGAINST (:match IN NATURAL LANGUAGE MODE) AS score "
+    "FROM places WHERE MATCH(title, description) AGAINST (:match IN NATURAL LANGUAGE MODE) "
+    "ORDER BY score DESC, id LIMIT :limit"
+)
+
+CHANGES_KEY = 'fulltext_changes'
+
+_backends = weakref.WeakKeyDictionary()
+_model = None
+
+
+def _has_fts5(connection) -> bool:
+    options = {row[0] for row in connection.exec_driver_sql('PRAGMA compile_options')}
+    return 'ENABLE_FTS5' in options
+
+
+def _sqlite_with_fts5(ddl, target, bind, **kw) -> bool:
+    return bind.dialect.name == 'sqlite' and _has_fts5(bind)
+
+
+def attach_fulltext(model) -> None:
+    """Create the text index with model's table, and keep the in-process
+    fallback index in step with committed changes to model."""
+    global _model
+    _model = model
+    table = getattr(model, '__table__', None)
+    if table is None:
+        # Not mapped (yet): no table whose creation could carry the index
+        return
+    for statement in FTS5_DDL:
+        event.listen(table, 'after_create', DDL(statement).execute_if(callable_=_sqlite_with_fts5))
+    event.listen(table, 'after_create', DDL(MYSQL_FULLTEXT_DDL).execute_if(dialect='mysql'))
+    event.listen(table, 'before_drop', DDL(FTS5_DROP).execute_if(dialect='sqlite'))
+
+
+def ensure_fulltext(engine) -> str:
+    """Create the text index of an existing places table; returns the backend in use."""
+    with engine.begin() as conn:
+        if conn.dialect.name == 'sqlite' and _has_fts5(conn):
+            if not inspect(conn).has_table(FTS_TABLE):
+                for statement in FTS5_DDL:
+                    conn.exec_driver_sql(statement)
+                conn.exec_driver_sql(FTS5_REBUILD)
+        elif conn.dialect.name == 'mysql' and _detect(conn) != 'mysql':
+            conn.exec_driver_sql(MYSQL_FULLTEXT_DDL)
+    _backends.pop(engine, None)
+    return backend(engine)
+
+
+def rebuild_fulltext(engine) -> None:
+    """Rebuild the text index from the places table."""
+    if backend(engine) == 'fts5':
+        with engine.begin() as conn:
+            conn.exec_driver_sql(FTS5_REBUILD)
+    _indexes.discard(engine)
+
+
+def _detect(conn) -> str:
+    if conn.dialect.name == 'sqlite':
+        return 'fts5' if inspect(conn).has_table(FTS_TABLE) else 'memory'
+    if conn.dialect.name == 'mysql':
+        found = conn.exec_driver_sql(
+            "SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() "
+            "AND table_name = 'places' AND index_type = 'FULLTEXT' LIMIT 1").first()
+        return 'mysql' if found else 'memory'
+    return 'memory'
+
+
+def backend(engine) -> str:
+    """'fts5', 'mysql' or 'memory': the text index used for engine."""
+    name = _backends.get(engine)
+    if name is None:
+        with engine.connect() as conn:
+            name = _detect(conn)
+        _backends[engine] = name
+    return name
+
+
+def _load(engine) -> InvertedIndex:
+    index = InvertedIndex(PLACE_FIELDS)
+    with engine.connect() as conn:
+        rows = conn.execute(select(_model.id, _model.title, _model.description))
+        for place_id, title, description in rows:
+            index.add(place_id, {'title': title, 'description': description})
+    return index
+
+
+def _apply(index, changes):
+    for place_id, document in changes.items():
+        if document is None:
+            index.remove(place_id)
+        else:
+            index.add(place_id, document)
+
+
+# Loads and commits racing: see app.persistence.engine_indexes
+_indexes = EngineIndexes(_apply)
+
+
+def search(session, query: str, limit: int):
+    """(score, place id) of the places best matching query, best first."""
+    terms = tokenize(query)
+    if not terms:
+        return []
+    # One engine for detection and query (a RoutingSession may pick a replica)
+    engine = session.get_bind(mapper=inspect(_model))
+    name = backend(engine)
+    if name == 'fts5':
+        # Tokens are alphanumeric, so quoting them is enough to escape FTS5 syntax
+        match = ' OR '.join(f'"{term}"' for term in dict.fromkeys(terms))
+        rows = session.execute(FTS5_SEARCH, {'match': match, 'limit': limit},
+                               bind_arguments={'bind': engine})
+        return [(score, place_id) for place_id, score in rows]
+    if name == 'mysql':
+        rows = session.execute(MYSQL_SEARCH, {'match': ' '.join(terms), 'limit': limit},
+                               bind_arguments={'bind': engine})
+        return [(float(score), place_id) for place_id, score in rows]
+    return _indexes.get(engine, _load).search(query, limit)
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_changes(session, flush_context):
+    # Recorded even before an index exists: one may start loading before the commit
+    if _model is None:
+        return
+    changes = session.info.setdefault(CHANGES_KEY, {})
+    for obj in session.new.union(session.dirty):
+        if isinstance(obj, _model):
+            changes[obj.id] = {'title': obj.title, 'description': obj.description}
+    for obj in session.deleted:
+        if isinstance(obj, _model):
+            changes[obj.id] = None
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_changes(session):
+    changes = session.info.pop(CHANGES_KEY, None)
+    if not changes:
+        return
+    _indexes.commit(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop(CHANGES_KEY, None)
@@ -0,0 +1,100 @@
+"""Place rating aggregates: places.rating_sum / rating_count.
+
+attach_rating_aggregates(Place, Review) keeps them in step from mapper
+events: every review insert, update and delete adjusts the place row with an
+atomic "col = col + delta" UPDATE on the flush connection, so the aggregates
+commit (or roll back) together with the review itself, including reviews
+removed by cascades from a deleted user or place. Review rating and place_id
+must load their old value on change (active_history), as in app/models.
+
+Writes that bypass the ORM are not seen: recompute_rating_aggregates()
+rebuilds both columns from the reviews table (`flask recompute-ratings`).
+"""
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.util import identity_key
+
+DIRTY_PLACES_KEY = 'rating_aggregate_place_ids'
+
+# _RatingAggregates of each attached place model
+_aggregates = {}
+
+
+class _RatingAggregates:
+    """The review listeners of one place model / review model pair."""
+
+    def __init__(self, place_model, review_model):
+        self.place_model = place_model
+        self.review_model = review_model
+
+    def adjust(self, connection, target, place_id, rating_delta, count_delta):
+        places = self.place_model.__table__
+        connection.execute(
+            places.update()
+            .where(places.c.id == place_id)
+            .values(rating_sum=places.c.rating_sum + rating_delta,
+                    rating_count=places.c.rating_count + count_delta)
+        )
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(DIRTY_PLACES_KEY, set()).add((self.place_model, place_id))
+
+    def review_inserted(self, mapper, connection, target):
+        self.adjust(connection, target, target.place_id, target.rating, 1)
+
+    def review_updated(self, mapper, connection, target):
+        state = inspect(target)
+        rating_history = state.attrs.rating.history
+        place_history = state.attrs.place_id.history
+        if not rating_history.has_changes() and not place_history.has_changes():
+            return
+        old_rating = rating_history.deleted[0] if rating_history.deleted else target.rating
+        old_place_id = place_history.deleted[0] if place_history.deleted else target.place_id
+        self.adjust(connection, target, old_place_id, -old_rating, -1)
+        self.adjust(connection, target, target.place_id, target.rating, 1)
+
+    def review_deleted(self, mapper, connection, target):
+        self.adjust(connection, target, target.place_id, -target.rating, -1)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _expire_place_ratings(session, flush_context):
+    """The UPDATEs above bypass the ORM; expire cached aggregates on loaded places."""
+    place_keys = session.info.pop(DIRTY_PLACES_KEY, None)
+    if not place_keys:
+        return
+    for place_model, place_id in place_keys:
+        place = session.identity_map.get(identity_key(place_model, place_id))
+        if place is not None:
+            session.expire(place, ['rating_sum', 'rating_count'])
+
+
+def attach_rating_aggregates(place_model, review_model) -> None:
+    """Keep place_model's rating_sum / rating_count in step with review_model writes."""
+    if place_model in _aggregates:
+        return
+    _aggregates[place_model] = target = _RatingAggregates(place_model, review_model)
+    event.listen(review_model, 'after_insert', target.review_inserted)
+    event.listen(review_model, 'after_update', target.review_updated)
+    event.listen(review_model, 'after_delete', target.review_deleted)
+
+
+def recompute_rating_aggregates(session, place_model) -> int:
+    """Rebuild rating_sum / rating_count of every place_model row from the reviews
+    table in one UPDATE with correlated subqueries (repair job for drifted
+    aggregates). Returns the number of places updated."""
+    places = place_model.__table__
+    reviews = _aggregates[place_model].review_model.__table__
+    rating_sum = (
+        select(func.coalesce(func.sum(reviews.c.rating), 0))
+        .where(reviews.c.place_id == places.c.id)
+        .scalar_subquery()
+    )
+    rating_count = (
+        select(func.count(reviews.c.id))
+        .where(reviews.c.place_id == places.c.id)
+        .scalar_subquery()
+    )
+    result = session.execute(update(places).values(rating_sum=rating_sum, rating_count=rating_count))
+    session.expire_all()
+    return result.rowcount
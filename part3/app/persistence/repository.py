@@ -1,9 +1,13 @@
 """Repository abstraction and implementations.
-   InMemoryRepository: existing in-memory store.
+   InMemoryRepository: existing in-memory store, with optional hash indexes on declared fields
+   and an optional spatial index on a (latitude, longitude) pair.
    SQLAlchemyRepository: db.session-backed store; generic, reusable for any mapped model."""
 from abc import ABC, abstractmethod
 
 from app import db
+from utils.geo import GeoIndex
+from utils.loading import loader_options
+from utils.pagination import DEFAULT_LIMIT, KeysetIndex, decode_cursor, encode_cursor, cursor_key
 
 
 class Repository(ABC):
@@ -33,15 +37,67 @@ class Repository(ABC):
     def get_by_attribute(self, attr_name, attr_value):
         pass
 
+    @abstractmethod
+    def get_page(self, cursor=None, limit=DEFAULT_LIMIT):
+        """Return (objects, next_cursor): up to limit objects after cursor, ordered by
+        (created_at, id). next_cursor is None on the last page."""
+        pass
+
 
 class InMemoryRepository(Repository):
-    """In-memory implementation of Repository."""
+    """In-memory implementation of Repository.
+    indexed_fields: attribute names kept in hash indexes (value -> objects), so that
+    get_by_attribute on them is O(1) instead of a scan over every stored object.
+    geo_fields: (latitude, longitude) attribute names kept in a GeoIndex for
+    get_within/get_nearest; objects missing either coordinate are not indexed."""
 
-    def __init__(self):
+    def __init__(self, indexed_fields=(), geo_fields=None):
         self._storage = {}
+        self._indexes = {field: {} for field in indexed_fields}
+        self._index_keys = {}
+        self._keyset = KeysetIndex()
+        self._geo_fields = geo_fields
+        self._geo = GeoIndex() if geo_fields else None
+
+    def _index(self, obj):
+        if self._geo is not None:
+            latitude, longitude = (getattr(obj, field, None) for field in self._geo_fields)
+            if latitude is not None and longitude is not None:
+                self._geo.add(obj.id, latitude, longitude)
+        if not self._indexes:
+            return
+        keys = {}
+        for field, index in self._indexes.items():
+            value = getattr(obj, field, None)
+            index.setdefault(value, {})[obj.id] = obj
+            keys[field] = value
+        self._index_keys[obj.id] = keys
+
+    def _unindex(self, obj_id):
+        if self._geo is not None:
+            self._geo.remove(obj_id)
+        keys = self._index_keys.pop(obj_id, None)
+        if not keys:
+            return
+        for field, value in keys.items():
+            index = self._indexes[field]
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.pop(obj_id, None)
+                if not bucket:
+                    del index[value]
+
+    def reindex(self, obj):
+        """Refresh the index entries of obj after it was mutated outside update()."""
+        self._unindex(obj.id)
+        if obj.id in self._storage:
+            self._index(obj)
 
     def add(self, obj):
+        self._unindex(obj.id)
         self._storage[obj.id] = obj
+        self._index(obj)
+        self._keyset.add(obj)
 
     def get(self, obj_id):
         return self._storage.get(obj_id)
@@ -52,36 +108,67 @@ class InMemoryRepository(Repository):
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
-            obj.update(data)
+            try:
+                obj.update(data)
+            finally:
+                self.reindex(obj)
 
     def delete(self, obj_id):
         if obj_id in self._storage:
+            self._unindex(obj_id)
+            self._keyset.remove(obj_id)
             del self._storage[obj_id]
 
     def get_by_attribute(self, attr_name, attr_value):
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            bucket = index.get(attr_value)
+            return next(iter(bucket.values())) if bucket else None
         return next(
             (obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value),
             None,
         )
 
+    def get_page(self, cursor=None, limit=DEFAULT_LIMIT):
+        ids, next_cursor = self._keyset.page(cursor, limit)
+        return [self._storage[obj_id] for obj_id in ids], next_cursor
+
+    def get_within(self, latitude, longitude, radius_km, limit=None):
+        """Objects within radius_km of a point as [(obj, distance_km)], nearest first."""
+        hits = self._geo.within(latitude, longitude, radius_km)
+        return [(self._storage[obj_id], distance) for distance, obj_id in hits[:limit]]
+
+    def get_nearest(self, latitude, longitude, k):
+        """The k objects nearest to a point as [(obj, distance_km)], nearest first."""
+        return [(self._storage[obj_id], distance)
+                for distance, obj_id in self._geo.nearest(latitude, longitude, k)]
+
 
 class SQLAlchemyRepository(Repository):
     """SQLAlchemy-backed repository implementing the Repository interface.
     Generic and reusable for any Flask-SQLAlchemy model. Uses db.session for all operations.
-    DB init (create_all, migrations) is deferred; model mapping is done in a later task."""
+    DB init (create_all, migrations) is deferred; model mapping is done in a later task.
+    db.session is a RoutingSession: reads go to replicas when SQLALCHEMY_REPLICA_BINDS is set.
+    Writes are only flushed; the caller's unit_of_work() (app.persistence.unit_of_work) commits."""
 
     def __init__(self, model_class):
         self._model = model_class
 
     def add(self, obj):
         db.session.add(obj)
-        db.session.commit()
+        db.session.flush()
 
-    def get(self, obj_id):
-        return db.session.get(self._model, obj_id)
+    def _query(self, profile=None):
+        """Query on the model with the loader options of a loading profile."""
+        return db.session.query(self._model).options(*loader_options(self._model, profile))
 
-    def get_all(self):
-        return db.session.query(self._model).all()
+    def get(self, obj_id, profile=None):
+        if profile is None:
+            return db.session.get(self._model, obj_id)
+        return db.session.get(self._model, obj_id, options=loader_options(self._model, profile))
+
+    def get_all(self, profile=None):
+        return self._query(profile).all()
 
     def update(self, obj_id, data):
         obj = self.get(obj_id)
@@ -93,13 +180,13 @@ class SQLAlchemyRepository(Repository):
             for k, v in data.items():
                 if hasattr(obj, k):
                     setattr(obj, k, v)
-        db.session.commit()
+        db.session.flush()
 
     def delete(self, obj_id):
         obj = self.get(obj_id)
         if obj:
             db.session.delete(obj)
-            db.session.commit()
+            db.session.flush()
 
     def get_by_attribute(self, attr_name, attr_value):
         return (
@@ -108,6 +195,24 @@ class SQLAlchemyRepository(Repository):
             .first()
         )
 
+    def get_page(self, cursor=None, limit=DEFAULT_LIMIT, profile=None):
+        """Keyset page: WHERE (created_at, id) > cursor ORDER BY created_at, id LIMIT n.
+        Served by the (created_at, id) index, so deep pages cost the same as the first.
+        profile names the relationships to eager-load for the whole page (utils.loading)."""
+        from sqlalchemy import and_, or_
+        model = self._model
+        query = self._query(profile).order_by(model.created_at, model.id)
+        if cursor:
+            created_at, obj_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                model.created_at > created_at,
+                and_(model.created_at == created_at, model.id > obj_id),
+            ))
+        rows = query.limit(limit + 1).all()
+        items = rows[:limit]
+        next_cursor = encode_cursor(cursor_key(items[-1])) if len(rows) > limit else None
+        return items, next_cursor
+
 
 class UserRepository(SQLAlchemyRepository):
     """Repository bound to User model. Adds user-specific query by email."""
@@ -0,0 +1,150 @@
+"""Read-replica routing for db.session.
+
+RoutingSession picks the engine per statement:
+
+- flushes and INSERT/UPDATE/DELETE statements go to the primary, and mark
+  the tables they touch as written;
+- once a session has written, all its later reads go to the primary too
+  (read-after-write within a request: the Flask-SQLAlchemy session lives for
+  one app context);
+- a read touching a table written (by any session of this process) less
+  than REPLICA_STALENESS_SECONDS ago goes to the primary, so a client does
+  not read its own write back from a replica that has not caught up yet;
+- any other read goes to one of the replica binds, round-robin.
+
+Replicas are ordinary SQLALCHEMY_BINDS entries listed in
+SQLALCHEMY_REPLICA_BINDS. Without replicas the session behaves exactly like
+the Flask-SQLAlchemy one.
+"""
+import itertools
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+from flask import current_app, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.util import find_tables
+
+WROTE_KEY = 'routing_wrote'
+FORCE_PRIMARY_KEY = 'routing_force_primary'
+DEFAULT_STALENESS_SECONDS = 5.0
+
+
+class ReplicaRouter:
+    """Replica bind keys, round-robin choice and recent writes per table."""
+
+    def __init__(self, replica_binds, staleness=DEFAULT_STALENESS_SECONDS, clock=time.monotonic):
+        self.replica_binds = list(replica_binds)
+        self.staleness = staleness
+        self._clock = clock
+        self._cycle = itertools.cycle(self.replica_binds)
+        self._written = {}
+        self._lock = Lock()
+
+    def next_replica(self):
+        with self._lock:
+            return next(self._cycle)
+
+    def mark_written(self, table_names):
+        now = self._clock()
+        with self._lock:
+            for name in table_names:
+                self._written[name] = now
+
+    def recently_written(self, table_names):
+        """True if any of table_names was written within the staleness window."""
+        horizon = self._clock() - self.staleness
+        return any(self._written.get(name, float('-inf')) > horizon for name in table_names)
+
+
+def init_replicas(app):
+    """Register a ReplicaRouter for app from its config (no-op without replicas)."""
+    replica_binds = app.config.get('SQLALCHEMY_REPLICA_BINDS') or ()
+    unknown = set(replica_binds) - set(app.config.get('SQLALCHEMY_BINDS') or {})
+    if unknown:
+        raise ValueError(f"Replica binds missing from SQLALCHEMY_BINDS: {', '.join(sorted(unknown))}")
+    if replica_binds:
+        app.extensions['replica_router'] = ReplicaRouter(
+            replica_binds,
+            app.config.get('REPLICA_STALENESS_SECONDS', DEFAULT_STALENESS_SECONDS),
+        )
+
+
+def _router():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('replica_router')
+
+
+def _statement_tables(mapper, clause):
+    """Names of the tables a statement reads, or None if they cannot be told."""
+    names = set()
+    if mapper is not None:
+        names.update(table.name for table in inspect(mapper).tables)
+    if clause is not None:
+        names.update(getattr(table, 'name', None)
+                     for table in find_tables(clause, include_aliases=True, include_joins=True))
+    names.discard(None)
+    return names or None
+
+
+def _written_tables(obj):
+    """Tables written when obj is flushed, including its association tables."""
+    mapper = inspect(obj).mapper
+    names = {table.name for table in mapper.tables}
+    names.update(rel.secondary.name for rel in mapper.relationships
+                 if rel.secondary is not None and hasattr(rel.secondary, 'name'))
+    return names
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session sending reads to replicas and writes to the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        router = _router()
+        # Explicit binds and models with their own bind_key are never rerouted
+        if bind is not None or router is None or engine is not self._db.engines.get(None):
+            return engine
+        if self._flushing:
+            return engine
+        if isinstance(clause, UpdateBase):
+            tables = _statement_tables(mapper, clause)
+            if tables:
+                router.mark_written(tables)
+            self.info[WROTE_KEY] = True
+            return engine
+        if self.info.get(WROTE_KEY) or self.info.get(FORCE_PRIMARY_KEY):
+            return engine
+        tables = _statement_tables(mapper, clause)
+        if tables is None or router.recently_written(tables):
+            return engine
+        return self._db.engines[router.next_replica()]
+
+    @contextmanager
+    def using_primary(self):
+        """Send every statement of the block to the primary.
+
+        db.session is a scoped_session proxy: use db.session().using_primary().
+        """
+        previous = self.info.get(FORCE_PRIMARY_KEY)
+        self.info[FORCE_PRIMARY_KEY] = True
+        try:
+            yield self
+        finally:
+            self.info[FORCE_PRIMARY_KEY] = previous
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_flush(session, flush_context):
+    router = _router()
+    if router is None:
+        return
+    written = set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        written.update(_written_tables(obj))
+    if written:
+        router.mark_written(written)
+        session.info[WROTE_KEY] = True
@@ -0,0 +1,259 @@
+"""Materialized place summaries for the dashboards.
+
+place_stats (a single row, all places) and city_stats (one row per city) hold
+the place count, price sum / min / max and review rating sum / count, so a
+summary read is a primary-key lookup instead of an aggregate over places and
+reviews.
+
+attach_summary(Place, Review) creates both tables with the models' metadata
+(db.create_all) and keeps them in step from mapper events: each place insert,
+price or city change and delete, and each review insert, update and delete
+adjusts the rows with "col = col + delta" statements on the flush connection,
+so they commit or roll back with the change itself. A min / max is recomputed
+from places only when the place holding it leaves the row (idx_places_city
+keeps that cheap per city). Reviews deleted with their place go through the
+ORM cascade first and take their ratings off; the place then takes its price
+off.
+
+Place price / city and Review rating / place_id must load their old value on
+change (active_history), as in app/models. Writes that bypass the ORM (bulk
+UPDATE, raw SQL, another application) are not seen: rebuild_summary()
+recomputes both tables (`flask rebuild-stats`), and has to run once when the
+tables are added to an existing database.
+"""
+from importlib import import_module
+from typing import Any, Dict, Optional
+
+from sqlalchemy import (Column, Float, Integer, Table, bindparam, case, delete, event, func,
+                        insert, inspect, literal, or_, select, update)
+
+from utils.summary import summary
+
+PLACE_STATS = 'place_stats'
+CITY_STATS = 'city_stats'
+ALL_PLACES = 1  # place_stats.id of its single row
+STATS_COLUMNS = ('place_count', 'price_sum', 'price_min', 'price_max', 'rating_sum', 'rating_count')
+
+# _Summary of each attached place model, for the read and rebuild functions
+_summaries = {}
+
+
+def _stats_table(name, metadata, key):
+    return Table(name, metadata, key,
+                 Column('place_count', Integer, nullable=False, default=0),
+                 Column('price_sum', Float, nullable=False, default=0),
+                 Column('price_min', Float),
+                 Column('price_max', Float),
+                 Column('rating_sum', Integer, nullable=False, default=0),
+                 Column('rating_count', Integer, nullable=False, default=0))
+
+
+def _old(target, name):
+    """Value of name as last flushed (before pending changes)."""
+    history = inspect(target).attrs[name].history
+    return history.deleted[0] if history.deleted else getattr(target, name)
+
+
+def _upsert(dialect, table, key, values, changes):
+    """Statements inserting values, or applying changes to the row at key:
+    one upsert on SQLite, PostgreSQL and MySQL, else an UPDATE then an INSERT."""
+    if dialect in ('sqlite', 'postgresql'):
+        statement = import_module(f'sqlalchemy.dialects.{dialect}').insert(table).values(values)
+        return (statement.on_conflict_do_update(index_elements=[key], set_=changes),)
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        return (mysql_insert(table).values(values).on_duplicate_key_update(changes),)
+    return (update(table).where(table.c[key] == bindparam('key')).values(changes),
+            insert(table).values(values))
+
+
+class _Summary:
+    """The stats tables of one Place / Review model pair and their maintenance.
+
+    The statements are built once per dialect and run with bound parameters
+    (key, place_price, rating_delta, count_delta), so the flush events reuse their
+    compiled forms.
+    """
+
+    def __init__(self, place_model, review_model):
+        self.places = place_model.__table__
+        self.reviews = review_model.__table__
+        metadata = self.places.metadata
+        self.place_stats = _stats_table(PLACE_STATS, metadata, Column('id', Integer, primary_key=True))
+        self.city_stats = _stats_table(CITY_STATS, metadata,
+                                       Column('city', self.places.c.city.type, primary_key=True))
+        self._statements = {}
+
+    def _scopes(self, city):
+        """(table, key value) of the rows a place of city counts in."""
+        yield self.place_stats, ALL_PLACES
+        if city:
+            yield self.city_stats, city
+
+    def _build(self, dialect):
+        places, reviews = self.places.c, self.reviews.c
+        # Parameter names must differ from the stats columns, or execute() adds them to the SET
+        price, rating_sum, rating_count = (bindparam('place_price'), bindparam('rating_delta'),
+                                           bindparam('count_delta'))
+        built = {}
+        for table, key in ((self.place_stats, 'id'), (self.city_stats, 'city')):
+            c = table.c
+            row = c[key] == bindparam('key')
+            # Only when the place held the min or max: recompute it from the places left
+            in_scope = [places.city == bindparam('key')] if table is self.city_stats else []
+            built[table] = {
+                'add': _upsert(dialect, table, key,
+                               {key: bindparam('key'), 'place_count': 1, 'price_sum': price,
+                                'price_min': price, 'price_max': price,
+                                'rating_sum': rating_sum, 'rating_count': rating_count},
+                               {'place_count': c.place_count + 1,
+                                'price_sum': c.price_sum + price,
+                                'price_min': case((or_(c.price_min.is_(None), c.price_min > price), price),
+                                                  else_=c.price_min),
+                                'price_max': case((or_(c.price_max.is_(None), c.price_max < price), price),
+                                                  else_=c.price_max),
+                                'rating_sum': c.rating_sum + rating_sum,
+                                'rating_count': c.rating_count + rating_count}),
+                'remove': (
+                    update(table).where(row).values(
+                        place_count=c.place_count - 1, price_sum=c.price_sum - price,
+                        rating_sum=c.rating_sum - rating_sum, rating_count=c.rating_count - rating_count),
+                    update(table).where(row, or_(c.price_min >= price, c.price_max <= price)).values(
+                        price_min=select(func.min(places.price)).where(*in_scope).scalar_subquery(),
+                        price_max=select(func.max(places.price)).where(*in_scope).scalar_subquery()),
+                ),
+            }
+        city = select(places.city).where(places.id == bindparam('place_id')).scalar_subquery()
+        built['ratings'] = [
+            update(table).where(row).values(rating_sum=table.c.rating_sum + rating_sum,
+                                            rating_count=table.c.rating_count + rating_count)
+            for table, row in ((self.place_stats, self.place_stats.c.id == ALL_PLACES),
+                               (self.city_stats, self.city_stats.c.city == city))]
+        built['drop_city'] = delete(self.city_stats).where(self.city_stats.c.city == bindparam('key'),
+                                                           self.city_stats.c.place_count <= 0)
+        built['place_ratings'] = (select(func.coalesce(func.sum(reviews.rating), 0), func.count())
+                                  .where(reviews.place_id == bindparam('place_id')))
+        return built
+
+    def statements(self, connection):
+        dialect = connection.dialect.name
+        built = self._statements.get(dialect)
+        if built is None:
+            built = self._statements[dialect] = self._build(dialect)
+        return built
+
+    def add_place(self, connection, city, price, rating_sum=0, rating_count=0):
+        statements = self.statements(connection)
+        for table, key in self._scopes(city):
+            params = {'key': key, 'place_price': price, 'rating_delta': rating_sum,
+                      'count_delta': rating_count}
+            upsert, *insert_missing = statements[table]['add']
+            if not connection.execute(upsert, params).rowcount and insert_missing:
+                connection.execute(insert_missing[0], params)
+
+    def remove_place(self, connection, city, price, rating_sum=0, rating_count=0):
+        statements = self.statements(connection)
+        for table, key in self._scopes(city):
+            params = {'key': key, 'place_price': price, 'rating_delta': rating_sum,
+                      'count_delta': rating_count}
+            for statement in statements[table]['remove']:
+                connection.execute(statement, params)
+        if city:
+            connection.execute(statements['drop_city'], {'key': city})
+
+    def adjust_ratings(self, connection, place_id, rating_delta, count_delta):
+        params = {'place_id': place_id, 'rating_delta': rating_delta, 'count_delta': count_delta}
+        for statement in self.statements(connection)['ratings']:
+            connection.execute(statement, params)
+
+    # Mapper events
+
+    def place_inserted(self, mapper, connection, target):
+        self.add_place(connection, target.city, target.price)
+
+    def place_updated(self, mapper, connection, target):
+        old_city, old_price = _old(target, 'city'), _old(target, 'price')
+        if (old_city, old_price) == (target.city, target.price):
+            return
+        # Its reviews move with the place to the new city
+        ratings = (0, 0)
+        if old_city != target.city:
+            ratings = connection.execute(self.statements(connection)['place_ratings'],
+                                         {'place_id': target.id}).one()
+        self.remove_place(connection, old_city, old_price, *ratings)
+        self.add_place(connection, target.city, target.price, *ratings)
+
+    def place_deleted(self, mapper, connection, target):
+        self.remove_place(connection, _old(target, 'city'), _old(target, 'price'))
+
+    def review_inserted(self, mapper, connection, target):
+        self.adjust_ratings(connection, target.place_id, target.rating, 1)
+
+    def review_updated(self, mapper, connection, target):
+        old_rating, old_place_id = _old(target, 'rating'), _old(target, 'place_id')
+        if (old_rating, old_place_id) == (target.rating, target.place_id):
+            return
+        self.adjust_ratings(connection, old_place_id, -old_rating, -1)
+        self.adjust_ratings(connection, target.place_id, target.rating, 1)
+
+    def review_deleted(self, mapper, connection, target):
+        self.adjust_ratings(connection, _old(target, 'place_id'), -_old(target, 'rating'), -1)
+
+    # Reads and repair
+
+    def read(self, connection, table, row) -> Optional[Dict[str, Any]]:
+        found = connection.execute(select(*[table.c[name] for name in STATS_COLUMNS]).where(row)).first()
+        return summary(*found) if found else None
+
+    def rebuild(self, connection) -> int:
+        places, reviews = self.places.c, self.reviews.c
+        ratings = (select(reviews.place_id, func.sum(reviews.rating).label('rating_sum'),
+                          func.count().label('rating_count'))
+                   .group_by(reviews.place_id).subquery('place_ratings'))
+        joined = self.places.outerjoin(ratings, ratings.c.place_id == places.id)
+        totals = (func.count(), func.coalesce(func.sum(places.price), 0), func.min(places.price),
+                  func.max(places.price), func.coalesce(func.sum(ratings.c.rating_sum), 0),
+                  func.coalesce(func.sum(ratings.c.rating_count), 0))
+        connection.execute(delete(self.place_stats))
+        connection.execute(delete(self.city_stats))
+        connection.execute(insert(self.place_stats).from_select(
+            ('id',) + STATS_COLUMNS, select(literal(ALL_PLACES), *totals).select_from(joined)))
+        return connection.execute(insert(self.city_stats).from_select(
+            ('city',) + STATS_COLUMNS,
+            select(places.city, *totals).select_from(joined).group_by(places.city))).rowcount
+
+
+def attach_summary(place_model, review_model) -> None:
+    """Create the place_stats / city_stats tables with place_model's table and
+    keep them in step with place_model and review_model writes."""
+    if not hasattr(place_model, '__table__') or not hasattr(review_model, '__table__'):
+        # Not mapped (yet): no tables to summarize
+        return
+    if place_model in _summaries:
+        return
+    _summaries[place_model] = target = _Summary(place_model, review_model)
+    for model, prefix in ((place_model, 'place'), (review_model, 'review')):
+        for name, action in (('insert', 'inserted'), ('update', 'updated'), ('delete', 'deleted')):
+            event.listen(model, f'after_{name}', getattr(target, f'{prefix}_{action}'))
+
+
+def read_summary(connection, place_model, city: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """utils.summary.summary() of all places, or of city (None if it has no places)."""
+    stats = _summaries[place_model]
+    if city is None:
+        found = stats.read(connection, stats.place_stats, stats.place_stats.c.id == ALL_PLACES)
+        return found or summary(0, 0, None, None, 0, 0)
+    return stats.read(connection, stats.city_stats, stats.city_stats.c.city == city)
+
+
+def read_city_summaries(connection, place_model) -> Dict[str, Dict[str, Any]]:
+    """{city: summary} of every city, the most places first."""
+    table = _summaries[place_model].city_stats
+    rows = connection.execute(select(table.c.city, *[table.c[name] for name in STATS_COLUMNS])
+                              .order_by(table.c.place_count.desc(), table.c.city))
+    return {city: summary(*totals) for city, *totals in rows}
+
+
+def rebuild_summary(connection, place_model) -> int:
+    """Recompute both tables from places and reviews; returns the number of cities."""
+    return _summaries[place_model].rebuild(connection)
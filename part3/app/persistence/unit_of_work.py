@@ -0,0 +1,47 @@
+"""Unit of work over db.session.
+
+Repositories only flush: their writes reach the database inside the
+current transaction (so generated ids, constraints and flush events are
+there), but nothing is committed. The facade wraps each business operation
+in unit_of_work(), which commits once at the end and rolls back on any
+exception, so an operation touching several repositories is all or nothing.
+
+Scopes nest: an operation calling another one joins the enclosing unit of
+work, and only the outermost scope commits or rolls back. An exception
+caught between an inner and the outer scope does not undo what the inner
+scope flushed.
+"""
+from contextlib import contextmanager
+from functools import wraps
+
+from app import db
+
+DEPTH_KEY = 'uow_depth'
+
+
+@contextmanager
+def unit_of_work(session=None):
+    """Commit session once when the outermost scope exits, roll it back on error."""
+    if session is None:
+        session = db.session()
+    depth = session.info.get(DEPTH_KEY, 0)
+    session.info[DEPTH_KEY] = depth + 1
+    try:
+        yield session
+        if depth == 0:
+            session.commit()
+    except BaseException:
+        if depth == 0:
+            session.rollback()
+        raise
+    finally:
+        session.info[DEPTH_KEY] = depth
+
+
+def transactional(func):
+    """Run func in a unit_of_work() on db.session."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with unit_of_work():
+            return func(*args, **kwargs)
+    return wrapper
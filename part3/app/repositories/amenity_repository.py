@@ -1,6 +1,8 @@
 """Amenity repository for database operations."""
+from app import db
 from app.models.amenity import Amenity
 from app.repositories.base_repository import BaseRepository
+from utils.bulk import existing, insert_batch
 
 
 class AmenityRepository(BaseRepository):
@@ -23,6 +25,25 @@ class AmenityRepository(BaseRepository):
         # Save to database
         return self.add(amenity)
     
+    def bulk_create_amenities(self, items, partial=False):
+        """Validate and insert many amenities in one transaction.
+
+        Existing names are resolved with a single IN query. Returns
+        (amenities, errors), errors being [{'index': i, 'error': msg}]. Unless
+        partial is true, nothing is written when any item is invalid.
+        """
+        names = {item['name'].strip() for item in items
+                 if isinstance(item, dict) and isinstance(item.get('name'), str)}
+        taken = existing(db.session, Amenity.name, names)
+
+        def build(item):
+            amenity = Amenity(name=item['name'])
+            if amenity.name in taken:
+                raise ValueError("Amenity with this name already exists")
+            taken.add(amenity.name)
+            return amenity
+        return insert_batch(db.session, items, build, partial)
+    
     def get_amenity_by_name(self, name):
         """Get amenity by name."""
         return self.model.query.filter_by(name=name).first()
@@ -2,6 +2,42 @@
 from app import db
 from app.models.place import Place
 from app.repositories.base_repository import BaseRepository
+from app.persistence import autocomplete, fulltext, summary
+from utils.bulk import checked_id, existing, insert_batch
+from utils.facets import facet_select, facets_from_rows
+from utils.geo import covering_cells, geohash_filter, haversine_km, nearest_search
+from utils.loading import loader_options
+from utils.suggest import DEFAULT_SUGGESTIONS
+from utils.text_search import DEFAULT_SEARCH_LIMIT
+
+
+def place_filter_conditions(filters):
+    """SQL conditions for the filter dict of utils.facets.place_filters()."""
+    conditions = []
+    if 'city' in filters:
+        conditions.append(Place.city == filters['city'])
+    if 'min_price' in filters:
+        conditions.append(Place.price >= filters['min_price'])
+    if 'max_price' in filters:
+        conditions.append(Place.price <= filters['max_price'])
+    if 'min_bedrooms' in filters:
+        conditions.append(Place.bedrooms >= filters['min_bedrooms'])
+    if 'min_bathrooms' in filters:
+        conditions.append(Place.bathrooms >= filters['min_bathrooms'])
+    if 'min_guests' in filters:
+        conditions.append(Place.max_guests >= filters['min_guests'])
+    return conditions
+
+
+def facets_statement(filters):
+    """The utils.facets.facet_select() statement over the places matching filters."""
+    from sqlalchemy import select
+    from app.models import place_amenities
+    from app.models.amenity import Amenity
+    filtered = (select(Place.id, Place.price, Place.city)
+                .where(*place_filter_conditions(filters)).cte('filtered_places'))
+    return facet_select(filtered, place_amenities.c.place_id, place_amenities.c.amenity_id,
+                        Amenity.id, Amenity.name)
 
 
 class PlaceRepository(BaseRepository):
@@ -43,19 +79,66 @@ class PlaceRepository(BaseRepository):
         
         # Save to database
         db.session.add(place)
-        db.session.commit()
+        db.session.flush()
         return place
     
-    def get_place_with_relationships(self, place_id):
-        """Get a place with all relationships loaded."""
-        from sqlalchemy.orm import joinedload
-        place = self.model.query.options(
-            joinedload(Place.owner),
-            joinedload(Place.reviews),
-            joinedload(Place.amenities)
-        ).get(place_id)
+    def bulk_create_places(self, items, partial=False):
+        """Validate and insert many places in one transaction.
+
+        Owner and amenity ids of the whole batch are resolved with one IN query
+        each, and the places and their amenity links are flushed as batched
+        INSERTs in the caller's unit of work. Returns (places, errors), errors
+        being [{'index': i, 'error': msg}]. Unless partial is true, nothing is
+        written when any item is invalid.
+        """
+        from app.models.amenity import Amenity
+        from app.models.user import User
+        # Only well-typed ids are looked up; _build_place reports the others per item
+        dicts = [item for item in items if isinstance(item, dict)]
+        owner_ids = {item['owner_id'] for item in dicts if isinstance(item.get('owner_id'), str)}
+        amenity_ids = {amenity_id for item in dicts if isinstance(item.get('amenities'), list)
+                       for amenity_id in item['amenities'] if isinstance(amenity_id, str)}
+        owners = existing(db.session, User.id, owner_ids)
+        amenities = {}
+        if amenity_ids:
+            amenities = {a.id: a for a in Amenity.query.filter(Amenity.id.in_(amenity_ids))}
+        return insert_batch(db.session, items,
+                            lambda item: self._build_place(item, owners, amenities), partial)
+
+    @staticmethod
+    def _build_place(place_data, owners, amenities):
+        """Build (but do not add) a Place from bulk input; model validators apply."""
+        checked_id(place_data, 'owner_id', owners, "Owner not found")
+        amenity_ids = place_data.get('amenities') or []
+        if not isinstance(amenity_ids, list) or not all(isinstance(a, str) for a in amenity_ids):
+            raise ValueError("amenities must be a list of amenity ids")
+        missing = [a for a in amenity_ids if a not in amenities]
+        if missing:
+            raise ValueError(f"Amenities not found: {', '.join(missing)}")
+        place = Place(
+            title=place_data['title'],
+            description=place_data['description'],
+            price=place_data['price'],
+            address=place_data.get('address', ''),
+            city=place_data.get('city', ''),
+            max_guests=place_data.get('max_guests', 1),
+            bedrooms=place_data.get('bedrooms', 1),
+            bathrooms=place_data.get('bathrooms', 1),
+            owner_id=place_data['owner_id']
+        )
+        if 'latitude' in place_data:
+            place.latitude = place_data['latitude']
+        if 'longitude' in place_data:
+            place.longitude = place_data['longitude']
+        place.amenities = [amenities[a] for a in dict.fromkeys(amenity_ids)]
         return place
     
+    def get_place_with_relationships(self, place_id, profile='place.detail'):
+        """Get a place with the relationships of a loading profile loaded.
+        The default profile covers Place.to_dict_with_relationships in 3 queries
+        (place + owner, reviews, amenities) whatever the review count."""
+        return db.session.get(Place, place_id, options=loader_options(Place, profile))
+    
     def get_places_by_owner(self, owner_id):
         """Get all places owned by a user."""
         return self.model.query.filter_by(owner_id=owner_id).all()
@@ -64,12 +147,50 @@ class PlaceRepository(BaseRepository):
         """Get all places in a specific city."""
         return self.model.query.filter_by(city=city).all()
     
-    def search_places(self, search_term):
-        """Search places by title or description."""
-        return self.model.query.filter(
-            (Place.title.ilike(f'%{search_term}%')) | 
-            (Place.description.ilike(f'%{search_term}%'))
-        ).all()
+    def search_places(self, search_term, limit=DEFAULT_SEARCH_LIMIT, profile='place.list'):
+        """Search places by title or description, best match first.
+        Ranked by the database's text index (FTS5, FULLTEXT) or the in-process
+        BM25 index; see app.persistence.fulltext."""
+        hits = fulltext.search(db.session(), search_term, limit)
+        return [place for place, _ in self._load_hits(hits, profile)]
+    
+    def suggest(self, query, limit=DEFAULT_SUGGESTIONS):
+        """Complete city names, amenity names and place titles, most popular first.
+        Served from an in-process prefix index; see app.persistence.autocomplete."""
+        return autocomplete.suggest(db.session(), query, limit)
+    
+    def _geo_hits(self, latitude, longitude, radius_km):
+        """(distance_km, id) of the places within radius_km: the geohash cells
+        covering the circle are read by index range, then filtered by haversine."""
+        query = db.session.query(Place.id, Place.latitude, Place.longitude).filter(
+            Place.geohash.isnot(None))
+        condition = geohash_filter(Place.geohash, covering_cells(latitude, longitude, radius_km))
+        if condition is not None:
+            query = query.filter(condition)
+        hits = []
+        for place_id, place_lat, place_lng in query:
+            distance = haversine_km(latitude, longitude, place_lat, place_lng)
+            if distance <= radius_km:
+                hits.append((distance, place_id))
+        return hits
+    
+    def _load_hits(self, hits, profile):
+        """[(place, value)] for (distance or score, id) hits, in hit order."""
+        if not hits:
+            return []
+        places = {place.id: place for place in self.model.query.options(
+            *loader_options(Place, profile)).filter(Place.id.in_([pid for _, pid in hits]))}
+        return [(places[pid], value) for value, pid in hits if pid in places]
+    
+    def get_within(self, latitude, longitude, radius_km, limit=None, profile='place.list'):
+        """Places within radius_km of a point as [(place, distance_km)], nearest first."""
+        hits = sorted(self._geo_hits(latitude, longitude, radius_km))
+        return self._load_hits(hits if limit is None else hits[:limit], profile)
+    
+    def get_nearest(self, latitude, longitude, k, profile='place.list'):
+        """The k places nearest to a point as [(place, distance_km)], nearest first."""
+        hits = nearest_search(lambda radius: self._geo_hits(latitude, longitude, radius), k)
+        return self._load_hits(hits, profile)
     
     def get_places_by_price_range(self, min_price, max_price):
         """Get places within a price range."""
@@ -78,24 +199,29 @@ class PlaceRepository(BaseRepository):
             Place.price <= max_price
         ).all()
     
-    def get_places_with_filters(self, filters):
-        """Get places with various filters."""
-        query = self.model.query
-        
-        if 'city' in filters:
-            query = query.filter_by(city=filters['city'])
-        if 'min_price' in filters:
-            query = query.filter(Place.price >= filters['min_price'])
-        if 'max_price' in filters:
-            query = query.filter(Place.price <= filters['max_price'])
-        if 'min_bedrooms' in filters:
-            query = query.filter(Place.bedrooms >= filters['min_bedrooms'])
-        if 'min_bathrooms' in filters:
-            query = query.filter(Place.bathrooms >= filters['min_bathrooms'])
-        if 'min_guests' in filters:
-            query = query.filter(Place.max_guests >= filters['min_guests'])
-        
-        return query.all()
+    def get_places_with_filters(self, filters, profile='place.list'):
+        """Get places with various filters, eager-loading the profile's relationships."""
+        query = self.model.query.options(*loader_options(Place, profile))
+        return query.filter(*place_filter_conditions(filters)).all()
+    
+    def get_facets(self, filters):
+        """Price buckets, places per city and per amenity, and the average price
+        of the places matching filters, from a single statement."""
+        return facets_from_rows(db.session.execute(facets_statement(filters)))
+    
+    def get_summary(self, city=None):
+        """Place count, price and rating summary of all places or of a city, read
+        from the place_stats / city_stats row (None if the city has no places)."""
+        return summary.read_summary(db.session, Place, city)
+    
+    def get_city_summaries(self):
+        """Summary of every city from city_stats, the most places first."""
+        return summary.read_city_summaries(db.session, Place)
+    
+    def rebuild_summary(self):
+        """Recompute place_stats / city_stats from places and reviews. Repair job
+        for writes made outside the ORM. Returns the number of cities."""
+        return summary.rebuild_summary(db.session, Place)
     
     def add_amenity_to_place(self, place_id, amenity_id):
         """Add an amenity to a place."""
@@ -112,7 +238,7 @@ class PlaceRepository(BaseRepository):
         
         if amenity not in place.amenities:
             place.amenities.append(amenity)
-            db.session.commit()
+            db.session.flush()
         
         return place
     
@@ -131,10 +257,16 @@ class PlaceRepository(BaseRepository):
         
         if amenity in place.amenities:
             place.amenities.remove(amenity)
-            db.session.commit()
+            db.session.flush()
         
         return place
     
+    def recompute_rating_aggregates(self):
+        """Rebuild rating_sum/rating_count for every place from the reviews table
+        (app.persistence.ratings). Returns the number of places updated."""
+        from app.persistence.ratings import recompute_rating_aggregates
+        return recompute_rating_aggregates(db.session, Place)
+    
     def get_place_reviews(self, place_id):
         """Get all reviews for a place."""
         place = self.get(place_id)
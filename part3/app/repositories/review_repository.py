@@ -1,6 +1,9 @@
 """Review repository for database operations with relationships."""
+from app import db
 from app.models.review import Review
 from app.repositories.base_repository import BaseRepository
+from utils.bulk import checked_id, existing, insert_batch
+from utils.loading import loader_options
 
 
 class ReviewRepository(BaseRepository):
@@ -31,14 +34,42 @@ class ReviewRepository(BaseRepository):
         # Save to database
         return self.add(review)
     
-    def get_review_with_relationships(self, review_id):
-        """Get a review with all relationships loaded."""
-        from sqlalchemy.orm import joinedload
-        review = self.model.query.options(
-            joinedload(Review.user),
-            joinedload(Review.place)
-        ).get(review_id)
-        return review
+    def bulk_create_reviews(self, items, partial=False):
+        """Validate and insert many reviews in one transaction.
+
+        Users, places and already existing (user, place) reviews of the batch
+        are resolved with one IN query each; the reviews are flushed as one batch.
+        Returns (reviews, errors), errors being [{'index': i, 'error': msg}].
+        Unless partial is true, nothing is written when any item is invalid.
+        """
+        from app.models.place import Place
+        from app.models.user import User
+        # Only well-typed ids are looked up; checked_id reports the others per item
+        dicts = [item for item in items if isinstance(item, dict)]
+        user_ids = {item['user_id'] for item in dicts if isinstance(item.get('user_id'), str)}
+        place_ids = {item['place_id'] for item in dicts if isinstance(item.get('place_id'), str)}
+        users = existing(db.session, User.id, user_ids)
+        places = existing(db.session, Place.id, place_ids)
+        reviewed = set()
+        if users and places:
+            reviewed = set(db.session.query(Review.user_id, Review.place_id).filter(
+                Review.place_id.in_(places), Review.user_id.in_(users)
+            ).all())
+
+        def build(item):
+            pair = (checked_id(item, 'user_id', users, "User not found"),
+                    checked_id(item, 'place_id', places, "Place not found"))
+            if pair in reviewed:
+                raise ValueError("User has already reviewed this place")
+            review = Review(text=item['text'], rating=item['rating'],
+                            user_id=pair[0], place_id=pair[1])
+            reviewed.add(pair)
+            return review
+        return insert_batch(db.session, items, build, partial)
+    
+    def get_review_with_relationships(self, review_id, profile='review.detail'):
+        """Get a review with the relationships of a loading profile loaded."""
+        return db.session.get(Review, review_id, options=loader_options(Review, profile))
     
     def get_by_user_and_place(self, user_id, place_id):
         """Get review by user and place."""
@@ -51,9 +82,11 @@ class ReviewRepository(BaseRepository):
         """Get all reviews by a user."""
         return self.model.query.filter_by(user_id=user_id).all()
     
-    def get_reviews_by_place(self, place_id):
-        """Get all reviews for a place."""
-        return self.model.query.filter_by(place_id=place_id).all()
+    def get_reviews_by_place(self, place_id, profile='review.list'):
+        """Get all reviews for a place, eager-loading the profile's relationships."""
+        return self.model.query.options(
+            *loader_options(Review, profile)
+        ).filter_by(place_id=place_id).all()
     
     def get_reviews_by_rating(self, rating):
         """Get all reviews with a specific rating."""
@@ -71,7 +104,7 @@ class ReviewRepository(BaseRepository):
         return self.model.query.order_by(Review.created_at.desc()).limit(limit).all()
     
     def get_average_rating_for_place(self, place_id):
-        """Get average rating for a place."""
-        from sqlalchemy import func
-        result = db.session.query(func.avg(Review.rating)).filter_by(place_id=place_id).scalar()
-        return float(result) if result else 0.0
+        """Get average rating for a place from its denormalized aggregates."""
+        from app.models.place import Place
+        place = db.session.get(Place, place_id)
+        return place.average_rating() if place else 0.0
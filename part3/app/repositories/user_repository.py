@@ -1,4 +1,5 @@
 """User repository for database operations with relationships."""
+from app import db
 from app.models.user import User
 from app.repositories.base_repository import BaseRepository
 
@@ -15,9 +16,11 @@ class UserRepository(BaseRepository):
         return self.model.query.filter_by(email=email).first()
     
     def authenticate_user(self, email, password):
-        """Authenticate a user by email and password."""
+        """Authenticate a user by email and password.
+        A hash with an outdated work factor is replaced (and flushed) on success."""
         user = self.get_user_by_email(email)
-        if user and user.verify_password(password):
+        if user and user.verify_and_rehash(password):
+            db.session.flush()
             return user
         return None
     
@@ -63,7 +66,7 @@ class UserRepository(BaseRepository):
             if hasattr(user, key):
                 setattr(user, key, value)
         
-        db.session.commit()
+        db.session.flush()
         return user
     
     def get_user_with_relationships(self, user_id):
@@ -1,5 +1,6 @@
 """Amenity service for business logic."""
 from app.services.facade import HBnBFacade
+from utils.bulk import bulk_create
 
 
 class AmenityService:
@@ -25,6 +26,10 @@ class AmenityService:
         except Exception as e:
             return {'error': 'Failed to create amenity'}, 500
     
+    def bulk_create_amenities(self, items, partial=False):
+        """Create many amenities in one transaction, reporting per-item errors."""
+        return bulk_create(items, self.facade.bulk_create_amenities, partial)
+    
     def get_amenity(self, amenity_id):
         """Get an amenity by ID."""
         amenity = self.facade.get_amenity(amenity_id)
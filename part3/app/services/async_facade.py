@@ -0,0 +1,169 @@
+"""Async facade for the ASGI entry point (app/asgi.py).
+
+The same operations as HBnBFacade for the routes served natively under
+asyncio, on AsyncSQLAlchemyRepository. Writes run in an async unit of work
+that commits once when the outermost one returns. Results are model objects;
+serialize them with app.persistence.async_repository.dump() inside the same
+unit of work.
+"""
+from sqlalchemy import select
+
+from app.persistence.async_repository import AsyncSQLAlchemyRepository
+from app.persistence.async_session import async_transactional, current_session
+from utils.pagination import DEFAULT_LIMIT
+from utils.suggest import DEFAULT_SUGGESTIONS
+from utils.text_search import DEFAULT_SEARCH_LIMIT
+
+PLACE_FIELDS = ('title', 'description', 'price', 'address', 'city', 'max_guests',
+                'bedrooms', 'bathrooms', 'latitude', 'longitude', 'owner_id')
+# What a PUT may change: not the owner, nor the derived rating_* / geohash columns
+PLACE_EDITABLE_FIELDS = tuple(field for field in PLACE_FIELDS if field != 'owner_id')
+
+
+class AsyncHBnBFacade:
+    """Async counterpart of HBnBFacade (users, places, reviews, amenities)."""
+
+    def __init__(self):
+        """Initialize facade with async repositories (models imported lazily, as in app.models)."""
+        from app.models.amenity import Amenity
+        from app.models.place import Place
+        from app.models.review import Review
+        from app.models.user import User
+        self.user_repo = AsyncSQLAlchemyRepository(User)
+        self.place_repo = AsyncSQLAlchemyRepository(Place)
+        self.review_repo = AsyncSQLAlchemyRepository(Review)
+        self.amenity_repo = AsyncSQLAlchemyRepository(Amenity)
+
+    # User operations
+    @async_transactional
+    async def create_user(self, user_data):
+        """Create a new user; bcrypt runs on the hashing pool, off the event loop."""
+        from app import password_hasher
+        if await self.user_repo.get_by_attribute('email', user_data.get('email')):
+            raise ValueError("User with this email already exists")
+        user = self.user_repo.model(
+            email=user_data['email'],
+            first_name=user_data['first_name'],
+            last_name=user_data['last_name'],
+            is_admin=user_data.get('is_admin', False)
+        )
+        user.validate_password(user_data['password'])
+        user.password_hash = await password_hasher.hash_async(user_data['password'])
+        await self.user_repo.add(user)
+        return user
+
+    async def get_user(self, user_id):
+        """Get a user by ID."""
+        return await self.user_repo.get(user_id)
+
+    async def get_users_page(self, cursor=None, limit=DEFAULT_LIMIT):
+        """Get one keyset page of users as (users, next_cursor)."""
+        return await self.user_repo.get_page(cursor, limit)
+
+    # Place operations
+    @async_transactional
+    async def create_place(self, place_data):
+        """Create a new place; its amenities are loaded with one IN query."""
+        place = self.place_repo.model(**{
+            'address': '', 'city': '', 'max_guests': 1, 'bedrooms': 1, 'bathrooms': 1,
+            **{key: place_data[key] for key in PLACE_FIELDS if key in place_data},
+        })
+        amenity_ids = list(dict.fromkeys(place_data.get('amenities') or ()))
+        place.amenities = await self.amenity_repo.get_many(amenity_ids)
+        await self.place_repo.add(place)
+        return place
+
+    async def get_place(self, place_id):
+        """Get a place by ID."""
+        return await self.place_repo.get(place_id)
+
+    async def get_all_places(self):
+        """Get all places."""
+        return await self.place_repo.get_all('place.list')
+
+    async def get_places_page(self, cursor=None, limit=DEFAULT_LIMIT):
+        """Get one keyset page of places as (places, next_cursor)."""
+        return await self.place_repo.get_page(cursor, limit, 'place.list')
+
+    @async_transactional
+    async def update_place(self, place_id, place_data):
+        """Update a place; returns None if it does not exist."""
+        return await self.place_repo.update(place_id, place_data, PLACE_EDITABLE_FIELDS)
+
+    @async_transactional
+    async def delete_place(self, place_id):
+        """Delete a place (and its reviews); returns False if it does not exist."""
+        return await self.place_repo.delete(place_id)
+
+    async def search_places(self, search_term, limit=DEFAULT_SEARCH_LIMIT):
+        """Search places by title or description, best match first."""
+        from app.persistence import fulltext
+        hits = await self.place_repo.run_sync(fulltext.search, search_term, limit)
+        return await self.place_repo.get_many([place_id for _, place_id in hits], 'place.list')
+
+    async def suggest(self, query, limit=DEFAULT_SUGGESTIONS):
+        """Autocomplete over city names, amenity names and place titles."""
+        from app.persistence import autocomplete
+        return await self.place_repo.run_sync(autocomplete.suggest, query, limit)
+
+    async def get_place_stats(self, filters):
+        """Facet counts of the places matching filters, in one statement."""
+        from app.repositories.place_repository import facets_statement
+        from utils.facets import facets_from_rows
+        return facets_from_rows(await current_session().execute(facets_statement(filters)))
+
+    async def get_place_summary(self, city=None):
+        """Summary of all places or of a city, from the materialized stats tables."""
+        from app.persistence import summary
+        return await self.place_repo.run_sync(summary.read_summary, self.place_repo.model, city)
+
+    async def get_city_summaries(self):
+        """Summary of every city, the most places first."""
+        from app.persistence import summary
+        return await self.place_repo.run_sync(summary.read_city_summaries, self.place_repo.model)
+
+    # Review operations
+    @async_transactional
+    async def create_review(self, review_data):
+        """Create a new review; a user reviews a place at most once."""
+        model = self.review_repo.model
+        existing = await current_session().scalar(select(model.id).where(
+            model.user_id == review_data['user_id'],
+            model.place_id == review_data['place_id']).limit(1))
+        if existing:
+            raise ValueError("User has already reviewed this place")
+        review = model(text=review_data['text'], rating=review_data['rating'],
+                       user_id=review_data['user_id'], place_id=review_data['place_id'])
+        await self.review_repo.add(review)
+        return review
+
+    async def get_review(self, review_id):
+        """Get a review by ID."""
+        return await self.review_repo.get(review_id)
+
+    async def get_reviews_page(self, cursor=None, limit=DEFAULT_LIMIT):
+        """Get one keyset page of reviews as (reviews, next_cursor)."""
+        return await self.review_repo.get_page(cursor, limit, 'review.list')
+
+    @async_transactional
+    async def delete_review(self, review_id):
+        """Delete a review; returns False if it does not exist."""
+        return await self.review_repo.delete(review_id)
+
+    # Amenity operations
+    @async_transactional
+    async def create_amenity(self, amenity_data):
+        """Create a new amenity with a unique name."""
+        if await self.amenity_repo.get_by_attribute('name', amenity_data['name']):
+            raise ValueError("Amenity with this name already exists")
+        amenity = self.amenity_repo.model(name=amenity_data['name'])
+        await self.amenity_repo.add(amenity)
+        return amenity
+
+    async def get_amenity(self, amenity_id):
+        """Get an amenity by ID."""
+        return await self.amenity_repo.get(amenity_id)
+
+    async def get_amenities_page(self, cursor=None, limit=DEFAULT_LIMIT):
+        """Get one keyset page of amenities as (amenities, next_cursor)."""
+        return await self.amenity_repo.get_page(cursor, limit)
@@ -3,10 +3,18 @@ from app.repositories.user_repository import UserRepository
 from app.repositories.place_repository import PlaceRepository
 from app.repositories.review_repository import ReviewRepository
 from app.repositories.amenity_repository import AmenityRepository
+from app.persistence.unit_of_work import transactional, unit_of_work
+from utils.pagination import DEFAULT_LIMIT
+from utils.suggest import DEFAULT_SUGGESTIONS
+from utils.text_search import DEFAULT_SEARCH_LIMIT
 
 
 class HBnBFacade:
-    """Facade for HBnB business operations with relationships."""
+    """Facade for HBnB business operations with relationships.
+
+    Repositories only flush; every write operation below runs in a unit of
+    work that commits once when it returns and rolls back if it raises.
+    """
     
     def __init__(self):
         """Initialize facade with repositories."""
@@ -15,7 +23,12 @@ class HBnBFacade:
         self.review_repo = ReviewRepository()
         self.amenity_repo = AmenityRepository()
     
+    def unit_of_work(self):
+        """Group several facade operations in one transaction (context manager)."""
+        return unit_of_work()
+    
     # User operations with relationships
+    @transactional
     def create_user(self, user_data):
         """Create a new user."""
         user = self.user_repo.create_user(user_data)
@@ -23,6 +36,16 @@ class HBnBFacade:
             raise ValueError("User with this email already exists")
         return user
     
+    @transactional
+    def update_user(self, user_id, user_data):
+        """Update a user; returns None if it does not exist."""
+        return self.user_repo.update_user(user_id, user_data)
+    
+    @transactional
+    def authenticate_user(self, email, password):
+        """The user with these credentials, or None; an outdated hash is upgraded and committed."""
+        return self.user_repo.authenticate_user(email, password)
+    
     def get_user(self, user_id):
         """Get a user by ID."""
         return self.user_repo.get(user_id)
@@ -40,11 +63,17 @@ class HBnBFacade:
         return self.user_repo.get_user_reviews(user_id)
     
     # Place operations with relationships
+    @transactional
     def create_place(self, place_data):
         """Create a new place with owner relationship."""
         place = self.place_repo.create_place(place_data)
         return place
     
+    @transactional
+    def bulk_create_places(self, items, partial=False):
+        """Create many places in one transaction; returns (places, errors)."""
+        return self.place_repo.bulk_create_places(items, partial)
+    
     def get_place(self, place_id):
         """Get a place by ID."""
         return self.place_repo.get(place_id)
@@ -53,6 +82,43 @@ class HBnBFacade:
         """Get a place with all relationships."""
         return self.place_repo.get_place_with_relationships(place_id)
     
+    def get_places_page(self, cursor=None, limit=DEFAULT_LIMIT):
+        """Get one keyset page of places as (places, next_cursor)."""
+        return self.place_repo.get_page(cursor, limit)
+    
+    def get_place_stats(self, filters):
+        """Facet counts of the places matching filters (see PlaceRepository.get_facets)."""
+        return self.place_repo.get_facets(filters)
+    
+    def get_place_summary(self, city=None):
+        """Summary of all places or of a city, from the materialized stats tables."""
+        return self.place_repo.get_summary(city)
+    
+    def get_city_summaries(self):
+        """Summary of every city, the most places first."""
+        return self.place_repo.get_city_summaries()
+    
+    @transactional
+    def rebuild_place_summary(self):
+        """Recompute the place_stats / city_stats tables; returns the number of cities."""
+        return self.place_repo.rebuild_summary()
+    
+    def search_places(self, search_term, limit=DEFAULT_SEARCH_LIMIT):
+        """Search places by title or description, best match first."""
+        return self.place_repo.search_places(search_term, limit)
+    
+    def suggest(self, query, limit=DEFAULT_SUGGESTIONS):
+        """Autocomplete over city names, amenity names and place titles."""
+        return self.place_repo.suggest(query, limit)
+    
+    def get_places_within(self, latitude, longitude, radius_km, limit=None):
+        """Get places within radius_km of a point as [(place, distance_km)], nearest first."""
+        return self.place_repo.get_within(latitude, longitude, radius_km, limit)
+    
+    def get_nearest_places(self, latitude, longitude, k):
+        """Get the k places nearest to a point as [(place, distance_km)], nearest first."""
+        return self.place_repo.get_nearest(latitude, longitude, k)
+    
     def get_places_by_owner(self, owner_id):
         """Get all places owned by a user."""
         return self.place_repo.get_places_by_owner(owner_id)
@@ -61,19 +127,27 @@ class HBnBFacade:
         """Get all reviews for a place."""
         return self.place_repo.get_place_reviews(place_id)
     
+    @transactional
     def add_amenity_to_place(self, place_id, amenity_id):
         """Add an amenity to a place."""
         return self.place_repo.add_amenity_to_place(place_id, amenity_id)
     
+    @transactional
     def remove_amenity_from_place(self, place_id, amenity_id):
         """Remove an amenity from a place."""
         return self.place_repo.remove_amenity_from_place(place_id, amenity_id)
     
     # Review operations with relationships
+    @transactional
     def create_review(self, review_data):
         """Create a new review with user and place relationships."""
         return self.review_repo.create_review(review_data)
     
+    @transactional
+    def bulk_create_reviews(self, items, partial=False):
+        """Create many reviews in one transaction; returns (reviews, errors)."""
+        return self.review_repo.bulk_create_reviews(items, partial)
+    
     def get_review(self, review_id):
         """Get a review by ID."""
         return self.review_repo.get(review_id)
@@ -91,6 +165,12 @@ class HBnBFacade:
         return self.review_repo.get_reviews_by_place(place_id)
     
     # Amenity operations
+    @transactional
+    def bulk_create_amenities(self, items, partial=False):
+        """Create many amenities in one transaction; returns (amenities, errors)."""
+        return self.amenity_repo.bulk_create_amenities(items, partial)
+    
+    @transactional
     def create_amenity(self, amenity_data):
         """Create a new amenity."""
         try:
@@ -1,5 +1,9 @@
 """Place service for business logic."""
 from app.services.facade import HBnBFacade
+from utils.bulk import bulk_create
+from utils.pagination import DEFAULT_LIMIT, page_headers
+from utils.suggest import DEFAULT_SUGGESTIONS
+from utils.text_search import DEFAULT_SEARCH_LIMIT
 
 
 class PlaceService:
@@ -27,6 +31,10 @@ class PlaceService:
         except Exception as e:
             return {'error': 'Failed to create place'}, 500
     
+    def bulk_create_places(self, items, partial=False):
+        """Create many places in one transaction, reporting per-item errors."""
+        return bulk_create(items, self.facade.bulk_create_places, partial)
+    
     def get_place(self, place_id):
         """Get a place by ID."""
         place = self.facade.get_place(place_id)
@@ -34,10 +42,18 @@ class PlaceService:
             return {'error': 'Place not found'}, 404
         return place.to_dict(), 200
     
-    def get_all_places(self):
-        """Get all places."""
-        places = self.facade.get_all_places()
-        return [place.to_dict() for place in places], 200
+    def get_all_places(self, cursor=None, limit=None, base_url=''):
+        """Get all places as (body, status), or one keyset page of them when cursor or
+        limit is given as (body, status, headers), headers being page_headers()'s."""
+        if cursor is None and limit is None:
+            places = self.facade.get_all_places()
+            return [place.to_dict() for place in places], 200
+        limit = limit or DEFAULT_LIMIT
+        try:
+            places, next_cursor = self.facade.get_places_page(cursor, limit)
+        except ValueError as e:
+            return {'error': str(e)}, 400, {}
+        return [place.to_dict() for place in places], 200, page_headers(base_url, next_cursor, limit)
     
     def update_place(self, place_id, place_data):
         """Update a place."""
@@ -56,11 +72,40 @@ class PlaceService:
             return {'error': 'Place not found'}, 404
         return {'message': 'Place deleted successfully'}, 200
     
-    def search_places(self, search_term):
-        """Search places by title or description."""
-        places = self.facade.search_places(search_term)
+    def get_place_stats(self, filters):
+        """Price buckets, cities, amenities and average price of the filtered places."""
+        return self.facade.get_place_stats(filters), 200
+    
+    def get_place_summary(self, city=None):
+        """Place count, price and rating summary of all places or of a city."""
+        result = self.facade.get_place_summary(city)
+        if result is None:
+            return {'error': 'No places in this city'}, 404
+        return result, 200
+    
+    def get_city_summaries(self):
+        """Summary of every city, the most places first."""
+        return self.facade.get_city_summaries(), 200
+    
+    def search_places(self, search_term, limit=DEFAULT_SEARCH_LIMIT):
+        """Search places by title or description, best match first."""
+        places = self.facade.search_places(search_term, limit)
         return [place.to_dict() for place in places], 200
     
+    def suggest(self, query, limit=DEFAULT_SUGGESTIONS):
+        """Autocomplete over city names, amenity names and place titles, most popular first."""
+        return self.facade.suggest(query, limit), 200
+    
+    def get_places_within(self, latitude, longitude, radius_km, limit=None):
+        """Get places within a radius, nearest first, with their distance in km."""
+        hits = self.facade.get_places_within(latitude, longitude, radius_km, limit)
+        return [dict(place.to_dict(), distance_km=round(distance, 3)) for place, distance in hits], 200
+    
+    def get_nearest_places(self, latitude, longitude, k):
+        """Get the k nearest places with their distance in km."""
+        hits = self.facade.get_nearest_places(latitude, longitude, k)
+        return [dict(place.to_dict(), distance_km=round(distance, 3)) for place, distance in hits], 200
+    
     def get_places_by_city(self, city):
         """Get all places in a city."""
         places = self.facade.get_places_by_city(city)
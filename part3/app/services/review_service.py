@@ -1,5 +1,6 @@
 """Review service for business logic."""
 from app.services.facade import HBnBFacade
+from utils.bulk import bulk_create
 
 
 class ReviewService:
@@ -27,6 +28,10 @@ class ReviewService:
         except Exception as e:
             return {'error': 'Failed to create review'}, 500
     
+    def bulk_create_reviews(self, items, partial=False):
+        """Create many reviews in one transaction, reporting per-item errors."""
+        return bulk_create(items, self.facade.bulk_create_reviews, partial)
+    
     def get_review(self, review_id):
         """Get a review by ID."""
         review = self.facade.get_review(review_id)
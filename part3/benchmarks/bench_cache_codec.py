@@ -0,0 +1,93 @@
+"""Benchmark: DBStorage cache hit (codec decode) vs session.query(...).first().
+
+Usage (from part3/): python benchmarks/bench_cache_codec.py [rows]
+Runs against a SQLite file so the query pays for real I/O. Set HBNB_REDIS_HOST
+to also time a full cache hit (Redis GET + decode) against a live server.
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import Column, DateTime, Float, Integer, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from models.engine.cache_codec import JSONCodec, MsgpackCodec, msgpack
+
+Base = declarative_base()
+
+
+class BenchPlace(Base):
+    __tablename__ = 'bench_places'
+    id = Column(String(36), primary_key=True)
+    title = Column(String(128))
+    description = Column(String(1024))
+    price = Column(Float)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    max_guests = Column(Integer)
+    owner_id = Column(String(36))
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+
+
+def _time(fn, ids, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for obj_id in ids:
+            fn(obj_id)
+    return (time.perf_counter() - start) / (rounds * len(ids)) * 1e6
+
+
+def main(rows=10_000):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(engine)
+    now = datetime.utcnow()
+    ids = [str(uuid.uuid4()) for _ in range(rows)]
+    with Session(engine) as session:
+        session.add_all(BenchPlace(id=i, title=f"Place {n}", description="A quiet place " * 10,
+                                   price=50.0 + n % 300, latitude=48.85, longitude=2.35,
+                                   max_guests=n % 8 + 1, owner_id=ids[0],
+                                   created_at=now, updated_at=now)
+                        for n, i in enumerate(ids))
+        session.commit()
+
+    sample = ids[::max(1, rows // 200)]
+    results = []
+    with Session(engine) as session:
+        def query(obj_id):
+            session.expunge_all()
+            return session.query(BenchPlace).filter_by(id=obj_id).first()
+        results.append(('query().first()', _time(query, sample, rounds=5)))
+
+        codecs = [JSONCodec([BenchPlace])]
+        if msgpack is not None:
+            codecs.append(MsgpackCodec([BenchPlace]))
+        for codec in codecs:
+            store = {i: codec.dumps(session.get(BenchPlace, i)) for i in sample}
+            size = sum(len(v) for v in store.values()) / len(store)
+            results.append((f"{codec.name} decode ({size:.0f} B)",
+                            _time(lambda i: codec.loads(store[i]), sample, rounds=20)))
+
+            if os.getenv('HBNB_REDIS_HOST'):
+                import redis
+                client = redis.Redis(host=os.getenv('HBNB_REDIS_HOST'),
+                                     port=int(os.getenv('HBNB_REDIS_PORT', 6379)))
+                for i, payload in store.items():
+                    client.setex(f"bench_{i}", 60, payload)
+                results.append((f"redis GET + {codec.name} decode",
+                                _time(lambda i: codec.loads(client.get(f"bench_{i}")),
+                                      sample, rounds=5)))
+
+    print(f"{'path':<32} {'us/op':>10}")
+    for name, us in results:
+        print(f"{name:<32} {us:>10.1f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,50 @@
+"""Benchmark: InMemoryRepository.get_by_attribute with and without a hash index.
+
+Usage (from part3/): python benchmarks/bench_repository_index.py [max_size]
+The indexed lookup time should stay flat from 1k to 1M objects, while the scan grows linearly.
+"""
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.persistence.repository import InMemoryRepository
+
+
+class _User:
+    __slots__ = ('id', 'email')
+
+    def __init__(self, i):
+        self.id = str(uuid.uuid4())
+        self.email = f"user{i}@example.com"
+
+
+def _time_lookups(repo, emails, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for email in emails:
+            repo.get_by_attribute('email', email)
+    return (time.perf_counter() - start) / (rounds * len(emails))
+
+
+def main(max_size=1_000_000):
+    sizes = [n for n in (1_000, 10_000, 100_000, 1_000_000) if n <= max_size]
+    print(f"{'objects':>10} {'indexed (us)':>14} {'scan (us)':>12}")
+    for size in sizes:
+        indexed = InMemoryRepository(indexed_fields=('email',))
+        plain = InMemoryRepository()
+        for i in range(size):
+            user = _User(i)
+            indexed.add(user)
+            plain.add(user)
+        # Worst case for the scan: the last inserted emails
+        emails = [f"user{i}@example.com" for i in range(size - 10, size)]
+        indexed_us = _time_lookups(indexed, emails, rounds=1000) * 1e6
+        scan_us = _time_lookups(plain, emails, rounds=1 if size > 10_000 else 10) * 1e6
+        print(f"{size:>10} {indexed_us:>14.3f} {scan_us:>12.1f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,134 @@
+"""Benchmark: place text search, BM25 inverted index and SQLite FTS5 vs. a LIKE scan.
+
+Usage (from part3/): python benchmarks/bench_text_search.py [places] [--no-sql]
+Titles and descriptions are drawn from a 5000-word vocabulary with a Zipf
+skew, so common words match a large share of the places and rare ones a few
+hundred.
+For one-word and two-word queries it times:
+- utils.text_search.InvertedIndex (in-memory facade / fallback backend)
+  against tokenizing every place;
+- the places_fts table of app.persistence.fulltext against
+  title/description LIKE '%word%', as the old PlaceRepository.search_places did.
+Index times follow the postings of the query words, scans grow with the
+table. With 500k places a selective word takes about 1 ms in memory and 2 ms
+with FTS5, against 20 s and 0.5 s for the scans; a word found in half of
+the places still costs a few hundred ms, since every match gets scored.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text
+
+from app.persistence.fulltext import FTS5_DDL, FTS5_SEARCH
+from utils.text_search import InvertedIndex, analyze
+
+QUERIES = 30
+SCANS = 1
+LIMIT = 20
+
+VOCABULARY = 5000
+THEMES = ('cozy quiet sunny bright modern rustic charming spacious historic luxury loft studio '
+         'apartment cottage villa cabin house flat penthouse bungalow beach mountain lake river '
+         'garden terrace balcony pool fireplace view downtown harbour forest vineyard castle '
+         'metro market park family romantic workspace parking sauna library courtyard').split()
+
+
+def _vocabulary(rng):
+    syllables = [c + v for c in 'bdfgklmnprstvz' for v in 'aeiou']
+    words = list(THEMES)
+    seen = set(words)
+    while len(words) < VOCABULARY:
+        word = ''.join(rng.choices(syllables, k=rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def _text(rng, words, weights, count):
+    return ' '.join(rng.choices(words, cum_weights=weights, k=count))
+
+
+def _places(n, rng, words):
+    weights, total = [], 0.0
+    for rank in range(len(words)):
+        total += 1 / (rank + 1)
+        weights.append(total)
+    for i in range(n):
+        yield f'{i:08d}', _text(rng, words, weights, 4).capitalize(), _text(rng, words, weights, 20)
+
+
+def _time(fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def _scan(places, query):
+    terms = set(analyze(query))
+    return {pid for pid, title, description in places
+            if terms.intersection(analyze(title)) or terms.intersection(analyze(description))}
+
+
+def main(size=500_000, sql=True):
+    rng = random.Random(42)
+    words = _vocabulary(rng)
+    places = list(_places(size, rng, words))
+    rare, themed = words[1000:], words[:len(THEMES)]
+    queries = {
+        'rare word': [rng.choice(rare) for _ in range(QUERIES)],
+        'two words': [f'{rng.choice(themed)} {rng.choice(rare)}' for _ in range(QUERIES)],
+        'common word': [rng.choice(words[:5]) for _ in range(QUERIES)],
+    }
+
+    start = time.perf_counter()
+    index = InvertedIndex()
+    for pid, title, description in places:
+        index.add(pid, {'title': title, 'description': description})
+    print(f"{size} places, InvertedIndex built in {time.perf_counter() - start:.1f} s")
+    print(f"{'in-memory':<12} {'index (ms)':>11} {'scan (ms)':>10}")
+    for name, batch in queries.items():
+        hits = {pid for _, pid in index.search(batch[0], size)}
+        assert hits == _scan(places, batch[0]), name
+        print(f"{name:<12} {_time(lambda q: index.search(q, LIMIT), batch):>11.2f} "
+              f"{_time(lambda q: _scan(places, q), batch[:SCANS]):>10.0f}")
+
+    if not sql:
+        return
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.exec_driver_sql('CREATE TABLE places (id VARCHAR(36) PRIMARY KEY, '
+                             'title VARCHAR(100), description TEXT)')
+        for statement in FTS5_DDL:
+            conn.exec_driver_sql(statement)
+        start = time.perf_counter()
+        conn.execute(text('INSERT INTO places VALUES (:id, :title, :description)'),
+                     [{'id': pid, 'title': title, 'description': description}
+                      for pid, title, description in places])
+    print(f"\nSQLite table and places_fts loaded in {time.perf_counter() - start:.1f} s")
+    print(f"{'sqlite':<12} {'fts5 (ms)':>11} {'like (ms)':>10}")
+    like = text('SELECT id FROM places WHERE ' + ' OR '.join(
+        f'title LIKE :w{i} OR description LIKE :w{i}' for i in range(2)) + ' LIMIT :limit')
+    with engine.connect() as conn:
+        def fts(query):
+            match = ' OR '.join(f'"{term}"' for term in query.split())
+            return conn.execute(FTS5_SEARCH, {'match': match, 'limit': LIMIT}).all()
+
+        def scan(query):
+            words = (query.split() * 2)[:2]
+            return conn.execute(like, {'w0': f'%{words[0]}%', 'w1': f'%{words[1]}%',
+                                       'limit': size}).all()
+
+        for name, batch in queries.items():
+            print(f"{name:<12} {_time(fts, batch):>11.2f} {_time(scan, batch[:SCANS]):>10.0f}")
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    main(int(args[0]) if args else 500_000, sql='--no-sql' not in sys.argv)
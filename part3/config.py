@@ -6,6 +6,29 @@ class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY") or "dev-key-please-change"
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY") or "dev-jwt-secret"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool (MySQL); turned into engine options by create_app
+    SQLALCHEMY_POOL_SIZE = int(os.environ.get("HBNB_DB_POOL_SIZE", 10))
+    SQLALCHEMY_MAX_OVERFLOW = int(os.environ.get("HBNB_DB_MAX_OVERFLOW", 20))
+    SQLALCHEMY_POOL_RECYCLE = int(os.environ.get("HBNB_DB_POOL_RECYCLE", 3600))
+    SQLALCHEMY_POOL_TIMEOUT = int(os.environ.get("HBNB_DB_POOL_TIMEOUT", 30))
+    # Password hashing (utils.password_hashing): bcrypt work factor, worker threads
+    # (default: one per core) and jobs allowed to wait before logins get a 503
+    BCRYPT_LOG_ROUNDS = int(os.environ.get("HBNB_BCRYPT_ROUNDS", 12))
+    BCRYPT_HASH_WORKERS = int(os.environ.get("HBNB_BCRYPT_WORKERS", 0)) or None
+    BCRYPT_HASH_QUEUE = int(os.environ.get("HBNB_BCRYPT_QUEUE", 32))
+    # Redis the WebSocket servers relay place / review changes from (their
+    # WS_REDIS_URL); unset, no change events are published
+    CHANGE_EVENTS_REDIS_URL = os.environ.get("HBNB_CHANGE_EVENTS_REDIS_URL")
+    # Query profiler (utils.query_profiler): a JSON log line per request, and the
+    # thresholds (ms / s) above which a statement is logged as slow / timed out
+    # (same variables as config/enhanced_config.py)
+    QUERY_LOGGING = os.environ.get("HBNB_DB_QUERY_LOGGING", "false").lower() == "true"
+    SLOW_QUERY_MS = int(os.environ.get("HBNB_DB_SLOW_QUERY_MS", 200))
+    QUERY_TIMEOUT = int(os.environ.get("HBNB_DB_QUERY_TIMEOUT", 30))
+    QUERY_SLOWEST_STATEMENTS = int(os.environ.get("HBNB_DB_SLOWEST_STATEMENTS", 3))
+    # GET /api/v1/_internal/pool (connection pool metrics, admin token required);
+    # off unless HBNB_POOL_METRICS=1
+    POOL_METRICS_ENABLED = os.environ.get("HBNB_POOL_METRICS", "0") == "1"
     DEBUG = False
     TESTING = False
 
@@ -22,6 +45,7 @@ class TestingConfig(Config):
     "Testing configuration."
     DEBUG = True
     TESTING = True
+    BCRYPT_LOG_ROUNDS = 4
     SQLALCHEMY_DATABASE_URI = os.environ.get(
         "DATABASE_URL", "sqlite:///test.db"
     )
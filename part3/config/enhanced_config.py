@@ -35,6 +35,12 @@ class EnhancedConfig:
     SQLALCHEMY_POOL_SIZE = int(os.getenv('HBNB_DB_POOL_SIZE', 20))
     SQLALCHEMY_MAX_OVERFLOW = int(os.getenv('HBNB_DB_MAX_OVERFLOW', 30))
     SQLALCHEMY_POOL_RECYCLE = int(os.getenv('HBNB_DB_POOL_RECYCLE', 3600))
+    SQLALCHEMY_POOL_TIMEOUT = int(os.getenv('HBNB_DB_POOL_TIMEOUT', 30))
+    # Query profiler (utils.query_profiler reads these from app.config)
+    QUERY_LOGGING = os.getenv('HBNB_DB_QUERY_LOGGING', 'false').lower() == 'true'
+    SLOW_QUERY_MS = int(os.getenv('HBNB_DB_SLOW_QUERY_MS', 200))
+    QUERY_TIMEOUT = int(os.getenv('HBNB_DB_QUERY_TIMEOUT', 30))
+    QUERY_SLOWEST_STATEMENTS = int(os.getenv('HBNB_DB_SLOWEST_STATEMENTS', 3))
     
     # Redis Cache
     REDIS_HOST = os.getenv('HBNB_REDIS_HOST', 'localhost')
@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+"""
+Cache codecs for DBStorage
+
+A codec turns mapped instances into bytes holding only their column values
+and turns those bytes back into detached instances, without a database round
+trip. Relationships are not cached: touching one on a rehydrated instance
+needs it to be merged into a session first (session.merge(obj, load=False)).
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+
+def _encode_value(value):
+    """Tag values that JSON/msgpack cannot carry natively"""
+    if isinstance(value, datetime):
+        return {'__dt__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__d__': value.isoformat()}
+    if isinstance(value, time):
+        return {'__t__': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'__dec__': str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and len(value) == 1:
+        tag, raw = next(iter(value.items()))
+        if tag == '__dt__':
+            return datetime.fromisoformat(raw)
+        if tag == '__d__':
+            return date.fromisoformat(raw)
+        if tag == '__t__':
+            return time.fromisoformat(raw)
+        if tag == '__dec__':
+            return Decimal(raw)
+    return value
+
+
+class CacheCodec:
+    """
+    Base codec: subclasses only provide _pack/_unpack for the wire format
+
+    classes is the list of mapped classes the codec may rehydrate; cached
+    payloads naming any other class are rejected.
+    """
+    name = None
+
+    def __init__(self, classes):
+        self._classes = {cls.__name__: cls for cls in classes}
+
+    def _pack(self, data):
+        raise NotImplementedError
+
+    def _unpack(self, payload):
+        raise NotImplementedError
+
+    def _row(self, obj):
+        mapper = inspect(obj).mapper
+        return [
+            type(obj).__name__,
+            {attr.key: _encode_value(getattr(obj, attr.key))
+             for attr in mapper.column_attrs},
+        ]
+
+    def _instance(self, row):
+        cls_name, values = row
+        cls = self._classes.get(cls_name)
+        if cls is None:
+            raise ValueError(f"Unknown cached class: {cls_name}")
+        mapper = inspect(cls)
+        obj = mapper.class_manager.new_instance()
+        for attr in mapper.column_attrs:
+            if attr.key in values:
+                set_committed_value(obj, attr.key, _decode_value(values[attr.key]))
+        make_transient_to_detached(obj)
+        return obj
+
+    def dumps(self, obj):
+        """Encode a single instance"""
+        return self._pack(self._row(obj))
+
+    def loads(self, payload):
+        """Decode a payload produced by dumps() into a detached instance"""
+        return self._instance(self._unpack(payload))
+
+    def dumps_many(self, objs):
+        """Encode a list of instances (possibly of different classes)"""
+        return self._pack([self._row(obj) for obj in objs])
+
+    def loads_many(self, payload):
+        """Decode a payload produced by dumps_many() into detached instances"""
+        return [self._instance(row) for row in self._unpack(payload)]
+
+
+class JSONCodec(CacheCodec):
+    """Compact JSON codec, always available"""
+    name = 'json'
+
+    def _pack(self, data):
+        return json.dumps(data, separators=(',', ':')).encode()
+
+    def _unpack(self, payload):
+        return json.loads(payload)
+
+
+class MsgpackCodec(CacheCodec):
+    """msgpack codec; smaller and faster than JSON, needs the msgpack package"""
+    name = 'msgpack'
+
+    def __init__(self, classes):
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        super().__init__(classes)
+
+    def _pack(self, data):
+        return msgpack.packb(data, use_bin_type=True)
+
+    def _unpack(self, payload):
+        return msgpack.unpackb(payload, raw=False)
+
+
+CODECS = {codec.name: codec for codec in (JSONCodec, MsgpackCodec)}
+
+
+def get_codec(name, classes):
+    """Build the codec called name, falling back to JSON if msgpack is missing"""
+    codec_cls = CODECS.get(name or 'json')
+    if codec_cls is None:
+        raise ValueError(f"Unknown cache codec: {name}")
+    if codec_cls is MsgpackCodec and msgpack is None:
+        codec_cls = JSONCodec
+    return codec_cls(classes)
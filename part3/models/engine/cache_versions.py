@@ -0,0 +1,130 @@
+#!/usr/bin/python3
+"""
+Versioned cache keys for DBStorage
+
+Every model class has a generation counter in Redis (gen:<Class>). List caches
+are stored under a key that embeds the current generation(s), so bumping a
+counter makes every list of that class unreachable in O(1) without KEYS/SCAN;
+the orphaned entries simply expire with their TTL. Single-object keys are
+deleted directly, by id.
+
+Invalidation is driven by session events: changes are collected on flush and
+applied only once the transaction commits, and dropped on rollback. Each
+invalidation is also published on a Redis channel so other processes can drop
+the same ids from their in-process caches.
+"""
+import json
+
+from sqlalchemy import event
+
+CHANGES_KEY = 'cache_changes'
+INVALIDATION_CHANNEL = 'hbnb:cache:invalidate'
+
+
+class CacheVersions:
+    """Generation counters and cache key builders backed by a Redis client
+
+    With client=None the generations are kept in this process only and just
+    the local listeners are notified (no Redis available).
+    """
+
+    def __init__(self, client, prefix='gen', channel=INVALIDATION_CHANNEL):
+        self._client = client
+        self._prefix = prefix
+        self.channel = channel
+        self._listeners = []
+        self._pubsub_thread = None
+        self._local_gens = {}
+
+    def _gen_key(self, cls_name):
+        return f"{self._prefix}:{cls_name}"
+
+    @staticmethod
+    def id_key(cls_name, obj_id):
+        """Cache key of a single object"""
+        return f"{cls_name}_{obj_id}"
+
+    def version(self, cls_names):
+        """Token combining the current generations of cls_names"""
+        if self._client is None:
+            gens = [self._local_gens.get(name, 0) for name in cls_names]
+        else:
+            gens = self._client.mget([self._gen_key(name) for name in cls_names])
+        return '.'.join(str(int(gen or 0)) for gen in gens)
+
+    def all_key(self, label, cls_names):
+        """Cache key of a list covering cls_names, at their current generations"""
+        return f"all_{label}:v{self.version(cls_names)}"
+
+    def invalidate(self, changes):
+        """Bump the generation of each changed class and drop its changed ids
+
+        changes maps a class name to the set of ids written in the transaction.
+        """
+        if not changes:
+            return
+        if self._client is not None:
+            pipe = self._client.pipeline()
+            for cls_name, ids in changes.items():
+                pipe.incr(self._gen_key(cls_name))
+                if ids:
+                    pipe.delete(*(self.id_key(cls_name, obj_id) for obj_id in ids))
+            pipe.publish(self.channel, json.dumps(
+                {cls_name: sorted(ids) for cls_name, ids in changes.items()}))
+            pipe.execute()
+        else:
+            for cls_name in changes:
+                self._local_gens[cls_name] = self._local_gens.get(cls_name, 0) + 1
+        self._notify(changes)
+
+    def add_listener(self, callback):
+        """Call callback(changes) on every invalidation, local or published"""
+        self._listeners.append(callback)
+
+    def _notify(self, changes):
+        for callback in self._listeners:
+            callback(changes)
+
+    def _on_message(self, message):
+        try:
+            changes = json.loads(message['data'])
+        except (TypeError, ValueError):
+            return
+        self._notify({cls_name: set(ids) for cls_name, ids in changes.items()})
+
+    def subscribe(self):
+        """Listen for invalidations published by other processes (background thread)"""
+        if self._pubsub_thread is None:
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self._on_message})
+            self._pubsub_thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        return self._pubsub_thread
+
+    def unsubscribe(self):
+        if self._pubsub_thread is not None:
+            self._pubsub_thread.stop()
+            self._pubsub_thread = None
+        self._local_gens = {}
+
+    def attach(self, session_factory):
+        """Listen to flush/commit/rollback on sessions made by session_factory"""
+        event.listen(session_factory, 'after_flush', _record_changes)
+        event.listen(session_factory, 'after_commit', self._after_commit)
+        event.listen(session_factory, 'after_rollback', _discard_changes)
+
+    def _after_commit(self, session):
+        self.invalidate(session.info.pop(CHANGES_KEY, None))
+
+
+def _record_changes(session, flush_context):
+    # new/dirty/deleted still describe the flushed state at this point
+    changes = session.info.setdefault(CHANGES_KEY, {})
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        ids = changes.setdefault(type(obj).__name__, set())
+        obj_id = getattr(obj, 'id', None)
+        if obj_id is not None:
+            ids.add(obj_id)
+
+
+def _discard_changes(session):
+    session.info.pop(CHANGES_KEY, None)
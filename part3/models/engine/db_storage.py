@@ -12,9 +12,15 @@ from models.city import City
 from models.amenity import Amenity
 from models.place import Place
 from models.review import Review
+from models.engine.cache_codec import get_codec
+from models.engine.cache_versions import CacheVersions
+from models.engine.local_cache import LocalCache
+from utils.loading import loader_options
 import redis
 from datetime import datetime, timedelta
 
+CLASSES = [User, State, City, Amenity, Place, Review]
+
 
 class DBStorage:
     """
@@ -23,6 +29,21 @@ class DBStorage:
     __engine = None
     __session = None
     __redis_cache = None
+    __codec = None
+    __versions = None
+    __local_cache = None
+
+    # Cache TTLs in seconds per class name; reference data changes rarely,
+    # reviews change often
+    CACHE_TTL = {
+        'State': 3600,
+        'City': 3600,
+        'Amenity': 3600,
+        'User': 600,
+        'Place': 600,
+        'Review': 120,
+    }
+    DEFAULT_CACHE_TTL = 300
     
     def __init__(self):
         """Initialize DBStorage with enhanced features"""
@@ -47,48 +68,94 @@ class DBStorage:
             self.__redis_cache = redis.Redis(
                 host=redis_host,
                 port=redis_port,
-                db=0,
-                decode_responses=True
+                db=0
             )
         except:
             self.__redis_cache = None
+        # In-process L1 in front of Redis for hot get() reads. It holds
+        # encoded payloads, not live instances, so callers never share objects
+        self.__local_cache = LocalCache(
+            maxsize=int(os.getenv('HBNB_L1_CACHE_SIZE', 10000)),
+            ttl=int(os.getenv('HBNB_L1_CACHE_TTL', 30))
+        )
+        self.__l2_hits = 0
+        self.__l2_misses = 0
+        self.__versions = CacheVersions(self.__redis_cache)
+        self.__versions.add_listener(self._evict_local)
+        if self.__redis_cache:
+            try:
+                self.__versions.subscribe()
+            except redis.RedisError as e:
+                # Without pub/sub, L1 entries still expire after their TTL
+                print(f"[CACHE] invalidation subscribe failed: {e}")
+        self.__codec = get_codec(os.getenv('HBNB_CACHE_CODEC', 'json'), CLASSES)
         
         if env == 'test':
             Base.metadata.drop_all(self.__engine)
+
+    def cache_ttl(self, cls=None):
+        """TTL for cached entries of cls (the shortest one for all classes)"""
+        if cls is None:
+            return min(self.CACHE_TTL.values(), default=self.DEFAULT_CACHE_TTL)
+        return self.CACHE_TTL.get(cls.__name__, self.DEFAULT_CACHE_TTL)
+
+    def _evict_local(self, changes):
+        """Drop invalidated ids from the in-process cache"""
+        self.__local_cache.delete(*(
+            CacheVersions.id_key(cls_name, obj_id)
+            for cls_name, ids in changes.items() for obj_id in ids
+        ))
+
+    @property
+    def cache_client(self):
+        """Shared cache for other layers (e.g. HTTP responses): Redis, else the L1"""
+        return self.__redis_cache or self.__local_cache
+
+    def cache_version(self, *classes):
+        """Token that changes whenever an object of one of classes is committed"""
+        return self.__versions.version([cls.__name__ for cls in classes])
+
+    def cache_stats(self):
+        """Hit/miss counters of the in-process (l1) and Redis (l2) caches"""
+        lookups = self.__l2_hits + self.__l2_misses
+        return {
+            'l1': self.__local_cache.stats(),
+            'l2': {
+                'hits': self.__l2_hits,
+                'misses': self.__l2_misses,
+                'hit_rate': self.__l2_hits / lookups if lookups else 0.0,
+            },
+        }
     
     def all(self, cls=None):
         """
-        Query all objects with caching support
+        Query all objects with caching support (cache hits are detached)
         """
-        cache_key = f"all_{cls.__name__ if cls else 'all'}"
-        
-        # Try to get from cache first
+        # Try to get from cache first; the key embeds the class generation(s)
+        # so any committed write to those classes makes it unreachable
         if self.__redis_cache:
+            cache_key = self.__versions.all_key(
+                cls.__name__ if cls else 'all',
+                [c.__name__ for c in ([cls] if cls else CLASSES)]
+            )
             cached = self.__redis_cache.get(cache_key)
             if cached:
-                return eval(cached)
+                return {f"{type(obj).__name__}.{obj.id}": obj
+                        for obj in self.__codec.loads_many(cached)}
         
-        classes = [User, State, City, Amenity, Place, Review]
         objects = {}
         
-        if cls:
-            query = self.__session.query(cls).all()
-            for obj in query:
+        for query_cls in ([cls] if cls else CLASSES):
+            for obj in self.__session.query(query_cls).all():
                 key = f"{type(obj).__name__}.{obj.id}"
                 objects[key] = obj
-        else:
-            for cls in classes:
-                query = self.__session.query(cls).all()
-                for obj in query:
-                    key = f"{type(obj).__name__}.{obj.id}"
-                    objects[key] = obj
         
-        # Cache the results
+        # Cache the column values of the results
         if self.__redis_cache:
             self.__redis_cache.setex(
                 cache_key,
-                300,  # 5 minutes TTL
-                str(objects)
+                self.cache_ttl(cls),
+                self.__codec.dumps_many(objects.values())
             )
         
         return objects
@@ -100,10 +167,9 @@ class DBStorage:
     def save(self):
         """Commit all changes to database"""
         try:
+            # Cache entries of the written classes and ids are invalidated
+            # by the session's after_commit hook (see CacheVersions)
             self.__session.commit()
-            # Invalidate relevant cache entries
-            if self.__redis_cache:
-                self.__redis_cache.delete("all_*")
         except Exception as e:
             self.__session.rollback()
             raise e
@@ -120,6 +186,8 @@ class DBStorage:
             bind=self.__engine,
             expire_on_commit=False
         )
+        if self.__versions:
+            self.__versions.attach(session_factory)
         Session = scoped_session(session_factory)
         self.__session = Session()
     
@@ -127,36 +195,54 @@ class DBStorage:
         """Close session"""
         if self.__session:
             self.__session.remove()
+        if self.__versions:
+            self.__versions.unsubscribe()
         if self.__redis_cache:
             self.__redis_cache.close()
     
     def get(self, cls, id):
         """
         Enhanced get method with caching
+
+        Cache hits are rehydrated from column values by the cache codec and
+        come back detached; merge them into a session to load relationships.
         """
         if cls and id:
-            cache_key = f"{cls.__name__}_{id}"
+            cache_key = CacheVersions.id_key(cls.__name__, id)
             
-            # Try cache first
+            # Try the in-process cache, then Redis
+            cached = self.__local_cache.get(cache_key)
+            if cached:
+                return self.__codec.loads(cached)
             if self.__redis_cache:
                 cached = self.__redis_cache.get(cache_key)
                 if cached:
-                    return eval(cached)
+                    self.__l2_hits += 1
+                    self.__local_cache.set(cache_key, cached, self.cache_ttl(cls))
+                    return self.__codec.loads(cached)
+                self.__l2_misses += 1
             
             # Query database
             result = self.__session.query(cls).filter_by(id=id).first()
             
             # Cache the result
-            if result and self.__redis_cache:
-                self.__redis_cache.setex(
-                    cache_key,
-                    600,  # 10 minutes TTL
-                    str(result)
-                )
+            if result:
+                payload = self.__codec.dumps(result)
+                self.__local_cache.set(cache_key, payload, self.cache_ttl(cls))
+                if self.__redis_cache:
+                    self.__redis_cache.setex(
+                        cache_key,
+                        self.cache_ttl(cls),
+                        payload
+                    )
             
             return result
         return None
     
+    def query(self, cls, profile=None):
+        """Session query on cls, eager-loading a loading profile (utils.loading)"""
+        return self.__session.query(cls).options(*loader_options(cls, profile))
+    
     def count(self, cls=None):
         """
         Count objects in storage
@@ -164,6 +250,6 @@ class DBStorage:
         if cls:
             return self.__session.query(cls).count()
         total = 0
-        for cls in [User, State, City, Amenity, Place, Review]:
+        for cls in CLASSES:
             total += self.__session.query(cls).count()
         return total
@@ -12,6 +12,10 @@ class Place:
     price: float = 0.0
     latitude: float = 0.0
     longitude: float = 0.0
+    city: str = ""
+    max_guests: int = 1
+    bedrooms: int = 1
+    bathrooms: int = 1
     owner_id: str = ""
     owner: Optional['User'] = None
     amenities: List['Amenity'] = field(default_factory=list)
@@ -90,6 +94,10 @@ class Place:
             'price': self.price,
             'latitude': self.latitude,
             'longitude': self.longitude,
+            'city': self.city,
+            'max_guests': self.max_guests,
+            'bedrooms': self.bedrooms,
+            'bathrooms': self.bathrooms,
             'owner_id': self.owner_id,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
@@ -1,7 +1,14 @@
 import uuid
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
+from .place_index import PlaceIndex
+from utils.facets import facet_places
+from utils.suggest import DEFAULT_SUGGESTIONS, Suggester
+from utils.summary import RunningSummary
+from utils.text_search import DEFAULT_SEARCH_LIMIT
+from utils.topics import change_event, place_topic
+
 
 class HBnBFacade:
     def __init__(self):
@@ -9,6 +16,14 @@ class HBnBFacade:
         self.places: Dict[str, 'Place'] = {}
         self.amenities: Dict[str, 'Amenity'] = {}
         self.reviews: Dict[str, 'Review'] = {}
+        # Secondary indexes answering get_places_with_filters without a full scan
+        self.place_index = PlaceIndex()
+        # Prefix index over city names, amenity names and place titles for suggest()
+        self.suggestions = Suggester()
+        # Running place count, price and rating totals of all places and of each city
+        self.summaries = RunningSummary()
+        # Called with the change events of each write (utils.topics), e.g. a RedisPublisher
+        self.change_publisher: Optional[Callable[[List[str]], None]] = None
         
         # Load sample data for testing
         self._load_sample_data()
@@ -46,6 +61,8 @@ class HBnBFacade:
             self.amenities[wifi.id] = wifi
             self.amenities[ac.id] = ac
             self.amenities[pool.id] = pool
+            for amenity in (wifi, ac, pool):
+                self.suggestions.set_amenity(amenity.id, amenity.name)
             
             # Create sample place
             place1 = Place()
@@ -60,6 +77,9 @@ class HBnBFacade:
             place1.amenities = [wifi, ac]
             
             self.places[place1.id] = place1
+            self.place_index.add(place1)
+            self._suggest_place(place1)
+            self._summarize_place(place1)
             
             # Create sample review
             review1 = Review()
@@ -73,6 +93,8 @@ class HBnBFacade:
             
             self.reviews[review1.id] = review1
             place1.reviews.append(review1)
+            self.suggestions.add_reviews(place1.id)
+            self.summaries.rate(place1.id, review1.rating)
             
             print(f"Loaded {len(self.users)} users, {len(self.places)} places, "
                   f"{len(self.amenities)} amenities, {len(self.reviews)} reviews")
@@ -127,6 +149,15 @@ class HBnBFacade:
             except (ValueError, TypeError):
                 raise ValueError("Longitude must be a valid number")
             
+            # Optional location and capacity fields
+            place.city = place_data.get('city', '')
+            for field in ('max_guests', 'bedrooms', 'bathrooms'):
+                if field in place_data:
+                    try:
+                        setattr(place, field, int(place_data[field]))
+                    except (ValueError, TypeError):
+                        raise ValueError(f"{field} must be a valid integer")
+            
             place.owner_id = owner_id
             place.owner = self.users[owner_id]
             
@@ -138,6 +169,9 @@ class HBnBFacade:
             
             # Save place
             self.places[place.id] = place
+            self.place_index.add(place)
+            self._suggest_place(place)
+            self._summarize_place(place)
             return place
             
         except ValueError as e:
@@ -183,6 +217,14 @@ class HBnBFacade:
                     place.longitude = float(place_data['longitude'])
                 except (ValueError, TypeError):
                     raise ValueError("Longitude must be a valid number")
+            if 'city' in place_data:
+                place.city = place_data['city']
+            for field in ('max_guests', 'bedrooms', 'bathrooms'):
+                if field in place_data:
+                    try:
+                        setattr(place, field, int(place_data[field]))
+                    except (ValueError, TypeError):
+                        raise ValueError(f"{field} must be a valid integer")
             
             # Update amenities if provided
             if 'amenities' in place_data:
@@ -192,10 +234,76 @@ class HBnBFacade:
                         place.amenities.append(self.amenities[amenity_id])
             
             place.updated_at = datetime.now()
+            self._publish_change('place_updated', place.id, place.to_dict())
             return place
             
         except ValueError as e:
             raise ValueError(f"Invalid update data: {str(e)}")
+        finally:
+            self.place_index.update(place)
+            self._suggest_place(place)
+            self._summarize_place(place)
+    
+    def get_places_with_filters(self, filters: dict) -> List['Place']:
+        """Get places matching the filter dict built by PlaceController
+        (city, min_price, max_price, min_bedrooms, min_bathrooms, min_guests)"""
+        place_ids = self.place_index.query(filters)
+        if place_ids is None:
+            return self.get_all_places()
+        return [self.places[place_id] for place_id in place_ids]
+    
+    def get_place_stats(self, filters: dict) -> dict:
+        """Facet counts (price buckets, cities, amenities, average price) of the
+        places matching filters, in one pass"""
+        return facet_places(self.get_places_with_filters(filters))
+    
+    def get_place_summary(self, city: Optional[str] = None) -> Optional[dict]:
+        """Place count, price and rating summary of all places, or of a city
+        (None if it has no places)"""
+        return self.summaries.summary(city)
+    
+    def get_city_summaries(self) -> Dict[str, dict]:
+        """Summary of each city, the most places first"""
+        return self.summaries.cities()
+    
+    def search_places(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List['Place']:
+        """Places whose title or description match query, best match first"""
+        return [self.places[place_id] for _, place_id in self.place_index.search(query, limit)]
+    
+    def suggest(self, query: str, limit: int = DEFAULT_SUGGESTIONS) -> List[dict]:
+        """Completions of query among city names, amenity names and place titles,
+        most popular first"""
+        return self.suggestions.suggest(query, limit)
+    
+    def _suggest_place(self, place: 'Place') -> None:
+        """Add or update place in the autocomplete index"""
+        self.suggestions.set_place(place.id, place.title, getattr(place, 'city', ''),
+                                   [amenity.id for amenity in getattr(place, 'amenities', [])])
+    
+    def _publish_change(self, kind: str, place_id: str, data: dict) -> None:
+        """Publish a change event on the place's topic, if a publisher is set"""
+        if self.change_publisher is None:
+            return
+        try:
+            self.change_publisher([change_event(kind, place_topic(place_id), data)])
+        except Exception as e:
+            print(f"⚠ Publishing {kind} of place {place_id} failed: {e}")
+    
+    def _summarize_place(self, place: 'Place') -> None:
+        """Add or update place in the running summaries"""
+        self.summaries.set_place(place.id, place.price, getattr(place, 'city', None))
+    
+    def get_places_within(self, latitude: float, longitude: float, radius_km: float,
+                          limit: Optional[int] = None) -> List[Tuple['Place', float]]:
+        """Places within radius_km of a point as (place, distance_km), nearest first"""
+        hits = self.place_index.within(latitude, longitude, radius_km)
+        return [(self.places[place_id], distance) for distance, place_id in hits[:limit]]
+    
+    def get_nearest_places(self, latitude: float, longitude: float,
+                           k: int) -> List[Tuple['Place', float]]:
+        """The k places nearest to a point as (place, distance_km), nearest first"""
+        return [(self.places[place_id], distance)
+                for distance, place_id in self.place_index.nearest(latitude, longitude, k)]
     
     def get_reviews_by_place(self, place_id: str) -> List['Review']:
         """Get all reviews for a specific place"""
@@ -264,6 +372,9 @@ class HBnBFacade:
             # Add review to place
             place = self.places[place_id]
             place.reviews.append(review)
+            self.suggestions.add_reviews(place_id)
+            self.summaries.rate(place_id, rating)
+            self._publish_change('review_created', place_id, review.to_dict())
             
             return review
             
@@ -298,11 +409,14 @@ class HBnBFacade:
                     rating = int(review_data['rating'])
                     if not 1 <= rating <= 5:
                         raise ValueError("Rating must be between 1 and 5")
+                    self.summaries.rate(review.place_id, review.rating, -1)
+                    self.summaries.rate(review.place_id, rating)
                     review.rating = rating
                 except (ValueError, TypeError):
                     raise ValueError("Rating must be an integer between 1 and 5")
             
             review.updated_at = datetime.now()
+            self._publish_change('review_updated', review.place_id, review.to_dict())
             return review
             
         except ValueError as e:
@@ -317,8 +431,12 @@ class HBnBFacade:
             if review.place_id in self.places:
                 place = self.places[review.place_id]
                 place.reviews = [r for r in place.reviews if r.id != review_id]
+                self.suggestions.add_reviews(place.id, -1)
+                self.summaries.rate(place.id, review.rating, -1)
             
             del self.reviews[review_id]
+            self._publish_change('review_deleted', review.place_id,
+                                 {'id': review_id, 'place_id': review.place_id})
             return True
         
         return False
@@ -1,7 +1,15 @@
 import uuid
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
+from .place_index import PlaceIndex
+from utils.facets import facet_places
+from utils.pagination import DEFAULT_LIMIT, KeysetIndex
+from utils.suggest import DEFAULT_SUGGESTIONS, Suggester
+from utils.summary import RunningSummary
+from utils.text_search import DEFAULT_SEARCH_LIMIT
+from utils.topics import change_event, place_topic
+
 # Use string type hints to avoid import issues at module level
 class HBnBFacadeFinal:
     def __init__(self):
@@ -9,6 +17,20 @@ class HBnBFacadeFinal:
         self.places: Dict[str, 'Place'] = {}
         self.amenities: Dict[str, 'Amenity'] = {}
         self.reviews: Dict[str, 'Review'] = {}
+        # Normalized email -> user id, so login and duplicate checks avoid scanning users
+        self._user_ids_by_email: Dict[str, str] = {}
+        # Secondary indexes answering get_places_with_filters without a full scan
+        self.place_index = PlaceIndex()
+        # Prefix index over city names, amenity names and place titles for suggest()
+        self.suggestions = Suggester()
+        # Running place count, price and rating totals of all places and of each city
+        self.summaries = RunningSummary()
+        # Called with the change events of each write (utils.topics), e.g. a RedisPublisher
+        self.change_publisher: Optional[Callable[[List[str]], None]] = None
+        # (created_at, id) ordering of each collection for cursor pagination
+        self._keysets: Dict[str, KeysetIndex] = {
+            name: KeysetIndex() for name in ('users', 'places', 'amenities', 'reviews')
+        }
         
         # Load sample data
         self._load_sample_data()
@@ -28,17 +50,19 @@ class HBnBFacadeFinal:
             user1 = User(id=str(uuid.uuid4()), first_name="John", last_name="Doe", email="john@example.com")
             user2 = User(id=str(uuid.uuid4()), first_name="Jane", last_name="Smith", email="jane@example.com")
             
-            self.users[user1.id] = user1
-            self.users[user2.id] = user2
+            self._store_user(user1)
+            self._store_user(user2)
             
             # Create amenities
             wifi = Amenity(id=str(uuid.uuid4()), name="Wi-Fi")
             ac = Amenity(id=str(uuid.uuid4()), name="Air Conditioning")
             pool = Amenity(id=str(uuid.uuid4()), name="Pool")
             
-            self.amenities[wifi.id] = wifi
-            self.amenities[ac.id] = ac
-            self.amenities[pool.id] = pool
+            self._store('amenities', wifi)
+            self._store('amenities', ac)
+            self._store('amenities', pool)
+            for amenity in (wifi, ac, pool):
+                self.suggestions.set_amenity(amenity.id, amenity.name)
             
             # Create a place - careful with initialization
             place = Place()
@@ -57,7 +81,10 @@ class HBnBFacadeFinal:
             place.owner = user1
             place.amenities = [wifi, ac]
             
-            self.places[place.id] = place
+            self._store('places', place)
+            self.place_index.add(place)
+            self._suggest_place(place)
+            self._summarize_place(place)
             
             # Create a review
             review = Review()
@@ -69,8 +96,10 @@ class HBnBFacadeFinal:
             review.user = user2
             review.place = place
             
-            self.reviews[review.id] = review
+            self._store('reviews', review)
             place.reviews.append(review)
+            self.suggestions.add_reviews(place.id)
+            self.summaries.rate(place.id, review.rating)
             
             print(f"✓ Loaded: {len(self.users)} users, {len(self.places)} places, "
                   f"{len(self.amenities)} amenities, {len(self.reviews)} reviews")
@@ -79,6 +108,21 @@ class HBnBFacadeFinal:
             print(f"⚠ Could not load sample data: {e}")
             # Continue with empty data
     
+    # ---------- Storage and pagination ----------
+
+    def _store(self, collection: str, obj) -> None:
+        """Save obj in the named collection dict and its pagination index."""
+        getattr(self, collection)[obj.id] = obj
+        self._keysets[collection].add(obj)
+
+    def get_page(self, collection: str, cursor: Optional[str] = None,
+                 limit: int = DEFAULT_LIMIT) -> Tuple[list, Optional[str]]:
+        """Return (objects, next_cursor) for one page of users, places, amenities or
+        reviews, ordered by (created_at, id). Raises ValueError on a malformed cursor."""
+        store = getattr(self, collection)
+        ids, next_cursor = self._keysets[collection].page(cursor, limit)
+        return [store[obj_id] for obj_id in ids], next_cursor
+    
     def create_place(self, data: dict) -> 'Place':
         """Create a new place"""
         try:
@@ -117,6 +161,15 @@ class HBnBFacadeFinal:
             except (ValueError, TypeError):
                 raise ValueError("Longitude must be a number")
             
+            # Optional location and capacity fields
+            place.city = data.get('city', '')
+            for field in ('max_guests', 'bedrooms', 'bathrooms'):
+                if field in data:
+                    try:
+                        setattr(place, field, int(data[field]))
+                    except (ValueError, TypeError):
+                        raise ValueError(f"{field} must be an integer")
+            
             place.owner_id = owner_id
             place.owner = self.users[owner_id]
             
@@ -126,7 +179,10 @@ class HBnBFacadeFinal:
                     place.amenities.append(self.amenities[amenity_id])
             
             # Save
-            self.places[place.id] = place
+            self._store('places', place)
+            self.place_index.add(place)
+            self._suggest_place(place)
+            self._summarize_place(place)
             return place
             
         except ValueError as e:
@@ -168,10 +224,83 @@ class HBnBFacadeFinal:
                 place.longitude = float(data['longitude'])
             except (ValueError, TypeError):
                 pass
+        if 'city' in data:
+            place.city = data['city']
+        for field in ('max_guests', 'bedrooms', 'bathrooms'):
+            if field in data:
+                try:
+                    setattr(place, field, int(data[field]))
+                except (ValueError, TypeError):
+                    pass
         
         place.updated_at = datetime.now()
+        self.place_index.update(place)
+        self._suggest_place(place)
+        self._summarize_place(place)
+        self._publish_change('place_updated', place.id, place.to_dict())
         return place
     
+    def get_places_with_filters(self, filters: dict) -> List['Place']:
+        """Get places matching the filter dict built by PlaceController
+        (city, min_price, max_price, min_bedrooms, min_bathrooms, min_guests)"""
+        place_ids = self.place_index.query(filters)
+        if place_ids is None:
+            return self.get_all_places()
+        return [self.places[place_id] for place_id in place_ids]
+    
+    def get_place_stats(self, filters: dict) -> dict:
+        """Facet counts (price buckets, cities, amenities, average price) of the
+        places matching filters, in one pass"""
+        return facet_places(self.get_places_with_filters(filters))
+    
+    def get_place_summary(self, city: Optional[str] = None) -> Optional[dict]:
+        """Place count, price and rating summary of all places, or of a city
+        (None if it has no places)"""
+        return self.summaries.summary(city)
+    
+    def get_city_summaries(self) -> Dict[str, dict]:
+        """Summary of each city, the most places first"""
+        return self.summaries.cities()
+    
+    def search_places(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List['Place']:
+        """Places whose title or description match query, best match first"""
+        return [self.places[place_id] for _, place_id in self.place_index.search(query, limit)]
+    
+    def suggest(self, query: str, limit: int = DEFAULT_SUGGESTIONS) -> List[dict]:
+        """Completions of query among city names, amenity names and place titles,
+        most popular first"""
+        return self.suggestions.suggest(query, limit)
+    
+    def _suggest_place(self, place: 'Place') -> None:
+        """Add or update place in the autocomplete index"""
+        self.suggestions.set_place(place.id, place.title, getattr(place, 'city', ''),
+                                   [amenity.id for amenity in getattr(place, 'amenities', [])])
+    
+    def _publish_change(self, kind: str, place_id: str, data: dict) -> None:
+        """Publish a change event on the place's topic, if a publisher is set"""
+        if self.change_publisher is None:
+            return
+        try:
+            self.change_publisher([change_event(kind, place_topic(place_id), data)])
+        except Exception as e:
+            print(f"⚠ Publishing {kind} of place {place_id} failed: {e}")
+    
+    def _summarize_place(self, place: 'Place') -> None:
+        """Add or update place in the running summaries"""
+        self.summaries.set_place(place.id, place.price, getattr(place, 'city', None))
+    
+    def get_places_within(self, latitude: float, longitude: float, radius_km: float,
+                          limit: Optional[int] = None) -> List[Tuple['Place', float]]:
+        """Places within radius_km of a point as (place, distance_km), nearest first"""
+        hits = self.place_index.within(latitude, longitude, radius_km)
+        return [(self.places[place_id], distance) for distance, place_id in hits[:limit]]
+    
+    def get_nearest_places(self, latitude: float, longitude: float,
+                           k: int) -> List[Tuple['Place', float]]:
+        """The k places nearest to a point as (place, distance_km), nearest first"""
+        return [(self.places[place_id], distance)
+                for distance, place_id in self.place_index.nearest(latitude, longitude, k)]
+    
     def get_reviews_by_place(self, place_id: str) -> List['Review']:
         """Get reviews for a place"""
         return [r for r in self.reviews.values() if r.place_id == place_id]
@@ -217,8 +346,11 @@ class HBnBFacadeFinal:
             review.place = self.places[place_id]
             
             # Save
-            self.reviews[review.id] = review
+            self._store('reviews', review)
             self.places[place_id].reviews.append(review)
+            self.suggestions.add_reviews(place_id)
+            self.summaries.rate(place_id, rating)
+            self._publish_change('review_created', place_id, review.to_dict())
             
             return review
             
@@ -250,11 +382,14 @@ class HBnBFacadeFinal:
             try:
                 rating = int(data['rating'])
                 if 1 <= rating <= 5:
+                    self.summaries.rate(review.place_id, review.rating, -1)
+                    self.summaries.rate(review.place_id, rating)
                     review.rating = rating
             except (ValueError, TypeError):
                 pass
         
         review.updated_at = datetime.now()
+        self._publish_change('review_updated', review.place_id, review.to_dict())
         return review
     
     def delete_review(self, review_id: str) -> bool:
@@ -265,13 +400,27 @@ class HBnBFacadeFinal:
             if review.place_id in self.places:
                 place = self.places[review.place_id]
                 place.reviews = [r for r in place.reviews if r.id != review_id]
+                self.suggestions.add_reviews(place.id, -1)
+                self.summaries.rate(place.id, review.rating, -1)
             
             del self.reviews[review_id]
+            self._keysets['reviews'].remove(review_id)
+            self._publish_change('review_deleted', review.place_id,
+                                 {'id': review_id, 'place_id': review.place_id})
             return True
         return False
 
     # ---------- User methods ----------
 
+    @staticmethod
+    def _email_key(email: Optional[str]) -> str:
+        return (email or '').strip().lower()
+
+    def _store_user(self, user: 'User') -> None:
+        """Save user and index its email."""
+        self._store('users', user)
+        self._user_ids_by_email[self._email_key(user.email)] = user.id
+
     def get_user(self, user_id: str) -> Optional['User']:
         """Get user by ID."""
         return self.users.get(user_id)
@@ -284,7 +433,8 @@ class HBnBFacadeFinal:
         """Get user by email. Assumption: email is unique."""
         if not email:
             return None
-        return next((u for u in self.users.values() if (u.email or '').strip().lower() == email.strip().lower()), None)
+        user_id = self._user_ids_by_email.get(self._email_key(email))
+        return self.users.get(user_id) if user_id else None
 
     def create_user(self, data: dict) -> 'User':
         """Create a new user. Expects first_name, last_name, email, password_hash; optional is_admin.
@@ -307,7 +457,7 @@ class HBnBFacadeFinal:
             password_hash=data['password_hash'],
             is_admin=bool(data.get('is_admin', False))
         )
-        self.users[user.id] = user
+        self._store_user(user)
         return user
 
     def update_user(self, user_id: str, data: dict) -> Optional['User']:
@@ -323,17 +473,21 @@ class HBnBFacadeFinal:
             other = self.get_user_by_email(email)
             if other and other.id != user_id:
                 raise ValueError("Email already registered")
+        old_key = self._email_key(user.email)
         user.update(data)
+        if self._user_ids_by_email.get(old_key) == user_id:
+            del self._user_ids_by_email[old_key]
+        self._user_ids_by_email[self._email_key(user.email)] = user_id
         return user
 
-    def ensure_admin(self, bcrypt_obj, default_email: str = "admin@example.com", default_password: str = "admin123") -> Optional['User']:
+    def ensure_admin(self, hasher, default_email: str = "admin@example.com", default_password: str = "admin123") -> Optional['User']:
         """Ensure at least one admin exists. If none, create one with default_email / default_password.
-        Returns the admin user. bcrypt_obj: Flask-Bcrypt instance for hashing."""
+        Returns the admin user. hasher: utils.password_hashing.PasswordHasher."""
         admin = next((u for u in self.users.values() if getattr(u, 'is_admin', False)), None)
         if admin:
             return admin
         from models.user import User
-        pw_hash = bcrypt_obj.generate_password_hash(default_password).decode("utf-8")
+        pw_hash = hasher.hash(default_password)
         user = User(
             first_name="Admin",
             last_name="User",
@@ -341,7 +495,7 @@ class HBnBFacadeFinal:
             password_hash=pw_hash,
             is_admin=True
         )
-        self.users[user.id] = user
+        self._store_user(user)
         return user
 
     # ---------- Amenity methods ----------
@@ -361,7 +515,8 @@ class HBnBFacadeFinal:
         if not name:
             raise ValueError("Amenity name cannot be empty")
         amenity = Amenity(name=name)
-        self.amenities[amenity.id] = amenity
+        self._store('amenities', amenity)
+        self.suggestions.set_amenity(amenity.id, amenity.name)
         return amenity
 
     def update_amenity(self, amenity_id: str, data: dict) -> Optional['Amenity']:
@@ -374,6 +529,7 @@ class HBnBFacadeFinal:
             if not name:
                 raise ValueError("Amenity name cannot be empty")
             amenity.name = name
+            self.suggestions.set_amenity(amenity.id, amenity.name)
         amenity.updated_at = datetime.now()
         return amenity
 
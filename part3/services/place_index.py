@@ -0,0 +1,197 @@
+"""In-memory secondary indexes for places and a small filter planner.
+
+The facades keep places in a plain dict; PlaceIndex sits next to that dict and
+answers the filter dictionary built by PlaceController.get_places_with_filters
+(city, min_price, max_price, min_bedrooms, min_bathrooms, min_guests) without
+walking every place, radius / nearest searches from a geohash index, and
+ranked text search from a BM25 inverted index on title and description.
+"""
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.geo import DEFAULT_NEAREST, GeoIndex
+from utils.text_search import DEFAULT_SEARCH_LIMIT, PLACE_FIELDS, InvertedIndex
+
+
+class SortedIndex:
+    """Sorted (key, id) index supporting range counts and scans in O(log n + k)."""
+
+    def __init__(self):
+        self._keys: List[Any] = []
+        self._entries: List[Tuple[Any, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: Any, obj_id: str) -> None:
+        if key is None:
+            return
+        pos = bisect_left(self._entries, (key, obj_id))
+        self._entries.insert(pos, (key, obj_id))
+        self._keys.insert(pos, key)
+
+    def remove(self, key: Any, obj_id: str) -> None:
+        if key is None:
+            return
+        pos = bisect_left(self._entries, (key, obj_id))
+        if pos < len(self._entries) and self._entries[pos] == (key, obj_id):
+            del self._entries[pos]
+            del self._keys[pos]
+
+    def _bounds(self, low: Any = None, high: Any = None) -> Tuple[int, int]:
+        lo = 0 if low is None else bisect_left(self._keys, low)
+        hi = len(self._keys) if high is None else bisect_right(self._keys, high)
+        return lo, max(lo, hi)
+
+    def count(self, low: Any = None, high: Any = None) -> int:
+        """Number of ids with low <= key <= high (None = unbounded)."""
+        lo, hi = self._bounds(low, high)
+        return hi - lo
+
+    def ids(self, low: Any = None, high: Any = None) -> List[str]:
+        """Ids with low <= key <= high, in key order."""
+        lo, hi = self._bounds(low, high)
+        return [obj_id for _, obj_id in self._entries[lo:hi]]
+
+
+class PlaceIndex:
+    """Hash index on city, sorted indexes on price and the room/guest counts,
+    a composite city -> price index for the common "city + price range" search,
+    a GeoIndex on (latitude, longitude) and an InvertedIndex on title/description.
+
+    Callers must call add() when a place is stored, update() after mutating it and
+    remove() when it is deleted.
+    """
+
+    # filter key -> (indexed attribute, bound used by the filter)
+    RANGE_FILTERS = {
+        'min_price': ('price', 'low'),
+        'max_price': ('price', 'high'),
+        'min_bedrooms': ('bedrooms', 'low'),
+        'min_bathrooms': ('bathrooms', 'low'),
+        'min_guests': ('max_guests', 'low'),
+    }
+    SORTED_FIELDS = ('price', 'bedrooms', 'bathrooms', 'max_guests')
+
+    def __init__(self):
+        self._city: Dict[Any, Set[str]] = {}
+        self._sorted: Dict[str, SortedIndex] = {f: SortedIndex() for f in self.SORTED_FIELDS}
+        self._city_price: Dict[Any, SortedIndex] = {}
+        self._geo = GeoIndex()
+        self._text = InvertedIndex(PLACE_FIELDS)
+        # id -> indexed values, so entries can be removed after the place was mutated
+        self._keys: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, place) -> None:
+        self.remove(place.id)
+        keys = {f: getattr(place, f, None) for f in ('city',) + self.SORTED_FIELDS}
+        self._keys[place.id] = keys
+        self._city.setdefault(keys['city'], set()).add(place.id)
+        for field in self.SORTED_FIELDS:
+            self._sorted[field].add(keys[field], place.id)
+        self._city_price.setdefault(keys['city'], SortedIndex()).add(keys['price'], place.id)
+        latitude, longitude = getattr(place, 'latitude', None), getattr(place, 'longitude', None)
+        if latitude is not None and longitude is not None:
+            self._geo.add(place.id, latitude, longitude)
+        self._text.add(place.id, place)
+
+    def update(self, place) -> None:
+        self.add(place)
+
+    def remove(self, place_id: str) -> None:
+        keys = self._keys.pop(place_id, None)
+        if keys is None:
+            return
+        self._geo.remove(place_id)
+        self._text.remove(place_id)
+        city_ids = self._city.get(keys['city'])
+        if city_ids is not None:
+            city_ids.discard(place_id)
+            if not city_ids:
+                del self._city[keys['city']]
+        for field in self.SORTED_FIELDS:
+            self._sorted[field].remove(keys[field], place_id)
+        by_price = self._city_price.get(keys['city'])
+        if by_price is not None:
+            by_price.remove(keys['price'], place_id)
+            if not len(by_price):
+                del self._city_price[keys['city']]
+
+    def _predicates(self, filters: Dict[str, Any]) -> List[Tuple[int, str, Any, Any, Any]]:
+        """Build (estimated_count, kind, field_or_city, low, high) access paths."""
+        bounds: Dict[str, List[Any]] = {}
+        for name, (field, side) in self.RANGE_FILTERS.items():
+            if filters.get(name) is not None:
+                bounds.setdefault(field, [None, None])[0 if side == 'low' else 1] = filters[name]
+
+        predicates = []
+        if filters.get('city') is not None:
+            city = filters['city']
+            price = bounds.pop('price', None)
+            if price is not None:
+                by_price = self._city_price.get(city)
+                count = by_price.count(*price) if by_price is not None else 0
+                predicates.append((count, 'city_price', city, price[0], price[1]))
+            else:
+                predicates.append((len(self._city.get(city, ())), 'city', city, None, None))
+        for field, (low, high) in bounds.items():
+            predicates.append((self._sorted[field].count(low, high), 'range', field, low, high))
+        predicates.sort(key=lambda p: p[0])
+        return predicates
+
+    def _candidate_ids(self, predicate) -> Iterable[str]:
+        _, kind, target, low, high = predicate
+        if kind == 'city':
+            return self._city.get(target, ())
+        if kind == 'city_price':
+            by_price = self._city_price.get(target)
+            return by_price.ids(low, high) if by_price is not None else ()
+        return self._sorted[target].ids(low, high)
+
+    def _matches(self, place_id: str, predicate) -> bool:
+        _, kind, target, low, high = predicate
+        keys = self._keys[place_id]
+        if kind in ('city', 'city_price') and keys['city'] != target:
+            return False
+        if kind == 'city':
+            return True
+        value = keys['price'] if kind == 'city_price' else keys[target]
+        if value is None:
+            return False
+        return (low is None or value >= low) and (high is None or value <= high)
+
+    def query(self, filters: Optional[Dict[str, Any]] = None) -> Optional[List[str]]:
+        """Return matching place ids, or None when no indexed filter was given
+        (the caller should then return every place).
+
+        The most selective predicate (smallest estimated count, from bisect or
+        bucket size) drives the scan; the candidate set is then intersected with
+        the remaining predicates by checking each candidate's indexed values, so
+        the cost is O(log n + smallest candidate set) rather than O(n).
+        """
+        predicates = self._predicates(filters or {})
+        if not predicates:
+            return None
+        driver, rest = predicates[0], predicates[1:]
+        if driver[0] == 0:
+            return []
+        return [
+            place_id for place_id in self._candidate_ids(driver)
+            if all(self._matches(place_id, p) for p in rest)
+        ]
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[float, str]]:
+        """(distance_km, place id) of the places within radius_km, nearest first."""
+        return self._geo.within(latitude, longitude, radius_km)
+
+    def nearest(self, latitude: float, longitude: float,
+                k: int = DEFAULT_NEAREST) -> List[Tuple[float, str]]:
+        """(distance_km, place id) of the k places nearest to a point, nearest first."""
+        return self._geo.nearest(latitude, longitude, k)
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Tuple[float, str]]:
+        """(BM25 score, place id) of the places best matching query, best first."""
+        return self._text.search(query, limit)
@@ -278,6 +278,28 @@ VALUES
     NOW()
 );
 
+-- Seed the denormalized rating aggregates on places
+UPDATE places p SET
+    rating_sum = (SELECT COALESCE(SUM(r.rating), 0) FROM reviews r WHERE r.place_id = p.id),
+    rating_count = (SELECT COUNT(*) FROM reviews r WHERE r.place_id = p.id);
+
+-- Seed place geohashes (utils.geo.geohash_encode); the app sets them on flush
+UPDATE places SET geohash = CASE id
+    WHEN '123e4567-e89b-12d3-a456-426614174001' THEN 'dhwfx1y0g'
+    WHEN '123e4567-e89b-12d3-a456-426614174002' THEN 'dr5regw3p'
+    WHEN '123e4567-e89b-12d3-a456-426614174003' THEN '9xj64fk3s'
+    WHEN '123e4567-e89b-12d3-a456-426614174004' THEN 'dp3wjztvt'
+END WHERE latitude IS NOT NULL AND longitude IS NOT NULL;
+
+-- Seed the summary tables (what `flask rebuild-stats` computes)
+INSERT INTO place_stats (id, place_count, price_sum, price_min, price_max, rating_sum, rating_count)
+SELECT 1, COUNT(*), COALESCE(SUM(price), 0), MIN(price), MAX(price),
+       COALESCE(SUM(rating_sum), 0), COALESCE(SUM(rating_count), 0)
+FROM places;
+INSERT INTO city_stats (city, place_count, price_sum, price_min, price_max, rating_sum, rating_count)
+SELECT city, COUNT(*), SUM(price), MIN(price), MAX(price), SUM(rating_sum), SUM(rating_count)
+FROM places GROUP BY city;
+
 -- Show inserted data counts
 SELECT 'Data Insertion Summary' AS title;
 SELECT 
@@ -3,6 +3,8 @@
 
 -- Drop tables if they exist (for clean setup)
 SET FOREIGN_KEY_CHECKS = 0;
+DROP TABLE IF EXISTS city_stats;
+DROP TABLE IF EXISTS place_stats;
 DROP TABLE IF EXISTS place_amenities;
 DROP TABLE IF EXISTS reviews;
 DROP TABLE IF EXISTS places;
@@ -21,7 +23,8 @@ CREATE TABLE users (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_email (email),
-    INDEX idx_is_admin (is_admin)
+    INDEX idx_is_admin (is_admin),
+    INDEX idx_created_at_id (created_at, id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Create places table
@@ -32,11 +35,14 @@ CREATE TABLE places (
     price DECIMAL(10, 2) NOT NULL CHECK (price > 0),
     latitude FLOAT,
     longitude FLOAT,
+    geohash VARCHAR(9),
     address VARCHAR(500) NOT NULL,
     city VARCHAR(100) NOT NULL,
     max_guests INT DEFAULT 1 CHECK (max_guests > 0),
     bedrooms INT DEFAULT 1 CHECK (bedrooms >= 0),
     bathrooms INT DEFAULT 1 CHECK (bathrooms >= 0),
+    rating_sum INT NOT NULL DEFAULT 0,
+    rating_count INT NOT NULL DEFAULT 0,
     owner_id CHAR(36) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
@@ -44,7 +50,9 @@ CREATE TABLE places (
     INDEX idx_owner_id (owner_id),
     INDEX idx_city (city),
     INDEX idx_price (price),
-    INDEX idx_created_at (created_at)
+    INDEX idx_created_at_id (created_at, id),
+    INDEX idx_geohash (geohash),
+    FULLTEXT INDEX ft_places_text (title, description)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Create amenities table
@@ -53,7 +61,8 @@ CREATE TABLE amenities (
     name VARCHAR(255) UNIQUE NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_name (name)
+    INDEX idx_name (name),
+    INDEX idx_created_at_id (created_at, id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Create reviews table
@@ -71,7 +80,7 @@ CREATE TABLE reviews (
     INDEX idx_user_id (user_id),
     INDEX idx_place_id (place_id),
     INDEX idx_rating (rating),
-    INDEX idx_created_at (created_at)
+    INDEX idx_created_at_id (created_at, id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Create association table for many-to-many relationship between places and amenities
@@ -85,6 +94,28 @@ CREATE TABLE place_amenities (
     INDEX idx_amenity_id (amenity_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Materialized summaries (app/persistence/summary.py): one row for all places,
+-- one row per city. Maintained by the application; rebuild with `flask rebuild-stats`
+CREATE TABLE place_stats (
+    id INT PRIMARY KEY,
+    place_count INT NOT NULL DEFAULT 0,
+    price_sum DOUBLE NOT NULL DEFAULT 0,
+    price_min DOUBLE,
+    price_max DOUBLE,
+    rating_sum INT NOT NULL DEFAULT 0,
+    rating_count INT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE city_stats (
+    city VARCHAR(100) PRIMARY KEY,
+    place_count INT NOT NULL DEFAULT 0,
+    price_sum DOUBLE NOT NULL DEFAULT 0,
+    price_min DOUBLE,
+    price_max DOUBLE,
+    rating_sum INT NOT NULL DEFAULT 0,
+    rating_count INT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Show table creation status
 SELECT 'Tables created successfully' AS status;
 SELECT TABLE_NAME, TABLE_ROWS 
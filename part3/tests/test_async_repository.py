@@ -0,0 +1,322 @@
+"""Async repository, unit of work and ASGI router (needs sqlalchemy[asyncio] and aiosqlite)."""
+import asyncio
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import jwt
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, func, select
+from sqlalchemy.orm import declarative_base, relationship
+
+HAVE_ASYNC = all(importlib.util.find_spec(name) for name in ('greenlet', 'aiosqlite'))
+HAVE_ASGIREF = importlib.util.find_spec('asgiref') is not None
+if HAVE_ASYNC:
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    from app.asgi import HBnBASGI, Request, Router, application, router
+    from app.persistence import async_session
+    from app.persistence.async_repository import AsyncSQLAlchemyRepository
+    from app.persistence.async_session import (async_database_url, async_engine_options,
+                                               async_transactional, async_unit_of_work)
+
+Base = declarative_base()
+
+
+class AsyncOwner(Base):
+    __tablename__ = 'async_owners'
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    name = Column(String(50), nullable=False)
+    item_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    items = relationship('AsyncItem', cascade='all, delete-orphan')
+
+    def update(self, **kwargs):
+        # As BaseModel.update
+        for key, value in kwargs.items():
+            if key not in ['id', 'created_at', '__class__']:
+                setattr(self, key, value)
+        return self
+
+
+class AsyncItem(Base):
+    __tablename__ = 'async_items'
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    rank = Column(Integer, nullable=False)
+    owner_id = Column(String(36), ForeignKey('async_owners.id'), nullable=False)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@unittest.skipUnless(HAVE_ASYNC, "sqlalchemy[asyncio] and aiosqlite are not installed")
+class TestAsyncEngine(unittest.TestCase):
+
+    def test_async_database_url(self):
+        self.assertEqual(async_database_url('sqlite:///hbnb.db'), 'sqlite+aiosqlite:///hbnb.db')
+        self.assertEqual(async_database_url('mysql+pymysql://u:p@db/hbnb'), 'mysql+aiomysql://u:p@db/hbnb')
+        self.assertEqual(async_database_url('postgresql+asyncpg://u@db/hbnb'),
+                         'postgresql+asyncpg://u@db/hbnb')
+        with self.assertRaises(ValueError):
+            async_database_url('oracle://u:p@db/hbnb')
+
+    def test_async_engine_options(self):
+        options = async_engine_options('mysql+pymysql://u:p@db/hbnb', {'SQLALCHEMY_POOL_SIZE': 30})
+        self.assertIs(options['poolclass'], AsyncAdaptedQueuePool)
+        self.assertEqual(options['pool_size'], 30)
+        self.assertEqual(async_engine_options('sqlite://'), {})
+
+
+@unittest.skipUnless(HAVE_ASYNC, "sqlalchemy[asyncio] and aiosqlite are not installed")
+class TestAsyncRepository(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        self.repo = AsyncSQLAlchemyRepository(AsyncOwner)
+
+    def _run(self, body):
+        async def scenario():
+            engine = async_session.init_async_engine(f'sqlite:///{self.path}')
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            try:
+                return await body()
+            finally:
+                await async_session.dispose_async_engine()
+        return run(scenario())
+
+    def test_crud_and_pages(self):
+        async def body():
+            async with async_unit_of_work():
+                for name in ('a', 'b', 'c'):
+                    await self.repo.add(AsyncOwner(name=name, items=[AsyncItem(rank=1)]))
+            async with async_unit_of_work():
+                owners = await self.repo.get_all(('items',))
+                self.assertEqual(sorted(o.name for o in owners), ['a', 'b', 'c'])
+                self.assertEqual([len(o.items) for o in owners], [1, 1, 1])
+                first, cursor = await self.repo.get_page(limit=2)
+                rest, last = await self.repo.get_page(cursor, 2)
+                self.assertEqual(len(first) + len(rest), 3)
+                self.assertIsNone(last)
+                ids = [o.id for o in owners]
+                self.assertEqual([o.id for o in await self.repo.get_many(ids[::-1] + ['nope'])],
+                                 ids[::-1])
+                updated = await self.repo.update(ids[0], {'name': 'y', 'item_count': 7})
+                self.assertEqual((updated.name, updated.item_count), ('y', 7))
+                updated = await self.repo.update(ids[0], {'name': 'z', 'item_count': 99}, ('name',))
+                self.assertEqual((updated.name, updated.item_count), ('z', 7))
+                self.assertIsNone(await self.repo.update('nope', {'name': 'x'}))
+                self.assertTrue(await self.repo.delete(ids[1]))
+                self.assertFalse(await self.repo.delete('nope'))
+            async with async_unit_of_work() as session:
+                self.assertEqual(await session.scalar(select(func.count()).select_from(AsyncItem)), 2)
+                self.assertEqual((await self.repo.get_by_attribute('name', 'z')).id, ids[0])
+        self._run(body)
+
+    def test_outermost_scope_commits_once_and_rolls_back(self):
+        @async_transactional
+        async def add(name, fail=False):
+            await self.repo.add(AsyncOwner(name=name))
+            if fail:
+                raise ValueError(name)
+
+        async def body():
+            async with async_unit_of_work():
+                await add('kept')
+                await add('also kept')
+            with self.assertRaises(ValueError):
+                async with async_unit_of_work():
+                    await add('dropped')
+                    await add('failing', fail=True)
+            async with async_unit_of_work():
+                return sorted(o.name for o in await self.repo.get_all())
+        self.assertEqual(self._run(body), ['also kept', 'kept'])
+
+    def test_sessions_are_per_task(self):
+        async def add(name):
+            async with async_unit_of_work() as session:
+                await self.repo.add(AsyncOwner(name=name))
+                await asyncio.sleep(0)
+                return session
+
+        async def body():
+            sessions = await asyncio.gather(*(add(str(i)) for i in range(5)))
+            self.assertEqual(len({id(session) for session in sessions}), 5)
+            async with async_unit_of_work():
+                return len(await self.repo.get_all())
+        self.assertEqual(self._run(body), 5)
+
+
+@unittest.skipUnless(HAVE_ASYNC, "sqlalchemy[asyncio] and aiosqlite are not installed")
+class TestASGIRouting(unittest.TestCase):
+
+    def test_router_matches_fixed_paths_first(self):
+        router = Router('/api/v1')
+        router.route('GET', '/places/search')('search')
+        router.route('GET', '/places/<place_id>')('get')
+        self.assertEqual(router.match('GET', '/api/v1/places/search'), ('search', {}))
+        self.assertEqual(router.match('GET', '/api/v1/places/p1/'), ('get', {'place_id': 'p1'}))
+        self.assertEqual(router.match('DELETE', '/api/v1/places/p1'), (None, {}))
+
+    def test_request_args_and_json(self):
+        request = Request({'method': 'GET', 'path': '/api/v1/places', 'query_string': b'limit=5&q=a',
+                           'headers': [(b'host', b'hbnb.test')]}, b'{"title": "x"}')
+        self.assertEqual(request.args, {'limit': '5', 'q': 'a'})
+        self.assertEqual(request.get_json(), {'title': 'x'})
+        self.assertEqual(request.base_url, 'http://hbnb.test/api/v1/places')
+
+    def test_unmatched_paths_without_fallback(self):
+        application = HBnBASGI(fallback=False)
+        application.facade = object()
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        run(application({'type': 'http', 'method': 'GET', 'path': '/elsewhere'}, receive, send))
+        self.assertEqual(sent[0]['status'], 404)
+        self.assertEqual(json.loads(sent[1]['body']), {'error': 'Not found'})
+
+
+class AuthConfig:
+    JWT_SECRET_KEY = 'test-secret-key-for-hs256-at-least-32-bytes'
+
+
+def token(user_id, is_admin=False, secret=AuthConfig.JWT_SECRET_KEY, expires_in=60):
+    claims = {'sub': user_id, 'type': 'access', 'is_admin': is_admin,
+              'exp': datetime.now(timezone.utc) + timedelta(seconds=expires_in)}
+    return jwt.encode(claims, secret, algorithm='HS256')
+
+
+class RecordingFacade:
+    """Owner 'alice' owns place p1 and wrote review r1; records the writes."""
+
+    def __init__(self):
+        self.writes = []
+
+    async def get_place(self, place_id):
+        return SimpleNamespace(owner_id='alice') if place_id == 'p1' else None
+
+    async def get_review(self, review_id):
+        return SimpleNamespace(user_id='alice') if review_id == 'r1' else None
+
+    def __getattr__(self, name):
+        async def write(*args):
+            self.writes.append(name)
+            return True
+        return write
+
+
+@unittest.skipUnless(HAVE_ASYNC, "sqlalchemy[asyncio] and aiosqlite are not installed")
+class TestASGIAccess(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        self.application = HBnBASGI(AuthConfig, fallback=False)
+        self.application.facade = self.facade = RecordingFacade()
+
+    def _call(self, method, path, body=None, bearer=None):
+        headers = [(b'authorization', f'Bearer {bearer}'.encode())] if bearer else []
+        request = Request({'method': method, 'path': path, 'headers': headers},
+                          json.dumps(body).encode() if body is not None else b'')
+        handler, params = router.match(method, path)
+
+        async def scenario():
+            async_session.init_async_engine(f'sqlite:///{self.path}')
+            try:
+                return await self.application.dispatch(handler, request, params)
+            finally:
+                await async_session.dispose_async_engine()
+        body, status, _ = run(scenario())
+        return status, body
+
+    def test_writes_require_a_valid_access_token(self):
+        admin_user = {'email': 'x@y.co', 'is_admin': True}
+        self.assertEqual(self._call('POST', '/api/v1/users', admin_user)[0], 401)
+        self.assertEqual(self._call('POST', '/api/v1/users', admin_user, 'garbage')[0], 422)
+        self.assertEqual(self._call('POST', '/api/v1/users', admin_user,
+                                    token('alice', True, secret='other'))[0], 422)
+        self.assertEqual(self._call('POST', '/api/v1/users', admin_user,
+                                    token('alice', True, expires_in=-10))[0], 401)
+        self.assertEqual(self._call('POST', '/api/v1/users', admin_user, token('alice'))[0], 403)
+        self.assertEqual(self._call('POST', '/api/v1/amenities', {'name': 'Wifi'}, token('alice'))[0], 403)
+        self.assertEqual(self._call('DELETE', '/api/v1/reviews/r1')[0], 401)
+        self.assertEqual(self.facade.writes, [])
+
+    def test_owner_or_admin_only(self):
+        checks = [
+            (('PUT', '/api/v1/places/p1', {'price': 1}, token('bob')), 403),
+            (('DELETE', '/api/v1/places/p1', None, token('bob')), 403),
+            (('DELETE', '/api/v1/reviews/r1', None, token('bob')), 403),
+            (('POST', '/api/v1/reviews', {'user_id': 'alice', 'rating': 5}, token('bob')), 403),
+            (('POST', '/api/v1/places', {'title': 't', 'description': 'd', 'price': 1,
+                                         'owner_id': 'alice'}, token('bob')), 403),
+            (('DELETE', '/api/v1/places/nope', None, token('bob')), 404),
+            (('DELETE', '/api/v1/places/p1', None, token('alice')), 200),
+            (('DELETE', '/api/v1/reviews/r1', None, token('bob', True)), 200),
+        ]
+        self.assertEqual([self._call(*call)[0] for call, _ in checks], [status for _, status in checks])
+        self.assertEqual(self.facade.writes, ['delete_place', 'delete_review'])
+
+
+
+@unittest.skipUnless(HAVE_ASYNC and HAVE_ASGIREF, "sqlalchemy[asyncio], aiosqlite and asgiref are not installed")
+class TestASGIEntryPoint(unittest.TestCase):
+    """app.asgi.application as uvicorn runs it: lifespan startup, requests, shutdown."""
+
+    @staticmethod
+    async def _http(method, path, body=None):
+        payload = json.dumps(body).encode() if body is not None else b''
+        pending = [{'type': 'http.request', 'body': payload}]
+        sent = []
+
+        async def receive():
+            return pending.pop(0) if pending else {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        headers = [(b'host', b'hbnb.test'), (b'content-type', b'application/json'),
+                   (b'content-length', str(len(payload)).encode())]
+        await application({'type': 'http', 'http_version': '1.1', 'method': method, 'path': path,
+                           'root_path': '', 'scheme': 'http', 'query_string': b'',
+                           'server': ('hbnb.test', 80), 'headers': headers}, receive, send)
+        content = b''.join(m.get('body', b'') for m in sent if m['type'] == 'http.response.body')
+        return sent[0]['status'], json.loads(content) if content else None
+
+    def test_lifespan_startup_then_the_api(self):
+        async def scenario():
+            inbox, outbox = asyncio.Queue(), asyncio.Queue()
+            lifespan = asyncio.ensure_future(application({'type': 'lifespan'}, inbox.get, outbox.put))
+            await inbox.put({'type': 'lifespan.startup'})
+            started = await outbox.get()
+            listed = await self._http('GET', '/api/v1/amenities/')
+            anonymous_write = await self._http('POST', '/api/v1/amenities/', {'name': 'Sauna'})
+            await inbox.put({'type': 'lifespan.shutdown'})
+            stopped = await outbox.get()
+            await lifespan
+            return started, listed, anonymous_write, stopped
+
+        started, (status, amenities), (write_status, _), stopped = run(scenario())
+        self.assertEqual(started, {'type': 'lifespan.startup.complete'})
+        self.assertEqual(status, 200)
+        self.assertIsInstance(amenities, list)
+        self.assertEqual(write_status, 401)
+        self.assertEqual(stopped, {'type': 'lifespan.shutdown.complete'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,247 @@
+"""Bulk create endpoints: the response helper, the batch inserts and the repositories' batches."""
+import importlib.util
+import unittest
+import uuid
+
+from flask import Flask
+from sqlalchemy import Column, ForeignKey, String, Table, create_engine, event
+from sqlalchemy.orm import Session, declarative_base, relationship, validates
+
+from utils.bulk import MAX_BULK_ITEMS, bulk_create, checked_id, existing, insert_batch
+
+HAVE_REPOSITORIES = importlib.util.find_spec('app.repositories.base_repository') is not None
+if HAVE_REPOSITORIES:
+    from app import db
+    from app.models.amenity import Amenity
+    from app.models.user import User
+    from app.repositories.amenity_repository import AmenityRepository
+    from app.repositories.place_repository import PlaceRepository
+    from app.repositories.review_repository import ReviewRepository
+
+SKIP_REASON = "app.repositories.base_repository is missing"
+
+Base = declarative_base()
+
+batch_place_amenities = Table(
+    'batch_place_amenities', Base.metadata,
+    Column('place_id', String(36), ForeignKey('batch_places.id'), primary_key=True),
+    Column('amenity_id', String(36), ForeignKey('batch_amenities.id'), primary_key=True),
+)
+
+
+class BatchOwner(Base):
+    __tablename__ = 'batch_owners'
+    id = Column(String(36), primary_key=True)
+
+
+class BatchAmenity(Base):
+    __tablename__ = 'batch_amenities'
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    name = Column(String(50), nullable=False, unique=True)
+
+    @validates('name')
+    def validate_name(self, key, name):
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("Amenity name is required")
+        return name.strip()
+
+
+class BatchPlace(Base):
+    __tablename__ = 'batch_places'
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    title = Column(String(100), nullable=False)
+    owner_id = Column(String(36), ForeignKey('batch_owners.id'), nullable=False)
+    amenities = relationship(BatchAmenity, secondary=batch_place_amenities)
+
+
+def place(owner_id, **fields):
+    return dict({'title': 'Harbour flat', 'description': 'A lovely flat by the harbour',
+                 'price': 80, 'owner_id': owner_id}, **fields)
+
+
+class TestBulkCreate(unittest.TestCase):
+
+    @staticmethod
+    def created(count, errors=()):
+        def create(items, partial):
+            return [type('Obj', (), {'id': str(i)})() for i in range(count)], list(errors)
+        return create
+
+    def test_status(self):
+        self.assertEqual(bulk_create([{}], self.created(1))[1], 201)
+        self.assertEqual(bulk_create([{}, {}], self.created(1, [{'index': 1, 'error': 'x'}]), True),
+                         ({'created': 1, 'ids': ['0'], 'errors': [{'index': 1, 'error': 'x'}]}, 207))
+        self.assertEqual(bulk_create([{}], self.created(0, [{'index': 0, 'error': 'x'}]))[1], 400)
+
+    def test_rejects_bad_payloads(self):
+        for items in ({}, [], 'places', [{}] * (MAX_BULK_ITEMS + 1)):
+            self.assertEqual(bulk_create(items, self.created(1))[1], 400)
+
+    def test_repository_failure_is_a_500(self):
+        def create(items, partial):
+            raise RuntimeError('database is down')
+        self.assertEqual(bulk_create([{}], create)[1], 500)
+
+
+class TestBatchInserts(unittest.TestCase):
+    """insert_batch / existing / checked_id on mapped models, as the repositories use them."""
+
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(engine)
+        self.statements = []
+        event.listen(engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: self.statements.append(statement))
+        self.session = Session(engine)
+        self.addCleanup(self.session.close)
+        self.wifi = BatchAmenity(name='Wifi')
+        self.session.add_all([BatchOwner(id='o1'), self.wifi])
+        self.session.commit()
+
+    def create_places(self, items, partial=False):
+        # As PlaceRepository.bulk_create_places
+        dicts = [item for item in items if isinstance(item, dict)]
+        owners = existing(self.session, BatchOwner.id,
+                          {item['owner_id'] for item in dicts if isinstance(item.get('owner_id'), str)})
+        amenities = {a.id: a for a in self.session.query(BatchAmenity)}
+
+        def build(item):
+            batch_place = BatchPlace(title=item['title'],
+                                     owner_id=checked_id(item, 'owner_id', owners, "Owner not found"))
+            batch_place.amenities = [amenities[a] for a in item.get('amenities', [])]
+            return batch_place
+        return insert_batch(self.session, items, build, partial)
+
+    def inserts(self, table):
+        return [s for s in self.statements if s.startswith(f'INSERT INTO {table} ')]
+
+    def test_valid_batch_is_flushed_as_batched_inserts(self):
+        self.statements.clear()
+        places, errors = self.create_places([place('o1', amenities=[self.wifi.id])] * 3)
+        self.assertEqual((len(places), errors), (3, []))
+        self.assertEqual(len(self.inserts('batch_places')), 1)
+        self.assertEqual(len(self.inserts('batch_place_amenities')), 1)
+        self.session.commit()
+        self.assertEqual(self.session.query(BatchPlace).count(), 3)
+        self.assertEqual([p.amenities for p in self.session.query(BatchPlace)], [[self.wifi]] * 3)
+
+    def test_invalid_items_write_nothing_unless_partial(self):
+        items = [
+            place('o1'),
+            place(['o1']),
+            place('missing-owner'),
+            'not an object',
+            {'owner_id': 'o1'},
+        ]
+        expected = [(1, 'owner_id must be a string'), (2, 'Owner not found'),
+                    (3, 'Item must be an object'), (4, 'title is required')]
+        places, errors = self.create_places(items)
+        self.assertEqual(places, [])
+        self.assertEqual([(e['index'], e['error']) for e in errors], expected)
+        self.assertEqual(self.session.query(BatchPlace).count(), 0)
+        places, errors = self.create_places(items, partial=True)
+        self.assertEqual(len(places), 1)
+        self.assertEqual([(e['index'], e['error']) for e in errors], expected)
+        self.assertEqual(self.session.query(BatchPlace).count(), 1)
+
+    def test_validators_and_duplicates_within_the_batch(self):
+        # As AmenityRepository.bulk_create_amenities
+        taken = existing(self.session, BatchAmenity.name, {'Pool', 'Wifi'})
+
+        def build(item):
+            amenity = BatchAmenity(name=item['name'])
+            if amenity.name in taken:
+                raise ValueError("Amenity with this name already exists")
+            taken.add(amenity.name)
+            return amenity
+        amenities, errors = insert_batch(
+            self.session, [{'name': 'Pool'}, {'name': 'Wifi'}, {'name': ' Pool '}, {'name': ''}],
+            build, partial=True)
+        self.assertEqual([a.name for a in amenities], ['Pool'])
+        self.assertEqual([(e['index'], e['error']) for e in errors], [
+            (1, 'Amenity with this name already exists'),
+            (2, 'Amenity with this name already exists'),
+            (3, 'Amenity name is required'),
+        ])
+
+    def test_existing_is_one_query_and_none_for_no_ids(self):
+        self.statements.clear()
+        self.assertEqual(existing(self.session, BatchOwner.id, set()), set())
+        self.assertEqual(self.statements, [])
+        self.assertEqual(existing(self.session, BatchOwner.id, {'o1', 'o2'}), {'o1'})
+        self.assertEqual(len(self.statements), 1)
+
+
+@unittest.skipUnless(HAVE_REPOSITORIES, SKIP_REASON)
+class TestBulkRepositories(unittest.TestCase):
+
+    def setUp(self):
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(app)
+        context = app.app_context()
+        context.push()
+        self.addCleanup(context.pop)
+        db.create_all()
+        self.addCleanup(db.drop_all)
+        self.addCleanup(db.session.remove)
+        self.owner = User(email='owner@example.com', first_name='Ann', last_name='Lee',
+                          password_hash='x')
+        self.reviewer = User(email='guest@example.com', first_name='Bo', last_name='Kim',
+                             password_hash='x')
+        self.wifi = Amenity(name='Wifi')
+        db.session.add_all([self.owner, self.reviewer, self.wifi])
+        db.session.commit()
+
+    def test_mixed_places_batch(self):
+        items = [
+            place(self.owner.id, amenities=[self.wifi.id]),
+            place(['not', 'an', 'id']),
+            place(self.owner.id, amenities=[['nested']]),
+            place(self.owner.id, amenities=self.wifi.id),
+            place('missing-owner'),
+            'not an object',
+            {'title': 'No owner'},
+        ]
+        self.assertEqual(PlaceRepository().bulk_create_places(items)[0], [])
+        places, errors = PlaceRepository().bulk_create_places(items, partial=True)
+        self.assertEqual([p.amenities for p in places], [[self.wifi]])
+        self.assertEqual([e['index'] for e in errors], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(errors[0]['error'], 'owner_id must be a string')
+        self.assertEqual(errors[-1]['error'], 'owner_id is required')
+
+    def test_mixed_reviews_batch(self):
+        target = PlaceRepository().bulk_create_places([place(self.owner.id)])[0][0]
+        review = {'text': 'Great stay, would come back', 'rating': 4,
+                  'user_id': self.reviewer.id, 'place_id': target.id}
+        items = [
+            review,
+            dict(review),
+            dict(review, user_id={'id': self.reviewer.id}),
+            dict(review, place_id=[target.id]),
+            dict(review, user_id='missing-user'),
+        ]
+        reviews, errors = ReviewRepository().bulk_create_reviews(items, partial=True)
+        self.assertEqual(len(reviews), 1)
+        self.assertEqual([(e['index'], e['error']) for e in errors], [
+            (1, 'User has already reviewed this place'),
+            (2, 'user_id must be a string'),
+            (3, 'place_id must be a string'),
+            (4, 'User not found'),
+        ])
+
+    def test_invalid_ids_are_a_400_not_a_500(self):
+        body, status = bulk_create([place([self.owner.id])], PlaceRepository().bulk_create_places)
+        self.assertEqual(status, 400)
+        self.assertEqual(body['errors'], [{'index': 0, 'error': 'owner_id must be a string'}])
+
+    def test_amenities_batch(self):
+        amenities, errors = AmenityRepository().bulk_create_amenities(
+            [{'name': 'Pool'}, {'name': 'Wifi'}, {'name': 'Pool'}, {'name': 3}], partial=True)
+        self.assertEqual([a.name for a in amenities], ['Pool'])
+        self.assertEqual([e['index'] for e in errors], [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""DBStorage cache codec tests."""
+import unittest
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, Numeric, String, create_engine, inspect
+from sqlalchemy.orm import Session, declarative_base, relationship
+
+from models.engine.cache_codec import JSONCodec, MsgpackCodec, get_codec, msgpack
+
+Base = declarative_base()
+
+
+class CachedCity(Base):
+    __tablename__ = 'cached_cities'
+    id = Column(String(36), primary_key=True)
+    name = Column(String(64))
+    places = relationship('CachedPlace', back_populates='city')
+
+
+class CachedPlace(Base):
+    __tablename__ = 'cached_places'
+    id = Column(String(36), primary_key=True)
+    name = Column(String(64))
+    price = Column(Numeric(10, 2))
+    rooms = Column(Integer)
+    created_at = Column(DateTime)
+    city_id = Column(String(36), ForeignKey('cached_cities.id'))
+    city = relationship('CachedCity', back_populates='places')
+
+
+CLASSES = [CachedCity, CachedPlace]
+
+
+class TestCacheCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        self.session = Session(self.engine, expire_on_commit=False)
+        self.city = CachedCity(id='c1', name='Paris')
+        self.place = CachedPlace(id='p1', name='Loft', price=Decimal('120.50'), rooms=2,
+                                 created_at=datetime(2024, 5, 1, 12, 30), city=self.city)
+        self.session.add_all([self.city, self.place])
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def _codecs(self):
+        codecs = [JSONCodec(CLASSES)]
+        if msgpack is not None:
+            codecs.append(MsgpackCodec(CLASSES))
+        return codecs
+
+    def test_round_trip_returns_detached_instance(self):
+        for codec in self._codecs():
+            with self.subTest(codec=codec.name):
+                payload = codec.dumps(self.place)
+                self.assertIsInstance(payload, bytes)
+                obj = codec.loads(payload)
+                self.assertIsInstance(obj, CachedPlace)
+                self.assertTrue(inspect(obj).detached)
+                self.assertEqual(obj.price, Decimal('120.50'))
+                self.assertEqual(obj.created_at, datetime(2024, 5, 1, 12, 30))
+                self.assertEqual((obj.id, obj.name, obj.rooms, obj.city_id),
+                                 ('p1', 'Loft', 2, 'c1'))
+
+    def test_many_mixed_classes(self):
+        codec = JSONCodec(CLASSES)
+        objs = codec.loads_many(codec.dumps_many([self.city, self.place]))
+        self.assertEqual([type(o) for o in objs], [CachedCity, CachedPlace])
+
+    def test_rehydrated_instance_merges_without_changes(self):
+        codec = JSONCodec(CLASSES)
+        obj = codec.loads(codec.dumps(self.place))
+        with Session(self.engine) as other:
+            merged = other.merge(obj, load=False)
+            self.assertFalse(other.dirty)
+            self.assertEqual(merged.city.name, 'Paris')
+
+    def test_unknown_class_rejected(self):
+        payload = JSONCodec(CLASSES).dumps(self.place)
+        with self.assertRaises(ValueError):
+            JSONCodec([CachedCity]).loads(payload)
+
+    def test_get_codec(self):
+        self.assertIsInstance(get_codec('json', CLASSES), JSONCodec)
+        self.assertIsInstance(get_codec(None, CLASSES), JSONCodec)
+        expected = MsgpackCodec if msgpack is not None else JSONCodec
+        self.assertIsInstance(get_codec('msgpack', CLASSES), expected)
+        with self.assertRaises(ValueError):
+            get_codec('pickle', CLASSES)
+
+
+if __name__ == '__main__':
+    unittest.main()
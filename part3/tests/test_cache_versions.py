@@ -0,0 +1,141 @@
+"""Versioned DBStorage cache keys driven by session commit events."""
+import json
+import unittest
+
+from sqlalchemy import Column, String, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from models.engine.cache_versions import CacheVersions
+
+Base = declarative_base()
+
+
+class VersionedCity(Base):
+    __tablename__ = 'versioned_cities'
+    id = Column(String(36), primary_key=True)
+    name = Column(String(64))
+
+
+class VersionedState(Base):
+    __tablename__ = 'versioned_states'
+    id = Column(String(36), primary_key=True)
+    name = Column(String(64))
+
+
+class DictRedis:
+    """The handful of Redis commands CacheVersions uses, kept in a dict."""
+
+    def __init__(self):
+        self.data = {}
+        self.published = []
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def pipeline(self):
+        return _Pipeline(self)
+
+
+class _Pipeline:
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self._calls.append((name, args))
+
+    def execute(self):
+        return [getattr(self._client, name)(*args) for name, args in self._calls]
+
+
+class TestCacheVersions(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = DictRedis()
+        self.versions = CacheVersions(self.redis)
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        factory = sessionmaker(bind=engine, expire_on_commit=False)
+        self.versions.attach(factory)
+        self.session = factory()
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_commit_bumps_only_the_written_class(self):
+        city_key = self.versions.all_key('VersionedCity', ['VersionedCity'])
+        state_key = self.versions.all_key('VersionedState', ['VersionedState'])
+        all_key = self.versions.all_key('all', ['VersionedCity', 'VersionedState'])
+
+        self.session.add(VersionedCity(id='c1', name='Paris'))
+        self.session.commit()
+
+        self.assertNotEqual(self.versions.all_key('VersionedCity', ['VersionedCity']), city_key)
+        self.assertEqual(self.versions.all_key('VersionedState', ['VersionedState']), state_key)
+        self.assertNotEqual(self.versions.all_key('all', ['VersionedCity', 'VersionedState']),
+                            all_key)
+
+    def test_commit_drops_changed_id_keys(self):
+        city = VersionedCity(id='c1', name='Paris')
+        self.session.add_all([city, VersionedCity(id='c2', name='Lyon')])
+        self.session.commit()
+        self.redis.set(CacheVersions.id_key('VersionedCity', 'c1'), b'cached')
+        self.redis.set(CacheVersions.id_key('VersionedCity', 'c2'), b'cached')
+
+        city.name = 'Paris 1er'
+        self.session.commit()
+        self.assertIsNone(self.redis.get('VersionedCity_c1'))
+        self.assertEqual(self.redis.get('VersionedCity_c2'), b'cached')
+
+        self.session.delete(self.session.get(VersionedCity, 'c2'))
+        self.session.commit()
+        self.assertIsNone(self.redis.get('VersionedCity_c2'))
+
+    def test_rollback_does_not_invalidate(self):
+        key = self.versions.all_key('VersionedCity', ['VersionedCity'])
+        self.session.add(VersionedCity(id='c1', name='Paris'))
+        self.session.flush()
+        self.session.rollback()
+        self.assertEqual(self.versions.all_key('VersionedCity', ['VersionedCity']), key)
+
+    def test_invalidation_notifies_listeners_and_publishes(self):
+        seen = []
+        self.versions.add_listener(seen.append)
+        self.session.add(VersionedCity(id='c1', name='Paris'))
+        self.session.commit()
+        self.assertEqual(seen, [{'VersionedCity': {'c1'}}])
+        channel, message = self.redis.published[-1]
+        self.assertEqual(channel, self.versions.channel)
+        self.assertEqual(json.loads(message), {'VersionedCity': ['c1']})
+
+        # A message published by another process reaches the same listeners
+        self.versions._on_message({'data': message})
+        self.assertEqual(seen[-1], {'VersionedCity': {'c1'}})
+
+    def test_without_redis_only_listeners_run(self):
+        seen = []
+        versions = CacheVersions(None)
+        versions.add_listener(seen.append)
+        versions.invalidate({'VersionedCity': {'c1'}})
+        self.assertEqual(seen, [{'VersionedCity': {'c1'}}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+"""Place and review change events: published on commit, by the in-memory facade too."""
+import json
+import unittest
+
+from sqlalchemy import Column, ForeignKey, Integer, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from app.persistence import change_events
+from services.facade_final import HBnBFacadeFinal
+
+Base = declarative_base()
+
+
+class EventPlace(Base):
+    __tablename__ = 'event_places'
+    id = Column(String(36), primary_key=True)
+    title = Column(String(100))
+
+    def to_dict(self):
+        return {'id': self.id, 'title': self.title}
+
+
+class EventReview(Base):
+    __tablename__ = 'event_reviews'
+    id = Column(String(36), primary_key=True)
+    place_id = Column(String(36), ForeignKey('event_places.id'))
+    rating = Column(Integer)
+
+    def to_dict(self):
+        return {'id': self.id, 'place_id': self.place_id, 'rating': self.rating}
+
+
+def decoded(events):
+    return [(event['type'], event['topic'], event['data'].get('id'))
+            for event in map(json.loads, events)]
+
+
+class TestChangeEvents(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        self.addCleanup(engine.dispose)
+        self.session = Session(engine)
+        self.addCleanup(self.session.close)
+        self.session.add_all([EventPlace(id='p1', title='Flat'), EventPlace(id='p2', title='Loft')])
+        self.session.commit()
+        self.published = []
+        change_events.attach_change_events(EventPlace, EventReview)
+        change_events.set_publisher(self.published.append)
+        self.addCleanup(change_events.set_publisher, None)
+
+    def test_commit_publishes(self):
+        self.session.add(EventReview(id='r1', place_id='p1', rating=4))
+        self.session.flush()
+        self.assertEqual(self.published, [])
+        self.session.commit()
+        review = self.session.get(EventReview, 'r1')
+        review.rating = 5
+        self.session.get(EventPlace, 'p2').title = 'Big loft'
+        self.session.commit()
+        self.session.delete(review)
+        self.session.commit()
+        # One batch per commit; no order among the objects of a flush
+        self.assertEqual([sorted(decoded(batch)) for batch in self.published], [
+            [('review_created', 'place:p1', 'r1')],
+            [('place_updated', 'place:p2', 'p2'), ('review_updated', 'place:p1', 'r1')],
+            [('review_deleted', 'place:p1', 'r1')],
+        ])
+
+    def test_rollback_discards(self):
+        self.session.add(EventReview(id='r1', place_id='p1', rating=4))
+        self.session.flush()
+        self.session.rollback()
+        self.session.add(EventReview(id='r2', place_id='p2', rating=3))
+        self.session.commit()
+        self.assertEqual([decoded(batch) for batch in self.published],
+                         [[('review_created', 'place:p2', 'r2')]])
+
+    def test_moved_review_leaves_one_topic_for_the_other(self):
+        self.session.add(EventReview(id='r1', place_id='p1', rating=4))
+        self.session.commit()
+        self.session.get(EventReview, 'r1').place_id = 'p2'
+        self.session.commit()
+        self.assertEqual(decoded(self.published[-1]),
+                         [('review_deleted', 'place:p1', 'r1'), ('review_created', 'place:p2', 'r1')])
+
+    def test_no_publisher_no_events(self):
+        change_events.set_publisher(None)
+        self.session.add(EventReview(id='r1', place_id='p1', rating=4))
+        self.session.commit()
+        self.assertEqual(self.published, [])
+
+
+class TestFacadeChangeEvents(unittest.TestCase):
+
+    def test_writes_publish_on_the_place_topic(self):
+        facade = HBnBFacadeFinal()
+        published = []
+        facade.change_publisher = published.extend
+        place_id = next(iter(facade.places))
+        user_id = list(facade.users)[0]
+        review = facade.create_review({'text': 'Nice', 'rating': 4, 'user_id': user_id,
+                                       'place_id': place_id})
+        facade.update_review(review.id, {'rating': 2})
+        facade.update_place(place_id, {'title': 'Renamed'})
+        facade.delete_review(review.id)
+        self.assertEqual(decoded(published), [
+            ('review_created', f'place:{place_id}', review.id),
+            ('review_updated', f'place:{place_id}', review.id),
+            ('place_updated', f'place:{place_id}', place_id),
+            ('review_deleted', f'place:{place_id}', review.id),
+        ])
+
+    def test_a_failing_publisher_does_not_fail_the_write(self):
+        facade = HBnBFacadeFinal()
+
+        def publisher(events):
+            raise ConnectionError('redis is down')
+        facade.change_publisher = publisher
+        place_id = next(iter(facade.places))
+        self.assertEqual(facade.update_place(place_id, {'title': 'Renamed'}).title, 'Renamed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""Engine options per backend, pool metrics and their admin endpoint."""
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from flask_jwt_extended import create_access_token
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import create_engine, exc, text
+
+from app import db, init_pool_metrics, jwt
+from app.persistence.engine import (DEFAULT_POOL_SETTINGS, TimedQueuePool, build_engine_options,
+                                    configure_engine_options, install_sqlite_pragmas, pool_stats)
+
+
+class TestEngineOptions(unittest.TestCase):
+
+    def test_mysql_pool_settings(self):
+        settings = dict(DEFAULT_POOL_SETTINGS, SQLALCHEMY_POOL_SIZE=25, SQLALCHEMY_MAX_OVERFLOW=5)
+        options = build_engine_options('mysql+mysqldb://u:p@db/hbnb', settings)
+        self.assertIs(options['poolclass'], TimedQueuePool)
+        self.assertEqual((options['pool_size'], options['max_overflow']), (25, 5))
+        self.assertTrue(options['pool_pre_ping'])
+        self.assertEqual(options['pool_recycle'], 3600)
+
+    def test_memory_sqlite_is_left_alone(self):
+        self.assertEqual(build_engine_options('sqlite://', DEFAULT_POOL_SETTINGS), {})
+        self.assertEqual(build_engine_options('sqlite:///:memory:', DEFAULT_POOL_SETTINGS), {})
+
+    def test_explicit_engine_options_win(self):
+        app = Flask(__name__)
+        app.config.update(SQLALCHEMY_DATABASE_URI='mysql+mysqldb://u:p@db/hbnb',
+                          SQLALCHEMY_POOL_SIZE=40,
+                          SQLALCHEMY_ENGINE_OPTIONS={'pool_recycle': 60})
+        configure_engine_options(app)
+        options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+        self.assertEqual((options['pool_size'], options['pool_recycle']), (40, 60))
+
+
+class TestSQLitePool(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'pool.db')
+
+    def test_wal_pragmas_on_file_database(self):
+        engine = create_engine(f'sqlite:///{self.path}',
+                               **build_engine_options(f'sqlite:///{self.path}', DEFAULT_POOL_SETTINGS))
+        install_sqlite_pragmas(engine)
+        install_sqlite_pragmas(engine)  # idempotent
+        with engine.connect() as conn:
+            self.assertEqual(conn.execute(text('PRAGMA journal_mode')).scalar(), 'wal')
+            self.assertEqual(conn.execute(text('PRAGMA foreign_keys')).scalar(), 1)
+        engine.dispose()
+
+    def test_pool_stats_track_checkouts_and_timeouts(self):
+        engine = create_engine(f'sqlite:///{self.path}', poolclass=TimedQueuePool,
+                               pool_size=1, max_overflow=0, pool_timeout=0.05)
+        conn = engine.connect()
+        stats = pool_stats(engine)
+        self.assertEqual((stats['checked_out'], stats['size'], stats['overflow']), (1, 1, 0))
+        with self.assertRaises(exc.TimeoutError):
+            engine.connect()
+        conn.close()
+        wait = pool_stats(engine)['wait']
+        self.assertEqual((wait['checkouts'], wait['timeouts']), (1, 1))
+        self.assertGreaterEqual(wait['max_wait_ms'], 50)
+        self.assertEqual(pool_stats(engine)['checked_out'], 0)
+        engine.dispose()
+
+    def test_flask_sqlalchemy_uses_configured_pool(self):
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{self.path}'
+        configure_engine_options(app)
+        db = SQLAlchemy()
+        db.init_app(app)
+        with app.app_context():
+            install_sqlite_pragmas(db.engine)
+            with db.engine.connect() as conn:
+                self.assertEqual(conn.execute(text('PRAGMA journal_mode')).scalar(), 'wal')
+            stats = pool_stats(db.engine)
+            self.assertEqual(stats['pool_class'], 'TimedQueuePool')
+            self.assertEqual(stats['wait']['checkouts'], 1)
+            db.engine.dispose()
+
+
+class TestPoolMetricsEndpoint(unittest.TestCase):
+
+    def _client(self, enabled):
+        app = Flask(__name__)
+        app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', POOL_METRICS_ENABLED=enabled,
+                          JWT_SECRET_KEY='pool-metrics-test-secret-key-32b')
+        db.init_app(app)
+        jwt.init_app(app)
+        init_pool_metrics(app)
+        with app.app_context():
+            self.user = {'Authorization': 'Bearer ' + create_access_token(
+                'u1', additional_claims={'is_admin': False})}
+            self.admin = {'Authorization': 'Bearer ' + create_access_token(
+                'a1', additional_claims={'is_admin': True})}
+        return app.test_client()
+
+    def test_off_by_default(self):
+        client = self._client(False)
+        self.assertEqual(client.get('/api/v1/_internal/pool', headers=self.admin).status_code, 404)
+
+    def test_admins_only(self):
+        client = self._client(True)
+        self.assertEqual(client.get('/api/v1/_internal/pool').status_code, 401)
+        response = client.get('/api/v1/_internal/pool', headers=self.user)
+        self.assertEqual((response.status_code, response.get_json()),
+                         (403, {'error': 'Admin access required'}))
+        response = client.get('/api/v1/_internal/pool', headers=self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('pool_class', response.get_json()['default'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Per-engine in-process indexes: loads racing commits, as fulltext and autocomplete use them."""
+import unittest
+
+from app.persistence.engine_indexes import EngineIndexes
+
+
+class Engine:
+    """Stands in for an Engine: a weak-referenceable key."""
+
+
+def apply(index, changes):
+    index.update(changes)
+
+
+class TestEngineIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.indexes = EngineIndexes(apply)
+        self.engine = Engine()
+
+    def test_commits_during_a_load_are_replayed(self):
+        def load(engine):
+            # The load has read its rows; this commit is not among them
+            self.indexes.commit({'late': 'Villa'})
+            return {'early': 'Flat'}
+        self.assertEqual(self.indexes.get(self.engine, load), {'early': 'Flat', 'late': 'Villa'})
+        self.indexes.commit({'later': 'Loft'})
+        self.assertEqual(self.indexes.get(self.engine, load),
+                         {'early': 'Flat', 'late': 'Villa', 'later': 'Loft'})
+
+    def test_the_first_installed_load_wins(self):
+        def outer_load(engine):
+            # A concurrent request loads and installs while this one still reads
+            self.indexes.get(engine, lambda engine: {'inner': 'Cabin'})
+            self.indexes.commit({'late': 'Villa'})
+            return {'outer': 'Flat'}
+        self.assertEqual(self.indexes.get(self.engine, outer_load), {'inner': 'Cabin', 'late': 'Villa'})
+
+    def test_a_failed_load_closes_its_journal(self):
+        def failing(engine):
+            raise ConnectionError('database is down')
+        with self.assertRaises(ConnectionError):
+            self.indexes.get(self.engine, failing)
+        self.assertEqual(self.indexes._journals[self.engine], [])
+        self.assertEqual(self.indexes.get(self.engine, lambda engine: {}), {})
+
+    def test_discard_reloads(self):
+        self.indexes.get(self.engine, lambda engine: {'old': 'Flat'})
+        self.indexes.discard(self.engine)
+        self.assertEqual(self.indexes.get(self.engine, lambda engine: {'new': 'Loft'}), {'new': 'Loft'})
+
+
+if __name__ == '__main__':
+    unittest.main()
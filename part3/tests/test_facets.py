@@ -0,0 +1,115 @@
+"""Facet counts: one pass in memory and one SQL statement must agree with plain counting."""
+import random
+import unittest
+from types import SimpleNamespace
+
+from sqlalchemy import (Column, Float, ForeignKey, Integer, MetaData, String, Table, create_engine,
+                        event, insert, select)
+
+from services.facade_final import HBnBFacadeFinal
+from utils.facets import facet_places, facet_select, facets_from_rows, place_filters, price_bucket
+
+metadata = MetaData()
+places = Table('facet_places', metadata,
+               Column('id', String(36), primary_key=True),
+               Column('price', Float), Column('city', String(100)), Column('bedrooms', Integer))
+amenities = Table('facet_amenities', metadata,
+                  Column('id', String(36), primary_key=True), Column('name', String(50)))
+links = Table('facet_place_amenities', metadata,
+              Column('place_id', String(36), ForeignKey('facet_places.id'), primary_key=True),
+              Column('amenity_id', String(36), ForeignKey('facet_amenities.id'), primary_key=True))
+
+AMENITIES = ['Wi-Fi', 'Pool', 'Parking', 'Sauna']
+
+
+def _places(n, seed=5):
+    rng = random.Random(seed)
+    result = []
+    for i in range(n):
+        result.append(SimpleNamespace(
+            id=f'p{i}', price=rng.choice([rng.uniform(5, 400), 50, 100, 200]),
+            city=rng.choice(['Paris', 'Lyon', 'Nice', '']), bedrooms=rng.randint(1, 4),
+            amenities=[SimpleNamespace(name=name) for name in AMENITIES if rng.random() < 0.4]))
+    return result
+
+
+def _expected(items):
+    total = len(items)
+    return {
+        'total_places': total,
+        'average_price': round(sum(p.price for p in items) / total, 2) if total else 0,
+        'price_distribution': {
+            'under_50': sum(p.price < 50 for p in items),
+            '50_100': sum(50 <= p.price < 100 for p in items),
+            '100_200': sum(100 <= p.price < 200 for p in items),
+            'over_200': sum(p.price >= 200 for p in items),
+        },
+        'by_city': {c: n for c in ('Paris', 'Lyon', 'Nice')
+                    for n in [sum(p.city == c for p in items)] if n},
+        'amenities': {a: n for a in AMENITIES
+                      for n in [sum(a in [x.name for x in p.amenities] for p in items)] if n},
+    }
+
+
+class TestFacets(unittest.TestCase):
+
+    def setUp(self):
+        self.places = _places(400)
+
+    def test_buckets_are_half_open(self):
+        self.assertEqual([price_bucket(p) for p in (0, 49.9, 50, 100, 199.99, 200)],
+                         ['under_50', 'under_50', '50_100', '100_200', '100_200', 'over_200'])
+
+    def test_one_pass(self):
+        result = facet_places(self.places)
+        self.assertEqual(result, _expected(self.places))
+        self.assertEqual(list(result['by_city'].values()),
+                         sorted(result['by_city'].values(), reverse=True))
+        self.assertEqual(facet_places([])['average_price'], 0)
+
+    def test_single_statement(self):
+        engine = create_engine('sqlite://')
+        self.addCleanup(engine.dispose)
+        metadata.create_all(engine)
+        statements = []
+        event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        with engine.begin() as conn:
+            conn.execute(insert(amenities), [{'id': f'a{i}', 'name': n} for i, n in enumerate(AMENITIES)])
+            conn.execute(insert(places), [{'id': p.id, 'price': p.price, 'city': p.city,
+                                           'bedrooms': p.bedrooms} for p in self.places])
+            conn.execute(insert(links), [{'place_id': p.id, 'amenity_id': f'a{AMENITIES.index(a.name)}'}
+                                         for p in self.places for a in p.amenities])
+            for min_bedrooms in (1, 3, 9):
+                filtered = (select(places.c.id, places.c.price, places.c.city)
+                            .where(places.c.bedrooms >= min_bedrooms).cte('filtered'))
+                del statements[:]
+                rows = conn.execute(facet_select(filtered, links.c.place_id, links.c.amenity_id,
+                                                 amenities.c.id, amenities.c.name))
+                result = facets_from_rows(rows)
+                self.assertEqual(len(statements), 1)
+                self.assertEqual(result, _expected([p for p in self.places if p.bedrooms >= min_bedrooms]))
+
+    def test_place_filters(self):
+        self.assertEqual(place_filters({'city': 'Paris', 'min_price': '10', 'min_guests': '2',
+                                        'max_price': ''}),
+                         {'city': 'Paris', 'min_price': 10.0, 'min_guests': 2})
+        with self.assertRaisesRegex(ValueError, 'min_price must be a number'):
+            place_filters({'min_price': 'cheap'})
+        with self.assertRaisesRegex(ValueError, 'min_bedrooms must be an integer'):
+            place_filters({'min_bedrooms': '1.5'})
+
+    def test_facade_stats_follow_filters(self):
+        facade = HBnBFacadeFinal()
+        owner_id = next(iter(facade.users))
+        wifi = next(a for a in facade.amenities.values() if a.name == 'Wi-Fi')
+        for price, city in ((40, 'Nice'), (120, 'Nice'), (250, 'Lyon')):
+            facade.create_place({'title': 'Flat', 'price': price, 'latitude': 43.7, 'longitude': 7.3,
+                                 'owner_id': owner_id, 'city': city, 'amenities': [wifi.id]})
+        stats = facade.get_place_stats({'city': 'Nice'})
+        self.assertEqual((stats['total_places'], stats['average_price']), (2, 80.0))
+        self.assertEqual(stats['amenities'], {'Wi-Fi': 2})
+        self.assertEqual(facade.get_place_stats({})['by_city'], {'Nice': 2, 'Lyon': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""Geohash cells, GeoIndex and the SQL geohash prefilter against brute-force haversine."""
+import random
+import unittest
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, create_engine, insert, select
+
+from utils.geo import (GeoIndex, cell_ranges, covering_cells, geohash_encode, geohash_filter,
+                       haversine_km, nearest_request, prefix_upper_bound, radius_request)
+
+# Cities close to the poles and on both sides of the antimeridian
+CENTERS = [(48.8566, 2.3522), (-33.87, 151.21), (0.0, 179.9), (0.0, -179.9),
+           (64.84, -147.72), (89.5, 10.0), (-89.5, -170.0), (1.35, 103.82)]
+
+
+def _points(n, seed=7):
+    rng = random.Random(seed)
+    points = []
+    for i in range(n):
+        lat, lng = rng.choice(CENTERS)
+        points.append((i, max(-90.0, min(90.0, lat + rng.gauss(0, 2))),
+                       (lng + rng.gauss(0, 2) + 180.0) % 360.0 - 180.0))
+    return points
+
+
+def _brute(points, lat, lng, radius):
+    return sorted((haversine_km(lat, lng, plat, plng), pid) for pid, plat, plng in points
+                  if haversine_km(lat, lng, plat, plng) <= radius)
+
+
+class TestGeohash(unittest.TestCase):
+
+    def test_known_hashes(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geohash_encode(42.6, -5.6, 5), 'ezs42')
+        self.assertEqual(geohash_encode(-90.0, -180.0, 4), '0000')
+        self.assertEqual(geohash_encode(90.0, 180.0, 4), 'zzzz')
+
+    def test_haversine(self):
+        self.assertAlmostEqual(haversine_km(48.8566, 2.3522, 51.5074, -0.1278), 343.6, delta=0.5)
+        self.assertAlmostEqual(haversine_km(0, 179.9, 0, -179.9), 22.24, delta=0.01)
+
+    def test_covering_cells_contain_the_circle(self):
+        rng = random.Random(1)
+        for lat, lng in CENTERS:
+            for radius in (0.5, 5, 50, 500):
+                cells = covering_cells(lat, lng, radius)
+                self.assertLessEqual(len(cells), 16)
+                for point in _points(300, seed=rng.random()):
+                    _, plat, plng = point
+                    if haversine_km(lat, lng, plat, plng) <= radius:
+                        geohash = geohash_encode(plat, plng)
+                        self.assertTrue(any(geohash.startswith(c) for c in cells),
+                                        (lat, lng, radius, geohash, cells))
+
+    def test_huge_radius_covers_the_world(self):
+        self.assertEqual(covering_cells(0, 0, 15000), [''])
+        self.assertEqual(cell_ranges(['']), [('', None)])
+
+    def test_cell_ranges_merge_adjacent_cells(self):
+        self.assertEqual(prefix_upper_bound('u09z'), 'u0b')
+        self.assertIsNone(prefix_upper_bound('zz'))
+        self.assertEqual(cell_ranges(['u09w5', 'u09w4', 'u09wh']),
+                         [('u09w4', 'u09w6'), ('u09wh', 'u09wj')])
+        self.assertEqual(cell_ranges(['zy', 'zz']), [('zy', None)])
+
+    def test_request_parsing(self):
+        self.assertEqual(radius_request({'lat': '48.8', 'lng': '2.3', 'radius': '5'}),
+                         (48.8, 2.3, 5.0, None))
+        self.assertEqual(radius_request({'lat': '0', 'lng': '0', 'radius': '1', 'limit': '3'})[3], 3)
+        self.assertEqual(nearest_request({'lat': '0', 'lng': '0'})[2], 10)
+        for args in ({'lat': '91', 'lng': '0', 'radius': '1'}, {'lng': '0', 'radius': '1'},
+                     {'lat': 'x', 'lng': '0', 'radius': '1'}, {'lat': '0', 'lng': '0', 'radius': '501'},
+                     *({'lat': '0', 'lng': '0', 'radius': '1', 'limit': limit}
+                       for limit in ('0', '-1', 'abc', '', '101'))):
+            with self.assertRaises(ValueError):
+                radius_request(args)
+        with self.assertRaises(ValueError):
+            nearest_request({'lat': '0', 'lng': '0', 'k': '0'})
+
+
+class TestGeoIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.points = _points(3000)
+        self.index = GeoIndex()
+        self.index.add_many(self.points)
+
+    def test_within_matches_brute_force(self):
+        for lat, lng in CENTERS:
+            for radius in (10, 100, 400):
+                self.assertEqual(self.index.within(lat, lng, radius),
+                                 _brute(self.points, lat, lng, radius))
+
+    def test_nearest_matches_brute_force(self):
+        for lat, lng in CENTERS + [(20.0, -40.0)]:
+            expected = sorted((haversine_km(lat, lng, plat, plng), pid)
+                              for pid, plat, plng in self.points)[:7]
+            self.assertEqual(self.index.nearest(lat, lng, 7), expected)
+
+    def test_moves_and_removals(self):
+        moved, removed = self.points[0][0], self.points[1][0]
+        self.index.add(moved, 10.0, 10.0)
+        self.index.remove(removed)
+        self.index.add(self.points[2][0], self.points[2][1], self.points[2][2])
+        self.assertEqual(self.index.nearest(10.0, 10.0, 1), [(0.0, moved)])
+        points = [(moved, 10.0, 10.0)] + [p for p in self.points if p[0] not in (moved, removed)]
+        for lat, lng in CENTERS:
+            self.assertEqual(self.index.within(lat, lng, 300), _brute(points, lat, lng, 300))
+        for pid, _, _ in points[:2000]:
+            self.index.remove(pid)
+        self.assertEqual(len(self.index), len(points) - 2000)
+        lat, lng = CENTERS[0]
+        self.assertEqual(self.index.within(lat, lng, 300), _brute(points[2000:], lat, lng, 300))
+
+    def test_empty_index(self):
+        self.assertEqual(GeoIndex().nearest(0, 0, 3), [])
+
+
+class TestGeohashFilter(unittest.TestCase):
+    """The SQL prefilter + haversine post-filter finds what a full scan finds."""
+
+    def test_sqlite_prefilter(self):
+        engine = create_engine('sqlite://')
+        self.addCleanup(engine.dispose)
+        table = Table('geo_places', MetaData(),
+                      Column('id', Integer, primary_key=True),
+                      Column('latitude', Float), Column('longitude', Float),
+                      Column('geohash', String(9), index=True))
+        table.create(engine)
+        points = _points(3000)
+        with engine.begin() as conn:
+            conn.execute(insert(table), [
+                {'id': pid, 'latitude': lat, 'longitude': lng, 'geohash': geohash_encode(lat, lng)}
+                for pid, lat, lng in points])
+            for lat, lng in CENTERS:
+                for radius in (10, 250):
+                    rows = conn.execute(select(table.c.id, table.c.latitude, table.c.longitude)
+                                        .where(geohash_filter(table.c.geohash,
+                                                              covering_cells(lat, lng, radius))))
+                    self.assertEqual(_brute(list(rows), lat, lng, radius),
+                                     _brute(points, lat, lng, radius))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+"""Loading profiles: a page of N rows must cost a constant number of queries."""
+import unittest
+from contextlib import contextmanager
+
+from sqlalchemy import Column, ForeignKey, Integer, String, Table, create_engine, event
+from sqlalchemy.orm import Session, declarative_base, relationship
+
+from utils.loading import PROFILES, loader_options, profile_paths
+
+Base = declarative_base()
+
+profile_place_amenity = Table(
+    'profile_place_amenity', Base.metadata,
+    Column('place_id', ForeignKey('profile_places.id'), primary_key=True),
+    Column('amenity_id', ForeignKey('profile_amenities.id'), primary_key=True),
+)
+
+
+class ProfileUser(Base):
+    __tablename__ = 'profile_users'
+    id = Column(String(36), primary_key=True)
+    first_name = Column(String(50))
+    places = relationship('ProfilePlace', back_populates='owner')
+    reviews = relationship('ProfileReview', back_populates='user')
+
+
+class ProfilePlace(Base):
+    __tablename__ = 'profile_places'
+    id = Column(String(36), primary_key=True)
+    title = Column(String(100))
+    owner_id = Column(ForeignKey('profile_users.id'))
+    owner = relationship('ProfileUser', back_populates='places')
+    reviews = relationship('ProfileReview', back_populates='place')
+    amenities = relationship('ProfileAmenity', secondary=profile_place_amenity,
+                             back_populates='places')
+
+
+class ProfileReview(Base):
+    __tablename__ = 'profile_reviews'
+    id = Column(String(36), primary_key=True)
+    rating = Column(Integer)
+    user_id = Column(ForeignKey('profile_users.id'))
+    place_id = Column(ForeignKey('profile_places.id'))
+    user = relationship('ProfileUser', back_populates='reviews')
+    place = relationship('ProfilePlace', back_populates='reviews')
+
+
+class ProfileAmenity(Base):
+    __tablename__ = 'profile_amenities'
+    id = Column(String(36), primary_key=True)
+    name = Column(String(50))
+    places = relationship('ProfilePlace', secondary=profile_place_amenity,
+                          back_populates='amenities')
+
+
+@contextmanager
+def count_queries(engine):
+    """Count the statements executed on engine inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def place_detail(place):
+    """Walks the same relationships as Place.to_dict_with_relationships."""
+    return {
+        'owner': place.owner.first_name,
+        'reviews': [review.rating for review in place.reviews],
+        'amenities': [amenity.name for amenity in place.amenities],
+    }
+
+
+def place_with_reviewers(place):
+    """Walks the same relationships as places_enhanced.get_place."""
+    return [review.user.first_name for review in place.reviews]
+
+
+class TestLoadingProfiles(unittest.TestCase):
+
+    def _engine(self, places):
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            amenities = [ProfileAmenity(id=f"a{i}", name=f"Amenity {i}") for i in range(3)]
+            for i in range(places):
+                owner = ProfileUser(id=f"u{i}", first_name=f"Owner {i}")
+                place = ProfilePlace(id=f"p{i}", title=f"Place {i}", owner=owner,
+                                     amenities=amenities[:i % 4])
+                for j in range(3):
+                    reviewer = ProfileUser(id=f"r{i}-{j}", first_name="Reviewer")
+                    session.add(ProfileReview(id=f"rv{i}-{j}", rating=j + 1,
+                                              user=reviewer, place=place))
+            session.commit()
+        return engine
+
+    def _page_queries(self, places, profile, serializer):
+        engine = self._engine(places)
+        with Session(engine) as session, count_queries(engine) as statements:
+            page = session.query(ProfilePlace).options(
+                *loader_options(ProfilePlace, profile)
+            ).order_by(ProfilePlace.id).all()
+            for place in page:
+                serializer(place)
+        engine.dispose()
+        return len(statements)
+
+    def test_place_detail_profile_is_constant(self):
+        small = self._page_queries(5, 'place.detail', place_detail)
+        large = self._page_queries(50, 'place.detail', place_detail)
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 3)
+
+    def test_nested_profile_is_constant(self):
+        profile = ('reviews', 'reviews.user')
+        small = self._page_queries(5, profile, place_with_reviewers)
+        large = self._page_queries(50, profile, place_with_reviewers)
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 3)
+
+    def test_lazy_loading_grows_with_the_page(self):
+        self.assertGreater(self._page_queries(50, None, place_detail),
+                           self._page_queries(5, None, place_detail))
+
+    def test_options(self):
+        # A chained path already loads its prefix, so only the leaf is emitted
+        self.assertEqual(len(loader_options(ProfilePlace, ('reviews', 'reviews.user'))), 1)
+        self.assertEqual(loader_options(ProfilePlace, None), [])
+        self.assertEqual(profile_paths('place.detail'), PROFILES['place.detail'])
+        with self.assertRaises(KeyError):
+            profile_paths('place.everything')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""In-process LRU/TTL cache used as DBStorage's L1."""
+import unittest
+
+from models.engine.local_cache import LocalCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLocalCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = LocalCache(maxsize=3, ttl=10, clock=self.clock)
+
+    def test_hit_and_miss_counters(self):
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.set('a', b'1')
+        self.assertEqual(self.cache.get('a'), b'1')
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_least_recently_used_is_evicted(self):
+        for key in 'abc':
+            self.cache.set(key, key)
+        self.cache.get('a')
+        self.cache.set('d', 'd')
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual([self.cache.get(k) for k in 'acd'], ['a', 'c', 'd'])
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_entries_expire(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2, ttl=3)
+        self.clock.now = 5
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), 1)
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.stats()['expirations'], 2)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_ttl_is_capped_by_cache_ttl(self):
+        self.cache.set('a', 1, ttl=3600)
+        self.clock.now = 11
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_delete(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.delete('a', 'missing')
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.get('b'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
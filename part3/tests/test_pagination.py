@@ -0,0 +1,87 @@
+"""Keyset pagination through the list endpoints of app.py: pages, headers and bad input."""
+import base64
+import importlib.util
+import json
+import os
+import sys
+import unittest
+from datetime import datetime
+
+from utils.pagination import decode_cursor, encode_cursor
+
+
+def restx_app():
+    """The Flask app of part3/app.py (shadowed by the app package, loaded as app.asgi does)."""
+    module = sys.modules.get('hbnb_restx_app')
+    if module is None:
+        path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+        spec = importlib.util.spec_from_file_location('hbnb_restx_app', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules['hbnb_restx_app'] = module
+    return module.create_app('testing')
+
+
+def raw_cursor(created_at, obj_id):
+    raw = json.dumps([created_at, obj_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+class TestPaginatedEndpoints(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = restx_app().test_client()
+        login = cls.client.post('/api/v1/auth/login',
+                                json={'email': 'admin@example.com', 'password': 'admin123'})
+        cls.auth = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+
+    def walk(self, path, limit):
+        """Follow X-Next-Cursor from the first page; return the ids and the pages' sizes."""
+        ids, sizes, query = [], [], f'?limit={limit}'
+        while True:
+            response = self.client.get(path + query, headers=self.auth)
+            self.assertEqual(response.status_code, 200)
+            page = [item['id'] for item in response.get_json()]
+            ids.extend(page)
+            sizes.append(len(page))
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor is None:
+                self.assertNotIn('Link', response.headers)
+                return ids, sizes
+            self.assertIn(f'cursor={cursor}&limit={limit}', response.headers['Link'])
+            query = f'?cursor={cursor}&limit={limit}'
+
+    def test_pages_cover_the_full_list_once(self):
+        for path in ('/api/v1/users/', '/api/v1/places/', '/api/v1/amenities/'):
+            with self.subTest(path=path):
+                everything = self.client.get(path, headers=self.auth)
+                self.assertNotIn('X-Next-Cursor', everything.headers)
+                expected = sorted(item['id'] for item in everything.get_json())
+                ids, sizes = self.walk(path, 1)
+                self.assertEqual(sorted(ids), expected)
+                self.assertEqual(len(ids), len(set(ids)))
+                self.assertTrue(all(size == 1 for size in sizes[:-1]))
+
+    def test_bad_cursor_or_limit_is_a_400(self):
+        aware = raw_cursor('2024-01-01T00:00:00+02:00', 'x')
+        for query in ('limit=0', 'limit=1000', 'limit=ten', 'cursor=not-a-cursor',
+                      f'cursor={raw_cursor("yesterday", "x")}', f'cursor={aware}'):
+            for path in ('/api/v1/places/', '/api/v1/amenities/'):
+                with self.subTest(path=path, query=query):
+                    self.assertEqual(self.client.get(f'{path}?{query}').status_code, 400)
+
+
+class TestCursor(unittest.TestCase):
+
+    def test_round_trip(self):
+        key = (datetime(2024, 1, 1, 12, 30), 'p1')
+        self.assertEqual(decode_cursor(encode_cursor(key)), key)
+
+    def test_offset_aware_timestamps_are_invalid(self):
+        with self.assertRaisesRegex(ValueError, 'Invalid cursor'):
+            decode_cursor(raw_cursor('2024-01-01T00:00:00+00:00', 'p1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Bcrypt on the bounded hashing pool: hashes, rehash on outdated cost, 503 shedding."""
+import threading
+import unittest
+
+import bcrypt
+from flask import Flask
+
+from utils.password_hashing import HashingOverloaded, PasswordHasher, hash_cost
+
+
+class TestPasswordHasher(unittest.TestCase):
+
+    def setUp(self):
+        self.hasher = PasswordHasher(rounds=4, workers=1, queue_size=1)
+
+    def test_hash_and_check(self):
+        pw_hash = self.hasher.hash('secret1')
+        self.assertEqual(hash_cost(pw_hash), 4)
+        self.assertTrue(self.hasher.check(pw_hash, 'secret1'))
+        self.assertFalse(self.hasher.check(pw_hash, 'secret2'))
+        self.assertFalse(self.hasher.check('not-a-hash', 'secret1'))
+        self.assertIsNone(hash_cost('not-a-hash'))
+
+    def test_reads_flask_bcrypt_hashes(self):
+        # Flask-Bcrypt writes plain $2b$ hashes of the utf-8 password
+        legacy = bcrypt.hashpw('pässwörd'.encode('utf-8'), bcrypt.gensalt(4)).decode('utf-8')
+        self.assertTrue(self.hasher.check(legacy, 'pässwörd'))
+        long_password = 'x' * 100
+        self.assertTrue(self.hasher.check(self.hasher.hash(long_password), long_password))
+
+    def test_rehash_on_outdated_cost(self):
+        old = bcrypt.hashpw(b'secret1', bcrypt.gensalt(5)).decode('utf-8')
+        self.assertTrue(self.hasher.needs_rehash(old))
+        valid, new_hash = self.hasher.check_and_rehash(old, 'secret1')
+        self.assertTrue(valid)
+        self.assertEqual(hash_cost(new_hash), 4)
+        self.assertTrue(self.hasher.check(new_hash, 'secret1'))
+        self.assertEqual(self.hasher.check_and_rehash(new_hash, 'secret1'), (True, None))
+        self.assertEqual(self.hasher.check_and_rehash(old, 'wrong'), (False, None))
+
+    def test_sheds_when_the_queue_is_full(self):
+        release = threading.Event()
+        running = self.hasher.submit(release.wait)
+        waiting = self.hasher.submit(release.wait)
+        with self.assertRaises(HashingOverloaded):
+            self.hasher.hash('secret1')
+        release.set()
+        running.result()
+        waiting.result()
+        # Slots are given back as jobs finish
+        self.assertTrue(self.hasher.check(self.hasher.hash('secret1'), 'secret1'))
+
+    def test_flask_config_and_503(self):
+        app = Flask(__name__)
+        app.config.update(BCRYPT_LOG_ROUNDS=5, BCRYPT_HASH_WORKERS=1, BCRYPT_HASH_QUEUE=0)
+        hasher = PasswordHasher(app)
+        self.assertIs(app.extensions['password_hasher'], hasher)
+        self.assertEqual((hasher.rounds, hasher.workers, hasher.queue_size), (5, 1, 0))
+
+        @app.route('/login')
+        def login():
+            return {'valid': hasher.check(hasher.hash('secret1'), 'secret1')}
+
+        self.assertEqual(app.test_client().get('/login').json, {'valid': True})
+        release = threading.Event()
+        hasher.submit(release.wait)
+        try:
+            response = app.test_client().get('/login')
+        finally:
+            release.set()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertIn('error', response.json)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""PlaceIndex and in-memory place filtering tests."""
+import random
+import unittest
+
+from models.place import Place
+from services.facade_final import HBnBFacadeFinal
+from services.place_index import PlaceIndex
+
+
+def _matches(place, filters):
+    """Reference implementation: the same predicates PlaceRepository applies in SQL."""
+    if 'city' in filters and place.city != filters['city']:
+        return False
+    if 'min_price' in filters and place.price < filters['min_price']:
+        return False
+    if 'max_price' in filters and place.price > filters['max_price']:
+        return False
+    if 'min_bedrooms' in filters and place.bedrooms < filters['min_bedrooms']:
+        return False
+    if 'min_bathrooms' in filters and place.bathrooms < filters['min_bathrooms']:
+        return False
+    if 'min_guests' in filters and place.max_guests < filters['min_guests']:
+        return False
+    return True
+
+
+class TestPlaceIndex(unittest.TestCase):
+    """The planner must return exactly what a full scan returns."""
+
+    def setUp(self):
+        rng = random.Random(42)
+        self.index = PlaceIndex()
+        self.places = {}
+        for _ in range(500):
+            place = Place(
+                title="Place", price=rng.randint(20, 400),
+                city=rng.choice(['Paris', 'Lyon', 'Nice', 'Lille']),
+                bedrooms=rng.randint(0, 5), bathrooms=rng.randint(1, 3),
+                max_guests=rng.randint(1, 10),
+            )
+            self.places[place.id] = place
+            self.index.add(place)
+        self.rng = rng
+
+    def _check(self, filters):
+        expected = {p.id for p in self.places.values() if _matches(p, filters)}
+        self.assertEqual(set(self.index.query(filters)), expected, filters)
+
+    def test_random_filters_match_full_scan(self):
+        for _ in range(200):
+            filters = {}
+            if self.rng.random() < 0.5:
+                filters['city'] = self.rng.choice(['Paris', 'Lyon', 'Nice', 'Lille', 'Rome'])
+            if self.rng.random() < 0.5:
+                filters['min_price'] = self.rng.randint(0, 300)
+            if self.rng.random() < 0.5:
+                filters['max_price'] = self.rng.randint(100, 450)
+            if self.rng.random() < 0.3:
+                filters['min_bedrooms'] = self.rng.randint(0, 5)
+            if self.rng.random() < 0.3:
+                filters['min_bathrooms'] = self.rng.randint(1, 3)
+            if self.rng.random() < 0.3:
+                filters['min_guests'] = self.rng.randint(1, 10)
+            if filters:
+                self._check(filters)
+
+    def test_no_filters_means_all_places(self):
+        self.assertIsNone(self.index.query({}))
+
+    def test_update_and_remove_keep_index_consistent(self):
+        place = next(iter(self.places.values()))
+        place.city = 'Rome'
+        place.price = 999
+        self.index.update(place)
+        self.assertEqual(self.index.query({'city': 'Rome', 'min_price': 900}), [place.id])
+        self.index.remove(place.id)
+        del self.places[place.id]
+        self.assertEqual(self.index.query({'city': 'Rome'}), [])
+        self._check({'min_price': 500})
+
+
+class TestFacadePlaceFilters(unittest.TestCase):
+    """get_places_with_filters on the in-memory facade."""
+
+    def test_filters_follow_create_and_update(self):
+        facade = HBnBFacadeFinal()
+        owner_id = next(iter(facade.users))
+        place = facade.create_place({
+            'title': 'Loft', 'price': 150, 'latitude': 48.8, 'longitude': 2.3,
+            'owner_id': owner_id, 'city': 'Paris', 'bedrooms': 2,
+        })
+        found = facade.get_places_with_filters({'city': 'Paris', 'min_bedrooms': 2})
+        self.assertEqual([p.id for p in found], [place.id])
+        facade.update_place(place.id, {'price': 50})
+        self.assertEqual(facade.get_places_with_filters({'city': 'Paris', 'min_price': 100}), [])
+
+    def test_radius_and_nearest_follow_create_and_update(self):
+        facade = HBnBFacadeFinal()
+        owner_id = next(iter(facade.users))
+        near, far = (facade.create_place({
+            'title': title, 'price': 100, 'latitude': lat, 'longitude': 2.35, 'owner_id': owner_id,
+        }) for title, lat in (('Near', 48.86), ('Far', 48.95)))
+        hits = facade.get_places_within(48.85, 2.35, 15)
+        self.assertEqual([place.id for place, _ in hits], [near.id, far.id])
+        self.assertAlmostEqual(hits[0][1], 1.11, places=2)
+        self.assertEqual([p.id for p, _ in facade.get_places_within(48.85, 2.35, 5)], [near.id])
+        facade.update_place(far.id, {'latitude': 48.85})
+        self.assertEqual([p.id for p, _ in facade.get_nearest_places(48.85, 2.35, 2)],
+                         [far.id, near.id])
+
+    def test_text_search_follows_create_and_update(self):
+        facade = HBnBFacadeFinal()
+        owner_id = next(iter(facade.users))
+        place = facade.create_place({
+            'title': 'Seaside cottages', 'description': 'Walk to the beach', 'price': 80,
+            'latitude': 43.3, 'longitude': 5.4, 'owner_id': owner_id,
+        })
+        self.assertEqual([p.id for p in facade.search_places('cottage beaches')], [place.id])
+        facade.update_place(place.id, {'title': 'Harbour flat'})
+        self.assertEqual(facade.search_places('cottage'), [])
+        self.assertEqual([p.id for p in facade.search_places('harbour')], [place.id])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Per-request query counter / slow-query profiler."""
+import json
+import unittest
+
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+
+from utils.query_profiler import QueryProfiler
+
+
+class TestQueryProfiler(unittest.TestCase):
+
+    def _client(self, config=None, **settings):
+        engine = create_engine('sqlite://')
+        self.addCleanup(engine.dispose)
+        app = Flask(__name__)
+        app.config.update(config or {})
+        QueryProfiler(app, settings)
+
+        @app.route('/places/<int:n>')
+        def list_places(n):
+            with engine.connect() as conn:
+                for _ in range(n):
+                    conn.execute(text('SELECT 1'))
+            return jsonify([])
+
+        return app.test_client()
+
+    def test_server_timing_reports_query_count(self):
+        header = self._client().get('/places/3').headers['Server-Timing']
+        self.assertIn('desc="3 queries"', header)
+        self.assertRegex(header, r'^db;dur=[0-9.]+;desc=')
+        self.assertIn('app;dur=', header)
+        self.assertEqual(header.count('db-slow-'), 3)
+
+    def test_counts_are_per_request(self):
+        client = self._client()
+        client.get('/places/5')
+        self.assertIn('desc="1 queries"', client.get('/places/1').headers['Server-Timing'])
+
+    def test_json_log_line(self):
+        client = self._client(enable_query_logging=True)
+        with self.assertLogs('hbnb.queries', level='INFO') as logs:
+            client.get('/places/2')
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['event'], 'request_queries')
+        self.assertEqual(record['endpoint'], 'list_places')
+        self.assertEqual(record['queries'], 2)
+        self.assertEqual(len(record['slowest']), 2)
+
+    def test_slow_statements_are_logged_with_endpoint(self):
+        client = self._client(slow_query_ms=0)
+        with self.assertLogs('hbnb.queries', level='WARNING') as logs:
+            client.get('/places/1')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['event'], 'slow_query')
+        self.assertEqual(record['endpoint'], 'list_places')
+        self.assertEqual(record['statement'], 'SELECT 1')
+
+    def test_over_timeout_is_an_error(self):
+        client = self._client(slow_query_ms=0, query_timeout=0)
+        with self.assertLogs('hbnb.queries', level='ERROR'):
+            client.get('/places/1')
+
+    def test_settings_from_the_app_config(self):
+        client = self._client({'SLOW_QUERY_MS': 0, 'QUERY_SLOWEST_STATEMENTS': 1})
+        with self.assertLogs('hbnb.queries', level='WARNING'):
+            header = client.get('/places/3').headers['Server-Timing']
+        self.assertEqual(header.count('db-slow-'), 1)
+
+    def test_explicit_settings_override_the_config(self):
+        client = self._client({'QUERY_LOGGING': True}, enable_query_logging=False)
+        with self.assertNoLogs('hbnb.queries', level='INFO'):
+            client.get('/places/1')
+
+
+if __name__ == '__main__':
+    unittest.main()
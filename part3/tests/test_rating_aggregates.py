@@ -0,0 +1,133 @@
+"""places.rating_sum / rating_count: kept in step by the review mapper events, rebuilt by the repair job."""
+import unittest
+
+from sqlalchemy import Column, ForeignKey, Integer, String, create_engine, update
+from sqlalchemy.orm import Session, column_property, declarative_base
+
+from app.persistence import ratings
+
+Base = declarative_base()
+
+
+class RatedPlace(Base):
+    __tablename__ = 'rated_places'
+    id = Column(String(36), primary_key=True)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+
+
+class RatedReview(Base):
+    __tablename__ = 'rated_reviews'
+    id = Column(String(36), primary_key=True)
+    rating = column_property(Column(Integer, nullable=False), active_history=True)
+    place_id = column_property(Column(String(36), ForeignKey('rated_places.id'), nullable=False),
+                               active_history=True)
+
+
+class GuideBook(Base):
+    __tablename__ = 'guide_books'
+    id = Column(String(36), primary_key=True)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+
+
+class GuideReview(Base):
+    __tablename__ = 'guide_reviews'
+    id = Column(String(36), primary_key=True)
+    rating = column_property(Column(Integer, nullable=False), active_history=True)
+    place_id = column_property(Column(String(36), ForeignKey('guide_books.id'), nullable=False),
+                               active_history=True)
+
+
+ratings.attach_rating_aggregates(RatedPlace, RatedReview)
+ratings.attach_rating_aggregates(GuideBook, GuideReview)
+
+
+class TestRatingAggregates(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(engine)
+        self.session = Session(engine)
+        self.addCleanup(self.session.close)
+        self.session.add_all([RatedPlace(id='p1'), RatedPlace(id='p2'), GuideBook(id='p1')])
+        self.session.commit()
+
+    def aggregates(self, place_id):
+        place = self.session.get(RatedPlace, place_id)
+        return place.rating_sum, place.rating_count
+
+    def test_insert(self):
+        self.session.add_all([RatedReview(id='r1', place_id='p1', rating=4),
+                              RatedReview(id='r2', place_id='p1', rating=5)])
+        self.session.commit()
+        self.assertEqual(self.aggregates('p1'), (9, 2))
+        self.assertEqual(self.aggregates('p2'), (0, 0))
+
+    def test_rating_change(self):
+        self.session.add(RatedReview(id='r1', place_id='p1', rating=4))
+        self.session.commit()
+        self.session.get(RatedReview, 'r1').rating = 2
+        self.session.commit()
+        self.assertEqual(self.aggregates('p1'), (2, 1))
+
+    def test_place_change(self):
+        self.session.add(RatedReview(id='r1', place_id='p1', rating=4))
+        self.session.commit()
+        review = self.session.get(RatedReview, 'r1')
+        review.place_id, review.rating = 'p2', 3
+        self.session.commit()
+        self.assertEqual((self.aggregates('p1'), self.aggregates('p2')), ((0, 0), (3, 1)))
+
+    def test_delete(self):
+        self.session.add_all([RatedReview(id='r1', place_id='p1', rating=4),
+                              RatedReview(id='r2', place_id='p1', rating=1)])
+        self.session.commit()
+        self.session.delete(self.session.get(RatedReview, 'r1'))
+        self.session.commit()
+        self.assertEqual(self.aggregates('p1'), (1, 1))
+
+    def test_loaded_place_sees_the_flushed_aggregates(self):
+        place = self.session.get(RatedPlace, 'p1')
+        self.session.add(RatedReview(id='r1', place_id='p1', rating=5))
+        self.session.flush()
+        self.assertEqual((place.rating_sum, place.rating_count), (5, 1))
+
+    def test_rollback_undoes_the_adjustment(self):
+        self.session.add(RatedReview(id='r1', place_id='p1', rating=5))
+        self.session.flush()
+        self.session.rollback()
+        self.assertEqual(self.aggregates('p1'), (0, 0))
+
+    def test_recompute_repairs_drifted_aggregates(self):
+        self.session.add_all([RatedReview(id='r1', place_id='p1', rating=4),
+                              RatedReview(id='r2', place_id='p2', rating=2),
+                              RatedReview(id='r3', place_id='p2', rating=5)])
+        self.session.commit()
+        # Writes that bypass the ORM are not seen by the events
+        self.session.execute(update(RatedPlace).values(rating_sum=99, rating_count=7))
+        self.session.execute(RatedReview.__table__.delete().where(RatedReview.id == 'r1'))
+        self.session.commit()
+        self.assertEqual(ratings.recompute_rating_aggregates(self.session, RatedPlace), 2)
+        self.session.commit()
+        self.assertEqual((self.aggregates('p1'), self.aggregates('p2')), ((0, 0), (7, 2)))
+
+    def test_attached_models_keep_their_own_aggregates(self):
+        # Attaching again is a no-op, not a second set of listeners
+        ratings.attach_rating_aggregates(RatedPlace, RatedReview)
+        book = self.session.get(GuideBook, 'p1')
+        self.session.add_all([RatedReview(id='r1', place_id='p1', rating=4),
+                              GuideReview(id='g1', place_id='p1', rating=2)])
+        self.session.commit()
+        self.assertEqual(self.aggregates('p1'), (4, 1))
+        self.assertEqual((book.rating_sum, book.rating_count), (2, 1))
+        self.session.execute(update(GuideBook).values(rating_sum=0, rating_count=0))
+        self.assertEqual(ratings.recompute_rating_aggregates(self.session, GuideBook), 1)
+        self.session.commit()
+        self.assertEqual(self.aggregates('p1'), (4, 1))
+        self.assertEqual((book.rating_sum, book.rating_count), (2, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
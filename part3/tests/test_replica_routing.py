@@ -0,0 +1,105 @@
+"""Read-replica routing with two SQLite files standing in for primary and replica."""
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import insert
+
+from app.persistence.routing import ReplicaRouter, RoutingSession, init_replicas
+
+# A separate instance: replica binds registered on app.db would leak into other tests
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+class RoutedItem(db.Model):
+    __tablename__ = 'routed_items'
+    id = db.Column(db.String(36), primary_key=True)
+    name = db.Column(db.String(50))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestReplicaRouting(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(tmp, 'primary.db')}",
+            SQLALCHEMY_BINDS={'replica': f"sqlite:///{os.path.join(tmp, 'replica.db')}"},
+            SQLALCHEMY_REPLICA_BINDS=['replica'],
+        )
+        init_replicas(self.app)
+        self.clock = FakeClock()
+        self.app.extensions['replica_router'] = ReplicaRouter(['replica'], staleness=5,
+                                                              clock=self.clock)
+        db.init_app(self.app)
+        # The replica lags behind: it only has 'a', the primary has 'a' and 'b'
+        with self.app.app_context():
+            for engine, names in ((db.engines[None], 'ab'), (db.engines['replica'], 'a')):
+                RoutedItem.__table__.create(engine)
+                with engine.begin() as conn:
+                    conn.execute(insert(RoutedItem.__table__),
+                                 [{'id': name, 'name': name} for name in names])
+
+    def tearDown(self):
+        with self.app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+
+    def _names(self):
+        return sorted(item.name for item in db.session.query(RoutedItem).all())
+
+    def _add(self, name):
+        db.session.add(RoutedItem(id=name, name=name))
+        db.session.commit()
+
+    def test_reads_go_to_the_replica(self):
+        with self.app.app_context():
+            self.assertEqual(self._names(), ['a'])
+            self.assertIsNone(db.session.get(RoutedItem, 'b'))
+
+    def test_read_after_write_in_the_same_request_uses_the_primary(self):
+        with self.app.app_context():
+            self._add('c')
+            self.assertEqual(self._names(), ['a', 'b', 'c'])
+
+    def test_staleness_window(self):
+        with self.app.app_context():
+            self._add('c')
+        with self.app.app_context():
+            self.clock.now += 4
+            self.assertEqual(self._names(), ['a', 'b', 'c'])
+        with self.app.app_context():
+            self.clock.now += 2
+            self.assertEqual(self._names(), ['a'])
+
+    def test_using_primary(self):
+        with self.app.app_context():
+            with db.session().using_primary():
+                self.assertEqual(self._names(), ['a', 'b'])
+            db.session.expunge_all()
+            self.assertEqual(self._names(), ['a'])
+
+    def test_without_replicas_everything_uses_the_primary(self):
+        del self.app.extensions['replica_router']
+        with self.app.app_context():
+            self.assertEqual(self._names(), ['a', 'b'])
+
+    def test_unknown_replica_bind_is_rejected(self):
+        app = Flask(__name__)
+        app.config.update(SQLALCHEMY_BINDS={}, SQLALCHEMY_REPLICA_BINDS=['replica'])
+        with self.assertRaises(ValueError):
+            init_replicas(app)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Repository tests."""
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from app import db
+from app.persistence.repository import InMemoryRepository, SQLAlchemyRepository
+from models.place import Place
+from models.user import User
+
+
+class PageItem(db.Model):
+    """Minimal mapped model for exercising SQLAlchemyRepository."""
+    __tablename__ = 'test_page_items'
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    created_at = db.Column(db.DateTime, nullable=False)
+
+
+def _walk(repo, limit):
+    """Follow next cursors until the last page; return every id seen."""
+    seen, cursor = [], None
+    while True:
+        items, cursor = repo.get_page(cursor, limit)
+        seen.extend(item.id for item in items)
+        if cursor is None:
+            return seen
+
+
+class TestInMemoryRepositoryIndexes(unittest.TestCase):
+    """Hash indexes must stay consistent through add/update/delete."""
+
+    def setUp(self):
+        self.repo = InMemoryRepository(indexed_fields=('email',))
+        self.user = User(first_name='John', last_name='Doe', email='john@example.com')
+        self.repo.add(self.user)
+
+    def test_lookup_uses_index(self):
+        self.assertIs(self.repo.get_by_attribute('email', 'john@example.com'), self.user)
+        self.assertIsNone(self.repo.get_by_attribute('email', 'nobody@example.com'))
+
+    def test_update_moves_index_entry(self):
+        self.repo.update(self.user.id, {'email': 'johnny@example.com'})
+        self.assertIsNone(self.repo.get_by_attribute('email', 'john@example.com'))
+        self.assertIs(self.repo.get_by_attribute('email', 'johnny@example.com'), self.user)
+
+    def test_delete_removes_index_entry(self):
+        self.repo.delete(self.user.id)
+        self.assertIsNone(self.repo.get_by_attribute('email', 'john@example.com'))
+
+    def test_reindex_after_direct_mutation(self):
+        self.user.email = 'direct@example.com'
+        self.repo.reindex(self.user)
+        self.assertIs(self.repo.get_by_attribute('email', 'direct@example.com'), self.user)
+        self.assertIsNone(self.repo.get_by_attribute('email', 'john@example.com'))
+
+    def test_unindexed_field_falls_back_to_scan(self):
+        self.assertIs(self.repo.get_by_attribute('first_name', 'John'), self.user)
+
+    def test_geo_index_follows_updates(self):
+        repo = InMemoryRepository(geo_fields=('latitude', 'longitude'))
+        place = Place(title='Loft', price=100, latitude=48.86, longitude=2.35)
+        repo.add(place)
+        self.assertEqual([obj for obj, _ in repo.get_within(48.85, 2.35, 5)], [place])
+        repo.update(place.id, {'latitude': 40.0})
+        self.assertEqual(repo.get_within(48.85, 2.35, 5), [])
+        self.assertIs(repo.get_nearest(40.0, 2.35, 1)[0][0], place)
+        repo.delete(place.id)
+        self.assertEqual(repo.get_nearest(40.0, 2.35, 1), [])
+
+
+
+class TestKeysetPagination(unittest.TestCase):
+    """Cursor pages cover every object once, in (created_at, id) order."""
+
+    def setUp(self):
+        base = datetime(2024, 1, 1)
+        # Duplicate timestamps make sure the id tie-breaker is honoured
+        self.stamps = [base + timedelta(seconds=i // 3) for i in range(25)]
+
+    def test_in_memory_pages(self):
+        repo = InMemoryRepository()
+        users = [User(email=f"u{i}@example.com", created_at=ts) for i, ts in enumerate(self.stamps)]
+        for user in reversed(users):
+            repo.add(user)
+        expected = [u.id for u in sorted(users, key=lambda u: (u.created_at, u.id))]
+        self.assertEqual(_walk(repo, 4), expected)
+        repo.delete(expected[0])
+        self.assertEqual(_walk(repo, 10), expected[1:])
+
+    def test_sqlalchemy_pages(self):
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            db.session.add_all(PageItem(created_at=ts) for ts in self.stamps)
+            db.session.commit()
+            expected = [row.id for row in PageItem.query.order_by(PageItem.created_at, PageItem.id)]
+            self.assertEqual(_walk(SQLAlchemyRepository(PageItem), 4), expected)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            InMemoryRepository().get_page('not-a-cursor')
+
+
+if __name__ == '__main__':
+    unittest.main()
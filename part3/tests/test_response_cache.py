@@ -0,0 +1,94 @@
+"""Response cache decorator: keys, compression, ETag/Last-Modified and 304s."""
+import unittest
+
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token
+
+from models.engine.local_cache import LocalCache
+from utils.response_cache import cache_response
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = LocalCache(maxsize=100, ttl=60)
+        self.calls = 0
+        self.data_version = 0
+        app = Flask(__name__)
+        app.config['JWT_SECRET_KEY'] = 'test-secret-key-of-sufficient-length'
+        JWTManager(app)
+
+        @app.route('/places/<place_id>')
+        @cache_response(timeout=60, client=lambda: self.cache,
+                        version=lambda: str(self.data_version))
+        def get_place(place_id):
+            self.calls += 1
+            if place_id == 'missing':
+                return jsonify({'error': 'not found'}), 404
+            return jsonify({'id': place_id, 'calls': self.calls, 'text': 'x' * 2000})
+
+        self.app = app
+        self.client = app.test_client()
+        with app.app_context():
+            self.token = create_access_token(identity='user-1')
+
+    def test_second_request_is_a_hit(self):
+        first = self.client.get('/places/p1')
+        second = self.client.get('/places/p1')
+        self.assertEqual(first.headers['X-Cache'], 'MISS')
+        self.assertEqual(second.headers['X-Cache'], 'HIT')
+        self.assertEqual(second.get_json(), first.get_json())
+        self.assertEqual(second.headers['ETag'], first.headers['ETag'])
+        self.assertEqual(second.headers['Last-Modified'], first.headers['Last-Modified'])
+        self.assertEqual(self.calls, 1)
+
+    def test_body_is_stored_compressed(self):
+        response = self.client.get('/places/p1')
+        (payload,) = [value for _, value in self.cache._data.values()]
+        self.assertLess(len(payload), len(response.get_data()))
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get('/places/p1').headers['ETag']
+        response = self.client.get('/places/p1', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+        self.assertEqual(response.headers['ETag'], etag)
+        stale = self.client.get('/places/p1', headers={'If-None-Match': '"other"'})
+        self.assertEqual(stale.status_code, 200)
+
+    def test_if_modified_since_returns_304(self):
+        last_modified = self.client.get('/places/p1').headers['Last-Modified']
+        response = self.client.get('/places/p1', headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 304)
+
+    def test_query_args_are_normalized(self):
+        self.client.get('/places/p1?b=2&a=1')
+        response = self.client.get('/places/p1?a=1&b=2')
+        self.assertEqual(response.headers['X-Cache'], 'HIT')
+
+    def test_auth_scope_is_part_of_the_key(self):
+        self.client.get('/places/p1')
+        response = self.client.get('/places/p1',
+                                   headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+
+    def test_invalid_token_bypasses_the_cache(self):
+        self.client.get('/places/p1')
+        response = self.client.get('/places/p1', headers={'Authorization': 'Bearer junk'})
+        self.assertNotIn('X-Cache', response.headers)
+        self.assertEqual(self.calls, 2)
+
+    def test_data_version_change_misses(self):
+        self.client.get('/places/p1')
+        self.data_version += 1
+        self.assertEqual(self.client.get('/places/p1').headers['X-Cache'], 'MISS')
+
+    def test_errors_are_not_cached(self):
+        self.client.get('/places/missing')
+        response = self.client.get('/places/missing')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
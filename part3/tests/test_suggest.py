@@ -0,0 +1,126 @@
+"""Autocomplete: the burst-trie PrefixIndex against brute force, Suggester popularity."""
+import random
+import unittest
+
+from services.facade_final import HBnBFacadeFinal
+from utils.suggest import PrefixIndex, Suggester, _keys, normalize, suggest_request
+
+SYLLABLES = [c + v for c in 'bdfklmnprst' for v in 'aeiou']
+
+
+class TestPrefixIndex(unittest.TestCase):
+    """Enough entries that leaves burst several levels deep."""
+
+    def setUp(self):
+        self.rng = random.Random(3)
+        self.index = PrefixIndex()
+        self.entries = {}
+
+    def _text(self):
+        return ' '.join(''.join(self.rng.choices(SYLLABLES, k=self.rng.randint(1, 3)))
+                        for _ in range(self.rng.randint(1, 4))).title()
+
+    def _set(self, entry_id, text, score):
+        self.entries[entry_id] = (text, score)
+        self.index.set(entry_id, text, score)
+
+    def _check(self, index=None):
+        index = index or self.index
+        for prefix in ('b', 'ba', 'bak', 'ke', 't', 'fa l', 'x', self._text()[:3]):
+            key = normalize(prefix)
+            expected = sorted((-score, text, entry_id) for entry_id, (text, score) in self.entries.items()
+                              if any(k.startswith(key) for k in _keys(text)))[:20]
+            self.assertEqual(index.complete(prefix, 20),
+                             [(-score, text, entry_id) for score, text, entry_id in expected], prefix)
+
+    def test_random_writes_match_brute_force(self):
+        for step in range(4000):
+            roll = self.rng.random()
+            entry_id = self.rng.randint(0, 1500)
+            if roll < 0.5 or entry_id not in self.entries:
+                self._set(entry_id, self._text(), self.rng.randint(0, 50))
+            elif roll < 0.75:
+                text, score = self.entries[entry_id]
+                self._set(entry_id, text, score + self.rng.randint(1, 5))
+            elif roll < 0.85:
+                text, score = self.entries[entry_id]
+                self._set(entry_id, text, max(score - 5, 0))
+            else:
+                del self.entries[entry_id]
+                self.index.discard(entry_id)
+            if step % 250 == 0:
+                self._check()
+        self._check()
+        loaded = PrefixIndex()
+        loaded.load((entry_id, text, score) for entry_id, (text, score) in self.entries.items())
+        self._check(loaded)
+
+    def test_word_starts_and_normalization(self):
+        self.index.set(1, 'Sunny Beach-House', 3)
+        self.index.set(2, 'Café Crème', 1)
+        self.assertEqual([e for _, _, e in self.index.complete('beach h')], [1])
+        self.assertEqual([e for _, _, e in self.index.complete('  HOU')], [1])
+        self.assertEqual([e for _, _, e in self.index.complete('cafe cr')], [2])
+        self.assertEqual(self.index.complete('each'), [])
+        self.assertEqual(self.index.complete('!!'), [])
+
+
+class TestSuggester(unittest.TestCase):
+
+    def setUp(self):
+        self.suggester = Suggester()
+        self.suggester.set_amenity('wifi', 'Wi-Fi')
+        self.suggester.set_place('p1', 'Paris loft', 'Paris', ['wifi'])
+        self.suggester.set_place('p2', 'Parisian flat', 'paris', ['wifi'])
+        self.suggester.set_place('p3', 'Palm villa', 'Palermo')
+
+    def _suggest(self, query):
+        return [(s['type'], s['text'], s['score']) for s in self.suggester.suggest(query)]
+
+    def test_popularity(self):
+        self.suggester.add_reviews('p3', 3)
+        self.assertEqual(self._suggest('pa'), [('place', 'Palm villa', 3), ('city', 'Paris', 2),
+                                               ('city', 'Palermo', 1), ('place', 'Paris loft', 0),
+                                               ('place', 'Parisian flat', 0)])
+        self.assertEqual(self._suggest('wi'), [('amenity', 'Wi-Fi', 2)])
+
+    def test_updates_and_removals_move_counts(self):
+        self.suggester.set_place('p2', 'Parisian flat', 'Lyon', [])
+        self.suggester.remove_place('p1')
+        self.suggester.remove_place('p1')
+        self.assertEqual(self._suggest('paris'), [('place', 'Parisian flat', 0)])
+        self.assertEqual(self._suggest('wi'), [('amenity', 'Wi-Fi', 0)])
+        self.suggester.remove_amenity('wifi')
+        self.assertEqual(self._suggest('wi'), [])
+
+    def test_request_parsing(self):
+        self.assertEqual(suggest_request({'q': ' par', 'limit': '5'}), ('par', 5))
+        for args in ({}, {'q': ''}, {'q': 'p', 'limit': '21'}, {'q': 'p', 'limit': 'x'}):
+            with self.assertRaises(ValueError):
+                suggest_request(args)
+
+
+class TestFacadeSuggest(unittest.TestCase):
+
+    def test_follows_places_reviews_and_amenities(self):
+        facade = HBnBFacadeFinal()
+        owner_id, reviewer_id = list(facade.users)
+        sauna = facade.create_amenity({'name': 'Sauna'})
+        place = facade.create_place({
+            'title': 'Sea view studio', 'price': 90, 'latitude': 43.3, 'longitude': 5.4,
+            'owner_id': owner_id, 'city': 'Sete', 'amenities': [sauna.id],
+        })
+        review = facade.create_review({'text': 'Lovely', 'rating': 5, 'user_id': reviewer_id,
+                                       'place_id': place.id})
+        self.assertEqual([(s['type'], s['score']) for s in facade.suggest('se')],
+                         [('place', 1), ('city', 1)])
+        self.assertEqual(facade.suggest('sau')[0], {'type': 'amenity', 'text': 'Sauna',
+                                                    'score': 1, 'id': sauna.id})
+        facade.delete_review(review.id)
+        facade.update_place(place.id, {'title': 'Harbour studio', 'city': 'Nice'})
+        self.assertEqual(facade.suggest('se'), [])
+        self.assertEqual(facade.suggest('stu')[0]['score'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
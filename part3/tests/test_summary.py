@@ -0,0 +1,167 @@
+"""Materialized place / city summaries: maintained from flush events, equal to a rebuild."""
+import random
+import unittest
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy import Column, Float, ForeignKey, Integer, String, create_engine
+from sqlalchemy.orm import Session, column_property, declarative_base, relationship
+
+from app.persistence import summary
+from services.facade_final import HBnBFacadeFinal
+from utils.summary import summarize
+
+Base = declarative_base()
+
+
+class SummaryPlace(Base):
+    __tablename__ = 'summary_places'
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    price = column_property(Column(Float, nullable=False), active_history=True)
+    city = column_property(Column(String(100), nullable=False), active_history=True)
+    reviews = relationship('SummaryReview', cascade='all, delete-orphan')
+
+
+class SummaryReview(Base):
+    __tablename__ = 'summary_reviews'
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    rating = column_property(Column(Integer, nullable=False), active_history=True)
+    place_id = column_property(Column(String(36), ForeignKey('summary_places.id'), nullable=False),
+                               active_history=True)
+
+
+summary.attach_summary(SummaryPlace, SummaryReview)
+
+CITIES = ['Paris', 'Lyon', 'Nice', 'Lille']
+
+
+class TestSummary(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        self.addCleanup(self.engine.dispose)
+        Base.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+        self.addCleanup(self.session.close)
+        self.rng = random.Random(11)
+
+    def _expected(self):
+        ratings = {}
+        for review in self.session.query(SummaryReview):
+            ratings.setdefault(review.place_id, []).append(review)
+        return summarize(SimpleNamespace(price=p.price, city=p.city, reviews=ratings.get(p.id, []))
+                         for p in self.session.query(SummaryPlace))
+
+    def _read(self):
+        return (summary.read_summary(self.session, SummaryPlace),
+                summary.read_city_summaries(self.session, SummaryPlace))
+
+    def _step(self):
+        places = self.session.query(SummaryPlace).all()
+        roll = self.rng.random()
+        if roll < 0.35 or not places:
+            self.session.add(SummaryPlace(price=self.rng.choice([20, 55.5, 120, 300, 80]),
+                                          city=self.rng.choice(CITIES)))
+        elif roll < 0.55:
+            place = self.rng.choice(places)
+            if self.rng.random() < 0.5:
+                place.price = self.rng.choice([20, 55.5, 120, 300, 80, 999])
+            else:
+                place.city = self.rng.choice(CITIES)
+        elif roll < 0.65:
+            self.session.delete(self.rng.choice(places))
+        elif roll < 0.85:
+            place = self.rng.choice(places)
+            place.reviews.append(SummaryReview(rating=self.rng.randint(1, 5)))
+        else:
+            reviews = self.session.query(SummaryReview).all()
+            if reviews:
+                review = self.rng.choice(reviews)
+                if self.rng.random() < 0.5:
+                    self.session.delete(review)
+                else:
+                    review.rating = self.rng.randint(1, 5)
+                    review.place_id = self.rng.choice(places).id
+
+    def test_events_match_rebuild(self):
+        for step in range(300):
+            self._step()
+            if self.rng.random() < 0.1:
+                self.session.flush()
+                self.session.rollback()
+            else:
+                self.session.commit()
+            if step % 25 == 0:
+                self.assertEqual(self._read(), self._expected(), step)
+        maintained = self._read()
+        self.assertEqual(maintained, self._expected())
+        self.assertEqual(summary.rebuild_summary(self.session, SummaryPlace), len(maintained[1]))
+        self.session.commit()
+        self.assertEqual(self._read(), maintained)
+
+    def test_reads_and_empty_cities(self):
+        self.assertEqual(summary.read_summary(self.session, SummaryPlace)['places'], 0)
+        place = SummaryPlace(price=100, city='Paris',
+                             reviews=[SummaryReview(rating=4), SummaryReview(rating=5)])
+        self.session.add_all([place, SummaryPlace(price=40, city='Paris')])
+        self.session.commit()
+        self.assertEqual(summary.read_summary(self.session, SummaryPlace, 'Paris'),
+                         {'places': 2, 'average_price': 70.0, 'min_price': 40, 'max_price': 100,
+                          'reviews_count': 2, 'average_rating': 4.5})
+        place.city = 'Nice'
+        self.session.commit()
+        self.assertEqual(summary.read_summary(self.session, SummaryPlace, 'Paris')['max_price'], 40)
+        nice = summary.read_summary(self.session, SummaryPlace, 'Nice')
+        self.assertEqual(nice['reviews_count'], 2)
+        self.session.delete(place)
+        self.session.commit()
+        self.assertIsNone(summary.read_summary(self.session, SummaryPlace, 'Nice'))
+        self.assertEqual(list(summary.read_city_summaries(self.session, SummaryPlace)), ['Paris'])
+        self.assertEqual(summary.read_summary(self.session, SummaryPlace)['reviews_count'], 0)
+
+
+class TestFacadeSummary(unittest.TestCase):
+
+    def test_follows_places_and_reviews(self):
+        facade = HBnBFacadeFinal()
+        owner_id, reviewer_id = list(facade.users)
+        place = facade.create_place({'title': 'Harbour flat', 'price': 60, 'latitude': 43.3,
+                                     'longitude': 5.4, 'owner_id': owner_id, 'city': 'Sete'})
+        facade.create_review({'text': 'Lovely stay', 'rating': 4, 'user_id': reviewer_id,
+                              'place_id': place.id})
+        self.assertEqual(facade.get_place_summary('Sete'),
+                         {'places': 1, 'average_price': 60.0, 'min_price': 60, 'max_price': 60,
+                          'reviews_count': 1, 'average_rating': 4.0})
+        self.assertIsNone(facade.get_place_summary('Nowhere'))
+        self.assertEqual(facade.get_place_summary()['places'], len(facade.places))
+        self.assertIn('Sete', facade.get_city_summaries())
+
+    def test_running_totals_match_a_full_scan(self):
+        facade = HBnBFacadeFinal()
+        owner_id, reviewer_id = list(facade.users)
+        rng = random.Random(7)
+        cities = ['Lyon', 'Nice', 'Sete', '']
+        for i in range(40):
+            places = list(facade.places)
+            action = rng.random()
+            if action < 0.3 or not places:
+                facade.create_place({'title': f'Place {i}', 'price': rng.choice([40, 60, 90.5]),
+                                     'latitude': 43.0, 'longitude': 5.0, 'owner_id': owner_id,
+                                     'city': rng.choice(cities)})
+            elif action < 0.5:
+                facade.update_place(rng.choice(places), {'price': rng.randint(10, 200),
+                                                         'city': rng.choice(cities)})
+            elif action < 0.75 or not facade.reviews:
+                facade.create_review({'text': 'Stay', 'rating': rng.randint(1, 5),
+                                      'user_id': reviewer_id, 'place_id': rng.choice(places)})
+            elif action < 0.9:
+                facade.update_review(rng.choice(list(facade.reviews)), {'rating': rng.randint(1, 5)})
+            else:
+                facade.delete_review(rng.choice(list(facade.reviews)))
+            overall, by_city = summarize(facade.places.values())
+            self.assertEqual(facade.get_place_summary(), overall)
+            self.assertEqual(facade.get_city_summaries(), by_city)
+
+
+if __name__ == '__main__':
+    unittest.main()
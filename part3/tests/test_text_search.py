@@ -0,0 +1,210 @@
+"""Text analysis, the BM25 inverted index and the database text index backends."""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+import uuid
+
+from sqlalchemy import Column, String, Text, create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from app.persistence import fulltext
+from utils.text_search import InvertedIndex, analyze, search_request, stem, tokenize
+
+Base = declarative_base()
+
+
+class SearchPlace(Base):
+    # Same table name as the app model: the FTS5 DDL targets 'places'
+    __tablename__ = 'places'
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    title = Column(String(100))
+    description = Column(Text)
+
+
+fulltext.attach_fulltext(SearchPlace)
+
+DOCUMENTS = {
+    'flat': ('Cozy apartments downtown', 'A lovely flat near the station'),
+    'beach': ('Beach house', 'Sunny house on the beach with an ocean view'),
+    'cabin': ('Mountain cabin', 'Rustic cabin with a cozy fireplace, great for hiking'),
+    'loft': ('Café loft', 'Loft above a café'),
+}
+
+
+class TestAnalysis(unittest.TestCase):
+
+    def test_tokenize_folds_case_accents_and_stop_words(self):
+        self.assertEqual(tokenize('The Café, on the Beach!'), ['cafe', 'beach'])
+        self.assertEqual(tokenize(None), [])
+
+    def test_porter_stems(self):
+        for word, expected in (('apartments', 'apart'), ('hopping', 'hop'), ('relational', 'relat'),
+                               ('generalizations', 'gener'), ('cozy', 'cozi'), ('sky', 'sky')):
+            self.assertEqual(stem(word), expected, word)
+        self.assertEqual(analyze('hiking cabins'), analyze('hike cabin'))
+
+    def test_search_request(self):
+        self.assertEqual(search_request({'q': ' beach ', 'limit': '5'}), ('beach', 5))
+        for args in ({}, {'q': ' '}, {'q': 'x', 'limit': '0'}, {'q': 'x', 'limit': 'many'}):
+            with self.assertRaises(ValueError):
+                search_request(args)
+
+
+class TestInvertedIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = InvertedIndex()
+        for doc_id, (title, description) in DOCUMENTS.items():
+            self.index.add(doc_id, {'title': title, 'description': description})
+
+    def _ids(self, query, limit=10):
+        return [doc_id for _, doc_id in self.index.search(query, limit)]
+
+    def test_ranking(self):
+        # A title match outranks a description match; stems match across forms
+        self.assertEqual(self._ids('cozy apartment'), ['flat', 'cabin'])
+        self.assertEqual(self._ids('cafe'), ['loft'])
+        self.assertEqual(self._ids('beaches'), ['beach'])
+        self.assertEqual(self._ids('the of'), [])
+        self.assertEqual(self._ids('cozy house', limit=1), ['beach'])
+
+    def test_update_and_remove(self):
+        self.index.add('beach', {'title': 'Seaside villa', 'description': 'Pool'})
+        self.assertEqual(self._ids('beach'), [])
+        self.assertEqual(self._ids('villa'), ['beach'])
+        self.index.remove('beach')
+        self.index.remove('beach')
+        self.assertEqual(self._ids('villa'), [])
+        self.assertEqual(len(self.index), 3)
+
+    def test_objects_are_indexed_by_attribute(self):
+        class Place:
+            title, description = 'Tiny house', None
+        index = InvertedIndex()
+        index.add('p', Place())
+        self.assertEqual(index.search('houses'), [(index.search('house')[0][0], 'p')])
+
+
+class TestFullTextBackends(unittest.TestCase):
+
+    def setUp(self):
+        path = os.path.join(tempfile.mkdtemp(), 'search.db')
+        self.engine = create_engine(f'sqlite:///{path}')
+        Base.metadata.create_all(self.engine)
+        self.addCleanup(self.engine.dispose)
+
+    def _populate(self):
+        with Session(self.engine) as session:
+            session.add_all(SearchPlace(id=doc_id, title=title, description=description)
+                            for doc_id, (title, description) in DOCUMENTS.items())
+            session.commit()
+
+    def _check_maintenance(self):
+        with Session(self.engine) as session:
+            ids = lambda query: [pid for _, pid in fulltext.search(session, query, 10)]
+            self.assertEqual(ids('cozy apartment'), ['flat', 'cabin'])
+            self.assertEqual(ids('cafe'), ['loft'])
+            self.assertEqual(ids('"; DROP TABLE places; --'), [])
+            place = session.get(SearchPlace, 'beach')
+            place.title = 'Seaside villa'
+            session.commit()
+            self.assertEqual(ids('villa'), ['beach'])
+            session.delete(place)
+            session.add(SearchPlace(id='rolled', title='Villa', description='Rolled back'))
+            session.flush()
+            session.rollback()
+            self.assertEqual(ids('villa'), ['beach'])
+            session.delete(session.get(SearchPlace, 'beach'))
+            session.commit()
+            self.assertEqual(ids('villa beach'), [])
+
+    def test_fts5(self):
+        self.assertEqual(fulltext.backend(self.engine), 'fts5')
+        self._populate()
+        self._check_maintenance()
+
+    def _drop_fts(self):
+        with self.engine.begin() as conn:
+            for suffix in ('ai', 'ad', 'au'):
+                conn.exec_driver_sql(f'DROP TRIGGER {fulltext.FTS_TABLE}_{suffix}')
+            conn.exec_driver_sql(fulltext.FTS5_DROP)
+
+    def test_in_process_index_without_fts(self):
+        self._drop_fts()
+        self._populate()
+        self.assertEqual(fulltext.backend(self.engine), 'memory')
+        self._check_maintenance()
+
+    def test_commit_during_the_first_load_is_not_lost(self):
+        self._drop_fts()
+        with self.engine.connect() as conn:
+            # The loading SELECT keeps reading its snapshot while the place commits
+            conn.exec_driver_sql('PRAGMA journal_mode=WAL')
+        self._populate()
+        committed = []
+
+        def commit_a_place(conn, cursor, statement, *args):
+            if statement.startswith('SELECT places.id, places.title') and not committed:
+                with Session(self.engine) as session:
+                    session.add(SearchPlace(id='late', title='Villa', description='Added mid-load'))
+                    session.commit()
+                committed.append('late')
+        event.listen(self.engine, 'after_cursor_execute', commit_a_place)
+        with Session(self.engine) as session:
+            self.assertEqual([pid for _, pid in fulltext.search(session, 'villa', 10)], ['late'])
+        self.assertEqual(committed, ['late'])
+
+    def test_ensure_fulltext_indexes_existing_rows(self):
+        with self.engine.begin() as conn:
+            for suffix in ('ai', 'ad', 'au'):
+                conn.exec_driver_sql(f'DROP TRIGGER {fulltext.FTS_TABLE}_{suffix}')
+            conn.exec_driver_sql(fulltext.FTS5_DROP)
+        self._populate()
+        self.assertEqual(fulltext.ensure_fulltext(self.engine), 'fts5')
+        self._check_maintenance()
+
+    def test_concurrent_first_searches_on_one_event_loop(self):
+        self._drop_fts()
+        self._populate()
+        url = str(self.engine.url).replace('sqlite://', 'sqlite+aiosqlite://', 1)
+
+        async def scenario():
+            engine = create_async_engine(url)
+            try:
+                async def search(query):
+                    async with AsyncSession(engine) as session:
+                        return await session.run_sync(
+                            lambda s: [pid for _, pid in fulltext.search(s, query, 10)])
+                return await asyncio.gather(*(search('cozy') for _ in range(4)))
+            finally:
+                await engine.dispose()
+
+        # Both requests load the in-process index: the second must not block
+        # the loop the first one's query is waiting on
+        results = []
+        worker = threading.Thread(target=lambda: results.append(asyncio.run(scenario())),
+                                  daemon=True)
+        worker.start()
+        worker.join(10)
+        self.assertFalse(worker.is_alive(), 'the event loop is deadlocked')
+        self.assertEqual(results, [[['flat', 'cabin']] * 4])
+
+
+class TestAttachUnmapped(unittest.TestCase):
+
+    def test_models_package_imports(self):
+        # attach_fulltext / attach_summary run at import, before the models
+        # are necessarily mapped; they must not need Place.__table__ then
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-c', 'import app.models'], cwd=root,
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
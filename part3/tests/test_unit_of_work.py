@@ -0,0 +1,99 @@
+"""Unit of work: repositories flush, the outermost scope commits or rolls back."""
+import unittest
+import uuid
+
+from flask import Flask
+from sqlalchemy import event
+
+from app import db
+from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.unit_of_work import transactional, unit_of_work
+
+
+class UowItem(db.Model):
+    __tablename__ = 'test_uow_items'
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    name = db.Column(db.String(50), nullable=False)
+
+
+class TestUnitOfWork(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.repo = SQLAlchemyRepository(UowItem)
+        self.commits = []
+        event.listen(db.session(), 'after_commit', self.commits.append)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _names(self):
+        db.session.expire_all()
+        return sorted(item.name for item in UowItem.query.all())
+
+    def test_repository_writes_are_flushed_not_committed(self):
+        item = UowItem(name='a')
+        self.repo.add(item)
+        self.repo.update(item.id, {'name': 'b'})
+        self.assertEqual(self.commits, [])
+        db.session.rollback()
+        self.assertEqual(self._names(), [])
+
+    def test_one_commit_for_several_operations(self):
+        with unit_of_work():
+            first, second = UowItem(name='a'), UowItem(name='b')
+            self.repo.add(first)
+            self.repo.add(second)
+            self.repo.delete(first.id)
+        self.assertEqual(len(self.commits), 1)
+        self.assertEqual(self._names(), ['b'])
+
+    def test_error_rolls_everything_back(self):
+        with self.assertRaises(RuntimeError):
+            with unit_of_work():
+                self.repo.add(UowItem(name='a'))
+                raise RuntimeError('boom')
+        self.assertEqual(self.commits, [])
+        self.assertEqual(self._names(), [])
+
+    def test_nested_scopes_commit_once_at_the_outermost(self):
+        @transactional
+        def add(name):
+            self.repo.add(UowItem(name=name))
+
+        with unit_of_work():
+            add('a')
+            add('b')
+            self.assertEqual(self.commits, [])
+        self.assertEqual(len(self.commits), 1)
+        self.assertEqual(self._names(), ['a', 'b'])
+
+    def test_inner_error_rolls_back_the_outer_scope(self):
+        @transactional
+        def fail():
+            self.repo.add(UowItem(name='b'))
+            raise ValueError('invalid')
+
+        with self.assertRaises(ValueError):
+            with unit_of_work():
+                self.repo.add(UowItem(name='a'))
+                fail()
+        self.assertEqual(self._names(), [])
+
+    def test_failed_flush_rolls_back(self):
+        with self.assertRaises(Exception):
+            with unit_of_work():
+                self.repo.add(UowItem(name='a'))
+                self.repo.add(UowItem(name=None))
+        self.assertEqual(self._names(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""WebSocket cluster mode: presence map, routing to the owning node, one broadcast per node."""
+import asyncio
+import unittest
+
+from web_dynamic.cluster import (BROADCAST_CHANNEL, PRESENCE_KEY, ClusterNode, InProcessBroker,
+                                 envelope, open_envelope)
+from web_dynamic.connections import ConnectionRegistry
+
+
+class FakeSocket:
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, payload):
+        self.sent.append(payload)
+
+    async def close(self, code, reason=''):
+        pass
+
+
+class CountingBroker(InProcessBroker):
+
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    async def publish(self, channel, message):
+        self.published.append(channel)
+        return await super().publish(channel, message)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def settle(*registries):
+    for _ in range(3):
+        await asyncio.sleep(0)
+    for registry in registries:
+        for outbound in registry.outbound.values():
+            await outbound.drain()
+
+
+async def start_cluster(broker, count):
+    nodes = [ClusterNode(broker, ConnectionRegistry(), f'n{i}') for i in range(count)]
+    for node in nodes:
+        await node.start()
+    return nodes
+
+
+async def connect(node, user_id):
+    socket = FakeSocket()
+    node.registry.add(socket, user_id)
+    await node.user_connected(user_id)
+    return socket
+
+
+class TestClusterNode(unittest.TestCase):
+
+    def test_envelope_round_trip(self):
+        message = envelope('n1', '{"text": "a\\nb"}', 'u1')
+        self.assertEqual(open_envelope(message), ('n1', 'u1', None, None, '{"text": "a\\nb"}'))
+
+    def test_send_to_user_reaches_the_owning_nodes_only(self):
+        async def scenario():
+            broker = CountingBroker()
+            a, b, c = await start_cluster(broker, 3)
+            on_b = await connect(b, 'alice')
+            on_c = await connect(c, 'alice')
+            local = await connect(a, 'alice')
+            bob = await connect(c, 'bob')
+            await a.send_to_user('alice', 'hi')
+            await settle(a.registry, b.registry, c.registry)
+            presence = await broker.hkeys(PRESENCE_KEY.format('alice'))
+            return broker.published, [on_b.sent, on_c.sent, local.sent, bob.sent], presence
+        published, received, presence = run(scenario())
+        self.assertEqual(sorted(published), ['ws:node:n1', 'ws:node:n2'])
+        self.assertEqual(received, [['hi'], ['hi'], ['hi'], []])
+        self.assertEqual(sorted(presence), ['n0', 'n1', 'n2'])
+
+    def test_broadcast_is_published_once(self):
+        async def scenario():
+            broker = CountingBroker()
+            nodes = await start_cluster(broker, 3)
+            sockets = [await connect(node, f'u{i}') for i, node in enumerate(nodes) for _ in range(4)]
+            await nodes[0].broadcast('stats')
+            await nodes[1].broadcast('typing', exclude_user_id='u2')
+            await settle(*(node.registry for node in nodes))
+            return broker.published, sockets
+        published, sockets = run(scenario())
+        self.assertEqual(published, [BROADCAST_CHANNEL, BROADCAST_CHANNEL])
+        # No order between messages from different nodes
+        self.assertEqual([sorted(s.sent) for s in sockets[:8]], [['stats', 'typing']] * 8)
+        self.assertEqual([s.sent for s in sockets[8:]], [['stats']] * 4)
+
+    def test_topic_publish_reaches_subscribers_on_every_node(self):
+        async def scenario():
+            broker = CountingBroker()
+            nodes = await start_cluster(broker, 3)
+            watching, others = [], []
+            for node in nodes:
+                socket, other = await connect(node, 'alice'), await connect(node, 'bob')
+                node.registry.subscribe(socket, 'place:p1')
+                watching.append(socket)
+                others.append(other)
+            await nodes[2].publish('place:p1', 'review')
+            await settle(*(node.registry for node in nodes))
+            return broker.published, watching, others
+        published, watching, others = run(scenario())
+        self.assertEqual(published, [BROADCAST_CHANNEL])
+        self.assertEqual([s.sent for s in watching], [['review']] * 3)
+        self.assertEqual([s.sent for s in others], [[]] * 3)
+
+    def test_presence_follows_connections(self):
+        async def scenario():
+            broker = InProcessBroker()
+            a, b = await start_cluster(broker, 2)
+            first = await connect(a, 'alice')
+            await connect(a, 'alice')
+            await connect(b, 'alice')
+            await a.registry.remove(first)
+            await a.user_disconnected('alice')
+            after_one = sorted(await broker.hkeys(PRESENCE_KEY.format('alice')))
+            await b.stop()
+            after_stop = await broker.hkeys(PRESENCE_KEY.format('alice'))
+            await a.stop()
+            return after_one, after_stop, await broker.hkeys(PRESENCE_KEY.format('alice'))
+        self.assertEqual(run(scenario()), (['n0', 'n1'], ['n0'], []))
+
+    def test_a_crashed_node_is_dropped_from_presence(self):
+        async def scenario():
+            broker = InProcessBroker()
+            a, b = await start_cluster(broker, 2)
+            await connect(b, 'alice')
+            # b goes away without cleaning up its presence entries
+            b._listener.cancel()
+            await b._subscription.close()
+            await a.send_to_user('alice', 'hi')
+            return await broker.hkeys(PRESENCE_KEY.format('alice'))
+        self.assertEqual(run(scenario()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
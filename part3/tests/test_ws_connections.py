@@ -0,0 +1,169 @@
+"""WebSocket outbound queues: one serialization, writer per connection, slow-consumer policies."""
+import asyncio
+import json
+import unittest
+
+from utils.topics import change_event, event_topic, is_topic, place_topic
+from web_dynamic.connections import (DISCONNECT, DROP, MAX_TOPICS, SLOW_CONSUMER_CLOSE_CODE,
+                                     ConnectionRegistry, Outbound, encode)
+
+
+class FakeSocket:
+    """Records sent payloads; blocked sockets wait until released."""
+
+    def __init__(self, blocked=False):
+        self.sent = []
+        self.closed_with = None
+        self.release = asyncio.Event()
+        if not blocked:
+            self.release.set()
+
+    async def send(self, payload):
+        await self.release.wait()
+        self.sent.append(payload)
+
+    async def close(self, code, reason=''):
+        self.closed_with = code
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestOutbound(unittest.TestCase):
+
+    def test_messages_are_sent_in_order(self):
+        async def scenario():
+            socket = FakeSocket()
+            outbound = Outbound(socket, 'u1')
+            for i in range(5):
+                self.assertTrue(outbound.send(encode({'n': i})))
+            await outbound.drain()
+            await outbound.close()
+            return socket.sent
+        self.assertEqual([json.loads(p)['n'] for p in run(scenario())], [0, 1, 2, 3, 4])
+
+    def test_drop_policy_keeps_the_newest(self):
+        async def scenario():
+            socket = FakeSocket(blocked=True)
+            outbound = Outbound(socket, 'u1', queue_size=3, policy=DROP)
+            await asyncio.sleep(0)
+            for i in range(10):
+                outbound.send(str(i))
+            socket.release.set()
+            await outbound.drain()
+            await outbound.close()
+            return socket.sent, outbound.dropped
+        sent, dropped = run(scenario())
+        self.assertEqual(sent, ['7', '8', '9'])
+        self.assertEqual(dropped, 7)
+
+    def test_disconnect_policy_closes_the_socket(self):
+        async def scenario():
+            socket = FakeSocket(blocked=True)
+            outbound = Outbound(socket, 'u1', queue_size=2, policy=DISCONNECT)
+            await asyncio.sleep(0)
+            results = [outbound.send(str(i)) for i in range(4)]
+            await asyncio.sleep(0.01)
+            return results, socket.closed_with, outbound.closed
+        results, code, closed = run(scenario())
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(code, SLOW_CONSUMER_CLOSE_CODE)
+        self.assertTrue(closed)
+
+    def test_unknown_policy(self):
+        async def scenario():
+            Outbound(FakeSocket(), 'u1', policy='block')
+        with self.assertRaises(ValueError):
+            run(scenario())
+
+
+class TestConnectionRegistry(unittest.TestCase):
+
+    def test_slow_client_does_not_stall_broadcast(self):
+        async def scenario():
+            registry = ConnectionRegistry(queue_size=8)
+            slow = FakeSocket(blocked=True)
+            fast = [FakeSocket() for _ in range(50)]
+            registry.add(slow, 'slow')
+            for i, socket in enumerate(fast):
+                registry.add(socket, f'u{i % 10}')
+            self.assertEqual(registry.broadcast(encode({'type': 'stats'})), 51)
+            self.assertEqual(registry.broadcast('x', exclude_user_id='u0'), 46)
+            for socket in fast:
+                await registry.outbound[socket].drain()
+            self.assertEqual(slow.sent, [])
+            self.assertEqual(registry.send_to_user('u3', 'hi'), 5)
+            self.assertEqual(registry.send_to_user('nobody', 'hi'), 0)
+            for socket in fast:
+                await registry.outbound[socket].drain()
+            await registry.remove(slow)
+            for socket in fast:
+                await registry.remove(socket)
+            return fast, registry
+        fast, registry = run(scenario())
+        self.assertTrue(all(socket.sent[0] == '{"type": "stats"}' for socket in fast))
+        self.assertEqual(sum(len(socket.sent) for socket in fast), 50 + 45 + 5)
+        self.assertEqual((len(registry), registry.connections), (0, {}))
+
+    def test_topic_publish_reaches_subscribers_only(self):
+        async def scenario():
+            registry = ConnectionRegistry()
+            sockets = [FakeSocket() for _ in range(1000)]
+            for i, socket in enumerate(sockets):
+                registry.add(socket, f'u{i}')
+            watching = sockets[:3]
+            for socket in watching:
+                self.assertTrue(registry.subscribe(socket, 'place:p1'))
+            registry.subscribe(sockets[0], 'place:p2')
+            counts = [registry.publish('place:p1', 'review'), registry.publish('place:nobody', 'x')]
+            self.assertTrue(registry.unsubscribe(watching[1], 'place:p1'))
+            self.assertFalse(registry.unsubscribe(watching[1], 'place:p1'))
+            counts.append(registry.publish('place:p1', 'update'))
+            for socket in sockets:
+                await registry.outbound[socket].drain()
+            await registry.remove(sockets[0])
+            counts.append(registry.publish('place:p1', 'last'))
+            await registry.outbound[watching[2]].drain()
+            topics = dict(registry.topics)
+            for socket in sockets[1:]:
+                await registry.remove(socket)
+            return counts, [s.sent for s in sockets[:4]], topics, registry.topics
+        counts, sent, topics, remaining = run(scenario())
+        self.assertEqual(counts, [3, 0, 2, 1])
+        self.assertEqual(sent, [['review', 'update'], ['review'], ['review', 'update', 'last'], []])
+        self.assertEqual(list(topics), ['place:p1'])
+        self.assertEqual(remaining, {})
+
+    def test_subscriptions_per_connection_are_bounded(self):
+        async def scenario():
+            registry = ConnectionRegistry()
+            socket = FakeSocket()
+            registry.add(socket, 'u1')
+            results = [registry.subscribe(socket, f'place:{i}') for i in range(MAX_TOPICS + 1)]
+            results.append(registry.subscribe(socket, 'place:0'))
+            results.append(registry.subscribe(FakeSocket(), 'place:0'))
+            await registry.remove(socket)
+            return results
+        results = run(scenario())
+        self.assertEqual(results[:MAX_TOPICS], [True] * MAX_TOPICS)
+        self.assertEqual(results[MAX_TOPICS:], [False, True, False])
+
+
+class TestTopics(unittest.TestCase):
+
+    def test_topic_names(self):
+        self.assertTrue(is_topic(place_topic('1234')))
+        for name in ('place:', 'user:1', 'place', None, 42, 'place:' + 'x' * 64):
+            self.assertFalse(is_topic(name))
+
+    def test_event_topic(self):
+        message = change_event('review_created', place_topic('p1'), {'id': 'r1', 'rating': 5})
+        self.assertEqual(event_topic(message), 'place:p1')
+        self.assertEqual(json.loads(message)['data'], {'id': 'r1', 'rating': 5})
+        for message in ('not json', '[1, 2]', '{"topic": "user:1"}'):
+            self.assertIsNone(event_topic(message))
+
+
+if __name__ == '__main__':
+    unittest.main()
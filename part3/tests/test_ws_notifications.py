@@ -0,0 +1,104 @@
+"""Pending WebSocket notifications: one pipelined round trip per operation, atomic fetch-and-clear."""
+import asyncio
+import unittest
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from web_dynamic.notifications import NotificationStore
+
+
+class FakePipeline:
+
+    def __init__(self, client, transaction):
+        self.client = client
+        self.transaction = transaction
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.commands.append((name, args))
+            return self
+        return queue
+
+    async def execute(self):
+        if self.client.down:
+            raise RedisConnectionError("Connection refused")
+        self.client.round_trips.append((self.transaction, [name for name, _ in self.commands]))
+        return [getattr(self.client, f'_{name}')(*args) for name, args in self.commands]
+
+
+class FakeRedis:
+    """The list commands of the store; records each pipeline execution as a round trip"""
+
+    def __init__(self):
+        self.lists = {}
+        self.round_trips = []
+        self.down = False
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self, transaction)
+
+    def _lpush(self, key, *values):
+        items = self.lists.setdefault(key, [])
+        items[:0] = reversed(values)
+        return len(items)
+
+    def _ltrim(self, key, start, end):
+        self.lists[key] = self.lists.get(key, [])[start:end + 1]
+        return True
+
+    def _lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def _delete(self, key):
+        return int(self.lists.pop(key, None) is not None)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestNotificationStore(unittest.TestCase):
+
+    def test_push_is_one_trimmed_round_trip(self):
+        client = FakeRedis()
+        store = NotificationStore(client, max_pending=3)
+        async def scenario():
+            for i in range(5):
+                await store.push('u1', {'n': i})
+        run(scenario())
+        self.assertEqual(client.round_trips, [(True, ['lpush', 'ltrim'])] * 5)
+        self.assertEqual(client.lists['notifications:u1'], ['{"n": 4}', '{"n": 3}', '{"n": 2}'])
+
+    def test_take_fetches_and_clears_atomically(self):
+        client = FakeRedis()
+        store = NotificationStore(client)
+        async def scenario():
+            await store.push('u1', {'n': 1})
+            await store.push('u1', {'n': 2})
+            return await store.take('u1'), await store.take('u1')
+        first, second = run(scenario())
+        self.assertEqual(first, [{'n': 2}, {'n': 1}])
+        self.assertEqual(second, [])
+        self.assertEqual(client.round_trips[2:], [(True, ['lrange', 'delete'])] * 2)
+
+    def test_redis_errors_are_not_raised_into_the_socket_handler(self):
+        client = FakeRedis()
+        client.down = True
+        store = NotificationStore(client)
+        async def scenario():
+            await store.push('u1', {'n': 1})
+            return await store.take('u1')
+        with self.assertLogs('web_dynamic.notifications', 'ERROR'):
+            self.assertEqual(run(scenario()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
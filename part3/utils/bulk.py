@@ -0,0 +1,84 @@
+"""Bulk create endpoints: the shared request handling and batch inserts.
+
+bulk_create() validates the payload and builds the (body, status) response
+around a repository's bulk create. The repositories build their batches with
+insert_batch(): the ids the items reference are resolved beforehand with
+existing() (one IN query per column for the whole batch, only well-typed
+ids), each item is built and checked against them (checked_id()), errors
+are collected per item, and the valid objects are flushed as batched INSERTs
+in the caller's session.
+"""
+from sqlalchemy import select
+
+MAX_BULK_ITEMS = 10000
+
+# What building an invalid item raises (model validators, checked_id, ...)
+ITEM_ERRORS = (ValueError, TypeError, AttributeError)
+
+
+def bulk_create(items, create, partial=False):
+    """Run a repository bulk create and build the (body, status) response.
+
+    create(items, partial) must return (objects, errors). Status is 201 when
+    everything was created, 207 when partial mode skipped invalid items and
+    400 when nothing was written.
+    """
+    if not isinstance(items, list) or not items:
+        return {'error': 'Expected a non-empty JSON array'}, 400
+    if len(items) > MAX_BULK_ITEMS:
+        return {'error': f'At most {MAX_BULK_ITEMS} items per request'}, 400
+    try:
+        created, errors = create(items, partial)
+    except Exception:
+        return {'error': 'Bulk create failed, nothing was written'}, 500
+    body = {
+        'created': len(created),
+        'ids': [obj.id for obj in created],
+        'errors': errors,
+    }
+    if not created:
+        return body, 400
+    return body, 207 if errors else 201
+
+
+def existing(session, column, values):
+    """The values among values that column holds, in one IN query (none if empty)."""
+    if not values:
+        return set()
+    return set(session.scalars(select(column).where(column.in_(values))))
+
+
+def checked_id(item, field, known, not_found):
+    """item[field], which must be a string among known; ValueError otherwise."""
+    value = item[field]
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be a string")
+    if value not in known:
+        raise ValueError(not_found)
+    return value
+
+
+def insert_batch(session, items, build, partial=False):
+    """Build one object per item with build(item) and flush the batch.
+
+    Returns (objects, errors), errors being [{'index': i, 'error': msg}] for
+    the items that are not objects or whose build raised (a missing key is
+    reported as '<key> is required'). Unless partial is true, nothing is
+    added when any item is invalid.
+    """
+    objects, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise TypeError("Item must be an object")
+            objects.append(build(item))
+        except KeyError as e:
+            errors.append({'index': index, 'error': f'{e.args[0]} is required'})
+        except ITEM_ERRORS as e:
+            errors.append({'index': index, 'error': str(e)})
+    if errors and not partial:
+        return [], errors
+
+    session.add_all(objects)
+    session.flush()
+    return objects, errors
@@ -0,0 +1,142 @@
+"""Facet counts for a set of places: price buckets, places per city, places
+per amenity and the average price.
+
+In memory, facet_places() makes one pass over the places. In SQL,
+facet_select() is one statement over a filtered places subquery: a
+GROUP BY city counting places, price sum and places per price bucket
+(conditional sums, so the totals need no extra query) UNION ALL a
+GROUP BY amenity over the place/amenity links.
+facets_from_rows() turns its rows into the same dict facet_places() returns.
+"""
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import and_, case, func, literal, null, select, union_all
+
+# (label, low, high): low <= price < high
+PRICE_BUCKETS = (
+    ('under_50', None, 50),
+    ('50_100', 50, 100),
+    ('100_200', 100, 200),
+    ('over_200', 200, None),
+)
+
+# Query parameter -> type, as accepted by the /places/filter and /places/stats routes
+FILTER_FIELDS = {
+    'city': str,
+    'min_price': float,
+    'max_price': float,
+    'min_bedrooms': int,
+    'min_bathrooms': int,
+    'min_guests': int,
+}
+
+
+def place_filters(args) -> Dict[str, Any]:
+    """Read the place filters from request args. Raises ValueError."""
+    filters = {}
+    for name, kind in FILTER_FIELDS.items():
+        value = args.get(name)
+        if not value:
+            continue
+        try:
+            filters[name] = kind(value)
+        except ValueError:
+            raise ValueError(f"{name} must be {'a number' if kind is float else 'an integer'}")
+    return filters
+
+
+def price_bucket(price: Optional[float]) -> str:
+    for label, _, high in PRICE_BUCKETS:
+        if high is None or (price or 0) < high:
+            return label
+
+
+def price_bucket_counts(price):
+    """One SQL sum per PRICE_BUCKETS entry, counting the rows whose price falls in it."""
+    counts = []
+    for label, low, high in PRICE_BUCKETS:
+        bounds = ([price >= low] if low is not None else []) + ([price < high] if high is not None else [])
+        counts.append(func.sum(case((and_(*bounds), 1), else_=0)).label(label))
+    return counts
+
+
+class FacetCounter:
+    """Accumulates facet counts; result() gives the response dict."""
+
+    def __init__(self):
+        self.total = 0
+        self.price_sum = 0.0
+        self.buckets = {label: 0 for label, _, _ in PRICE_BUCKETS}
+        self.cities = Counter()
+        self.amenities = Counter()
+
+    def add(self, price: Optional[float], city: Optional[str], amenities: Iterable[str] = ()) -> None:
+        """Count one place."""
+        self.total += 1
+        self.price_sum += price or 0
+        self.buckets[price_bucket(price)] += 1
+        if city:
+            self.cities[city] += 1
+        self.amenities.update(amenities)
+
+    def add_city(self, city: Optional[str], places: int, price_sum: float,
+                 bucket_counts: Iterable[int]) -> None:
+        """Count a group of places of one city, with their places per price bucket."""
+        self.total += places
+        self.price_sum += price_sum or 0
+        for (label, _, _), count in zip(PRICE_BUCKETS, bucket_counts):
+            self.buckets[label] += count or 0
+        if city:
+            self.cities[city] += places
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            'total_places': self.total,
+            'average_price': round(self.price_sum / self.total, 2) if self.total else 0,
+            'price_distribution': dict(self.buckets),
+            'by_city': _by_count(self.cities),
+            'amenities': _by_count(self.amenities),
+        }
+
+
+def _by_count(counter: Counter) -> Dict[str, int]:
+    """Most frequent first, then by name."""
+    return dict(sorted(counter.items(), key=lambda item: (-item[1], item[0])))
+
+
+def facet_places(places: Iterable) -> Dict[str, Any]:
+    """Facets of in-memory places (price, city and amenities attributes), in one pass."""
+    counter = FacetCounter()
+    for place in places:
+        counter.add(place.price, getattr(place, 'city', None),
+                    [amenity.name for amenity in getattr(place, 'amenities', None) or ()])
+    return counter.result()
+
+
+def facet_select(filtered, link_place_id, link_amenity_id, amenity_id, amenity_name):
+    """One statement computing the facets of filtered, a subquery or CTE with
+    id, price and city columns. link_* are the place/amenity association
+    table's columns; amenity_id / amenity_name those of the amenities table."""
+    by_city = (select(literal('city').label('facet'), filtered.c.city.label('name'),
+                      func.count().label('places'), func.sum(filtered.c.price).label('price_sum'),
+                      *price_bucket_counts(filtered.c.price))
+               .group_by(filtered.c.city))
+    by_amenity = (select(literal('amenity'), amenity_name, func.count(),
+                         *[null()] * (1 + len(PRICE_BUCKETS)))
+                  .select_from(filtered)
+                  .join(link_place_id.table, link_place_id == filtered.c.id)
+                  .join(amenity_id.table, amenity_id == link_amenity_id)
+                  .group_by(amenity_name))
+    return union_all(by_city, by_amenity)
+
+
+def facets_from_rows(rows) -> Dict[str, Any]:
+    """The facets dict from the rows of a facet_select() statement."""
+    counter = FacetCounter()
+    for facet, name, places, price_sum, *bucket_counts in rows:
+        if facet == 'city':
+            counter.add_city(name, places, price_sum, bucket_counts)
+        else:
+            counter.amenities[name] += places
+    return counter.result()
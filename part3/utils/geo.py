@@ -0,0 +1,295 @@
+"""Geohash cells, haversine distance and radius / k-nearest search helpers.
+
+Places store a geohash of their coordinates (GEOHASH_PRECISION characters,
+about 5 m). Every point in a geohash cell has a hash starting with the cell's
+hash, so "points in a cell" is a range seek on a sorted index, in SQL and in
+GeoIndex alike. A radius query:
+
+1. covers the circle's bounding box with at most MAX_COVER_CELLS cells, at
+   the finest precision that allows it (covering_cells);
+2. reads the candidates of those cells by hash range (cell_ranges);
+3. keeps the candidates within the radius by haversine distance, sorted by
+   distance.
+
+k-nearest runs radius queries with a doubling radius until k points are in
+range (nearest_search).
+"""
+import math
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+MAX_COVER_CELLS = 16
+EARTH_RADIUS_KM = 6371.0088
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+MAX_RADIUS_KM = 500.0
+DEFAULT_NEAREST = 10
+MAX_NEAREST = 100
+MAX_NEARBY = 100
+
+Hit = Tuple[float, Any]
+
+
+def _bits(precision: int) -> Tuple[int, int]:
+    """(latitude bits, longitude bits) of a geohash of precision characters."""
+    total = 5 * precision
+    return total // 2, (total + 1) // 2
+
+
+def _spread(value: int) -> int:
+    """Move bit i of value to bit 2i."""
+    result, shift = 0, 0
+    while value:
+        result |= (value & 1) << shift
+        value >>= 1
+        shift += 2
+    return result
+
+
+# Spread of every byte, so interleaving a cell costs a few table lookups
+_SPREAD = [_spread(byte) for byte in range(256)]
+
+
+def _interleave(value: int) -> int:
+    result, shift = 0, 0
+    while value:
+        result |= _SPREAD[value & 0xFF] << shift
+        value >>= 8
+        shift += 16
+    return result
+
+
+def _cell_hash(lat_index: int, lng_index: int, precision: int) -> str:
+    """Geohash of the cell in row lat_index and column lng_index."""
+    # Geohash bits alternate longitude, latitude, ... starting from the top;
+    # with an odd bit count the lowest bit is a longitude bit
+    if (5 * precision) % 2:
+        code = _interleave(lng_index) | (_interleave(lat_index) << 1)
+    else:
+        code = _interleave(lat_index) | (_interleave(lng_index) << 1)
+    return ''.join(BASE32[(code >> (5 * i)) & 31] for i in range(precision - 1, -1, -1))
+
+
+def _index(value: float, origin: float, extent: float, bits: int) -> int:
+    cells = 1 << bits
+    return min(max(int((value - origin) / extent * cells), 0), cells - 1)
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Geohash of a point."""
+    lat_bits, lng_bits = _bits(precision)
+    return _cell_hash(_index(latitude, -90.0, 180.0, lat_bits),
+                      _index(longitude, -180.0, 360.0, lng_bits), precision)
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points, in km."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_boxes(latitude: float, longitude: float,
+                   radius_km: float) -> List[Tuple[float, float, float, float]]:
+    """(south, west, north, east) boxes covering a circle; two when it crosses
+    the antimeridian, one full-longitude band when it reaches a pole."""
+    angle = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angle)
+    south, north = latitude - dlat, latitude + dlat
+    if south <= -90.0 or north >= 90.0:
+        return [(max(south, -90.0), -180.0, min(north, 90.0), 180.0)]
+    dlng = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(latitude)))))
+    west, east = longitude - dlng, longitude + dlng
+    if west < -180.0:
+        return [(south, west + 360.0, north, 180.0), (south, -180.0, north, east)]
+    if east > 180.0:
+        return [(south, west, north, 180.0), (south, -180.0, north, east - 360.0)]
+    return [(south, west, north, east)]
+
+
+def covering_cells(latitude: float, longitude: float, radius_km: float,
+                   max_cells: int = MAX_COVER_CELLS,
+                   precision: int = GEOHASH_PRECISION) -> List[str]:
+    """Sorted geohash cells covering a circle, at the finest precision needing
+    at most max_cells. [''] (the whole world) when even one character is too fine."""
+    boxes = bounding_boxes(latitude, longitude, radius_km)
+    for p in range(precision, 0, -1):
+        lat_bits, lng_bits = _bits(p)
+        spans = [
+            (range(_index(south, -90.0, 180.0, lat_bits), _index(north, -90.0, 180.0, lat_bits) + 1),
+             range(_index(west, -180.0, 360.0, lng_bits), _index(east, -180.0, 360.0, lng_bits) + 1))
+            for south, west, north, east in boxes
+        ]
+        if sum(len(rows) * len(cols) for rows, cols in spans) <= max_cells:
+            return sorted({_cell_hash(row, col, p) for rows, cols in spans for row in rows for col in cols})
+    return ['']
+
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    """Smallest hash sorting after every hash starting with prefix (None: no bound)."""
+    chars = list(prefix)
+    while chars:
+        pos = BASE32.index(chars[-1])
+        if pos + 1 < len(BASE32):
+            chars[-1] = BASE32[pos + 1]
+            return ''.join(chars)
+        chars.pop()
+    return None
+
+
+def cell_ranges(cells: Sequence[str]) -> List[Tuple[str, Optional[str]]]:
+    """Sorted cells as merged [low, high) hash ranges (high None: unbounded)."""
+    ranges: List[Tuple[str, Optional[str]]] = []
+    for cell in sorted(cells):
+        upper = prefix_upper_bound(cell)
+        if ranges and ranges[-1][1] is None:
+            break
+        if ranges and ranges[-1][1] >= cell:
+            low, high = ranges[-1]
+            ranges[-1] = (low, None if upper is None else max(high, upper))
+        else:
+            ranges.append((cell, upper))
+    return ranges
+
+
+def geohash_filter(column, cells: Sequence[str]):
+    """SQL condition selecting column values inside cells (None: no condition)."""
+    clauses = []
+    for low, high in cell_ranges(cells):
+        if not low and high is None:
+            return None
+        clauses.append(column >= low if high is None else and_(column >= low, column < high))
+    return or_(*clauses)
+
+
+def nearest_search(within: Callable[[float], List[Hit]], k: int,
+                   start_km: float = 1.0) -> List[Hit]:
+    """k nearest (distance, id) hits, given within(radius_km) returning every
+    hit up to radius_km. The radius doubles until k hits are in range."""
+    radius = start_km
+    while True:
+        hits = within(radius)
+        if len(hits) >= k or radius >= MAX_DISTANCE_KM:
+            hits.sort()
+            return hits[:k]
+        radius = min(radius * 2, MAX_DISTANCE_KM)
+
+
+class GeoIndex:
+    """In-memory spatial index: ids sorted by geohash for cell range seeks.
+
+    Additions are buffered and merged into the sorted keys on the next query;
+    removals leave stale keys behind, skipped on reads and dropped when they
+    make up half of the keys.
+    """
+
+    def __init__(self, precision: int = GEOHASH_PRECISION):
+        self.precision = precision
+        self._points: Dict[Any, Tuple[str, float, float]] = {}
+        self._keys: List[Tuple[str, Any]] = []
+        self._pending: List[Tuple[str, Any]] = []
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, obj_id) -> bool:
+        return obj_id in self._points
+
+    def add(self, obj_id, latitude: float, longitude: float) -> None:
+        self.remove(obj_id)
+        geohash = geohash_encode(latitude, longitude, self.precision)
+        self._points[obj_id] = (geohash, latitude, longitude)
+        self._pending.append((geohash, obj_id))
+
+    def add_many(self, points: Iterable[Tuple[Any, float, float]]) -> None:
+        """Add (id, latitude, longitude) points."""
+        for obj_id, latitude, longitude in points:
+            self.add(obj_id, latitude, longitude)
+
+    def remove(self, obj_id) -> None:
+        if self._points.pop(obj_id, None) is not None:
+            self._stale += 1
+
+    def _merge(self) -> None:
+        if self._stale * 2 > len(self._keys) + len(self._pending):
+            self._keys = sorted((geohash, obj_id) for obj_id, (geohash, _, _) in self._points.items())
+            self._pending.clear()
+            self._stale = 0
+        elif self._pending:
+            self._keys.extend(self._pending)
+            self._pending.clear()
+            self._keys.sort()
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> List[Hit]:
+        """(distance_km, id) of the points within radius_km, nearest (then lowest id) first."""
+        self._merge()
+        keys, points = self._keys, self._points
+        hits, seen = [], set()
+        for low, high in cell_ranges(covering_cells(latitude, longitude, radius_km,
+                                                    precision=self.precision)):
+            start = bisect_left(keys, (low,))
+            stop = len(keys) if high is None else bisect_left(keys, (high,))
+            for geohash, obj_id in keys[start:stop]:
+                point = points.get(obj_id)
+                # Stale key of a removed or moved point, or a point re-added in place
+                if point is None or point[0] != geohash or obj_id in seen:
+                    continue
+                seen.add(obj_id)
+                distance = haversine_km(latitude, longitude, point[1], point[2])
+                if distance <= radius_km:
+                    hits.append((distance, obj_id))
+        hits.sort()
+        return hits
+
+    def nearest(self, latitude: float, longitude: float, k: int = DEFAULT_NEAREST) -> List[Hit]:
+        """(distance_km, id) of the k points nearest to a point, nearest first."""
+        if not self._points:
+            return []
+        return nearest_search(lambda radius: self.within(latitude, longitude, radius), k)
+
+
+def _coordinate(args, name: str, low: float, high: float) -> float:
+    try:
+        value = float(args[name])
+    except KeyError:
+        raise ValueError(f"{name} is required")
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number")
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be between {low:g} and {high:g}")
+    return value
+
+
+def _count(args, name: str, default: int, maximum: int) -> int:
+    try:
+        value = int(args.get(name, default))
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+    if value < 1 or value > maximum:
+        raise ValueError(f"{name} must be between 1 and {maximum}")
+    return value
+
+
+def radius_request(args) -> Tuple[float, float, float, Optional[int]]:
+    """Read ?lat=&lng=&radius= (km) and the optional ?limit= from request args
+    (limit None: every place within the radius). Raises ValueError."""
+    latitude = _coordinate(args, 'lat', -90.0, 90.0)
+    longitude = _coordinate(args, 'lng', -180.0, 180.0)
+    radius = _coordinate(args, 'radius', 0.0, MAX_RADIUS_KM)
+    limit = _count(args, 'limit', MAX_NEARBY, MAX_NEARBY) if 'limit' in args else None
+    return latitude, longitude, radius, limit
+
+
+def nearest_request(args) -> Tuple[float, float, int]:
+    """Read ?lat=&lng=&k= from request args. Raises ValueError."""
+    latitude = _coordinate(args, 'lat', -90.0, 90.0)
+    longitude = _coordinate(args, 'lng', -180.0, 180.0)
+    k = _count(args, 'k', DEFAULT_NEAREST, MAX_NEAREST)
+    return latitude, longitude, k
@@ -0,0 +1,66 @@
+"""Declarative relationship-loading profiles.
+
+An endpoint names the relationships its serializer will touch (a profile) and
+the repository turns that into loader options, so a page of N rows costs a
+fixed number of queries instead of 1 + N per relationship:
+
+- collections (one-to-many, many-to-many) use selectinload: one extra
+  SELECT ... WHERE fk IN (...) per relationship for the whole page;
+- scalar relationships (many-to-one) use joinedload: no extra query at all.
+
+Paths are dotted attribute names ('reviews.user'), so the same profile works
+for any mapped model family that uses those names.
+"""
+from typing import Iterable, List, Tuple, Union
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+# profile name -> relationship paths touched by that endpoint's serializer
+PROFILES = {
+    # Place.to_dict reads the rating aggregates, so a list needs no relationship
+    'place.list': (),
+    'place.detail': ('owner', 'reviews', 'amenities'),
+    'review.list': (),
+    'review.detail': ('user', 'place'),
+    'user.detail': ('places', 'reviews'),
+    'amenity.detail': ('places',),
+}
+
+Profile = Union[str, Iterable[str], None]
+
+
+def profile_paths(profile: Profile) -> Tuple[str, ...]:
+    """Resolve a profile name (or an explicit iterable of paths) to its paths."""
+    if profile is None:
+        return ()
+    if isinstance(profile, str):
+        if profile not in PROFILES:
+            raise KeyError(f"Unknown loading profile: {profile}")
+        return PROFILES[profile]
+    return tuple(profile)
+
+
+def loader_options(model, profile: Profile) -> List:
+    """Build selectinload/joinedload options on model for profile.
+
+    Each path is loaded hop by hop ('reviews.user' chains the loader of
+    Place.reviews into Review.user); shared prefixes are emitted once.
+    """
+    options = {}
+    for path in sorted(profile_paths(profile)):
+        cls, option, prefix = model, None, ''
+        for name in path.split('.'):
+            prefix = f"{prefix}.{name}" if prefix else name
+            relationship = inspect(cls).relationships[name]
+            attr = getattr(cls, name)
+            strategy = 'selectinload' if relationship.uselist else 'joinedload'
+            if option is None:
+                option = selectinload(attr) if relationship.uselist else joinedload(attr)
+            else:
+                option = getattr(option, strategy)(attr)
+            options[prefix] = option
+            cls = relationship.mapper.class_
+    # Only the leaves are needed: a chained option already loads its prefixes
+    return [option for path, option in options.items()
+            if not any(other.startswith(path + '.') for other in options)]
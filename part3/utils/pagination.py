@@ -0,0 +1,107 @@
+"""Keyset (cursor) pagination helpers.
+
+Pages are ordered by (created_at, id). A cursor is the opaque, URL-safe encoding
+of the last (created_at, id) a client has seen, so fetching the next page is a
+range seek instead of an OFFSET scan, whatever the page depth.
+"""
+import base64
+import json
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+CursorKey = Tuple[datetime, str]
+
+
+def cursor_key(obj: Any) -> CursorKey:
+    """Return the (created_at, id) sort key of an entity."""
+    return obj.created_at, obj.id
+
+
+def encode_cursor(key: CursorKey) -> str:
+    """Encode a (created_at, id) key as an opaque cursor string."""
+    created_at, obj_id = key
+    raw = json.dumps([created_at.isoformat(), obj_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> CursorKey:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, obj_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(created_at)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    # created_at is naive UTC everywhere; an aware one would not compare with the keys
+    if created_at.tzinfo is not None:
+        raise ValueError("Invalid cursor")
+    return created_at, str(obj_id)
+
+
+def page_request(args) -> Optional[Tuple[Optional[str], int]]:
+    """Read ?cursor=&limit= from request args.
+
+    Returns None when the client asked for neither (callers keep returning the full
+    list for backwards compatibility), else (cursor, limit). Raises ValueError on a
+    bad limit or cursor.
+    """
+    if 'cursor' not in args and 'limit' not in args:
+        return None
+    try:
+        limit = int(args.get('limit', DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if limit < 1 or limit > MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    cursor = args.get('cursor') or None
+    if cursor:
+        decode_cursor(cursor)
+    return cursor, limit
+
+
+def page_headers(base_url: str, next_cursor: Optional[str], limit: int) -> Dict[str, str]:
+    """Response headers pointing at the next page (empty on the last page)."""
+    if not next_cursor:
+        return {}
+    return {
+        'X-Next-Cursor': next_cursor,
+        'Link': f'<{base_url}?cursor={next_cursor}&limit={limit}>; rel="next"',
+    }
+
+
+class KeysetIndex:
+    """Ids kept sorted by (created_at, id) for O(log n + limit) page reads in memory."""
+
+    def __init__(self):
+        self._keys: List[CursorKey] = []
+        self._by_id: Dict[str, CursorKey] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, obj: Any) -> None:
+        self.remove(obj.id)
+        key = cursor_key(obj)
+        self._keys.insert(bisect_right(self._keys, key), key)
+        self._by_id[obj.id] = key
+
+    def remove(self, obj_id: str) -> None:
+        key = self._by_id.pop(obj_id, None)
+        if key is None:
+            return
+        pos = bisect_left(self._keys, key)
+        if pos < len(self._keys) and self._keys[pos] == key:
+            del self._keys[pos]
+
+    def page(self, cursor: Optional[str] = None,
+             limit: int = DEFAULT_LIMIT) -> Tuple[List[str], Optional[str]]:
+        """Return (ids, next_cursor) for the page after cursor."""
+        start = bisect_right(self._keys, decode_cursor(cursor)) if cursor else 0
+        keys = self._keys[start:start + limit]
+        more = start + limit < len(self._keys)
+        next_cursor = encode_cursor(keys[-1]) if keys and more else None
+        return [obj_id for _, obj_id in keys], next_cursor
@@ -0,0 +1,144 @@
+"""Bcrypt on a bounded worker pool.
+
+A bcrypt hash or check costs about 250 ms of CPU at 12 rounds. Run on the
+request thread, a burst of logins queues every other request behind it; run
+on an unbounded pool, the burst just grows the queue until the clients time
+out. PasswordHasher runs them on a dedicated pool of BCRYPT_HASH_WORKERS
+threads (bcrypt releases the GIL, so one per core hashes in parallel) and
+admits at most BCRYPT_HASH_QUEUE more waiting jobs: past that it raises
+HashingOverloaded, a 503 with Retry-After, instead of queueing.
+
+The work factor is BCRYPT_LOG_ROUNDS (the Flask-Bcrypt setting, so hashes
+from both agree). Stored hashes carry their cost ($2b$12$...):
+check_and_rehash() verifies a password and, when the cost differs from the
+configured one, returns a fresh hash in the same pool job for the caller to
+store, so raising the factor upgrades accounts on their next login.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+import bcrypt
+from flask import Flask, jsonify
+from werkzeug.exceptions import ServiceUnavailable
+
+DEFAULT_ROUNDS = 12
+# bcrypt only reads the first 72 bytes; bcrypt>=5 raises instead of truncating
+MAX_PASSWORD_BYTES = 72
+
+
+class HashingOverloaded(ServiceUnavailable):
+    """Every hashing worker is busy and the queue is full."""
+
+    description = "Too many concurrent logins, retry shortly"
+
+
+def _encode(password: str) -> bytes:
+    return password.encode('utf-8')[:MAX_PASSWORD_BYTES]
+
+
+def hash_cost(pw_hash: str) -> Optional[int]:
+    """Work factor of a bcrypt hash ('$2b$12$...' -> 12), None if it is not one."""
+    parts = (pw_hash or '').split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    """Flask extension hashing and checking passwords on a bounded thread pool."""
+
+    def __init__(self, app: Optional[Flask] = None, rounds: int = DEFAULT_ROUNDS,
+                 workers: Optional[int] = None, queue_size: Optional[int] = None):
+        self._executor = None
+        self._lock = threading.Lock()
+        self.configure(rounds, workers, queue_size)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        self.configure(app.config.get('BCRYPT_LOG_ROUNDS', DEFAULT_ROUNDS),
+                       app.config.get('BCRYPT_HASH_WORKERS'),
+                       app.config.get('BCRYPT_HASH_QUEUE'))
+        app.extensions['password_hasher'] = self
+        app.register_error_handler(HashingOverloaded, _overloaded)
+
+    def configure(self, rounds: int, workers: Optional[int] = None,
+                  queue_size: Optional[int] = None) -> None:
+        """Set the work factor and pool bounds (the pool is rebuilt on next use)."""
+        self.rounds = int(rounds)
+        self.workers = int(workers or os.cpu_count() or 1)
+        self.queue_size = int(self.workers * 4 if queue_size is None else queue_size)
+        # Running plus waiting jobs
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='bcrypt')
+        return self._executor
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Run fn(*args) on the pool; raises HashingOverloaded when no slot is free."""
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HashingOverloaded(retry_after=1)
+        try:
+            future = self._pool().submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    # Pool jobs
+
+    def _hash(self, password: str) -> str:
+        return bcrypt.hashpw(_encode(password), bcrypt.gensalt(self.rounds)).decode('utf-8')
+
+    @staticmethod
+    def _check(pw_hash: str, password: str) -> bool:
+        try:
+            return bcrypt.checkpw(_encode(password), pw_hash.encode('utf-8'))
+        except ValueError:
+            # Not a bcrypt hash
+            return False
+
+    def _check_and_rehash(self, pw_hash: str, password: str) -> Tuple[bool, Optional[str]]:
+        if not self._check(pw_hash, password):
+            return False, None
+        return True, self._hash(password) if self.needs_rehash(pw_hash) else None
+
+    # Blocking API (request threads)
+
+    def hash(self, password: str) -> str:
+        return self.submit(self._hash, password).result()
+
+    def check(self, pw_hash: str, password: str) -> bool:
+        return self.submit(self._check, pw_hash, password).result()
+
+    def check_and_rehash(self, pw_hash: str, password: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new hash or None): a new hash when pw_hash has an outdated cost."""
+        return self.submit(self._check_and_rehash, pw_hash, password).result()
+
+    def needs_rehash(self, pw_hash: str) -> bool:
+        return hash_cost(pw_hash) != self.rounds
+
+    # Asyncio API (app/asgi.py)
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self.submit(self._hash, password))
+
+    async def check_and_rehash_async(self, pw_hash: str, password: str) -> Tuple[bool, Optional[str]]:
+        return await asyncio.wrap_future(self.submit(self._check_and_rehash, pw_hash, password))
+
+
+def _overloaded(error: HashingOverloaded):
+    return jsonify({'error': error.description}), error.code, {'Retry-After': str(error.retry_after)}
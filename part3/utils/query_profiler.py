@@ -0,0 +1,170 @@
+"""Per-request SQL query counter and slow-query profiler.
+
+SQLAlchemy before/after_cursor_execute hooks time every statement; a Flask
+before/after_request pair collects the timings of the current request and
+reports them:
+
+- a Server-Timing header (db;dur=<ms>;desc="<n> queries", plus the slowest
+  statements) on every response, readable in the browser dev tools;
+- one JSON log line per request when enable_query_logging is on;
+- a warning for each statement slower than slow_query_ms, and an error for
+  each one slower than query_timeout, both with the endpoint name.
+
+Settings come from the app config (QUERY_LOGGING, QUERY_TIMEOUT, SLOW_QUERY_MS,
+QUERY_SLOWEST_STATEMENTS; see config.Config); a settings dict passed to
+QueryProfiler overrides them.
+"""
+import heapq
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Flask, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('hbnb.queries')
+
+DEFAULT_SETTINGS = {
+    'enable_query_logging': False,
+    'query_timeout': 30,
+    'slow_query_ms': 200,
+    'slowest_statements': 3,
+}
+
+# app.config key of each setting
+CONFIG_KEYS = {
+    'enable_query_logging': 'QUERY_LOGGING',
+    'query_timeout': 'QUERY_TIMEOUT',
+    'slow_query_ms': 'SLOW_QUERY_MS',
+    'slowest_statements': 'QUERY_SLOWEST_STATEMENTS',
+}
+
+_START_KEY = 'query_profiler_start'
+_hooks_installed = False
+
+
+class RequestQueryStats:
+    """Query count, total DB time and the slowest statements of one request."""
+
+    def __init__(self, keep: int):
+        self.keep = keep
+        self.count = 0
+        self.total = 0.0
+        self._slowest: List[Tuple[float, int, str]] = []
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total += elapsed
+        entry = (elapsed, self.count, statement)
+        if len(self._slowest) < self.keep:
+            heapq.heappush(self._slowest, entry)
+        elif self.keep:
+            heapq.heappushpop(self._slowest, entry)
+
+    @property
+    def slowest(self) -> List[Tuple[float, str]]:
+        """(seconds, statement), slowest first."""
+        return [(elapsed, statement) for elapsed, _, statement in sorted(self._slowest, reverse=True)]
+
+
+def _short(statement: str, length: int = 200) -> str:
+    statement = ' '.join(statement.split())
+    return statement if len(statement) <= length else statement[:length - 3] + '...'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if not has_request_context():
+        return
+    stats = g.get('query_stats')
+    profiler = current_app.extensions.get('query_profiler')
+    if stats is None or profiler is None:
+        return
+    stats.record(statement, elapsed)
+    profiler.check_slow(statement, elapsed)
+
+
+def _install_hooks() -> None:
+    """Listen on every Engine once; timings outside a profiled request are dropped."""
+    global _hooks_installed
+    if not _hooks_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _hooks_installed = True
+
+
+class QueryProfiler:
+    """Flask extension reporting the SQL cost of each request."""
+
+    def __init__(self, app: Optional[Flask] = None, settings: Optional[Dict[str, Any]] = None):
+        self._overrides = dict(settings or {})
+        self.settings = {**DEFAULT_SETTINGS, **self._overrides}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        configured = {name: app.config[key] for name, key in CONFIG_KEYS.items() if key in app.config}
+        self.settings = {**DEFAULT_SETTINGS, **configured, **self._overrides}
+        _install_hooks()
+        app.extensions['query_profiler'] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def check_slow(self, statement: str, elapsed: float) -> None:
+        """Log statement if it exceeded the slow-query threshold or the timeout."""
+        ms = elapsed * 1000
+        if ms < self.settings['slow_query_ms']:
+            return
+        level = logging.ERROR if elapsed >= self.settings['query_timeout'] else logging.WARNING
+        logger.log(level, json.dumps({
+            'event': 'slow_query',
+            'endpoint': request.endpoint,
+            'method': request.method,
+            'path': request.path,
+            'duration_ms': round(ms, 2),
+            'statement': _short(statement),
+        }))
+
+    def _before_request(self) -> None:
+        g.query_stats = RequestQueryStats(self.settings['slowest_statements'])
+        g.query_profiler_started = time.perf_counter()
+
+    def _after_request(self, response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+        request_ms = (time.perf_counter() - g.pop('query_profiler_started')) * 1000
+        db_ms = stats.total * 1000
+        metrics = [
+            f'db;dur={db_ms:.2f};desc="{stats.count} queries"',
+            f'app;dur={request_ms:.2f}',
+        ]
+        for rank, (elapsed, _) in enumerate(stats.slowest, 1):
+            metrics.append(f'db-slow-{rank};dur={elapsed * 1000:.2f}')
+        response.headers.add('Server-Timing', ', '.join(metrics))
+
+        if self.settings['enable_query_logging']:
+            logger.info(json.dumps({
+                'event': 'request_queries',
+                'endpoint': request.endpoint,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': stats.count,
+                'db_ms': round(db_ms, 2),
+                'request_ms': round(request_ms, 2),
+                'slowest': [
+                    {'duration_ms': round(elapsed * 1000, 2), 'statement': _short(statement)}
+                    for elapsed, statement in stats.slowest
+                ],
+            }))
+        return response
@@ -0,0 +1,110 @@
+"""HTTP response cache with conditional GET support.
+
+cache_response() caches successful GET responses in any client exposing
+get(key) / setex(key, ttl, value) (Redis, or LocalCache for a single process).
+Entries are keyed on the path, the normalized query args, the caller's auth
+scope and an optional data version, and hold the zlib-compressed body. Every
+response carries an ETag and Last-Modified, and a request whose If-None-Match /
+If-Modified-Since still matches gets an empty 304 instead of the body.
+"""
+import hashlib
+import json
+import zlib
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Callable, Optional
+from urllib.parse import urlencode
+
+from flask import make_response, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+KEY_PREFIX = 'resp:'
+
+
+class _BadToken(Exception):
+    """The request carried a token that did not verify: never cache."""
+
+
+def auth_scope() -> str:
+    """Default cache scope: the JWT identity, or 'anon' without a token."""
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception as e:
+        raise _BadToken() from e
+    identity = get_jwt_identity()
+    return f"user:{identity}" if identity is not None else 'anon'
+
+
+def cache_key(scope: str, version: str = '') -> str:
+    """Key for the current request: path + sorted query args + scope + version."""
+    args = urlencode(sorted(request.args.items(multi=True)))
+    raw = f"{request.path}?{args}|{scope}|{version}"
+    return KEY_PREFIX + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _pack(response, etag: str, last_modified: datetime) -> bytes:
+    meta = {
+        'status': response.status_code,
+        'mimetype': response.mimetype,
+        'etag': etag,
+        'last_modified': last_modified.timestamp(),
+    }
+    return json.dumps(meta, separators=(',', ':')).encode() + b'\n' + zlib.compress(response.get_data())
+
+
+def _unpack(payload: bytes):
+    meta, body = payload.split(b'\n', 1)
+    return json.loads(meta), body
+
+
+def _conditional(response, etag: str, last_modified: datetime):
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Authorization')
+    return response.make_conditional(request)
+
+
+def cache_response(timeout: int = 300, client: Optional[Callable] = None,
+                   version: Optional[Callable[[], str]] = None,
+                   scope: Callable[[], str] = auth_scope):
+    """Cache a GET view's 200 responses for timeout seconds.
+
+    client returns the cache client (or None to disable caching); version
+    returns a token that changes whenever the underlying data changes, so a
+    write makes older entries unreachable before their TTL.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            cache = client() if client else None
+            if cache is None or request.method != 'GET':
+                return f(*args, **kwargs)
+            try:
+                key = cache_key(scope(), version() if version else '')
+            except _BadToken:
+                return f(*args, **kwargs)
+
+            cached = cache.get(key)
+            if cached:
+                meta, body = _unpack(cached)
+                last_modified = datetime.fromtimestamp(meta['last_modified'], timezone.utc)
+                response = make_response(b'', meta['status'])
+                response.mimetype = meta['mimetype']
+                response = _conditional(response, meta['etag'], last_modified)
+                if response.status_code != 304:
+                    response.set_data(zlib.decompress(body))
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            etag = hashlib.sha1(response.get_data()).hexdigest()
+            last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+            cache.setex(key, timeout, _pack(response, etag, last_modified))
+            response = _conditional(response, etag, last_modified)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return decorated_function
+    return decorator
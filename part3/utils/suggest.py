@@ -0,0 +1,334 @@
+"""Autocomplete over city names, amenity names and place titles.
+
+PrefixIndex is a burst trie: keys are routed to nodes character by character,
+and a leaf holding more than BURST_SIZE keys splits into one child per next
+character. Every node caches the top_k best entries below it, so completing a
+prefix walks len(prefix) nodes and slices that list. A write only touches the
+nodes on the paths of the changed keys: a new entry or a higher score is
+merged into their lists, anything else recomputes them from the children.
+
+Suggester keeps the popularity behind each entry (places in the city, places
+with the amenity, reviews of the place) and feeds it to a PrefixIndex.
+"""
+import heapq
+from bisect import insort
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from utils.text_search import words
+
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 20
+MAX_PREFIX_LENGTH = 32
+BURST_SIZE = 64
+
+# (-score, text, entry id): sorts best first, ties by text
+Rank = Tuple[int, str, Hashable]
+Completion = Tuple[int, str, Hashable]
+
+
+def normalize(text: Optional[str]) -> str:
+    """Folded words of text joined by single spaces: what prefixes are matched on."""
+    return ' '.join(words(text))
+
+
+def _keys(text: str) -> Tuple[str, ...]:
+    """One key per word start, so "Sunny beach house" completes "sun", "bea" and "hou"."""
+    parts = words(text)
+    return tuple(dict.fromkeys(' '.join(parts[i:])[:MAX_PREFIX_LENGTH] for i in range(len(parts))))
+
+
+class _Node:
+    __slots__ = ('children', 'items', 'top')
+
+    def __init__(self):
+        self.children: Optional[Dict[str, '_Node']] = None  # set once the node bursts
+        # (key, entry id): every key below a leaf, keys ending here for an inner node
+        self.items: Set[Tuple[str, Hashable]] = set()
+        self.top: List[Rank] = []
+
+
+class PrefixIndex:
+    """Top-scored entries having a word that starts with a prefix."""
+
+    def __init__(self, top_k: int = MAX_SUGGESTIONS):
+        self.top_k = top_k
+        self._root = _Node()
+        self._entries: Dict[Hashable, Tuple[Rank, Tuple[str, ...]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, entry_id) -> bool:
+        return entry_id in self._entries
+
+    def set(self, entry_id: Hashable, text: str, score: int = 0) -> None:
+        """Add entry_id, or update its text and score."""
+        keys = _keys(text)
+        rank = (-score, text, entry_id)
+        old = self._entries.get(entry_id)
+        if old == (rank, keys):
+            return
+        self._entries[entry_id] = (rank, keys)
+        if old is None or (old[1] == keys and rank < old[0]):
+            # New entry or higher score (the common writes): patch the lists
+            for key in keys:
+                path = self._path(key)
+                if old is None:
+                    self._insert(path, key, entry_id)
+                self._patch(path, old[0] if old else None, rank)
+            return
+        old_keys = old[1]
+        for key in old_keys:
+            if key not in keys:
+                self._remove_key(key, entry_id)
+        for key in keys:
+            if key in old_keys:
+                self._update(self._path(key))  # same key, new rank
+            else:
+                self._add_key(key, entry_id)
+
+    def discard(self, entry_id: Hashable) -> None:
+        old = self._entries.get(entry_id)
+        if old is None:
+            return
+        for key in old[1]:
+            self._remove_key(key, entry_id)
+        del self._entries[entry_id]
+
+    def load(self, entries: Iterable[Tuple[Hashable, str, int]]) -> None:
+        """Add many (entry id, text, score), computing each node's list once."""
+        for entry_id, text, score in entries:
+            self.discard(entry_id)
+            keys = _keys(text)
+            self._entries[entry_id] = ((-score, text, entry_id), keys)
+            for key in keys:
+                self._insert(self._path(key), key, entry_id)
+        self._rebuild(self._root)
+
+    def complete(self, prefix: str, limit: int = DEFAULT_SUGGESTIONS) -> List[Completion]:
+        """(score, text, entry id) of the best entries matching prefix, best first."""
+        key = normalize(prefix)[:MAX_PREFIX_LENGTH]
+        if not key:
+            return []
+        node = self._root
+        for depth, char in enumerate(key):
+            if node.children is None:
+                # A leaf: its keys share key[:depth], filter on the rest
+                ranks = {self._entries[entry_id][0] for item, entry_id in node.items
+                         if item.startswith(key)}
+                return [(-score, text, entry_id)
+                        for score, text, entry_id in heapq.nsmallest(limit, ranks)]
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [(-score, text, entry_id) for score, text, entry_id in node.top[:limit]]
+
+    def _path(self, key: str) -> List[_Node]:
+        """Nodes from the root to the one holding key, created as needed."""
+        node = self._root
+        path = [node]
+        for char in key:
+            if node.children is None:
+                break
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+            node = child
+            path.append(node)
+        return path
+
+    def _insert(self, path: List[_Node], key: str, entry_id) -> None:
+        node = path[-1]
+        node.items.add((key, entry_id))
+        depth = len(path) - 1
+        if node.children is None and len(node.items) > BURST_SIZE and depth < MAX_PREFIX_LENGTH:
+            self._burst(node, depth)
+
+    def _add_key(self, key: str, entry_id) -> None:
+        path = self._path(key)
+        self._insert(path, key, entry_id)
+        self._update(path)
+
+    def _remove_key(self, key: str, entry_id) -> None:
+        path = self._path(key)
+        path[-1].items.discard((key, entry_id))
+        self._update(path)
+
+    def _burst(self, node: _Node, depth: int) -> None:
+        """Split a full leaf into one child per character at depth."""
+        items, node.items, node.children = node.items, set(), {}
+        for key, entry_id in items:
+            if len(key) == depth:
+                node.items.add((key, entry_id))
+            else:
+                node.children.setdefault(key[depth], _Node()).items.add((key, entry_id))
+        for child in node.children.values():
+            if len(child.items) > BURST_SIZE and depth + 1 < MAX_PREFIX_LENGTH:
+                self._burst(child, depth + 1)
+            child.top = self._top(child)
+
+    def _top(self, node: _Node) -> List[Rank]:
+        entries = self._entries
+        ranks = {entries[entry_id][0] for _, entry_id in node.items}
+        if node.children:
+            for child in node.children.values():
+                ranks.update(child.top)
+        return heapq.nsmallest(self.top_k, ranks)
+
+    def _update(self, path: List[_Node]) -> None:
+        """Recompute the lists bottom-up; a node whose list is unchanged leaves
+        its ancestors unchanged too."""
+        for node in reversed(path):
+            top = self._top(node)
+            if top == node.top:
+                return
+            node.top = top
+
+    def _patch(self, path: List[_Node], old: Optional[Rank], new: Rank) -> None:
+        """Bottom-up update for an entry whose rank improved from old (None if
+        it is new) to new: each list only swaps old for new."""
+        for node in reversed(path):
+            top = [rank for rank in node.top if rank != old]
+            if new not in top:
+                insort(top, new)
+                del top[self.top_k:]
+            if top == node.top:
+                return
+            node.top = top
+
+    def _rebuild(self, node: _Node) -> None:
+        if node.children:
+            for child in node.children.values():
+                self._rebuild(child)
+        node.top = self._top(node)
+
+
+class Suggester:
+    """Cities ranked by their number of places, amenities by the places that
+    have them, place titles by their number of reviews.
+
+    set_place() is called for every stored or updated place, remove_place()
+    when one is deleted, add_reviews() when reviews are created or deleted, and
+    set_amenity() / remove_amenity() for amenity writes.
+    """
+
+    def __init__(self, top_k: int = MAX_SUGGESTIONS):
+        self.index = PrefixIndex(top_k)
+        # place id -> (title, city key, amenity ids, reviews)
+        self._places: Dict[str, Tuple[str, str, frozenset, int]] = {}
+        self._cities: Dict[str, List] = {}  # city key -> [name, places]
+        self._amenity_names: Dict[str, str] = {}
+        self._amenity_places: Dict[str, int] = {}
+
+    def set_place(self, place_id: str, title: str, city: Optional[str] = '',
+                  amenity_ids: Optional[Iterable[str]] = (), reviews: Optional[int] = None) -> None:
+        """Add or update a place. amenity_ids or reviews of None keep the previous values."""
+        old = self._places.get(place_id)
+        city_key = normalize(city)
+        amenities = frozenset(amenity_ids) if amenity_ids is not None else (old[2] if old else frozenset())
+        if reviews is None:
+            reviews = old[3] if old else 0
+        if old is not None:
+            if old[1] != city_key:
+                self._count_city(old[1], None, -1)
+            for amenity_id in old[2] - amenities:
+                self._count_amenity(amenity_id, -1)
+        if old is None or old[1] != city_key:
+            self._count_city(city_key, city, 1)
+        for amenity_id in amenities - (old[2] if old else frozenset()):
+            self._count_amenity(amenity_id, 1)
+        self._places[place_id] = (title, city_key, amenities, reviews)
+        self.index.set(('place', place_id), title or '', reviews)
+
+    def remove_place(self, place_id: str) -> None:
+        old = self._places.pop(place_id, None)
+        if old is None:
+            return
+        self._count_city(old[1], None, -1)
+        for amenity_id in old[2]:
+            self._count_amenity(amenity_id, -1)
+        self.index.discard(('place', place_id))
+
+    def add_reviews(self, place_id: str, delta: int = 1) -> None:
+        old = self._places.get(place_id)
+        if old is None:
+            return
+        title, city_key, amenities, reviews = old
+        reviews = max(reviews + delta, 0)
+        self._places[place_id] = (title, city_key, amenities, reviews)
+        self.index.set(('place', place_id), title or '', reviews)
+
+    def set_amenity(self, amenity_id: str, name: str) -> None:
+        self._amenity_names[amenity_id] = name
+        self.index.set(('amenity', amenity_id), name, self._amenity_places.get(amenity_id, 0))
+
+    def remove_amenity(self, amenity_id: str) -> None:
+        self._amenity_names.pop(amenity_id, None)
+        self.index.discard(('amenity', amenity_id))
+
+    def load(self, places: Iterable[Tuple[str, str, str, Iterable[str], int]],
+             amenities: Iterable[Tuple[str, str]]) -> None:
+        """Bulk load (id, title, city, amenity ids, reviews) places and (id, name)
+        amenities into an empty Suggester."""
+        for place_id, title, city, amenity_ids, reviews in places:
+            city_key = normalize(city)
+            amenity_ids = frozenset(amenity_ids)
+            self._places[place_id] = (title, city_key, amenity_ids, reviews or 0)
+            if city_key:
+                self._cities.setdefault(city_key, [city.strip(), 0])[1] += 1
+            for amenity_id in amenity_ids:
+                self._amenity_places[amenity_id] = self._amenity_places.get(amenity_id, 0) + 1
+        self._amenity_names.update(amenities)
+        self.index.load([(('place', place_id), title or '', reviews)
+                         for place_id, (title, _, _, reviews) in self._places.items()]
+                        + [(('city', key), name, count) for key, (name, count) in self._cities.items()]
+                        + [(('amenity', amenity_id), name, self._amenity_places.get(amenity_id, 0))
+                           for amenity_id, name in self._amenity_names.items()])
+
+    def suggest(self, query: str, limit: int = DEFAULT_SUGGESTIONS) -> List[dict]:
+        """Best completions of query as {'type', 'text', 'score'} (plus 'id' for
+        amenities and places), most popular first."""
+        suggestions = []
+        for score, text, (kind, key) in self.index.complete(query, limit):
+            suggestion = {'type': kind, 'text': text, 'score': score}
+            if kind != 'city':
+                suggestion['id'] = key
+            suggestions.append(suggestion)
+        return suggestions
+
+    def _count_city(self, city_key: str, name: Optional[str], delta: int) -> None:
+        if not city_key:
+            return
+        entry = self._cities.get(city_key)
+        if entry is None:
+            entry = self._cities[city_key] = [name.strip(), 0]
+        entry[1] += delta
+        if entry[1] > 0:
+            self.index.set(('city', city_key), entry[0], entry[1])
+        else:
+            del self._cities[city_key]
+            self.index.discard(('city', city_key))
+
+    def _count_amenity(self, amenity_id: str, delta: int) -> None:
+        count = self._amenity_places.get(amenity_id, 0) + delta
+        if count > 0:
+            self._amenity_places[amenity_id] = count
+        else:
+            self._amenity_places.pop(amenity_id, None)
+        name = self._amenity_names.get(amenity_id)
+        if name is not None:
+            self.index.set(('amenity', amenity_id), name, max(count, 0))
+
+
+def suggest_request(args) -> Tuple[str, int]:
+    """Read ?q=&limit= from request args. Raises ValueError."""
+    query = (args.get('q') or '').strip()
+    if not query:
+        raise ValueError("q is required")
+    try:
+        limit = int(args.get('limit', DEFAULT_SUGGESTIONS))
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if limit < 1 or limit > MAX_SUGGESTIONS:
+        raise ValueError(f"limit must be between 1 and {MAX_SUGGESTIONS}")
+    return query, limit
@@ -0,0 +1,170 @@
+"""Place count, price and rating summaries of all places and of each city.
+
+summary() builds the response dict from the running totals kept in the
+place_stats / city_stats tables (app.persistence.summary);
+summarize() computes the same dicts from in-memory places in one pass, and
+RunningSummary keeps them current from the in-memory facades' writes.
+"""
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+def summary(place_count: int, price_sum: float, price_min: Optional[float],
+            price_max: Optional[float], rating_sum: int, rating_count: int) -> Dict[str, Any]:
+    return {
+        'places': place_count or 0,
+        'average_price': round(price_sum / place_count, 2) if place_count else 0,
+        'min_price': price_min if place_count else None,
+        'max_price': price_max if place_count else None,
+        'reviews_count': rating_count or 0,
+        'average_rating': round(rating_sum / rating_count, 1) if rating_count else 0.0,
+    }
+
+
+class _Totals:
+    __slots__ = ('count', 'price_sum', 'price_min', 'price_max', 'rating_sum', 'rating_count')
+
+    def __init__(self):
+        self.count = self.rating_sum = self.rating_count = 0
+        self.price_sum = 0.0
+        self.price_min = self.price_max = None
+
+    def add(self, price: float, ratings: Iterable[int]) -> None:
+        self.count += 1
+        self.price_sum += price
+        self.price_min = price if self.price_min is None else min(self.price_min, price)
+        self.price_max = price if self.price_max is None else max(self.price_max, price)
+        for rating in ratings:
+            self.rating_sum += rating
+            self.rating_count += 1
+
+    def summary(self) -> Dict[str, Any]:
+        return summary(self.count, self.price_sum, self.price_min, self.price_max,
+                       self.rating_sum, self.rating_count)
+
+
+def summarize(places: Iterable) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """(summary of all places, {city: summary}) of in-memory places (price,
+    city and reviews attributes), cities with the most places first."""
+    overall, cities = _Totals(), {}
+    for place in places:
+        ratings = [review.rating for review in getattr(place, 'reviews', None) or ()]
+        price = place.price or 0
+        overall.add(price, ratings)
+        city = getattr(place, 'city', None)
+        if city:
+            cities.setdefault(city, _Totals()).add(price, ratings)
+    ordered = sorted(cities.items(), key=lambda item: (-item[1].count, item[0]))
+    return overall.summary(), {city: totals.summary() for city, totals in ordered}
+
+
+
+class _RunningTotals:
+    """Totals that places and ratings can also leave: prices are counted so
+    that min and max survive removals (rescanned over the distinct prices
+    only when the current extreme leaves)"""
+    __slots__ = ('prices', 'count', 'price_sum', 'price_min', 'price_max',
+                 'rating_sum', 'rating_count')
+
+    def __init__(self):
+        self.prices = Counter()
+        self.count = self.rating_sum = self.rating_count = 0
+        self.price_sum = 0.0
+        self.price_min = self.price_max = None
+
+    def add_price(self, price: float) -> None:
+        self.prices[price] += 1
+        self.count += 1
+        self.price_sum += price
+        self.price_min = price if self.price_min is None else min(self.price_min, price)
+        self.price_max = price if self.price_max is None else max(self.price_max, price)
+
+    def remove_price(self, price: float) -> None:
+        self.prices[price] -= 1
+        if self.prices[price] <= 0:
+            del self.prices[price]
+        self.count -= 1
+        # Reset when empty, so float rounding does not accumulate
+        self.price_sum = self.price_sum - price if self.count else 0.0
+        if price == self.price_min:
+            self.price_min = min(self.prices, default=None)
+        if price == self.price_max:
+            self.price_max = max(self.prices, default=None)
+
+    def add_ratings(self, rating_sum: int, rating_count: int) -> None:
+        self.rating_sum += rating_sum
+        self.rating_count += rating_count
+
+    def summary(self) -> Dict[str, Any]:
+        return summary(self.count, self.price_sum, self.price_min, self.price_max,
+                       self.rating_sum, self.rating_count)
+
+
+class RunningSummary:
+    """
+    The summaries of summarize(), kept as running totals: the in-memory
+    facades call set_place() and rate() on each place and review change, and
+    summary() reads the totals instead of scanning the places
+    """
+
+    def __init__(self):
+        self._overall = _RunningTotals()
+        self._cities: Dict[str, _RunningTotals] = {}
+        # place id -> [price, city, rating sum, rating count]
+        self._places: Dict[str, list] = {}
+
+    def _totals(self, city: Optional[str]):
+        yield self._overall
+        if city:
+            yield self._cities.setdefault(city, _RunningTotals())
+
+    def _remove(self, entry: list) -> None:
+        price, city, rating_sum, rating_count = entry
+        for totals in self._totals(city):
+            totals.remove_price(price)
+            totals.add_ratings(-rating_sum, -rating_count)
+        if city and not self._cities[city].count:
+            del self._cities[city]
+
+    def _add(self, entry: list) -> None:
+        price, city, rating_sum, rating_count = entry
+        for totals in self._totals(city):
+            totals.add_price(price)
+            totals.add_ratings(rating_sum, rating_count)
+
+    def set_place(self, place_id: str, price: Optional[float], city: Optional[str]) -> None:
+        """Add a place, or move it to its new price and city with its ratings"""
+        entry = self._places.get(place_id)
+        if entry is not None:
+            self._remove(entry)
+        else:
+            entry = self._places[place_id] = [0, None, 0, 0]
+        entry[0], entry[1] = price or 0, city
+        self._add(entry)
+
+    def remove_place(self, place_id: str) -> None:
+        entry = self._places.pop(place_id, None)
+        if entry is not None:
+            self._remove(entry)
+
+    def rate(self, place_id: str, rating: int, count: int = 1) -> None:
+        """Add a rating of place_id (count=-1 takes one away)"""
+        entry = self._places.get(place_id)
+        if entry is None:
+            return
+        entry[2] += count * rating
+        entry[3] += count
+        for totals in self._totals(entry[1]):
+            totals.add_ratings(count * rating, count)
+
+    def summary(self, city: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Summary of all places, or of a city (None if it has no places)"""
+        if city is None:
+            return self._overall.summary()
+        totals = self._cities.get(city)
+        return totals.summary() if totals is not None else None
+
+    def cities(self) -> Dict[str, Dict[str, Any]]:
+        """Summary of each city, the most places first"""
+        ordered = sorted(self._cities.items(), key=lambda item: (-item[1].count, item[0]))
+        return {city: totals.summary() for city, totals in ordered}
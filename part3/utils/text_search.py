@@ -0,0 +1,239 @@
+"""Tokenizer, Porter stemmer and an in-memory BM25 inverted index.
+
+tokenize() lowercases, folds accents and drops English stop words; analyze()
+also stems, so "Cozy apartments" and "cozy apartment" index the same terms.
+InvertedIndex keeps term -> {doc id: weighted term frequency} postings for a
+few weighted fields (title counts more than description) and ranks OR
+queries with BM25, touching only the postings of the query terms.
+"""
+import heapq
+import math
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 200
+PLACE_FIELDS = {'title': 2.0, 'description': 1.0}
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have in is it its of on or that the
+this to was were will with
+""".split())
+
+_WORD = re.compile(r'[^\W_]+')
+
+Hit = Tuple[float, Any]
+
+
+def _fold(text: str) -> str:
+    """Lowercase text and strip accents ("Café" -> "cafe")."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def words(text: Optional[str]) -> List[str]:
+    """Lowercased, accent-folded words of text."""
+    return _WORD.findall(_fold(text)) if text else []
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased, accent-folded words of text, stop words removed."""
+    return [word for word in words(text) if word not in STOP_WORDS]
+
+
+def analyze(text: Optional[str]) -> List[str]:
+    """Stemmed index terms of text."""
+    return [stem(word) for word in tokenize(text)]
+
+
+# Porter stemmer (M.F. Porter, 1980)
+
+def _is_consonant(word: str, i: int) -> bool:
+    char = word[i]
+    if char in 'aeiou':
+        return False
+    if char == 'y':
+        return i == 0 or not _is_consonant(word, i - 1)
+    return True
+
+
+def _measure(stem_: str) -> int:
+    """Number of vowel-consonant sequences in stem_ ([C](VC)^m[V])."""
+    m, prev_vowel = 0, False
+    for i in range(len(stem_)):
+        vowel = not _is_consonant(stem_, i)
+        if prev_vowel and not vowel:
+            m += 1
+        prev_vowel = vowel
+    return m
+
+
+def _has_vowel(stem_: str) -> bool:
+    return any(not _is_consonant(stem_, i) for i in range(len(stem_)))
+
+
+def _double_consonant(word: str) -> bool:
+    return len(word) >= 2 and word[-1] == word[-2] and _is_consonant(word, len(word) - 1)
+
+
+def _cvc(word: str) -> bool:
+    return (len(word) >= 3 and _is_consonant(word, len(word) - 3)
+            and not _is_consonant(word, len(word) - 2)
+            and _is_consonant(word, len(word) - 1) and word[-1] not in 'wxy')
+
+
+_STEP2 = (('ational', 'ate'), ('tional', 'tion'), ('enci', 'ence'), ('anci', 'ance'),
+          ('izer', 'ize'), ('bli', 'ble'), ('alli', 'al'), ('entli', 'ent'), ('eli', 'e'),
+          ('ousli', 'ous'), ('ization', 'ize'), ('ation', 'ate'), ('ator', 'ate'),
+          ('alism', 'al'), ('iveness', 'ive'), ('fulness', 'ful'), ('ousness', 'ous'),
+          ('aliti', 'al'), ('iviti', 'ive'), ('biliti', 'ble'), ('logi', 'log'))
+_STEP3 = (('icate', 'ic'), ('ative', ''), ('alize', 'al'), ('iciti', 'ic'), ('ical', 'ic'),
+          ('ful', ''), ('ness', ''))
+_STEP4 = ('al', 'ance', 'ence', 'er', 'ic', 'able', 'ible', 'ant', 'ement', 'ment', 'ent',
+          'ion', 'ou', 'ism', 'ate', 'iti', 'ous', 'ive', 'ize')
+
+
+def _replace(word: str, rules, min_measure: int) -> str:
+    """Apply the rule with the longest matching suffix, if its stem is long enough."""
+    for suffix, replacement in sorted(rules, key=lambda rule: -len(rule[0])):
+        if word.endswith(suffix):
+            base = word[:-len(suffix)]
+            return base + replacement if _measure(base) > min_measure else word
+    return word
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Porter stem of a lowercase word."""
+    if len(word) <= 2 or not word.isalpha():
+        return word
+    # Step 1a: plurals
+    if word.endswith('sses') or word.endswith('ies'):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+    # Step 1b: -eed, -ed, -ing
+    if word.endswith('eed'):
+        if _measure(word[:-3]) > 0:
+            word = word[:-1]
+    else:
+        for suffix in ('ed', 'ing'):
+            if word.endswith(suffix) and _has_vowel(word[:-len(suffix)]):
+                word = word[:-len(suffix)]
+                if word.endswith(('at', 'bl', 'iz')):
+                    word += 'e'
+                elif _double_consonant(word) and word[-1] not in 'lsz':
+                    word = word[:-1]
+                elif _measure(word) == 1 and _cvc(word):
+                    word += 'e'
+                break
+    # Step 1c: y -> i
+    if word.endswith('y') and _has_vowel(word[:-1]):
+        word = word[:-1] + 'i'
+    word = _replace(word, _STEP2, 0)
+    word = _replace(word, _STEP3, 0)
+    # Step 4: drop derivational suffixes from long stems
+    for suffix in sorted(_STEP4, key=len, reverse=True):
+        if word.endswith(suffix):
+            base = word[:-len(suffix)]
+            if _measure(base) > 1 and (suffix != 'ion' or base.endswith(('s', 't'))):
+                word = base
+            break
+    # Step 5: final -e and -ll
+    if word.endswith('e'):
+        base = word[:-1]
+        if _measure(base) > 1 or (_measure(base) == 1 and not _cvc(base)):
+            word = base
+    if _measure(word) > 1 and _double_consonant(word) and word.endswith('l'):
+        word = word[:-1]
+    return word
+
+
+class InvertedIndex:
+    """BM25-ranked inverted index over weighted text fields.
+
+    A document's term frequency and length are the field-weighted sums over
+    its fields, so a term in the title counts twice by default (BM25F-style).
+    """
+
+    def __init__(self, fields: Mapping[str, float] = None, k1: float = 1.2, b: float = 0.75):
+        self.fields = dict(fields or PLACE_FIELDS)
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Any, float]] = {}
+        self._lengths: Dict[Any, float] = {}
+        self._doc_terms: Dict[Any, Tuple[str, ...]] = {}
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self._lengths
+
+    def add(self, doc_id, document: Any) -> None:
+        """Index the fields of document (a mapping or an object with the field attributes)."""
+        self.remove(doc_id)
+        frequencies: Dict[str, float] = {}
+        length = 0.0
+        for field, weight in self.fields.items():
+            value = document.get(field) if isinstance(document, Mapping) else getattr(document, field, None)
+            for term in analyze(value):
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+                length += weight
+        for term, frequency in frequencies.items():
+            self._postings.setdefault(term, {})[doc_id] = frequency
+        self._doc_terms[doc_id] = tuple(frequencies)
+        self._lengths[doc_id] = length
+        self._total_length += length
+
+    def remove(self, doc_id) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Hit]:
+        """(score, doc id) of the best matches for any query term, best first."""
+        terms = set(analyze(query))
+        count = len(self._lengths)
+        if not terms or not count:
+            return []
+        avg_length = self._total_length / count or 1.0
+        k1, b, lengths = self.k1, self.b, self._lengths
+        norm = k1 * (1 - b)
+        scale = k1 * b / avg_length
+        scores: Dict[Any, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            gain = idf * (k1 + 1)
+            get = scores.get
+            for doc_id, frequency in postings.items():
+                scores[doc_id] = get(doc_id, 0.0) + gain * frequency / (
+                    frequency + norm + scale * lengths[doc_id])
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(score, doc_id) for doc_id, score in best]
+
+
+def search_request(args) -> Tuple[str, int]:
+    """Read ?q=&limit= from request args. Raises ValueError."""
+    query = (args.get('q') or '').strip()
+    if not query:
+        raise ValueError("Search term is required")
+    try:
+        limit = int(args.get('limit', DEFAULT_SEARCH_LIMIT))
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if limit < 1 or limit > MAX_SEARCH_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_SEARCH_LIMIT}")
+    return query, limit
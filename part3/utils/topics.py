@@ -0,0 +1,65 @@
+"""Topics of the real-time updates, shared by the API and the WebSocket server.
+
+A WebSocket client subscribes to the topics it watches; today that is
+place:<place id>, which carries the changes of the place and of its reviews.
+
+The API processes announce committed changes on the Redis pub/sub channel
+CHANGES_CHANNEL (app.persistence.change_events), one JSON message per
+change: {'type': 'review_created', 'topic': 'place:<id>', 'data': {...}}.
+The in-memory facades (services/) publish the same events through their
+change_publisher. Every WebSocket server relays each message as is to its
+own subscribers of the topic, so a change costs one message per server and
+one queued send per subscriber.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+CHANGES_CHANNEL = 'hbnb:changes'
+TOPIC_KINDS = ('place',)
+MAX_TOPIC_LENGTH = 64
+
+
+def place_topic(place_id: str) -> str:
+    return f'place:{place_id}'
+
+
+def is_topic(name: Any) -> bool:
+    """Whether a client may subscribe to name: <kind>:<id> with a known kind."""
+    if not isinstance(name, str) or len(name) > MAX_TOPIC_LENGTH:
+        return False
+    kind, _, key = name.partition(':')
+    return kind in TOPIC_KINDS and bool(key)
+
+
+def change_event(kind: str, topic: str, data: Dict[str, Any]) -> str:
+    return json.dumps({'type': kind, 'topic': topic, 'data': data}, default=str)
+
+
+def event_topic(message: str) -> Optional[str]:
+    """Topic of an encoded change event, None if it is malformed."""
+    try:
+        topic = json.loads(message).get('topic')
+    except (ValueError, AttributeError):
+        return None
+    return topic if is_topic(topic) else None
+
+
+class RedisPublisher:
+    """PUBLISH of a batch of change events on CHANGES_CHANNEL, in one round trip."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def __call__(self, events: List[str]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for message in events:
+            pipe.publish(CHANGES_CHANNEL, message)
+        pipe.execute()
+
+
+def redis_publisher(redis_url: Optional[str]) -> Optional[RedisPublisher]:
+    """Publisher on the Redis at redis_url (CHANGE_EVENTS_REDIS_URL), None if unset."""
+    if not redis_url:
+        return None
+    import redis
+    return RedisPublisher(redis.Redis.from_url(redis_url))
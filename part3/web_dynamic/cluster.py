@@ -0,0 +1,223 @@
+#!/usr/bin/python3
+"""
+Cluster mode for the WebSocket server: several nodes behind one broker
+
+Each node (server process) subscribes to its own channel, ws:node:<id>, and
+to ws:broadcast. A presence map in the broker records where each user is
+connected: one hash per user, ws:presence:<user id>, of node id -> number of
+that user's connections on the node.
+
+- send_to_user queues the message on the local connections, reads the
+  user's presence hash and publishes once to each other node listed there;
+  that node queues it on its own connections. A node that no longer
+  receives (PUBLISH reached nobody: it stopped or crashed) is removed from
+  the hash on the way.
+- broadcast queues locally and publishes once on ws:broadcast: every other
+  node does its own local fan-out, so a broadcast costs one message per
+  node whatever the number of sockets. A topic publish goes the same way,
+  each node queueing it on its own subscribers of the topic.
+
+The broker is RedisBroker (redis.asyncio) in production. InProcessBroker
+implements the same few operations in memory, so a cluster of nodes can run
+in one event loop in tests and benchmarks without a Redis server.
+"""
+import asyncio
+import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+NODE_CHANNEL = 'ws:node:{}'
+BROADCAST_CHANNEL = 'ws:broadcast'
+PRESENCE_KEY = 'ws:presence:{}'
+
+
+def envelope(origin, payload, user_id=None, exclude_user_id=None, topic=None):
+    """Broker message: a JSON header line, then the already encoded payload"""
+    return json.dumps([origin, user_id, exclude_user_id, topic]) + '\n' + payload
+
+
+def open_envelope(message):
+    """(origin, user_id, exclude_user_id, topic, payload) of an envelope"""
+    header, payload = message.split('\n', 1)
+    origin, user_id, exclude_user_id, topic = json.loads(header)
+    return origin, user_id, exclude_user_id, topic, payload
+
+
+class InProcessBroker:
+    """
+    The broker operations of the cluster, in memory, for one event loop
+    """
+
+    def __init__(self):
+        self._subscribers = {}  # channel -> set of queues
+        self._hashes = {}
+
+    async def publish(self, channel, message):
+        queues = self._subscribers.get(channel, ())
+        for queue in queues:
+            queue.put_nowait((channel, message))
+        return len(queues)
+
+    async def subscribe(self, *channels):
+        queue = asyncio.Queue()
+        for channel in channels:
+            self._subscribers.setdefault(channel, set()).add(queue)
+        return _QueueSubscription(self, queue, channels)
+
+    async def hincrby(self, key, field, amount=1):
+        values = self._hashes.setdefault(key, {})
+        values[field] = values.get(field, 0) + amount
+        return values[field]
+
+    async def hdel(self, key, *fields):
+        values = self._hashes.get(key, {})
+        removed = sum(values.pop(field, None) is not None for field in fields)
+        if not values:
+            self._hashes.pop(key, None)
+        return removed
+
+    async def hkeys(self, key):
+        return list(self._hashes.get(key, ()))
+
+
+class _QueueSubscription:
+
+    def __init__(self, broker, queue, channels):
+        self._broker = broker
+        self._queue = queue
+        self._channels = channels
+
+    async def __aiter__(self):
+        while True:
+            yield await self._queue.get()
+
+    async def close(self):
+        for channel in self._channels:
+            self._broker._subscribers.get(channel, set()).discard(self._queue)
+
+
+class RedisBroker:
+    """
+    The broker operations of the cluster on a redis.asyncio client
+    (created with decode_responses=True)
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def publish(self, channel, message):
+        return await self.client.publish(channel, message)
+
+    async def subscribe(self, *channels):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(*channels)
+        return _RedisSubscription(pubsub)
+
+    async def hincrby(self, key, field, amount=1):
+        return await self.client.hincrby(key, field, amount)
+
+    async def hdel(self, key, *fields):
+        return await self.client.hdel(key, *fields)
+
+    async def hkeys(self, key):
+        return await self.client.hkeys(key)
+
+
+class _RedisSubscription:
+
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    async def __aiter__(self):
+        async for message in self._pubsub.listen():
+            if message['type'] == 'message':
+                yield message['channel'], message['data']
+
+    async def close(self):
+        await self._pubsub.unsubscribe()
+        await self._pubsub.aclose()
+
+
+class ClusterNode:
+    """
+    One node of the cluster: routes deliveries for the users of other nodes
+    through the broker and applies the ones published to it on its registry
+    """
+
+    def __init__(self, broker, registry, node_id=None):
+        self.broker = broker
+        self.registry = registry
+        self.node_id = node_id or uuid.uuid4().hex
+        self.channel = NODE_CHANNEL.format(self.node_id)
+        self._subscription = None
+        self._listener = None
+
+    async def start(self):
+        self._subscription = await self.broker.subscribe(self.channel, BROADCAST_CHANNEL)
+        self._listener = asyncio.ensure_future(self._listen())
+        logger.info(f"Cluster node {self.node_id} listening on {self.channel}")
+
+    async def stop(self):
+        """Stop listening and take this node out of the presence map"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            await self._subscription.close()
+            self._listener = self._subscription = None
+        for user_id in list(self.registry.connections):
+            await self.broker.hdel(PRESENCE_KEY.format(user_id), self.node_id)
+
+    async def user_connected(self, user_id):
+        await self.broker.hincrby(PRESENCE_KEY.format(user_id), self.node_id, 1)
+
+    async def user_disconnected(self, user_id):
+        key = PRESENCE_KEY.format(user_id)
+        if await self.broker.hincrby(key, self.node_id, -1) <= 0:
+            await self.broker.hdel(key, self.node_id)
+
+    async def send_to_user(self, user_id, payload):
+        """Queue payload on the user's connections here and publish it to their other nodes"""
+        self.registry.send_to_user(user_id, payload)
+        key = PRESENCE_KEY.format(user_id)
+        message = None
+        for node_id in await self.broker.hkeys(key):
+            if node_id == self.node_id:
+                continue
+            message = message or envelope(self.node_id, payload, user_id)
+            if not await self.broker.publish(NODE_CHANNEL.format(node_id), message):
+                logger.info(f"Node {node_id} is gone, dropping it from the presence of {user_id}")
+                await self.broker.hdel(key, node_id)
+
+    async def broadcast(self, payload, exclude_user_id=None):
+        """Queue payload on the local connections and publish it once for the other nodes"""
+        self.registry.broadcast(payload, exclude_user_id)
+        await self.broker.publish(BROADCAST_CHANNEL,
+                                  envelope(self.node_id, payload, exclude_user_id=exclude_user_id))
+
+    async def publish(self, topic, payload):
+        """Queue payload on the local subscribers of topic and publish it once for the other nodes"""
+        self.registry.publish(topic, payload)
+        await self.broker.publish(BROADCAST_CHANNEL, envelope(self.node_id, payload, topic=topic))
+
+    async def _listen(self):
+        async for channel, message in self._subscription:
+            try:
+                origin, user_id, exclude_user_id, topic, payload = open_envelope(message)
+            except ValueError:
+                logger.warning(f"Malformed cluster message on {channel}")
+                continue
+            if channel == BROADCAST_CHANNEL:
+                # The origin node already delivered its local copy
+                if origin == self.node_id:
+                    continue
+                if topic is not None:
+                    self.registry.publish(topic, payload)
+                else:
+                    self.registry.broadcast(payload, exclude_user_id)
+            elif user_id is not None:
+                self.registry.send_to_user(user_id, payload)
@@ -0,0 +1,188 @@
+#!/usr/bin/python3
+"""
+Outbound queues and fan-out for the WebSocket server
+
+Every connection gets a bounded queue of encoded messages and a writer task
+that drains it into the socket, so sending never awaits a client: a message
+is serialized once (encode) and put on each recipient's queue, and a
+broadcast to 10k sockets is 10k put_nowait() calls in one pass of the event
+loop. The writers then send concurrently, each at its client's pace.
+
+A client that cannot keep up fills its queue. The slow-consumer policy then
+either drops its oldest queued message (DROP, the default: fine for stats,
+typing indicators and notifications that are also kept for offline users)
+or closes the connection (DISCONNECT, code 1013) so that it reconnects and
+resynchronizes.
+
+Connections can also subscribe to topics (place:<id>, see utils.topics):
+the registry indexes topic -> connections, so publishing to a topic costs
+one put_nowait per subscriber, whatever the number of other connections.
+"""
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+DROP = 'drop'
+DISCONNECT = 'disconnect'
+SLOW_CONSUMER_POLICIES = (DROP, DISCONNECT)
+DEFAULT_QUEUE_SIZE = 256
+MAX_TOPICS = 100  # per connection
+SLOW_CONSUMER_CLOSE_CODE = 1013  # Try Again Later
+
+
+def encode(message):
+    """Serialize a message once for all its recipients"""
+    return json.dumps(message)
+
+
+class Outbound:
+    """
+    One connection: its bounded send queue and the writer task draining it
+    """
+
+    def __init__(self, websocket, user_id, queue_size=DEFAULT_QUEUE_SIZE, policy=DROP):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.websocket = websocket
+        self.user_id = user_id
+        self.policy = policy
+        self.queue = asyncio.Queue(queue_size)
+        self.dropped = 0
+        self.closed = False
+        self.topics = set()
+        self._writer = asyncio.ensure_future(self._write())
+
+    def send(self, payload):
+        """Queue an encoded message without waiting; False if it was not queued"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            pass
+        if self.policy == DISCONNECT:
+            logger.warning(f"Disconnecting slow consumer {self.user_id}")
+            asyncio.ensure_future(self.close(SLOW_CONSUMER_CLOSE_CODE, "Slow consumer"))
+            return False
+        # DROP: the oldest message makes room for the newest
+        self.queue.get_nowait()
+        self.queue.task_done()
+        self.queue.put_nowait(payload)
+        self.dropped += 1
+        return True
+
+    async def _write(self):
+        while True:
+            payload = await self.queue.get()
+            try:
+                await self.websocket.send(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.info(f"Send to {self.user_id} failed, stopping its writer: {e}")
+                self.closed = True
+                return
+            finally:
+                self.queue.task_done()
+
+    async def drain(self):
+        """Wait until every queued message has been handed to the socket"""
+        if not self._writer.done():
+            await self.queue.join()
+
+    async def close(self, code=None, reason=''):
+        """Stop the writer (dropping what is queued) and optionally close the socket"""
+        if self.closed and self._writer.done():
+            return
+        self.closed = True
+        self._writer.cancel()
+        try:
+            await self._writer
+        except (asyncio.CancelledError, Exception):
+            pass
+        if code is not None:
+            try:
+                await self.websocket.close(code, reason)
+            except Exception as e:
+                logger.info(f"Close of {self.user_id} failed: {e}")
+
+
+class ConnectionRegistry:
+    """
+    Connections by user id, with their outbound queues
+    """
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE, policy=DROP):
+        self.queue_size = queue_size
+        self.policy = policy
+        self.connections = {}  # user_id -> set of websockets
+        self.outbound = {}  # websocket -> Outbound
+        self.topics = {}  # topic -> set of websockets
+
+    def __len__(self):
+        return len(self.outbound)
+
+    def add(self, websocket, user_id):
+        outbound = Outbound(websocket, user_id, self.queue_size, self.policy)
+        self.outbound[websocket] = outbound
+        self.connections.setdefault(user_id, set()).add(websocket)
+        return outbound
+
+    async def remove(self, websocket):
+        outbound = self.outbound.pop(websocket, None)
+        if outbound is None:
+            return
+        sockets = self.connections.get(outbound.user_id)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self.connections[outbound.user_id]
+        for topic in outbound.topics:
+            self._discard(topic, websocket)
+        await outbound.close()
+
+    def send(self, websocket, payload):
+        """Queue an encoded message for one connection"""
+        outbound = self.outbound.get(websocket)
+        return outbound.send(payload) if outbound else False
+
+    def send_to_user(self, user_id, payload):
+        """Queue an encoded message on every connection of user_id; returns how many took it"""
+        return sum(self.outbound[websocket].send(payload)
+                   for websocket in self.connections.get(user_id, ()))
+
+    def broadcast(self, payload, exclude_user_id=None):
+        """Queue an encoded message on every connection; returns how many took it"""
+        return sum(outbound.send(payload) for outbound in self.outbound.values()
+                   if outbound.user_id != exclude_user_id)
+
+    def subscribe(self, websocket, topic):
+        """Add a connection to a topic; False if unknown or at MAX_TOPICS"""
+        outbound = self.outbound.get(websocket)
+        if outbound is None or (topic not in outbound.topics and len(outbound.topics) >= MAX_TOPICS):
+            return False
+        outbound.topics.add(topic)
+        self.topics.setdefault(topic, set()).add(websocket)
+        return True
+
+    def unsubscribe(self, websocket, topic):
+        outbound = self.outbound.get(websocket)
+        if outbound is None or topic not in outbound.topics:
+            return False
+        outbound.topics.discard(topic)
+        self._discard(topic, websocket)
+        return True
+
+    def _discard(self, topic, websocket):
+        sockets = self.topics.get(topic)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self.topics[topic]
+
+    def publish(self, topic, payload):
+        """Queue an encoded message on the subscribers of topic; returns how many took it"""
+        return sum(self.outbound[websocket].send(payload) for websocket in self.topics.get(topic, ()))
@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+"""
+Pending notifications of the WebSocket server, kept in Redis for offline users
+
+The store runs on a redis.asyncio client, so a round trip to Redis suspends
+the calling coroutine instead of blocking the event loop (and every other
+socket with it). The clients share one BlockingConnectionPool: thousands of
+concurrent handlers queue for WS_REDIS_POOL_SIZE connections instead of each
+opening its own.
+
+Each operation is one round trip, a MULTI/EXEC pipeline:
+- push: LPUSH + LTRIM, so the list never holds more than MAX_PENDING;
+- take: LRANGE + DEL, an atomic fetch-and-clear; a notification pushed
+  meanwhile is either in this batch or left for the next connection, never
+  deleted unread as it could be between a separate LRANGE and DEL.
+"""
+import json
+import logging
+import os
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REDIS_URL = 'redis://localhost:6379/1'
+DEFAULT_POOL_SIZE = 50
+POOL_TIMEOUT = 5  # seconds a command waits for a free connection
+NOTIFICATIONS_KEY = 'notifications:{}'
+MAX_PENDING = 100
+
+
+def redis_client(url=None, pool_size=None):
+    """redis.asyncio client on a bounded pool (WS_REDIS_URL, WS_REDIS_POOL_SIZE); connects lazily"""
+    pool = aioredis.BlockingConnectionPool.from_url(
+        url or os.environ.get('WS_REDIS_URL', DEFAULT_REDIS_URL),
+        max_connections=int(pool_size or os.environ.get('WS_REDIS_POOL_SIZE', DEFAULT_POOL_SIZE)),
+        timeout=POOL_TIMEOUT,
+        decode_responses=True
+    )
+    return aioredis.Redis(connection_pool=pool)
+
+
+class NotificationStore:
+    """
+    Notifications waiting for a user, newest first, MAX_PENDING at most
+    """
+
+    def __init__(self, client, max_pending=MAX_PENDING):
+        self.client = client
+        self.max_pending = max_pending
+
+    async def push(self, user_id, notification):
+        key = NOTIFICATIONS_KEY.format(user_id)
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.lpush(key, json.dumps(notification))
+                pipe.ltrim(key, 0, self.max_pending - 1)
+                await pipe.execute()
+        except RedisError as e:
+            logger.error(f"Storing notification for {user_id} failed: {e}")
+
+    async def take(self, user_id):
+        """Fetch and clear the user's notifications in one atomic round trip"""
+        key = NOTIFICATIONS_KEY.format(user_id)
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.lrange(key, 0, -1)
+                pipe.delete(key)
+                notifications, _ = await pipe.execute()
+        except RedisError as e:
+            logger.error(f"Fetching notifications of {user_id} failed: {e}")
+            return []
+        return [json.loads(n) for n in notifications]
@@ -3,6 +3,7 @@
 Enhanced WebSocket handler for real-time features in HBNB
 """
 import asyncio
+import os
 import websockets
 import json
 import jwt
@@ -10,9 +11,15 @@ from datetime import datetime
 from functools import wraps
 from models import storage
 from models.user import User
-import redis
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
 import logging
 
+from utils.topics import CHANGES_CHANNEL, event_topic, is_topic
+from web_dynamic.cluster import ClusterNode, RedisBroker
+from web_dynamic.connections import DEFAULT_QUEUE_SIZE, DROP, ConnectionRegistry, encode
+from web_dynamic.notifications import NotificationStore, redis_client
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
@@ -20,30 +27,49 @@ logger = logging.getLogger(__name__)
 class WebSocketManager:
     """
     Manages WebSocket connections for real-time features
+
+    Messages are serialized once and queued on each recipient connection;
+    per-connection writer tasks do the sends (see web_dynamic.connections).
+    slow_consumer is DROP (oldest queued message) or DISCONNECT.
+
+    With a broker, the manager is one node of a cluster (see
+    web_dynamic.cluster): users connected to other nodes are reached through
+    their node's channel and broadcasts go once to every node.
+
+    Clients receive place and review changes by subscribing to topics
+    (place:<id>, see utils.topics); relay_changes delivers the change events
+    published by the API to the subscribers on this node.
     """
     
-    def __init__(self):
-        self.connections = {}
-        self.redis_pubsub = None
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE, slow_consumer=DROP, broker=None, node_id=None):
+        self.registry = ConnectionRegistry(queue_size, slow_consumer)
+        self.connections = self.registry.connections
+        self.cluster = ClusterNode(broker, self.registry, node_id) if broker else None
         self.redis_client = None
+        self.notifications = None
         self.setup_redis()
     
     def setup_redis(self):
-        """Setup Redis for pub/sub"""
+        """Setup the asyncio Redis client and its pool (no I/O until first use)"""
+        self.redis_client = redis_client()
+        self.notifications = NotificationStore(self.redis_client)
+    
+    async def start(self):
+        """Check Redis and join the cluster, if any"""
         try:
-            self.redis_client = redis.Redis(
-                host='localhost',
-                port=6379,
-                db=1,
-                decode_responses=True
-            )
-            
-            # Test connection
-            self.redis_client.ping()
-            logger.info("Redis connected for WebSocket pub/sub")
-        except Exception as e:
+            await self.redis_client.ping()
+            logger.info("Redis connected for WebSocket notifications")
+        except RedisError as e:
             logger.error(f"Redis connection failed: {e}")
-            self.redis_client = None
+            self.notifications = None
+        if self.cluster:
+            await self.cluster.start()
+    
+    async def stop(self):
+        """Leave the cluster, if any, and close the Redis pool"""
+        if self.cluster:
+            await self.cluster.stop()
+        await self.redis_client.aclose()
     
     def authenticate_token(self, token):
         """Authenticate WebSocket connection token"""
@@ -64,11 +90,10 @@ class WebSocketManager:
             return None
     
     async def register(self, websocket, user_id):
-        """Register a new WebSocket connection"""
-        if user_id not in self.connections:
-            self.connections[user_id] = set()
-        
-        self.connections[user_id].add(websocket)
+        """Register a new WebSocket connection and start its writer"""
+        self.registry.add(websocket, user_id)
+        if self.cluster:
+            await self.cluster.user_connected(user_id)
         logger.info(f"User {user_id} connected. Total connections: {len(self.connections)}")
         
         # Send welcome message
@@ -78,37 +103,48 @@ class WebSocketManager:
             'timestamp': datetime.utcnow().isoformat(),
             'user_count': len(self.connections)
         }
-        await websocket.send(json.dumps(welcome_msg))
+        self.send_to_connection(websocket, welcome_msg)
     
     async def unregister(self, websocket, user_id):
-        """Unregister a WebSocket connection"""
-        if user_id in self.connections:
-            self.connections[user_id].discard(websocket)
-            if not self.connections[user_id]:
-                del self.connections[user_id]
+        """Unregister a WebSocket connection and stop its writer"""
+        await self.registry.remove(websocket)
+        if self.cluster:
+            await self.cluster.user_disconnected(user_id)
         
         logger.info(f"User {user_id} disconnected. Total connections: {len(self.connections)}")
     
+    def send_to_connection(self, websocket, message):
+        """Queue a message for one connection, behind what it already has queued"""
+        return self.registry.send(websocket, encode(message))
+    
     async def send_to_user(self, user_id, message):
-        """Send message to specific user"""
-        if user_id in self.connections:
-            for websocket in self.connections[user_id]:
-                try:
-                    await websocket.send(json.dumps(message))
-                except websockets.exceptions.ConnectionClosed:
-                    logger.warning(f"Connection closed for user {user_id}")
+        """Send message to specific user (queued on each of their connections, on any node)"""
+        if self.cluster:
+            return await self.cluster.send_to_user(user_id, encode(message))
+        return self.registry.send_to_user(user_id, encode(message))
     
     async def broadcast(self, message, exclude_user_id=None):
-        """Broadcast message to all connected users"""
-        for user_id, connections in self.connections.items():
-            if user_id == exclude_user_id:
-                continue
-            
-            for websocket in connections:
-                try:
-                    await websocket.send(json.dumps(message))
-                except websockets.exceptions.ConnectionClosed:
-                    logger.warning(f"Connection closed during broadcast for user {user_id}")
+        """Broadcast message to all connected users: one serialization, one pass"""
+        if self.cluster:
+            return await self.cluster.broadcast(encode(message), exclude_user_id)
+        return self.registry.broadcast(encode(message), exclude_user_id)
+    
+    async def publish(self, topic, message):
+        """Send message to the subscribers of topic only (on every node)"""
+        if self.cluster:
+            return await self.cluster.publish(topic, encode(message))
+        return self.registry.publish(topic, encode(message))
+    
+    async def relay_changes(self):
+        """Deliver the change events of the API to this node's subscribers, as published"""
+        subscription = await RedisBroker(self.redis_client).subscribe(CHANGES_CHANNEL)
+        try:
+            async for _, message in subscription:
+                topic = event_topic(message)
+                if topic:
+                    self.registry.publish(topic, message)
+        finally:
+            await subscription.close()
     
     async def handle_message(self, websocket, user, message):
         """Handle incoming WebSocket messages"""
@@ -124,6 +160,10 @@ class WebSocketManager:
                 await self.handle_notification_ack(user, data)
             elif msg_type == 'typing':
                 await self.handle_typing_indicator(user, data)
+            elif msg_type == 'subscribe':
+                self.handle_subscribe(websocket, data)
+            elif msg_type == 'unsubscribe':
+                self.handle_unsubscribe(websocket, data)
             else:
                 logger.warning(f"Unknown message type: {msg_type}")
         
@@ -133,7 +173,23 @@ class WebSocketManager:
                 'type': 'error',
                 'message': 'Invalid JSON format'
             }
-            await websocket.send(json.dumps(error_msg))
+            self.send_to_connection(websocket, error_msg)
+    
+    def handle_subscribe(self, websocket, data):
+        """Start receiving the updates of a topic, e.g. place:<id>"""
+        topic = data.get('topic')
+        if not is_topic(topic):
+            self.send_to_connection(websocket, {'type': 'error', 'message': 'Unknown topic'})
+        elif not self.registry.subscribe(websocket, topic):
+            self.send_to_connection(websocket, {'type': 'error', 'message': 'Too many subscriptions'})
+        else:
+            self.send_to_connection(websocket, {'type': 'subscribed', 'topic': topic})
+    
+    def handle_unsubscribe(self, websocket, data):
+        """Stop receiving the updates of a topic"""
+        topic = data.get('topic')
+        self.registry.unsubscribe(websocket, topic)
+        self.send_to_connection(websocket, {'type': 'unsubscribed', 'topic': topic})
     
     async def handle_chat_message(self, sender, data):
         """Handle chat messages between users"""
@@ -223,28 +279,27 @@ class WebSocketManager:
         
         await self.send_to_user(user_id, notification)
         
-        # Store notification in Redis for offline users
-        if self.redis_client:
-            key = f"notifications:{user_id}"
-            self.redis_client.lpush(key, json.dumps(notification))
-            self.redis_client.ltrim(key, 0, 99)  # Keep last 100 notifications
+        # Store notification in Redis for offline users (last 100)
+        if self.notifications:
+            await self.notifications.push(user_id, notification)
     
     async def get_pending_notifications(self, user_id):
-        """Get pending notifications for user"""
-        if not self.redis_client:
+        """Get and clear pending notifications for user, atomically"""
+        if not self.notifications:
             return []
-        
-        key = f"notifications:{user_id}"
-        notifications = self.redis_client.lrange(key, 0, -1)
-        
-        # Clear notifications after sending
-        self.redis_client.delete(key)
-        
-        return [json.loads(n) for n in notifications]
+        return await self.notifications.take(user_id)
+
+
+def cluster_broker():
+    """Broker of the cluster on WS_CLUSTER_REDIS_URL, None for a single node"""
+    url = os.environ.get('WS_CLUSTER_REDIS_URL')
+    if not url:
+        return None
+    return RedisBroker(aioredis.Redis.from_url(url, decode_responses=True))
 
 
 # Global WebSocket manager instance
-ws_manager = WebSocketManager()
+ws_manager = WebSocketManager(broker=cluster_broker(), node_id=os.environ.get('WS_NODE_ID'))
 
 
 async def websocket_handler(websocket, path):
@@ -276,7 +331,7 @@ async def websocket_handler(websocket, path):
         # Send pending notifications
         pending_notifications = await ws_manager.get_pending_notifications(user_id)
         for notification in pending_notifications:
-            await websocket.send(json.dumps(notification))
+            ws_manager.send_to_connection(websocket, notification)
         
         # Main message loop
         async for message in websocket:
@@ -292,7 +347,7 @@ async def websocket_handler(websocket, path):
 
 
 async def periodic_broadcast():
-    """Periodic broadcast of system stats"""
+    """Periodic broadcast of system stats (every node sends its own to its own clients)"""
     while True:
         await asyncio.sleep(60)  # Every minute
         
@@ -303,24 +358,38 @@ async def periodic_broadcast():
             'total_connections': sum(len(conns) for conns in ws_manager.connections.values())
         }
         
-        await ws_manager.broadcast(stats_message)
+        ws_manager.registry.broadcast(encode(stats_message))
+
+
+async def relay_change_events():
+    """Relay place / review change events to topic subscribers, reconnecting on Redis errors"""
+    while True:
+        try:
+            await ws_manager.relay_changes()
+        except RedisError as e:
+            logger.error(f"Change events relay failed, retrying: {e}")
+            await asyncio.sleep(5)
 
 
-def start_websocket_server():
-    """Start WebSocket server"""
+def start_websocket_server(host=None, port=None):
+    """Start WebSocket server (WS_HOST / WS_PORT, e.g. one port per local cluster node)"""
+    host = host or os.environ.get('WS_HOST', 'localhost')
+    port = int(port or os.environ.get('WS_PORT', 8765))
     start_server = websockets.serve(
         websocket_handler,
-        "localhost",
-        8765,
+        host,
+        port,
         ping_interval=20,
         ping_timeout=10,
         max_size=2**20  # 1MB max message size
     )
     
-    logger.info("Starting WebSocket server on ws://localhost:8765")
+    logger.info(f"Starting WebSocket server on ws://{host}:{port}")
     
-    # Start periodic broadcast task
+    # Join the cluster and start periodic broadcast and change relay tasks
+    asyncio.get_event_loop().create_task(ws_manager.start())
     asyncio.get_event_loop().create_task(periodic_broadcast())
+    asyncio.get_event_loop().create_task(relay_change_events())
     
     return start_server
 